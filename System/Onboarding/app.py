@@ -1,21 +1,30 @@
 import csv
 import hashlib
+import heapq
+import itertools
 import json
 import math
 import os
 import random
 import sys
-import urllib.error
-import urllib.request
-from dataclasses import dataclass
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from PIL import Image, ImageDraw, ImageFont
 
+try:
+    import numpy as np
+except ImportError:  # select_team scores candidates in pure Python without it
+    np = None
+
 # Add lib to path for API manager access
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from lib.api_manager import APIManager, BatchRequest
+
 
 CULTURE_MODES = [
     "friendly_safe",
@@ -117,6 +126,7 @@ class SelectionConfig:
     ceo_originality: str
     rng: random.Random
     seed_label: str
+    search_mode: str = "beam"
 
 
 @dataclass
@@ -126,13 +136,14 @@ class Assignment:
     breakdown: Dict[str, Dict[str, float]]
     notes: Dict[str, str]
     image_prompts: Dict[str, str]
-    image_prompts: Dict[str, str]
     backstories: Dict[str, str]
     image_paths: Dict[str, str]
+    team: Optional["TeamState"] = None  # Running score terms, set by select_team
 
 
 RANDOMNESS_LEVELS = ["low", "medium", "high"]
 CEO_ORIGINALITY_LEVELS = ["subtle", "balanced", "bold"]
+SEARCH_MODES = ["beam", "exact", "multi-seed"]
 
 CULTURE_CARDS = [
     CultureCard(
@@ -1436,7 +1447,294 @@ def score_assignment(
     return total, breakdown
 
 
-def select_team(
+# ---------- Compiled team scoring ----------
+
+# score_assignment() recomputes every pair and team-wide term for each
+# candidate team. select_team() instead scores all of a role's candidates
+# against a partial team at once, from the library compiled into columns.
+
+MBTI_TYPES = [e + n + t + j for e in "EI" for n in "NS" for t in "TF" for j in "JP"]
+MBTI_INDEX = {mbti: index for index, mbti in enumerate(MBTI_TYPES)}
+MBTI_COMPATIBILITY = [[mbti_compatibility(a, b) for b in MBTI_TYPES] for a in MBTI_TYPES]
+# Indexed by enneagram core - 1
+ENNEAGRAM_COMPATIBILITY = [[enneagram_compatibility(a, b) for b in range(1, 10)] for a in range(1, 10)]
+
+# Tag bitsets: one bit per coverage group, then one per conflict tag
+COVERAGE_GROUPS = [INTEGRATOR_TAGS, OPERATOR_TAGS, GOVERNANCE_TAGS, INNOVATOR_TAGS]
+CONFLICT_TAGS = ["direct", "conflict-forward", "intense"]
+COVERAGE_MASK = (1 << len(COVERAGE_GROUPS)) - 1
+# coverage_bonus() for each combination of covered groups
+COVERAGE_BONUS = [
+    sum(0.2 if bits >> group & 1 else -0.4 for group in range(len(COVERAGE_GROUPS)))
+    for bits in range(1 << len(COVERAGE_GROUPS))
+]
+
+
+def tag_bits(tags: Tuple[str, ...]) -> int:
+    bits = 0
+    for group, group_tags in enumerate(COVERAGE_GROUPS):
+        if group_tags.intersection(tags):
+            bits |= 1 << group
+    for offset, tag in enumerate(CONFLICT_TAGS):
+        if tag in tags:
+            bits |= 1 << (len(COVERAGE_GROUPS) + offset)
+    return bits
+
+
+def conflict_table(culture: CultureProfile) -> List[float]:
+    """construct_conflict_adjustment() for one pair, by the conflict tags either member has."""
+    bonus_multiplier = {"low": 0.5, "medium": 1.0, "high": 1.4}[culture.conflict_emphasis]
+    penalty_multiplier = {"low": 1.4, "medium": 1.0, "high": 0.7}[culture.conflict_emphasis]
+    table = []
+    for flags in range(1 << len(CONFLICT_TAGS)):
+        direct, conflict_forward, intense = (bool(flags >> offset & 1) for offset in range(3))
+        adjust = 0.0
+        if culture.tolerance_for_conflict == "high" and direct:
+            adjust += 0.05 * bonus_multiplier
+        if culture.tolerance_for_conflict == "low" and conflict_forward:
+            adjust -= 0.2 * penalty_multiplier
+        if culture.tolerance_for_burnout == "low" and intense:
+            adjust -= 0.15 * penalty_multiplier
+        table.append(adjust)
+    return table
+
+
+@dataclass(frozen=True)
+class RoleColumns:
+    bundles: Tuple[PersonaBundle, ...]
+    mbti: List[int]
+    enneagram: List[int]
+    tags: List[int]
+    culture_fit: Dict[str, List[float]]
+    positions: Dict[int, int]  # id(bundle) -> column position
+
+
+def compile_persona_library(library: Dict[str, List[PersonaBundle]]) -> Dict[str, RoleColumns]:
+    compiled = {}
+    for role, bundles in library.items():
+        compiled[role] = RoleColumns(
+            bundles=tuple(bundles),
+            mbti=[MBTI_INDEX[bundle.mbti] for bundle in bundles],
+            enneagram=[bundle.enneagram_core - 1 for bundle in bundles],
+            tags=[tag_bits(bundle.trait_tags) for bundle in bundles],
+            culture_fit={
+                mode: [bundle.culture_fit_vector.get(mode, 0.0) for bundle in bundles]
+                for mode in CULTURE_MODES
+            },
+            positions={id(bundle): position for position, bundle in enumerate(bundles)},
+        )
+    return compiled
+
+
+class TeamScorer:
+    """
+    Scores candidates for one role against a partial team.
+
+    Totals equal score_assignment() for the extended team, up to float
+    rounding. Per-member terms (role fit, culture fit, CEO match) are
+    precomputed per candidate; pair terms come from the compatibility
+    matrices and the conflict table, weighted by the team's TeamState
+    histograms; diversity and coverage from the histograms and tag bits.
+    With NumPy installed a role's candidates are scored as one batch.
+    """
+
+    def __init__(
+        self,
+        library: Dict[str, List[PersonaBundle]],
+        culture: CultureProfile,
+        human: HumanProfile,
+        vibe: VibeProfile,
+        human_position: str,
+        ceo_originality: str,
+    ) -> None:
+        self.columns = compile_persona_library(library)
+        self.conflict = conflict_table(culture)
+        self.member_scores: Dict[str, List[float]] = {}
+        for role, columns in self.columns.items():
+            scores = []
+            for bundle, culture_fit in zip(columns.bundles, columns.culture_fit[culture.culture_mode]):
+                score = bundle.role_fit_weight + culture_fit
+                if role == "CEO":
+                    match_ok, vibe_score = ceo_vibe_match_score(bundle, vibe)
+                    score += vibe_score if match_ok else vibe_score - 2.0
+                    compatibility = human_ceo_compatibility(human, bundle)
+                    score += compatibility * 2.5 + ceo_originality_bonus(compatibility, ceo_originality)
+                    if human_position == "Chairman":
+                        score += compatibility * 1.5
+                scores.append(score)
+            self.member_scores[role] = scores
+
+        self._arrays: Dict[str, Dict[str, "np.ndarray"]] = {}
+        self._stacks: Dict[Tuple[str, ...], Dict[str, "np.ndarray"]] = {}  # stacked_gains() inputs
+        if np is not None:
+            self._mbti_matrix = np.array(MBTI_COMPATIBILITY)
+            self._enneagram_matrix = np.array(ENNEAGRAM_COMPATIBILITY)
+            self._coverage = np.array(COVERAGE_BONUS)
+            # Conflict term of a pair, by each member's conflict-tag bits
+            self._conflict_pairs = np.array(
+                [[self.conflict[a | b] for b in range(len(self.conflict))] for a in range(len(self.conflict))]
+            )
+            for role, columns in self.columns.items():
+                self._arrays[role] = {
+                    "mbti": np.array(columns.mbti, dtype=np.intp),
+                    "enneagram": np.array(columns.enneagram, dtype=np.intp),
+                    "tags": np.array(columns.tags, dtype=np.intp),
+                    "member_scores": np.array(self.member_scores[role]),
+                }
+
+    def team_state(self, team: Dict[str, PersonaBundle]) -> "TeamState":
+        """The TeamState of a team built from the library, one member at a time."""
+        state = TeamState()
+        for role, bundle in team.items():
+            state = self.extend(state, role, self.columns[role].positions[id(bundle)])
+        return state
+
+    def pair_potential(self, role: str, other_role: str, others: List[int]) -> List[float]:
+        """Each of role's candidates' best pair and conflict terms with other_role's candidates at others."""
+        columns, other_columns = self.columns[role], self.columns[other_role]
+        shift = len(COVERAGE_GROUPS)
+        partners = {
+            (other_columns.mbti[position], other_columns.enneagram[position], other_columns.tags[position] >> shift)
+            for position in others
+        }
+        return [
+            max(
+                0.4 * (MBTI_COMPATIBILITY[mbti][other_mbti] + ENNEAGRAM_COMPATIBILITY[enneagram][other_enneagram])
+                + self.conflict[flags >> shift | other_flags]
+                for other_mbti, other_enneagram, other_flags in partners
+            )
+            for mbti, enneagram, flags in zip(columns.mbti, columns.enneagram, columns.tags)
+        ]
+
+    def _additions(self, team: "TeamState", role: str, position: int) -> Tuple[float, float]:
+        """Pair and conflict terms between one candidate and the team's members."""
+        columns = self.columns[role]
+        c_mbti, c_enneagram = columns.mbti[position], columns.enneagram[position]
+        c_conflict = columns.tags[position] >> len(COVERAGE_GROUPS)
+        pair = 0.0
+        for mbti, count in team.mbti_present:
+            pair += count * MBTI_COMPATIBILITY[mbti][c_mbti]
+        for enneagram, count in team.enneagram_present:
+            pair += count * ENNEAGRAM_COMPATIBILITY[enneagram][c_enneagram]
+        conflict = 0.0
+        for flags, count in team.conflict_present:
+            conflict += count * self.conflict[flags | c_conflict]
+        return pair, conflict
+
+    def extend(self, team: "TeamState", role: str, position: int) -> "TeamState":
+        """The team with role's candidate at position added."""
+        columns = self.columns[role]
+        pair, conflict = self._additions(team, role, position)
+        return TeamState(
+            size=team.size + 1,
+            member_sum=team.member_sum + self.member_scores[role][position],
+            pair_sum=team.pair_sum + pair,
+            conflict_sum=team.conflict_sum + conflict,
+            mbti_present=_add_count(team.mbti_present, columns.mbti[position]),
+            enneagram_present=_add_count(team.enneagram_present, columns.enneagram[position]),
+            conflict_present=_add_count(team.conflict_present, columns.tags[position] >> len(COVERAGE_GROUPS)),
+            covered=team.covered | columns.tags[position] & COVERAGE_MASK,
+        )
+
+    def score_candidates(self, team: "TeamState", role: str) -> List[float]:
+        """Team score with each of role's candidates added, in library order."""
+        base = team.base_score
+        if np is not None:
+            coverage = self._coverage[team.covered | self._arrays[role]["tags"] & COVERAGE_MASK]
+            return (base + self._gains_batch(team, self._arrays[role]) + coverage).tolist()
+        tags = self.columns[role].tags
+        return [
+            base + gain + COVERAGE_BONUS[team.covered | tags[position] & COVERAGE_MASK]
+            for position, gain in enumerate(self.candidate_gains(team, role))
+        ]
+
+    def candidate_gains(self, team: "TeamState", role: str) -> List[float]:
+        """Each of role's candidates' change to the team's base_score, in library order."""
+        if np is not None:
+            return self._gains_batch(team, self._arrays[role]).tolist()
+
+        columns = self.columns[role]
+        mbti_seen = {mbti for mbti, _ in team.mbti_present}
+        enneagram_seen = {enneagram for enneagram, _ in team.enneagram_present}
+        gains = []
+        for position, member_score in enumerate(self.member_scores[role]):
+            pair, conflict = self._additions(team, role, position)
+            repeats = (columns.mbti[position] in mbti_seen) + (columns.enneagram[position] in enneagram_seen)
+            gains.append(member_score + 0.4 * pair + conflict - 0.2 * repeats)
+        return gains
+
+    def stacked_gains(self, team: "TeamState", roles: Tuple[str, ...]) -> Union[List[float], "np.ndarray"]:
+        """candidate_gains() for several roles, concatenated; an array with NumPy."""
+        if np is None:
+            return [gain for role in roles for gain in self.candidate_gains(team, role)]
+        if roles not in self._stacks:
+            self._stacks[roles] = {
+                key: np.concatenate([self._arrays[role][key] for role in roles]) for key in self._arrays[roles[0]]
+            }
+        return self._gains_batch(team, self._stacks[roles])
+
+    def _gains_batch(self, team: "TeamState", candidates: Dict[str, "np.ndarray"]) -> "np.ndarray":
+        mbti_counts = np.zeros(len(MBTI_TYPES))
+        for mbti, count in team.mbti_present:
+            mbti_counts[mbti] = count
+        enneagram_counts = np.zeros(len(ENNEAGRAM_COMPATIBILITY))
+        for enneagram, count in team.enneagram_present:
+            enneagram_counts[enneagram] = count
+        conflict_counts = np.zeros(len(self.conflict))
+        for flags, count in team.conflict_present:
+            conflict_counts[flags] = count
+
+        pair = (
+            mbti_counts @ self._mbti_matrix[:, candidates["mbti"]]
+            + enneagram_counts @ self._enneagram_matrix[:, candidates["enneagram"]]
+        )
+        conflict = conflict_counts @ self._conflict_pairs[:, candidates["tags"] >> len(COVERAGE_GROUPS)]
+        repeats = (mbti_counts[candidates["mbti"]] > 0).astype(float) + (enneagram_counts[candidates["enneagram"]] > 0)
+        return candidates["member_scores"] + 0.4 * pair + conflict - 0.2 * repeats
+
+
+def _add_count(present: Tuple[Tuple[int, int], ...], value: int) -> Tuple[Tuple[int, int], ...]:
+    for index, (seen, count) in enumerate(present):
+        if seen == value:
+            return present[:index] + ((value, count + 1),) + present[index + 1:]
+    return present + ((value, 1),)
+
+
+@dataclass(frozen=True)
+class TeamState:
+    """
+    Running score terms of a partial team.
+
+    Histograms replace the member list: pair and conflict terms with a new
+    member are summed per MBTI type, Enneagram core and conflict-tag
+    combination present, so TeamScorer.extend() costs O(roles) at most.
+    """
+    size: int = 0
+    member_sum: float = 0.0  # Role fit, culture fit and CEO terms
+    pair_sum: float = 0.0  # MBTI + Enneagram compatibility over member pairs
+    conflict_sum: float = 0.0  # construct_conflict_adjustment() over member pairs
+    mbti_present: Tuple[Tuple[int, int], ...] = ()  # (MBTI index, members)
+    enneagram_present: Tuple[Tuple[int, int], ...] = ()  # (core - 1, members)
+    conflict_present: Tuple[Tuple[int, int], ...] = ()  # (conflict-tag bits, members)
+    covered: int = 0  # Coverage-group bits
+
+    @property
+    def duplicates(self) -> int:
+        """Members sharing an MBTI type or Enneagram core with an earlier member."""
+        return 2 * self.size - len(self.mbti_present) - len(self.enneagram_present)
+
+    @property
+    def base_score(self) -> float:
+        """The score without the coverage bonus, which depends on the whole team."""
+        return self.member_sum + 0.4 * self.pair_sum + self.conflict_sum - 0.2 * self.duplicates
+
+    @property
+    def score(self) -> float:
+        """score_assignment() of the team, up to float rounding."""
+        return self.base_score + COVERAGE_BONUS[self.covered]
+
+
+def select_teams(
     roles: List[str],
     library: Dict[str, List[PersonaBundle]],
     culture: CultureProfile,
@@ -1445,7 +1743,9 @@ def select_team(
     human_position: str,
     selection: Optional[SelectionConfig] = None,
     beam_width: int = 8,
-) -> Assignment:
+    top_k: int = 1,
+) -> List[Assignment]:
+    """The selected team, then up to top_k - 1 alternates from the final beam."""
     if selection is None:
         selection = SelectionConfig(
             randomness_level="low",
@@ -1453,66 +1753,453 @@ def select_team(
             rng=random.Random(0),
             seed_label="default",
         )
+    scorer = TeamScorer(library, culture, human, vibe, human_position, selection.ceo_originality)
+    beam = beam_search(roles, scorer, vibe, selection, beam_width)
+    return finish_assignments(beam[: max(top_k, 1)], culture, human, vibe, human_position, selection.ceo_originality)
+
+
+def beam_search(
+    roles: List[str],
+    scorer: TeamScorer,
+    vibe: VibeProfile,
+    selection: SelectionConfig,
+    beam_width: int = 8,
+) -> List[Assignment]:
+    """
+    The final beam, with the team selection picks moved to the front.
+
+    Entries carry roles, score and TeamState; breakdowns and why-notes are
+    left to finish_assignments() for the teams that are kept.
+    """
     jitter, temperature, pool_size = selection_tuning(selection.randomness_level)
     rng = selection.rng
     beam: List[Assignment] = [
-        Assignment(roles={}, score=0.0, breakdown={}, notes={}, image_prompts={}, backstories={})
+        Assignment(
+            roles={}, score=0.0, breakdown={}, notes={}, image_prompts={}, backstories={}, image_paths={},
+            team=TeamState(),
+        )
     ]
 
     for role in roles:
-        candidates = library.get(role, [])
-        new_beam: List[Assignment] = []
-        for assignment in beam:
-            for candidate in candidates:
-                if role == "CEO":
-                    match_ok, _ = ceo_vibe_match_score(candidate, vibe)
-                    if not match_ok:
-                        continue
-
-                next_roles = dict(assignment.roles)
-                next_roles[role] = candidate
-                total_score, breakdown = score_assignment(
-                    next_roles, culture, human, vibe, human_position, selection.ceo_originality
-                )
-                note = build_why_note(
-                    role,
-                    candidate,
-                    culture,
-                    vibe,
-                    human,
-                    human_position,
-                    selection.ceo_originality,
-                )
-                notes = dict(assignment.notes)
-                notes[role] = note
-                new_beam.append(
-                    Assignment(
-                        roles=next_roles,
-                        score=total_score,
-                        breakdown=breakdown,
-                        notes=notes,
-                        image_prompts=assignment.image_prompts,
-                        backstories=assignment.backstories,
-                    )
-                )
+        candidates = scorer.columns[role].bundles if role in scorer.columns else ()
+        eligible = [
+            (position, candidate)
+            for position, candidate in enumerate(candidates)
+            if role != "CEO" or ceo_vibe_match_score(candidate, vibe)[0]
+        ]
+        # (score, persona_id, beam index, candidate position); survivors become Assignments
+        new_beam: List[Tuple[float, str, int, int]] = []
+        for index, assignment in enumerate(beam):
+            totals = scorer.score_candidates(assignment.team, role) if eligible else []
+            for position, candidate in eligible:
+                new_beam.append((totals[position], candidate.persona_id, index, position))
         if jitter > 0:
             new_beam.sort(
-                key=lambda a: (
-                    a.score + rng.uniform(-jitter, jitter),
-                    a.roles.get(role).persona_id,
-                ),
+                key=lambda entry: (entry[0] + rng.uniform(-jitter, jitter), entry[1]),
                 reverse=True,
             )
         else:
-            new_beam.sort(
-                key=lambda a: (a.score, a.roles.get(role).persona_id), reverse=True
-            )
-        beam = new_beam[:beam_width]
+            # Rounded so float summation order can't break ties between equal teams
+            new_beam.sort(key=lambda entry: (round(entry[0], 9), entry[1]), reverse=True)
+
+        next_beam = []
+        for score, _, index, position in new_beam[:beam_width]:
+            parent = beam[index]
+            next_roles = dict(parent.roles)
+            next_roles[role] = candidates[position]
+            next_beam.append(replace(
+                parent, roles=next_roles, score=score, team=scorer.extend(parent.team, role, position)
+            ))
+        beam = next_beam
 
     if pool_size <= 1 or len(beam) <= 1:
-        return beam[0]
-    pool = beam[: min(pool_size, len(beam))]
-    return softmax_sample(pool, rng, temperature)
+        chosen = beam[0]
+    else:
+        chosen = softmax_sample(beam[: min(pool_size, len(beam))], rng, temperature)
+    return [chosen] + [entry for entry in beam if entry is not chosen]
+
+
+def select_team(
+    roles: List[str],
+    library: Dict[str, List[PersonaBundle]],
+    culture: CultureProfile,
+    human: HumanProfile,
+    vibe: VibeProfile,
+    human_position: str,
+    selection: Optional[SelectionConfig] = None,
+    beam_width: int = 8,
+) -> Assignment:
+    return select_teams(
+        roles, library, culture, human, vibe, human_position, selection=selection, beam_width=beam_width
+    )[0]
+
+
+def finish_assignments(
+    assignments: List[Assignment],
+    culture: CultureProfile,
+    human: HumanProfile,
+    vibe: VibeProfile,
+    human_position: str,
+    ceo_originality: str,
+) -> List[Assignment]:
+    """
+    The searched teams with score breakdowns and why-notes.
+
+    Searches leave these out of the assignments they compare; a persona's
+    note doesn't depend on its teammates, so notes are built once per
+    (role, persona) across the teams.
+    """
+    note_cache: Dict[Tuple[str, str], str] = {}
+
+    def why_note(role: str, candidate: PersonaBundle) -> str:
+        key = (role, candidate.persona_id)
+        if key not in note_cache:
+            note_cache[key] = build_why_note(
+                role, candidate, culture, vibe, human, human_position, ceo_originality
+            )
+        return note_cache[key]
+
+    results = []
+    for assignment in assignments:
+        score, breakdown = score_assignment(
+            assignment.roles, culture, human, vibe, human_position, ceo_originality
+        )
+        notes = {role: why_note(role, candidate) for role, candidate in assignment.roles.items()}
+        results.append(replace(assignment, score=score, breakdown=breakdown, notes=notes))
+    return results
+
+
+# ---------- Exact team search ----------
+
+# select_team() keeps beam_width partial teams per role, so it can drop the
+# partial team that leads to the best one. optimize_team() searches every
+# team depth-first and skips a partial team once an upper bound on any
+# completion can't beat the top_k found so far.
+
+OPTIMIZER_TIME_BUDGET = float(os.getenv("ONBOARDING_OPTIMIZER_SECONDS", "10"))
+SCORE_TOLERANCE = 1e-9  # Bounds within this of the cutoff are ties, not improvements
+
+
+@dataclass
+class TeamSearchResult:
+    teams: List[Assignment]  # Best first
+    upper_bound: float  # No team scores higher
+    gap: float  # upper_bound - teams[0].score; 0.0 when optimal
+    optimal: bool  # The search finished, so teams are the exact top_k
+    nodes: int  # Partial teams expanded
+    seconds: float
+
+
+def optimize_team(
+    roles: List[str],
+    library: Dict[str, List[PersonaBundle]],
+    culture: CultureProfile,
+    human: HumanProfile,
+    vibe: VibeProfile,
+    human_position: str,
+    ceo_originality: str = "balanced",
+    top_k: int = 1,
+    time_budget: Optional[float] = OPTIMIZER_TIME_BUDGET,
+) -> TeamSearchResult:
+    """
+    The top_k highest-scoring teams, by branch and bound over roles in order.
+
+    A partial team's completions are bounded by its base score, plus for
+    each remaining role the best of a candidate's gain against the team plus
+    half its best pair terms with every other remaining role (each pair is
+    split between its two members), plus the coverage bonus if every group
+    the remaining roles could cover were covered. Duplicate penalties among
+    remaining roles are left out, so the bound never undercuts a completion.
+
+    The search starts from select_team()'s beam and tries candidates best
+    bound first. Past time_budget seconds it returns the best teams found,
+    with the gap to the highest bound still open.
+    """
+    started = time.perf_counter()
+    scorer = TeamScorer(library, culture, human, vibe, human_position, ceo_originality)
+    eligible = []
+    for role in roles:
+        positions = [
+            position for position, candidate in enumerate(library.get(role, []))
+            if role != "CEO" or ceo_vibe_match_score(candidate, vibe)[0]
+        ]
+        if not positions:
+            raise ValueError(f"No eligible candidates for {role}.")
+        eligible.append(positions)
+
+    # For each depth, what each candidate of a later role can add beyond its gain against
+    # a team of roles[:depth + 1]: its best pair with roles[depth], plus half its best pairs
+    # with the other later roles. Stacked in role order, -inf where ineligible.
+    pairs = {
+        (role_index, other): scorer.pair_potential(roles[role_index], roles[other], eligible[other])
+        for role_index in range(len(roles)) for other in range(len(roles)) if role_index != other
+    }
+    later_roles, extras, starts = [], [], []
+    for depth in range(len(roles)):
+        later_roles.append(tuple(roles[depth + 1:]))
+        extras.append([])
+        starts.append([])
+        for later in range(depth + 1, len(roles)):
+            allowed = set(eligible[later])
+            starts[depth].append(len(extras[depth]))
+            extras[depth].extend(
+                pairs[later, depth][position]
+                + 0.5 * sum(pairs[later, other][position] for other in range(depth + 1, len(roles)) if other != later)
+                if position in allowed else -math.inf
+                for position in range(len(library[roles[later]]))
+            )
+        if np is not None:
+            extras[depth] = np.array(extras[depth])
+
+    def completion_bound(team: TeamState, depth: int) -> float:
+        """Upper bound on what roles after depth add to team, pairs with it included."""
+        gains = scorer.stacked_gains(team, later_roles[depth])
+        if np is not None:
+            return float(np.maximum.reduceat(gains + extras[depth], starts[depth]).sum())
+        totals = [gain + extra for gain, extra in zip(gains, extras[depth])]
+        ends = starts[depth][1:] + [len(totals)]
+        return sum(max(totals[start:end]) for start, end in zip(starts[depth], ends))
+
+    coverable = [0] * (len(roles) + 1)  # Coverage bits roles[depth:] can add
+    for depth in reversed(range(len(roles))):
+        tags = scorer.columns[roles[depth]].tags
+        coverable[depth] = coverable[depth + 1]
+        for position in eligible[depth]:
+            coverable[depth] |= tags[position] & COVERAGE_MASK
+
+    best: List[Tuple[float, Tuple[int, ...]]] = []  # Min-heap of (score, positions)
+    found = set()
+
+    def offer(score: float, positions: Tuple[int, ...]) -> None:
+        if positions in found:
+            return
+        if len(best) < top_k:
+            heapq.heappush(best, (score, positions))
+        elif score > best[0][0]:
+            found.discard(heapq.heapreplace(best, (score, positions))[1])
+        else:
+            return
+        found.add(positions)
+
+    def cutoff() -> float:
+        return best[0][0] + SCORE_TOLERANCE if len(best) >= top_k else -math.inf
+
+    beam_selection = SelectionConfig("low", ceo_originality, random.Random(0), "optimizer")
+    for assignment in select_teams(
+        roles, library, culture, human, vibe, human_position, selection=beam_selection, top_k=top_k
+    ):
+        positions = tuple(scorer.columns[role].positions[id(assignment.roles[role])] for role in roles)
+        offer(assignment.team.score, positions)
+
+    # Depth-first: (bound, positions so far, TeamState)
+    stack: List[Tuple[float, Tuple[int, ...], TeamState]] = [(math.inf, (), TeamState())]
+    nodes = 0
+    while stack:
+        if time_budget is not None and time.perf_counter() - started > time_budget:
+            break
+        bound, positions, team = stack.pop()
+        if bound <= cutoff():
+            continue
+        nodes += 1
+        depth = len(positions)
+        gains = scorer.candidate_gains(team, roles[depth])
+        tags = scorer.columns[roles[depth]].tags
+        if depth + 1 == len(roles):
+            for position in eligible[depth]:
+                offer(team.base_score + gains[position] + COVERAGE_BONUS[team.covered | tags[position] & COVERAGE_MASK],
+                      positions + (position,))
+            continue
+
+        rest = team.base_score + completion_bound(team, depth)
+        limit = cutoff()
+        children = []
+        for position in eligible[depth]:
+            child_bound = rest + gains[position] + COVERAGE_BONUS[
+                team.covered | tags[position] & COVERAGE_MASK | coverable[depth + 1]
+            ]
+            if child_bound > limit:
+                children.append((child_bound, position))
+        # Best bound is popped first
+        for child_bound, position in sorted(children):
+            stack.append((child_bound, positions + (position,), scorer.extend(team, roles[depth], position)))
+
+    ranked = sorted(best, key=lambda entry: (-round(entry[0], 9), entry[1]))
+    teams = [
+        Assignment(
+            roles={role: scorer.columns[role].bundles[position] for role, position in zip(roles, positions)},
+            score=score, breakdown={}, notes={}, image_prompts={}, backstories={}, image_paths={},
+        )
+        for score, positions in ranked
+    ]
+    teams = [
+        replace(assignment, team=scorer.team_state(assignment.roles))
+        for assignment in finish_assignments(teams, culture, human, vibe, human_position, ceo_originality)
+    ]
+    # Open partial teams that can still beat the cutoff bound what was missed
+    open_bounds = [entry[0] for entry in stack if entry[0] > cutoff()]
+    upper_bound = max(open_bounds + [ranked[0][0]])
+    return TeamSearchResult(
+        teams=teams,
+        upper_bound=upper_bound,
+        gap=upper_bound - ranked[0][0],
+        optimal=not open_bounds,
+        nodes=nodes,
+        seconds=time.perf_counter() - started,
+    )
+
+
+# ---------- Multi-seed search ----------
+
+# select_team() follows one jittered trajectory per seed. search_team_seeds()
+# runs many (seed, randomness level) pairs across a process pool and ranks
+# the teams by how often the runs agree on them.
+
+SEED_SEARCH_SEEDS = int(os.getenv("ONBOARDING_SEARCH_SEEDS", "32"))  # Seeds per randomness level
+
+_worker_scorer: Optional[TeamScorer] = None
+_worker_search: Tuple = ()  # (roles, vibe, ceo_originality, beam_width)
+
+
+def _init_seed_worker(
+    roles: List[str],
+    library: Dict[str, List[PersonaBundle]],
+    culture: CultureProfile,
+    human: HumanProfile,
+    vibe: VibeProfile,
+    human_position: str,
+    ceo_originality: str,
+    beam_width: int,
+) -> None:
+    """Compile the persona library once per worker process."""
+    global _worker_scorer, _worker_search
+    _worker_scorer = TeamScorer(library, culture, human, vibe, human_position, ceo_originality)
+    _worker_search = (roles, vibe, ceo_originality, beam_width)
+
+
+def _search_chunk(runs: List[Tuple[str, str]]) -> List[Tuple[Tuple[int, ...], float]]:
+    """Beam-search a chunk of (seed label, randomness level); runs in a worker."""
+    roles, vibe, ceo_originality, beam_width = _worker_search
+    results = []
+    for seed_label, randomness_level in runs:
+        selection = SelectionConfig(
+            randomness_level, ceo_originality, random.Random(stable_seed(seed_label)), seed_label
+        )
+        chosen = beam_search(roles, _worker_scorer, vibe, selection, beam_width)[0]
+        # Library positions, not bundles, go back to the parent
+        positions = tuple(_worker_scorer.columns[role].positions[id(chosen.roles[role])] for role in roles)
+        results.append((positions, chosen.team.score))
+    return results
+
+
+@dataclass
+class TeamTally:
+    persona_ids: Tuple[str, ...]  # By role, in search order
+    score: float
+    runs: List[Tuple[str, str]] = field(default_factory=list)  # (seed label, randomness level) that chose it
+    frequency: float = 0.0  # Share of all runs that chose the team
+    consensus: float = 0.0  # Mean share of runs that chose each member for their role
+
+
+@dataclass
+class SeedSearchResult:
+    teams: List[Assignment]  # Most stable first
+    tallies: List[TeamTally]  # Same order as teams
+    role_frequency: Dict[str, Dict[str, float]]  # role -> persona_id -> share of runs, most chosen first
+    runs: int
+    distinct_teams: int
+    workers: int
+    seconds: float
+
+
+def search_team_seeds(
+    roles: List[str],
+    library: Dict[str, List[PersonaBundle]],
+    culture: CultureProfile,
+    human: HumanProfile,
+    vibe: VibeProfile,
+    human_position: str,
+    seed_labels: Sequence[str],
+    randomness_levels: Sequence[str] = ("medium", "high"),
+    ceo_originality: str = "balanced",
+    shortlist: int = 5,
+    beam_width: int = 8,
+    workers: Optional[int] = None,
+) -> SeedSearchResult:
+    """
+    Beam-search every (seed label, randomness level) pair and rank the teams chosen.
+
+    Each worker gets the library once and compiles it into its own
+    TeamScorer. Runs are seeded from their labels (as build_rng() does), so
+    the result doesn't depend on the number of workers. Teams are ranked by
+    the share of runs that chose them, then by consensus (how often their
+    members were chosen for their roles in any team), then by score.
+
+    Args:
+        workers: Processes to search in (default: CPU count); 1 searches inline
+    """
+    started = time.perf_counter()
+    runs = list(itertools.product(seed_labels, randomness_levels))
+    if not runs:
+        raise ValueError("No seeds to search.")
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    workers = max(1, min(workers, len(runs)))
+    initargs = (list(roles), library, culture, human, vibe, human_position, ceo_originality, beam_width)
+    # A few chunks per worker keeps them busy without a round trip per run
+    chunk_size = max(1, math.ceil(len(runs) / (workers * 4)))
+    chunks = [runs[start:start + chunk_size] for start in range(0, len(runs), chunk_size)]
+
+    results: List[Tuple[Tuple[int, ...], float]] = []
+    if workers == 1:
+        _init_seed_worker(*initargs)
+        for chunk in chunks:
+            results.extend(_search_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_seed_worker, initargs=initargs) as pool:
+            for chunk_results in pool.map(_search_chunk, chunks):
+                results.extend(chunk_results)
+
+    tallies: Dict[Tuple[int, ...], TeamTally] = {}
+    role_counts: List[Dict[int, int]] = [{} for _ in roles]
+    for run, (positions, score) in zip(runs, results):
+        if positions not in tallies:
+            persona_ids = tuple(library[role][position].persona_id for role, position in zip(roles, positions))
+            tallies[positions] = TeamTally(persona_ids=persona_ids, score=score)
+        tallies[positions].runs.append(run)
+        for counts, position in zip(role_counts, positions):
+            counts[position] = counts.get(position, 0) + 1
+    for positions, tally in tallies.items():
+        tally.frequency = len(tally.runs) / len(runs)
+        tally.consensus = sum(
+            counts[position] for counts, position in zip(role_counts, positions)
+        ) / (len(roles) * len(runs))
+
+    ranked = sorted(
+        tallies.items(),
+        key=lambda item: (-item[1].frequency, -item[1].consensus, -round(item[1].score, 9), item[1].persona_ids),
+    )[:shortlist]
+    teams = [
+        Assignment(
+            roles={role: library[role][position] for role, position in zip(roles, positions)},
+            score=tally.score, breakdown={}, notes={}, image_prompts={}, backstories={}, image_paths={},
+        )
+        for positions, tally in ranked
+    ]
+    role_frequency = {
+        role: {
+            library[role][position].persona_id: count / len(runs)
+            for position, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        }
+        for role, counts in zip(roles, role_counts)
+    }
+    return SeedSearchResult(
+        teams=finish_assignments(teams, culture, human, vibe, human_position, ceo_originality),
+        tallies=[tally for _, tally in ranked],
+        role_frequency=role_frequency,
+        runs=len(runs),
+        distinct_teams=len(tallies),
+        workers=workers,
+        seconds=time.perf_counter() - started,
+    )
 
 
 def build_why_note(
@@ -1592,7 +2279,6 @@ def build_manual_assignment(
         breakdown={},
         notes=notes,
         image_prompts={},
-        image_prompts={},
         backstories={},
         image_paths={},
     )
@@ -1743,41 +2429,6 @@ def culture_summary(culture: CultureProfile) -> str:
     )
 
 
-def openrouter_request(
-    api_key: str,
-    model: str,
-    messages: List[Dict[str, str]],
-    temperature: float,
-    max_tokens: int,
-    timeout: int,
-) -> str:
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    referer = os.getenv("OPENROUTER_REFERER")
-    title = os.getenv("OPENROUTER_TITLE")
-    if referer:
-        headers["HTTP-Referer"] = referer
-    if title:
-        headers["X-Title"] = title
-    payload = {
-        "model": model,
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-    }
-    request = urllib.request.Request(
-        url, data=json.dumps(payload).encode("utf-8"), headers=headers
-    )
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        data = json.loads(response.read().decode("utf-8"))
-    if "choices" not in data or not data["choices"]:
-        raise ValueError(f"Unexpected OpenRouter response: {data}")
-    return data["choices"][0]["message"]["content"].strip()
-
-
 def load_env_file(path: str) -> None:
     if not os.path.exists(path):
         return
@@ -1842,24 +2493,32 @@ def collect_backstories(
             "Get your key at: https://openrouter.ai/keys\n"
             "Then add to .env.local: OPENROUTER_API_KEY=sk-or-..."
         )
-    backstories: Dict[str, str] = {}
     model = prompt_text("OpenRouter model (Gemini recommended)", default=default_model)
 
-    for role in roles:
-        bundle = assignment.roles.get(role)
-        if bundle is None:
-            continue
-        messages = build_backstory_messages(role, bundle, culture, vibe, selection)
-        backstory = openrouter_request(
-            api_key=api_key,
-            model=model,
-            messages=messages,
+    manager = APIManager()
+    routing = manager._get_routing("backstory_generation")
+    # A copy: the loaded routing can be the module-wide DEFAULT_TASK_ROUTING
+    manager.config = replace(manager.config, task_routing={
+        **manager.config.task_routing,
+        "backstory_generation": replace(routing, primary=replace(routing.primary, model=model)),
+    })
+
+    batch_roles = [role for role in roles if role in assignment.roles]
+    batch = manager.complete_batch([
+        BatchRequest(
+            task="backstory_generation",
+            messages=build_backstory_messages(role, assignment.roles[role], culture, vibe, selection),
             temperature=0.6,
             max_tokens=180,
-            timeout=20,
+            use_fallback=False,  # The model the user picked, or an error
+            agent=role,
         )
-        backstories[role] = backstory
-    return backstories
+        for role in batch_roles
+    ])
+    for role, result in zip(batch_roles, batch.results):
+        if not result.success:
+            raise RuntimeError(f"Backstory generation failed for {role}: {result.error}")
+    return {role: result.content.strip() for role, result in zip(batch_roles, batch.results)}
 
 
 # ---------- Reporting ----------
@@ -1963,11 +2622,17 @@ def prompt_selection_config() -> SelectionConfig:
     )
     rng, seed_label = build_rng(seed_phrase)
     print(f"Variation seed: {seed_label}")
+    search_mode = prompt_choice(
+        "Team search (exact: best-scoring team; multi-seed: the team most seeds agree on)",
+        SEARCH_MODES,
+        default_index=1,
+    )
     return SelectionConfig(
         randomness_level=randomness_level,
         ceo_originality=ceo_originality,
         rng=rng,
         seed_label=seed_label,
+        search_mode=search_mode,
     )
 
 
@@ -2081,9 +2746,28 @@ def main() -> None:
         roles.append("Chairman")
 
     library = build_persona_library()
-    assignment = select_team(
-        roles, library, culture, human_profile, vibe, human_position, selection=selection
-    )
+    if selection.search_mode == "exact":
+        search = optimize_team(
+            roles, library, culture, human_profile, vibe, human_position, selection.ceo_originality
+        )
+        assignment = search.teams[0]
+        if not search.optimal:
+            print(f"\nSearch stopped after {search.seconds:.1f}s; the best team may score up to {search.gap:.3f} higher.")
+    elif selection.search_mode == "multi-seed":
+        search = search_team_seeds(
+            roles, library, culture, human_profile, vibe, human_position,
+            seed_labels=[f"{selection.seed_label}-{seed}" for seed in range(SEED_SEARCH_SEEDS)],
+            ceo_originality=selection.ceo_originality,
+        )
+        assignment = search.teams[0]
+        print(
+            f"\nChosen in {search.tallies[0].frequency:.0%} of {search.runs} runs "
+            f"({search.distinct_teams} distinct teams, {search.seconds:.1f}s on {search.workers} workers)."
+        )
+    else:
+        assignment = select_team(
+            roles, library, culture, human_profile, vibe, human_position, selection=selection
+        )
 
     print("\nHuman profile summary")
     print_human_profile(human_profile)
@@ -1,5 +1,9 @@
+import itertools
+import random
 from datetime import date
 
+import pytest
+
 import app
 
 
@@ -27,3 +31,201 @@ def test_ceo_pleasantness_constraint_enforced():
         candidate_axis = app.vibe_axis_score(candidate.trait_tags, "pleasantness")
         if candidate_axis < 4:
             assert not app.ceo_vibe_match_score(candidate, vibe)[0]
+
+
+def _selection_inputs():
+    culture = app.CultureProfile(
+        culture_mode="performance_driven",
+        tolerance_for_conflict="high",
+        conflict_emphasis="high",
+        tolerance_for_burnout="low",
+        governance_level="medium",
+        innovation_level="medium",
+        risk_appetite="medium",
+        hiring_bar="high",
+        quality_bar="high",
+    )
+    human = app.HumanProfile(
+        top_enneagram=[(8, 0.6)],
+        top_mbti=[("ENTJ", 0.6)],
+        western_zodiac="Aries",
+        chinese_zodiac="Fire Tiger",
+        raw_mbti_scores={},
+        raw_enneagram_scores={},
+    )
+    vibe = app.synthesize_vibe_profile({axis: 3 for axis in app.AXES}, "balanced")
+    return app.build_persona_library(), culture, human, vibe
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_team_scorer_matches_score_assignment(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(app, "np", None)
+    library, culture, human, vibe = _selection_inputs()
+    scorer = app.TeamScorer(library, culture, human, vibe, "Chairman", "balanced")
+    team = {"CEO": library["CEO"][0], "CFO": library["CFO"][1], "COO": library["COO"][2]}
+
+    totals = scorer.score_candidates(scorer.team_state(team), "CTO")
+
+    assert len(totals) == len(library["CTO"])
+    for candidate, total in zip(library["CTO"], totals):
+        expected, _ = app.score_assignment(
+            {**team, "CTO": candidate}, culture, human, vibe, "Chairman", "balanced"
+        )
+        assert total == pytest.approx(expected, abs=1e-9)
+
+
+def test_team_state_matches_score_assignment():
+    library, culture, human, vibe = _selection_inputs()
+    roles = list(app.ROLE_ORDER_DEFAULT) + ["Chairman"]
+    rng = random.Random(7)
+
+    for human_position in ["Chairman", "CEO"]:
+        scorer = app.TeamScorer(library, culture, human, vibe, human_position, "bold")
+        for _ in range(20):
+            team = {}
+            state = app.TeamState()
+            for role in roles:
+                position = rng.randrange(len(library[role]))
+                team[role] = library[role][position]
+                state = scorer.extend(state, role, position)
+                expected, _ = app.score_assignment(team, culture, human, vibe, human_position, "bold")
+                assert state.score == pytest.approx(expected, abs=1e-9)
+
+
+def test_select_team_breakdown_matches_score_assignment():
+    library, culture, human, vibe = _selection_inputs()
+    roles = list(app.ROLE_ORDER_DEFAULT) + ["Chairman"]
+
+    assignment = app.select_team(roles, library, culture, human, vibe, "CEO")
+
+    assert list(assignment.roles) == roles
+    score, breakdown = app.score_assignment(assignment.roles, culture, human, vibe, "CEO", "balanced")
+    assert assignment.score == score
+    assert assignment.breakdown == breakdown
+    assert assignment.team.score == pytest.approx(score, abs=1e-9)
+
+
+def test_select_teams_builds_notes_for_returned_teams_only(monkeypatch):
+    library, culture, human, vibe = _selection_inputs()
+    roles = list(app.ROLE_ORDER_DEFAULT) + ["Chairman"]
+    build_why_note = app.build_why_note
+    calls = []
+
+    def counting_build_why_note(role, candidate, *args):
+        calls.append((role, candidate.persona_id))
+        return build_why_note(role, candidate, *args)
+
+    monkeypatch.setattr(app, "build_why_note", counting_build_why_note)
+    teams = app.select_teams(roles, library, culture, human, vibe, "CEO", top_k=3)
+
+    returned = {(role, candidate.persona_id) for team in teams for role, candidate in team.roles.items()}
+    assert sorted(calls) == sorted(returned)
+    assert len(teams) == 3
+    assert teams[0].roles == app.select_team(roles, library, culture, human, vibe, "CEO").roles
+    for team in teams:
+        assert list(team.notes) == roles
+        assert team.notes["CEO"] == build_why_note(
+            "CEO", team.roles["CEO"], culture, vibe, human, "CEO", "balanced"
+        )
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_optimize_team_finds_top_teams(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(app, "np", None)
+    library, culture, human, vibe = _selection_inputs()
+    roles = ["CEO", "CFO", "COO", "CTO", "CPO", "Chairman"]
+    eligible = [
+        [candidate for candidate in library[role] if role != "CEO" or app.ceo_vibe_match_score(candidate, vibe)[0]]
+        for role in roles
+    ]
+    scores = sorted(
+        (
+            app.score_assignment(dict(zip(roles, team)), culture, human, vibe, "CEO", "bold")[0]
+            for team in itertools.product(*eligible)
+        ),
+        reverse=True,
+    )
+
+    result = app.optimize_team(roles, library, culture, human, vibe, "CEO", "bold", top_k=4, time_budget=None)
+
+    assert result.optimal
+    assert result.gap == 0.0
+    assert [team.score for team in result.teams] == pytest.approx(scores[:4], abs=1e-9)
+    assert all(list(team.notes) == roles for team in result.teams)
+
+
+def test_optimize_team_out_of_time_returns_beam_team():
+    library, culture, human, vibe = _selection_inputs()
+    roles = list(app.ROLE_ORDER_DEFAULT) + ["Chairman"]
+
+    result = app.optimize_team(roles, library, culture, human, vibe, "CEO", time_budget=0.0)
+
+    assert not result.optimal
+    assert result.teams[0].roles == app.select_team(roles, library, culture, human, vibe, "CEO").roles
+    assert result.upper_bound >= result.teams[0].score
+
+
+def test_search_team_seeds_ranks_by_agreement():
+    library, culture, human, vibe = _selection_inputs()
+    roles = list(app.ROLE_ORDER_DEFAULT) + ["Chairman"]
+    labels = [f"seed-{index}" for index in range(6)]
+
+    result = app.search_team_seeds(roles, library, culture, human, vibe, "CEO", labels, workers=1)
+
+    assert result.runs == 12
+    assert sum(len(tally.runs) for tally in result.tallies) <= result.runs
+    assert [tally.frequency for tally in result.tallies] == sorted(
+        (tally.frequency for tally in result.tallies), reverse=True
+    )
+    for team, tally in zip(result.teams, result.tallies):
+        assert tuple(team.roles[role].persona_id for role in roles) == tally.persona_ids
+        seed_label, level = tally.runs[0]
+        selection = app.SelectionConfig(level, "balanced", random.Random(app.stable_seed(seed_label)), seed_label)
+        assert app.select_team(roles, library, culture, human, vibe, "CEO", selection=selection).roles == team.roles
+    for frequencies in result.role_frequency.values():
+        assert sum(frequencies.values()) == pytest.approx(1.0)
+
+
+def test_search_team_seeds_same_result_across_workers():
+    library, culture, human, vibe = _selection_inputs()
+    roles = list(app.ROLE_ORDER_DEFAULT) + ["Chairman"]
+    labels = [f"seed-{index}" for index in range(4)]
+
+    inline = app.search_team_seeds(roles, library, culture, human, vibe, "CEO", labels, workers=1)
+    pooled = app.search_team_seeds(roles, library, culture, human, vibe, "CEO", labels, workers=2)
+
+    assert pooled.workers == 2
+    assert pooled.tallies == inline.tallies
+    assert pooled.role_frequency == inline.role_frequency
+
+
+def test_collect_backstories_keeps_default_routing(monkeypatch):
+    from lib import api_manager
+
+    library, culture, human, vibe = _selection_inputs()
+    assignment = app.select_team(["CEO", "CFO"], library, culture, human, vibe, "Chairman")
+    selection = app.SelectionConfig("low", "balanced", random.Random(0), "test")
+    default_model = api_manager.DEFAULT_TASK_ROUTING["backstory_generation"].primary.model
+    sent = []
+
+    def complete_batch(manager, requests, **kwargs):
+        sent.append(manager._get_routing("backstory_generation"))
+        assert not any(request.use_fallback for request in requests)
+        return api_manager.BatchResult(
+            results=[api_manager.CompletionResult(content=" A backstory. \n", usage=api_manager.UsageInfo()) for _ in requests],
+            usage=api_manager.UsageInfo(),
+        )
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(app, "load_env_file", lambda path: None)
+    monkeypatch.setattr(app, "prompt_text", lambda prompt, default=None: "example/picked-model")
+    monkeypatch.setattr(api_manager.APIManager, "complete_batch", complete_batch)
+
+    backstories = app.collect_backstories(["CEO", "CFO"], assignment, culture, vibe, selection)
+
+    assert sent[0].primary.model == "example/picked-model"
+    assert api_manager.DEFAULT_TASK_ROUTING["backstory_generation"].primary.model == default_model
+    assert api_manager.APIManager()._get_routing("backstory_generation").primary.model == default_model
+    assert backstories == {"CEO": "A backstory.", "CFO": "A backstory."}
@@ -16,12 +16,17 @@ import sys
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 # Add packages to path so we can import factory_core
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 
-from factory_core.agent import BaseAgent
+from factory_core.agent import BaseAgent, CompletionResult
+from factory_core.documents import read_document
+from factory_core.factory_state import factory_state, position_memory
+from factory_core.keywords import KeywordMatcher
+from factory_core.memory import MemoryStore
+from factory_core.registry import get_agent
 
 
 class CEOAgent(BaseAgent):
@@ -140,6 +145,12 @@ class CEOAgent(BaseAgent):
             "warning": "EU operations require GDPR compliance."
         }
     }
+    HIGH_RISK_MATCHER = KeywordMatcher.from_groups(
+        (domain_id, domain_info["keywords"]) for domain_id, domain_info in HIGH_RISK_DOMAINS.items()
+    )
+
+    # Default number of position briefs generated in parallel by ceo.propagate
+    PROPAGATE_MAX_CONCURRENCY = 6
 
     def __init__(self, factory_id: Optional[str] = None):
         super().__init__("CEO", "Chief Executive Officer", factory_id)
@@ -158,65 +169,44 @@ class CEOAgent(BaseAgent):
         """Get project root path."""
         return Path(__file__).parent.parent.parent.parent
 
+    def _position_memory(self, position: str) -> MemoryStore:
+        """Get the MemoryStore of a C-Suite position (C-Suites/[POSITION]/.[pos]/memory)."""
+        return position_memory(self._get_project_root(), position)
+
     def _load_vision(self) -> Optional[Dict[str, Any]]:
         """Load existing vision from memory."""
-        vision_path = self.memory_path / "vision.md"
-        if vision_path.exists():
-            try:
-                with open(vision_path, 'r') as f:
-                    content = f.read()
-                    # Parse the markdown into structured data
-                    return {"raw": content, "exists": True}
-            except Exception as e:
-                self.logger.warning(f"Could not load vision: {e}")
-        return None
+        try:
+            content = self.memory.read("vision")
+        except Exception as e:
+            self.logger.warning(f"Could not load vision: {e}")
+            return None
+        if content is None:
+            return None
+        # Parse the markdown into structured data
+        return {"raw": content, "exists": True}
 
     def _save_vision(self, vision_data: Dict[str, Any]) -> bool:
         """Save vision to memory."""
         try:
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            vision_path = self.memory_path / "vision.md"
-            with open(vision_path, 'w') as f:
-                f.write(vision_data.get("markdown", ""))
+            self.memory.put("vision", vision_data.get("markdown", ""))
             return True
         except Exception as e:
             self.logger.error(f"Could not save vision: {e}")
             return False
 
     def _detect_high_risk_domains(self, text: str) -> List[Dict[str, Any]]:
-        """Detect high-risk domains in the given text."""
-        text_lower = text.lower()
-        flagged = []
-
-        for domain_id, domain_info in self.HIGH_RISK_DOMAINS.items():
-            for keyword in domain_info["keywords"]:
-                if keyword in text_lower:
-                    flagged.append({
-                        "domain": domain_id,
-                        "keyword": keyword,
-                        "regulations": domain_info["regulations"],
-                        "warning": domain_info["warning"]
-                    })
-                    break  # Only flag each domain once
-
-        return flagged
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        """Log a session to the logs directory."""
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        """Detect high-risk domains in the given text (each domain flagged once)."""
+        matches = self.HIGH_RISK_MATCHER.first_by_label(text)
+        return [
+            {
+                "domain": domain_id,
+                "keyword": matches[domain_id].keyword,
+                "regulations": domain_info["regulations"],
+                "warning": domain_info["warning"]
+            }
+            for domain_id, domain_info in self.HIGH_RISK_DOMAINS.items()
+            if domain_id in matches
+        ]
 
     # =========================================================================
     # CEO.VISION - Gather business vision from founder
@@ -330,7 +320,7 @@ class CEOAgent(BaseAgent):
 
                 return {
                     "message": "Your vision has been saved. Ready to create the business plan.",
-                    "saved_to": str(self.memory_path / "vision.md"),
+                    "saved_to": self.memory.location("vision"),
                     "next_step": "Run /ceo.plan to generate your business plan",
                     "next_action": "ceo.plan"
                 }
@@ -459,13 +449,17 @@ After each section, write naturally and professionally. Do not use placeholder t
         # Load mission files if they exist
         mission_content = self._load_mission_files()
 
+        context = self._prompt_budget("critical_decision", max_tokens=4000).add(
+            "vision", vision_content, priority=1
+        ).add("mission", mission_content, priority=2).pack()
+
         prompt = f"""Based on the following vision document, generate a comprehensive business plan in Lean Canvas format.
 
 ## Vision Document
-{vision_content}
+{context["vision"]}
 
 ## Existing Mission (if any)
-{mission_content}
+{context["mission"]}
 
 Generate the business plan in this exact markdown format. Fill in all sections with specific, actionable content based on the vision. Do NOT use placeholder text like [X] or TBD.
 
@@ -573,12 +567,12 @@ Make sure every section has real content based on the vision, not placeholders.
             root_readme = self._get_project_root() / "README.md"
 
             # Also save plan version to memory
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            plan_version_path = self.memory_path / "plan-version.md"
-            with open(plan_version_path, 'w') as f:
-                f.write(f"# Business Plan Version\n\n")
-                f.write(f"**Generated**: {datetime.utcnow().isoformat()}Z\n")
-                f.write(f"**Based on**: vision.md\n")
+            self.memory.put(
+                "plan-version",
+                f"# Business Plan Version\n\n"
+                f"**Generated**: {datetime.utcnow().isoformat()}Z\n"
+                f"**Based on**: vision.md\n"
+            )
 
             # Log the generation
             self._log_session("plan-generation", {
@@ -615,15 +609,12 @@ Make sure every section has real content based on the vision, not placeholders.
         ]
 
         for filename in mission_files:
-            filepath = mission_dir / filename
-            if filepath.exists():
-                try:
-                    with open(filepath, 'r') as f:
-                        file_content = f.read()
-                        if file_content.strip() and "TEMPLATE" not in file_content.upper():
-                            content.append(f"### {filename}\n{file_content[:500]}")
-                except Exception:
-                    pass
+            try:
+                file_content = read_document(mission_dir / filename, "")
+            except Exception:
+                continue
+            if file_content.strip() and "TEMPLATE" not in file_content.upper():
+                content.append(f"### {filename}\n{file_content}")
 
         return "\n\n".join(content) if content else "No mission files configured yet."
 
@@ -638,24 +629,22 @@ Make sure every section has real content based on the vision, not placeholders.
         Args:
             payload: {
                 "positions": list (optional, defaults to all),
-                "business_plan": str (optional, will load from README if not provided)
+                "business_plan": str (optional, will load from README if not provided),
+                "max_concurrency": int (optional, briefs generated in parallel; 1 = sequential)
             }
 
         Returns:
             Propagation status and briefs generated
         """
         # Load business plan
-        readme_path = self._get_project_root() / "README.md"
-        if not readme_path.exists():
+        business_plan = read_document(self._get_project_root() / "README.md")
+        if business_plan is None:
             return {
                 "error": "Business plan not found",
                 "message": "Run /ceo.plan first to generate the business plan.",
                 "next_action": "ceo.plan"
             }
 
-        with open(readme_path, 'r') as f:
-            business_plan = f.read()
-
         # Positions to brief (CTO is info-only, gated)
         positions = {
             "CFO": {
@@ -687,14 +676,14 @@ Make sure every section has real content based on the vision, not placeholders.
             }
         }
 
-        briefs_generated = {}
-
-        for position, config in positions.items():
-            brief = self._generate_position_brief(position, config, business_plan)
-            briefs_generated[position] = brief
+        max_concurrency = int(payload.get("max_concurrency", self.PROPAGATE_MAX_CONCURRENCY))
+        briefs_generated, failed_positions = self._generate_position_briefs(
+            positions, business_plan, max_concurrency
+        )
 
-            # Save brief to position's memory
-            self._save_position_brief(position, brief)
+        factory_state(self._get_project_root()).record_briefs(
+            position for position in positions if position not in failed_positions
+        )
 
         # Create propagation record
         propagation_record = self._create_propagation_record(positions, briefs_generated)
@@ -710,6 +699,7 @@ Make sure every section has real content based on the vision, not placeholders.
             "positions_briefed": list(positions.keys()),
             "briefs": {pos: brief[:500] + "..." for pos, brief in briefs_generated.items()},
             "propagation_record": propagation_record,
+            "failed_positions": failed_positions,
             "gate_status": {
                 "cto_gated": True,
                 "requires": ["CMO validation", "Human approval"]
@@ -718,18 +708,71 @@ Make sure every section has real content based on the vision, not placeholders.
             "next_action": "ceo.report"
         }
 
-    def _generate_position_brief(
+    def _generate_position_briefs(
+        self,
+        positions: Dict[str, Dict[str, Any]],
+        business_plan: str,
+        max_concurrency: int
+    ) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Generate briefs for all positions as one batch, saving each as it arrives.
+
+        Briefs run through APIManager.complete_batch() with bounded
+        concurrency, so one slow or failing position does not hold up the
+        others, and each brief is written to its position's memory as soon
+        as it is generated rather than after the whole batch.
+
+        Returns:
+            (briefs in position order, positions whose brief failed to generate or save)
+        """
+        names = list(positions)
+        briefs: Dict[str, str] = {}
+        failed = set()
+
+        def save(index: int, result: CompletionResult) -> None:
+            position = names[index]
+            if result.success:
+                brief = result.content
+            else:
+                failed.add(position)
+                brief = f"# Brief for {position}\n\nError generating brief: {result.error}"
+            briefs[position] = brief
+            # Save brief to position's memory
+            if not self._save_position_brief(position, brief):
+                failed.add(position)
+
+        self._think_batch(
+            [
+                self._position_brief_prompt(position, config, business_plan)
+                for position, config in positions.items()
+            ],
+            task_type="agent_reasoning",
+            temperature=0.5,
+            max_tokens=1500,
+            max_concurrency=max_concurrency,
+            on_result=save
+        )
+
+        return (
+            {position: briefs[position] for position in names},
+            [position for position in names if position in failed]
+        )
+
+    def _position_brief_prompt(
         self,
         position: str,
         config: Dict[str, Any],
         business_plan: str
     ) -> str:
-        """Generate a brief for a specific position using LLM."""
+        """Build the LLM prompt for a position's brief."""
+        context = self._prompt_budget("agent_reasoning", max_tokens=1500).add(
+            "business_plan", business_plan
+        ).pack()
 
-        prompt = f"""Based on this business plan, generate a brief for the {position} position.
+        return f"""Based on this business plan, generate a brief for the {position} position.
 
 ## Business Plan
-{business_plan[:3000]}
+{context["business_plan"]}
 
 Generate a brief in this format:
 
@@ -770,32 +813,11 @@ Submit inquiries via /{position.lower()}.inquire → CEO
 *Refer to your .ethics/ethics.md for behavioral guidelines.*
 """
 
-        try:
-            brief = self._think(
-                prompt=prompt,
-                task_type="agent_reasoning",
-                temperature=0.5,
-                max_tokens=1500
-            )
-            return brief
-        except Exception as e:
-            self.logger.error(f"Error generating brief for {position}: {e}")
-            return f"# Brief for {position}\n\nError generating brief: {e}"
-
     def _save_position_brief(self, position: str, brief: str) -> bool:
         """Save a brief to the position's memory directory."""
         try:
-            # Path: C-Suites/[POSITION]/.[pos]/memory/ceo-brief.md
-            pos_lower = position.lower()
-            memory_path = (
-                self._get_project_root() / "C-Suites" / position /
-                f".{pos_lower}" / "memory" / "ceo-brief.md"
-            )
-            memory_path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(memory_path, 'w') as f:
-                f.write(brief)
-
+            # Record: C-Suites/[POSITION]/.[pos]/memory/ceo-brief.md
+            self._position_memory(position).put("ceo-brief", brief)
             return True
         except Exception as e:
             self.logger.error(f"Error saving brief for {position}: {e}")
@@ -841,10 +863,7 @@ Before CTO can begin:
 
         # Save propagation record
         try:
-            record_path = self.memory_path / f"propagation-{datetime.utcnow().strftime('%Y-%m-%d')}.md"
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            with open(record_path, 'w') as f:
-                f.write(record)
+            self.memory.put("propagation", record, key=datetime.utcnow().strftime('%Y-%m-%d'))
         except Exception as e:
             self.logger.warning(f"Could not save propagation record: {e}")
 
@@ -915,13 +934,12 @@ Before CTO can begin:
 
     def _get_onboarding_status(self) -> Dict[str, Any]:
         """Get current onboarding status."""
-        status_path = self.memory_path / "onboarding-status.json"
-        if status_path.exists():
-            try:
-                with open(status_path, 'r') as f:
-                    return json.load(f)
-            except Exception:
-                pass
+        try:
+            status = self.memory.get_json("onboarding-status")
+        except Exception:
+            status = None
+        if status is not None:
+            return status
 
         return {
             "phase_1_complete": False,
@@ -979,10 +997,7 @@ Before CTO can begin:
     def _save_onboarding_status(self, status: Dict[str, Any]) -> None:
         """Save onboarding status."""
         try:
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            status_path = self.memory_path / "onboarding-status.json"
-            with open(status_path, 'w') as f:
-                json.dump(status, f, indent=2)
+            self.memory.put_json("onboarding-status", status)
         except Exception as e:
             self.logger.error(f"Could not save onboarding status: {e}")
 
@@ -1052,15 +1067,14 @@ Before CTO can begin:
             return {"error": "Question is required"}
 
         # Load business context
-        readme_path = self._get_project_root() / "README.md"
+        business_plan = read_document(self._get_project_root() / "README.md", "")
         vision = self._load_vision()
 
-        business_context = ""
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                business_context = f.read()[:2000]
-
-        vision_context = vision.get("raw", "")[:1000] if vision else ""
+        context = self._prompt_budget("agent_reasoning", max_tokens=1500).add(
+            "business_plan", business_plan, priority=1
+        ).add("vision", vision.get("raw", "") if vision else "", priority=2).pack()
+        business_context = context["business_plan"]
+        vision_context = context["vision"]
 
         # Determine if we can answer or need to escalate
         escalation_triggers = [
@@ -1210,8 +1224,10 @@ Please advise on how to proceed.
         positions_status = {}
         c_suite = ["CEO", "CFO", "CMO", "COO", "CIO", "CLO", "CTO", "CXA"]
 
+        # A brief means the position has been activated
+        briefed = factory_state(self._get_project_root()).positions(c_suite)
         for pos in c_suite:
-            positions_status[pos] = self._get_position_status(pos)
+            positions_status[pos] = self._get_position_status(pos, briefed[pos] is not None)
 
         # Check for blockers
         blockers = []
@@ -1223,17 +1239,13 @@ Please advise on how to proceed.
                 })
 
         # Load business info
-        readme_path = self._get_project_root() / "README.md"
         business_name = "Your Business"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                content = f.read()
-                # Try to extract business name from first heading
-                lines = content.split('\n')
-                for line in lines:
-                    if line.startswith('# '):
-                        business_name = line[2:].strip()
-                        break
+        content = read_document(self._get_project_root() / "README.md", "")
+        # Try to extract business name from first heading
+        for line in content.split('\n'):
+            if line.startswith('# '):
+                business_name = line[2:].strip()
+                break
 
         # Generate report
         report = f"""# Business Status Report
@@ -1308,10 +1320,7 @@ Please advise on how to proceed.
 
         # Save report
         try:
-            report_path = self.memory_path / "latest-report.md"
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            with open(report_path, 'w') as f:
-                f.write(report)
+            self.memory.put("latest-report", report)
         except Exception as e:
             self.logger.warning(f"Could not save report: {e}")
 
@@ -1326,19 +1335,11 @@ Please advise on how to proceed.
             "report": report,
             "positions": positions_status,
             "blockers": blockers,
-            "saved_to": str(self.memory_path / "latest-report.md")
+            "saved_to": self.memory.location("latest-report")
         }
 
-    def _get_position_status(self, position: str) -> Dict[str, Any]:
+    def _get_position_status(self, position: str, has_brief: bool) -> Dict[str, Any]:
         """Get status for a specific C-Suite position."""
-        pos_lower = position.lower()
-
-        # Check for brief (means position has been activated)
-        brief_path = (
-            self._get_project_root() / "C-Suites" / position /
-            f".{pos_lower}" / "memory" / "ceo-brief.md"
-        )
-
         # Check for recent logs
         logs_path = self._get_project_root() / "C-Suites" / position / "logs"
 
@@ -1364,7 +1365,7 @@ Please advise on how to proceed.
                 "progress": "-",
                 "blocker_reason": "CMO validation + approval"
             })
-        elif brief_path.exists():
+        elif has_brief:
             status.update({
                 "status": "active",
                 "progress": "Working",
@@ -1392,7 +1393,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CEOAgent(factory_id=factory_id)
+    agent = get_agent(CEOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
 
     return result
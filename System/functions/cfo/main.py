@@ -20,6 +20,8 @@ from typing import Dict, Any, List, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.registry import get_agent
 
 
 class CFOAgent(BaseAgent):
@@ -50,35 +52,11 @@ class CFOAgent(BaseAgent):
 
     def _load_ceo_brief(self) -> Optional[str]:
         """Load the CEO brief for this position."""
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
         """Load the business plan from root README."""
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        """Log a session to the logs directory."""
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     # =========================================================================
     # CFO.BUDGET - Create budget projections
@@ -97,13 +75,17 @@ class CFOAgent(BaseAgent):
                 "message": "CEO must create business plan first via /ceo.plan"
             }
 
+        context = self._prompt_budget("critical_decision", max_tokens=3000).add(
+            "business_plan", business_plan, priority=1
+        ).add("ceo_brief", ceo_brief or "No brief available", priority=2).pack()
+
         prompt = f"""Based on this business plan and CEO brief, create comprehensive financial projections.
 
 ## Business Plan
-{business_plan[:3000]}
+{context["business_plan"]}
 
 ## CEO Brief
-{ceo_brief[:1500] if ceo_brief else "No brief available"}
+{context["ceo_brief"]}
 
 Generate a detailed budget in this format:
 
@@ -176,18 +158,15 @@ Generate a detailed budget in this format:
             )
 
             # Save budget
-            self.memory_path.mkdir(parents=True, exist_ok=True)
             version = datetime.utcnow().strftime("%Y%m%d")
-            budget_path = self.memory_path / f"budget-v{version}.md"
-            with open(budget_path, 'w') as f:
-                f.write(budget)
+            record = self.memory.put("budget", budget, key=f"v{version}")
 
             self._log_session("budget", {"version": version})
 
             return {
                 "message": "Budget projections generated",
                 "budget": budget,
-                "saved_to": str(budget_path),
+                "saved_to": record.location,
                 "next_step": "Review projections and adjust assumptions as needed"
             }
 
@@ -282,9 +261,13 @@ Generate a detailed budget in this format:
         horizon = payload.get("horizon", "12_months")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("critical_decision", max_tokens=2500).add(
+            "business_plan", business_plan or "No business plan available"
+        ).pack()
+
         prompt = f"""Based on this business plan, create a {horizon} financial forecast.
 
-{business_plan[:2500] if business_plan else "No business plan available"}
+{context["business_plan"]}
 
 Generate a forecast including:
 1. Revenue projections by month
@@ -304,15 +287,12 @@ Format as a professional financial forecast document.
                 max_tokens=2500
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            forecast_path = self.memory_path / "forecast.md"
-            with open(forecast_path, 'w') as f:
-                f.write(forecast)
+            record = self.memory.put("forecast", forecast)
 
             return {
                 "message": f"{horizon} forecast generated",
                 "forecast": forecast,
-                "saved_to": str(forecast_path)
+                "saved_to": record.location
             }
 
         except Exception as e:
@@ -348,18 +328,17 @@ Format as a professional financial forecast document.
         period = payload.get("period", "current")
 
         # Load any existing financial data
-        budget_files = list(self.memory_path.glob("budget-*.md")) if self.memory_path.exists() else []
-        forecast_path = self.memory_path / "forecast.md" if self.memory_path.exists() else None
+        latest_budget = self.memory.latest("budget")
+        budget_content = latest_budget.content if latest_budget else ""
 
-        budget_content = ""
-        if budget_files:
-            with open(sorted(budget_files)[-1], 'r') as f:
-                budget_content = f.read()[:1500]
+        context = self._prompt_budget("critical_decision", max_tokens=2000).add(
+            "budget", budget_content or "No budget data available yet"
+        ).pack()
 
         prompt = f"""Perform a financial health analysis based on available data.
 
 ## Available Budget Data
-{budget_content if budget_content else "No budget data available yet"}
+{context["budget"]}
 
 Generate a financial analysis report including:
 1. Overall Health Assessment (GREEN/YELLOW/RED)
@@ -406,7 +385,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CFOAgent(factory_id=factory_id)
+    agent = get_agent(CFOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
 
     return result
@@ -20,6 +20,8 @@ from typing import Dict, Any, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.registry import get_agent
 
 
 class CIOAgent(BaseAgent):
@@ -49,33 +51,10 @@ class CIOAgent(BaseAgent):
         return Path(__file__).parent.parent.parent.parent
 
     def _load_ceo_brief(self) -> Optional[str]:
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     # =========================================================================
     # CIO.SECURITY - Security framework
@@ -88,13 +67,17 @@ class CIOAgent(BaseAgent):
         business_plan = self._load_business_plan()
         ceo_brief = self._load_ceo_brief()
 
+        context = self._prompt_budget("critical_decision", max_tokens=2500).add(
+            "business_plan", business_plan or "No plan available", priority=1
+        ).add("ceo_brief", ceo_brief or "No brief available", priority=2).pack()
+
         prompt = f"""Based on this business plan, create a security framework.
 
 ## Business Plan
-{business_plan[:2500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 ## CEO Brief
-{ceo_brief[:1000] if ceo_brief else "No brief available"}
+{context["ceo_brief"]}
 
 Generate a security framework including:
 
@@ -151,17 +134,14 @@ Generate a security framework including:
                 max_tokens=2500
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            security_path = self.memory_path / "security-framework.md"
-            with open(security_path, 'w') as f:
-                f.write(framework)
+            record = self.memory.put("security-framework", framework)
 
             self._log_session("security", {"generated": True})
 
             return {
                 "message": "Security framework created",
                 "framework": framework,
-                "saved_to": str(security_path),
+                "saved_to": record.location,
                 "note": "Review with security professional before implementation"
             }
 
@@ -178,9 +158,13 @@ Generate a security framework including:
         """
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("critical_decision", max_tokens=2000).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create a data governance framework for this business.
 
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Include:
 1. Data classification policy
@@ -198,15 +182,12 @@ Include:
                 max_tokens=2000
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            data_path = self.memory_path / "data-governance.md"
-            with open(data_path, 'w') as f:
-                f.write(governance)
+            record = self.memory.put("data-governance", governance)
 
             return {
                 "message": "Data governance framework created",
                 "governance": governance,
-                "saved_to": str(data_path)
+                "saved_to": record.location
             }
 
         except Exception as e:
@@ -338,7 +319,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CIOAgent(factory_id=factory_id)
+    agent = get_agent(CIOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
@@ -20,6 +20,9 @@ from typing import Dict, Any, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.keywords import KeywordMatcher
+from factory_core.registry import get_agent
 
 
 class CLOAgent(BaseAgent):
@@ -49,6 +52,18 @@ The information provided is for planning purposes only and may not be complete,
 accurate, or current.
 """
 
+    # High-risk legal domains: (keywords, domain)
+    HIGH_RISK_DOMAINS = [
+        (["children", "kids", "minors", "under 18"], {"domain": "Minors", "regulations": ["COPPA", "CARU"]}),
+        (["health", "medical", "patient", "therapy"], {"domain": "Healthcare", "regulations": ["HIPAA", "HITECH"]}),
+        (["education", "school", "student"], {"domain": "Education", "regulations": ["FERPA"]}),
+        (["crypto", "securities", "investment", "trading"], {"domain": "Financial/Crypto", "regulations": ["SEC", "FinCEN"]}),
+        (["eu", "europe", "european", "gdpr"], {"domain": "EU Operations", "regulations": ["GDPR"]}),
+    ]
+    HIGH_RISK_MATCHER = KeywordMatcher.from_groups(
+        (index, keywords) for index, (keywords, _) in enumerate(HIGH_RISK_DOMAINS)
+    )
+
     def __init__(self, factory_id: Optional[str] = None):
         super().__init__("CLO", "Chief Legal Officer", factory_id)
         self.memory_path = self._get_memory_path()
@@ -64,51 +79,19 @@ accurate, or current.
         return Path(__file__).parent.parent.parent.parent
 
     def _load_ceo_brief(self) -> Optional[str]:
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     def _detect_high_risk_domains(self, text: str) -> list:
         """Detect high-risk legal domains."""
-        text_lower = text.lower() if text else ""
-        domains = []
-
-        if any(kw in text_lower for kw in ["children", "kids", "minors", "under 18"]):
-            domains.append({"domain": "Minors", "regulations": ["COPPA", "CARU"], "attorney_required": True})
-        if any(kw in text_lower for kw in ["health", "medical", "patient", "therapy"]):
-            domains.append({"domain": "Healthcare", "regulations": ["HIPAA", "HITECH"], "attorney_required": True})
-        if any(kw in text_lower for kw in ["education", "school", "student"]):
-            domains.append({"domain": "Education", "regulations": ["FERPA"], "attorney_required": True})
-        if any(kw in text_lower for kw in ["crypto", "securities", "investment", "trading"]):
-            domains.append({"domain": "Financial/Crypto", "regulations": ["SEC", "FinCEN"], "attorney_required": True})
-        if any(kw in text_lower for kw in ["eu", "europe", "european", "gdpr"]):
-            domains.append({"domain": "EU Operations", "regulations": ["GDPR"], "attorney_required": True})
-
-        return domains
+        matches = self.HIGH_RISK_MATCHER.first_by_label(text or "")
+        return [
+            {**domain, "attorney_required": True}
+            for index, (_, domain) in enumerate(self.HIGH_RISK_DOMAINS)
+            if index in matches
+        ]
 
     # =========================================================================
     # CLO.COMPLIANCE - Compliance checklist
@@ -123,13 +106,17 @@ accurate, or current.
 
         high_risk = self._detect_high_risk_domains(business_plan or "")
 
+        context = self._prompt_budget("legal_review", max_tokens=3000).add(
+            "business_plan", business_plan or "No plan available", priority=1
+        ).add("ceo_brief", ceo_brief or "No brief available", priority=2).pack()
+
         prompt = f"""As a digital paralegal, create a compliance assessment for this business.
 
 ## Business Plan
-{business_plan[:2500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 ## CEO Brief
-{ceo_brief[:1000] if ceo_brief else "No brief available"}
+{context["ceo_brief"]}
 
 ## High-Risk Domains Detected
 {json.dumps(high_risk, indent=2) if high_risk else "None detected"}
@@ -199,10 +186,7 @@ Generate a compliance assessment in this format:
                 max_tokens=3000
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            compliance_path = self.memory_path / "compliance-checklist.md"
-            with open(compliance_path, 'w') as f:
-                f.write(assessment)
+            record = self.memory.put("compliance-checklist", assessment)
 
             self._log_session("compliance", {
                 "high_risk_domains": [d["domain"] for d in high_risk],
@@ -213,7 +197,7 @@ Generate a compliance assessment in this format:
                 "message": "Compliance assessment created",
                 "assessment": assessment,
                 "high_risk_domains": high_risk,
-                "saved_to": str(compliance_path),
+                "saved_to": record.location,
                 "attorney_review_required": len(high_risk) > 0 or True
             }
 
@@ -231,10 +215,14 @@ Generate a compliance assessment in this format:
         contract_type = payload.get("type", "terms_of_service")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("legal_review", max_tokens=2500).add(
+            "business_plan", business_plan or "General business"
+        ).pack()
+
         prompt = f"""As a digital paralegal, draft a {contract_type} template.
 
 Business Context:
-{business_plan[:1500] if business_plan else "General business"}
+{context["business_plan"]}
 
 Generate a {contract_type} draft that:
 1. Uses plain language where possible
@@ -279,10 +267,14 @@ Begin with a clear disclaimer that this is a draft requiring attorney review.
         business_plan = self._load_business_plan()
         high_risk = self._detect_high_risk_domains(business_plan or "")
 
+        context = self._prompt_budget("legal_review", max_tokens=2000).add(
+            "business_plan", business_plan or "General business"
+        ).pack()
+
         prompt = f"""As a digital paralegal, assess legal risks for this business.
 
 Business Context:
-{business_plan[:2000] if business_plan else "General business"}
+{context["business_plan"]}
 
 High-Risk Domains:
 {json.dumps(high_risk, indent=2)}
@@ -306,16 +298,13 @@ Include disclaimer that this requires attorney review.
                 max_tokens=2000
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            risk_path = self.memory_path / "risk-assessment.md"
-            with open(risk_path, 'w') as f:
-                f.write(assessment + self.LEGAL_DISCLAIMER)
+            record = self.memory.put("risk-assessment", assessment + self.LEGAL_DISCLAIMER)
 
             return {
                 "message": "Risk assessment created",
                 "assessment": assessment,
                 "high_risk_domains": high_risk,
-                "saved_to": str(risk_path),
+                "saved_to": record.location,
                 "attorney_review_required": True
             }
 
@@ -405,7 +394,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CLOAgent(factory_id=factory_id)
+    agent = get_agent(CLOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
@@ -25,6 +25,9 @@ from typing import Dict, Any, List, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.factory_state import factory_state, parse_gate_decision
+from factory_core.registry import get_agent
 
 
 class CMOAgent(BaseAgent):
@@ -50,33 +53,10 @@ class CMOAgent(BaseAgent):
         return Path(__file__).parent.parent.parent.parent
 
     def _load_ceo_brief(self) -> Optional[str]:
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     # =========================================================================
     # CMO.VALIDATE - Record validation results (CRITICAL GATE)
@@ -133,29 +113,30 @@ class CMOAgent(BaseAgent):
             }
 
             # Save validation result
-            self.memory_path.mkdir(parents=True, exist_ok=True)
             date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            result_path = self.memory_path / f"validation-results-{date_str}.md"
-
-            with open(result_path, 'w') as f:
-                f.write(f"# Validation Results\n\n")
-                f.write(f"## GATE DECISION: {decision} {decision_icon}\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(f"### Criteria Assessment\n\n")
-                f.write(f"- Signups: {signups}/{target_signups}\n")
-                f.write(f"- Cost per signup: ${cost_per_signup} (max ${max_cost})\n")
-                f.write(f"- Engagement rate: {engagement_rate}% (min {min_engagement}%)\n\n")
-
-                if decision == "PROCEED":
-                    f.write("### Next Steps\n")
-                    f.write("1. Request human approval for CTO activation\n")
-                    f.write("2. Share validated messaging with CTO\n")
-                elif decision == "ITERATE":
-                    f.write("### Iteration Needed\n")
-                    f.write("Close to thresholds - recommend one more iteration\n")
-                else:
-                    f.write("### Pivot Required\n")
-                    f.write("Significant miss on thresholds - recommend pivot discussion\n")
+            content = (
+                f"# Validation Results\n\n"
+                f"## GATE DECISION: {decision} {decision_icon}\n\n"
+                f"**Date**: {datetime.utcnow().isoformat()}Z\n\n"
+                f"### Criteria Assessment\n\n"
+                f"- Signups: {signups}/{target_signups}\n"
+                f"- Cost per signup: ${cost_per_signup} (max ${max_cost})\n"
+                f"- Engagement rate: {engagement_rate}% (min {min_engagement}%)\n\n"
+            )
+
+            if decision == "PROCEED":
+                content += (
+                    "### Next Steps\n"
+                    "1. Request human approval for CTO activation\n"
+                    "2. Share validated messaging with CTO\n"
+                )
+            elif decision == "ITERATE":
+                content += "### Iteration Needed\nClose to thresholds - recommend one more iteration\n"
+            else:
+                content += "### Pivot Required\nSignificant miss on thresholds - recommend pivot discussion\n"
+
+            record = self.memory.put("validation-results", content, key=date_str)
+            factory_state(self._get_project_root()).record_validation(decision, record.location)
 
             self._log_session("validation", validation_result)
 
@@ -163,7 +144,7 @@ class CMOAgent(BaseAgent):
                 "message": f"Validation complete: {decision}",
                 "gate_decision": decision,
                 "criteria_met": f"{criteria_met}/{criteria_total}",
-                "saved_to": str(result_path)
+                "saved_to": record.location
             }
 
             if decision == "PROCEED":
@@ -179,16 +160,13 @@ class CMOAgent(BaseAgent):
 
         elif action == "status":
             # Check current validation status
-            result_files = list(self.memory_path.glob("validation-results-*.md")) if self.memory_path.exists() else []
+            latest = self.memory.latest("validation-results")
 
-            if result_files:
-                latest = sorted(result_files)[-1]
-                with open(latest, 'r') as f:
-                    content = f.read()
+            if latest:
                 return {
                     "message": "Current validation status",
-                    "latest_result": content[:1000],
-                    "file": str(latest)
+                    "latest_result": latest.content[:1000],
+                    "file": latest.location
                 }
 
             return {
@@ -207,19 +185,17 @@ class CMOAgent(BaseAgent):
         Request human approval to activate CTO.
         """
         # Check that validation passed
-        result_files = list(self.memory_path.glob("validation-results-*.md")) if self.memory_path.exists() else []
+        latest = self.memory.latest("validation-results")
 
-        if not result_files:
+        if not latest:
             return {
                 "error": "No validation results found",
                 "message": "Complete validation first with /cmo.validate"
             }
 
-        latest = sorted(result_files)[-1]
-        with open(latest, 'r') as f:
-            content = f.read()
+        content = latest.content
 
-        if "PROCEED" not in content:
+        if parse_gate_decision(content) != "PROCEED":
             return {
                 "error": "Validation did not pass",
                 "message": "Gate decision must be PROCEED before requesting approval"
@@ -251,12 +227,11 @@ Provide feedback on concerns or additional validation needed.
 """
 
         # Save approval request
-        approval_path = self.memory_path / "approval-request.md"
-        with open(approval_path, 'w') as f:
-            f.write(approval_request)
+        request_record = self.memory.put("approval-request", approval_request)
+        factory_state(self._get_project_root()).record_approval_request(request_record.location)
 
         self._log_session("approval-request", {
-            "validation_file": str(latest),
+            "validation_file": latest.location,
             "requested": datetime.utcnow().isoformat()
         })
 
@@ -278,13 +253,17 @@ Provide feedback on concerns or additional validation needed.
         business_plan = self._load_business_plan()
         ceo_brief = self._load_ceo_brief()
 
+        context = self._prompt_budget("content_generation", max_tokens=2500).add(
+            "business_plan", business_plan or "No plan available", priority=1
+        ).add("ceo_brief", ceo_brief or "No brief available", priority=2).pack()
+
         prompt = f"""Based on this business plan, create a comprehensive marketing strategy.
 
 ## Business Plan
-{business_plan[:2500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 ## CEO Brief
-{ceo_brief[:1000] if ceo_brief else "No brief available"}
+{context["ceo_brief"]}
 
 Generate a marketing strategy including:
 
@@ -341,16 +320,13 @@ Generate a marketing strategy including:
                 max_tokens=2500
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
             version = datetime.utcnow().strftime("%Y%m%d")
-            strategy_path = self.memory_path / f"strategy-v{version}.md"
-            with open(strategy_path, 'w') as f:
-                f.write(strategy)
+            record = self.memory.put("strategy", strategy, key=f"v{version}")
 
             return {
                 "message": "Marketing strategy created",
                 "strategy": strategy,
-                "saved_to": str(strategy_path),
+                "saved_to": record.location,
                 "next_step": "Execute validation campaign, then record results with /cmo.validate"
             }
 
@@ -415,12 +391,16 @@ Generate a marketing strategy including:
         topic = payload.get("topic", "")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("content_generation", max_tokens=1000).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Generate {content_type} marketing content for this business.
 
 Topic: {topic if topic else "General business promotion"}
 
 Business Context:
-{business_plan[:1500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Generate engaging content appropriate for the platform. Keep it authentic and avoid overly salesy language.
 """
@@ -455,9 +435,13 @@ Generate engaging content appropriate for the platform. Keep it authentic and av
         if action == "guidelines":
             business_plan = self._load_business_plan()
 
+            context = self._prompt_budget("content_generation", max_tokens=1500).add(
+                "business_plan", business_plan or "No plan available"
+            ).pack()
+
             prompt = f"""Based on this business plan, create brand guidelines.
 
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Generate brand guidelines including:
 1. Brand Voice (tone, personality)
@@ -528,10 +512,14 @@ Generate brand guidelines including:
                     business_name = line[2:].strip()
                     break
 
+        context = self._prompt_budget("content_generation", max_tokens=2500).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create {variations} logo concept descriptions for {business_name}.
 
 Business Context:
-{business_plan[:1500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Concept Direction: {concept if concept else "Modern, professional, memorable"}
 Style Preferences: {', '.join(style) if isinstance(style, list) else style}
@@ -561,15 +549,15 @@ Remember: All logos require GREENLIGHT: BRAND from human before any use.
             logo_id = f"LOGO-{datetime.utcnow().strftime('%Y%m%d')}-001"
 
             # Save concepts
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            concepts_path = self.memory_path / f"logo-concepts-{logo_id}.md"
-            with open(concepts_path, 'w') as f:
-                f.write(f"# Logo Concepts: {business_name}\n\n")
-                f.write(f"**Logo ID**: {logo_id}\n")
-                f.write(f"**Generated**: {datetime.utcnow().isoformat()}Z\n")
-                f.write(f"**Status**: AWAITING GREENLIGHT: BRAND\n\n")
-                f.write("---\n\n")
-                f.write(concepts)
+            record = self.memory.put(
+                "logo-concepts",
+                f"# Logo Concepts: {business_name}\n\n"
+                f"**Logo ID**: {logo_id}\n"
+                f"**Generated**: {datetime.utcnow().isoformat()}Z\n"
+                f"**Status**: AWAITING GREENLIGHT: BRAND\n\n"
+                "---\n\n" + concepts,
+                key=logo_id
+            )
 
             self._log_session("logo", {
                 "action": "generate",
@@ -581,7 +569,7 @@ Remember: All logos require GREENLIGHT: BRAND from human before any use.
                 "message": "Logo concepts generated",
                 "logo_id": logo_id,
                 "concepts": concepts,
-                "saved_to": str(concepts_path),
+                "saved_to": record.location,
                 "status": "awaiting_approval",
                 "approval_required": "GREENLIGHT: BRAND from human",
                 "next_step": "Review concepts and approve with: APPROVE CONCEPT [N]"
@@ -635,15 +623,13 @@ Remember: All logos require GREENLIGHT: BRAND from human before any use.
 
     def _logo_status(self) -> Dict[str, Any]:
         """Get logo generation status."""
-        logo_files = list(self.memory_path.glob("logo-concepts-*.md")) if self.memory_path.exists() else []
+        latest = self.memory.latest("logo-concepts")
 
-        if logo_files:
-            latest = sorted(logo_files)[-1]
-            with open(latest, 'r') as f:
-                content = f.read()[:500]
+        if latest:
+            content = latest.content[:500]
             return {
                 "message": "Logo status",
-                "latest_concepts": str(latest),
+                "latest_concepts": latest.location,
                 "preview": content,
                 "status": "AWAITING GREENLIGHT: BRAND" if "AWAITING" in content else "Unknown"
             }
@@ -683,10 +669,14 @@ Remember: All logos require GREENLIGHT: BRAND from human before any use.
         cta = payload.get("cta", "Link in bio")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("content_generation", max_tokens=1500).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create a TikTok video script optimized for virality.
 
 Business Context:
-{business_plan[:1000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Concept: {concept if concept else "Showcase the product/service value"}
 Style: {', '.join(style) if isinstance(style, list) else style}
@@ -850,10 +840,14 @@ All TikTok content requires human approval before publication.
         site_type = payload.get("type", "marketing")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("content_generation", max_tokens=3000).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create a website specification for a {site_type} website.
 
 Business Context:
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Generate a comprehensive website specification including:
 
@@ -911,10 +905,7 @@ Website launches require GREENLIGHT from human.
             )
 
             # Save spec
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            spec_path = self.memory_path / f"website-spec-{datetime.utcnow().strftime('%Y%m%d')}.md"
-            with open(spec_path, 'w') as f:
-                f.write(spec)
+            record = self.memory.put("website-spec", spec, key=datetime.utcnow().strftime('%Y%m%d'))
 
             self._log_session("website", {
                 "action": "spec",
@@ -924,7 +915,7 @@ Website launches require GREENLIGHT from human.
             return {
                 "message": "Website specification created",
                 "spec": spec,
-                "saved_to": str(spec_path),
+                "saved_to": record.location,
                 "next_steps": [
                     "Review spec with stakeholders",
                     "Get CLO review for legal pages",
@@ -941,11 +932,15 @@ Website launches require GREENLIGHT from human.
         goal = payload.get("goal", "lead_capture")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("content_generation", max_tokens=2000).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create a high-converting landing page specification.
 
 Goal: {goal}
 Business Context:
-{business_plan[:1500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Create a landing page spec with:
 
@@ -1405,10 +1400,7 @@ This specification requires **GREENLIGHT: DASHBOARD** from human before implemen
 """
 
         # Save spec
-        self.memory_path.mkdir(parents=True, exist_ok=True)
-        spec_path = self.memory_path / f"dashboard-spec-{datetime.utcnow().strftime('%Y%m%d')}.md"
-        with open(spec_path, 'w') as f:
-            f.write(spec)
+        record = self.memory.put("dashboard-spec", spec, key=datetime.utcnow().strftime('%Y%m%d'))
 
         self._log_session("dashboard", {
             "action": "spec",
@@ -1418,7 +1410,7 @@ This specification requires **GREENLIGHT: DASHBOARD** from human before implemen
         return {
             "message": "Dashboard specification generated",
             "spec": spec,
-            "saved_to": str(spec_path),
+            "saved_to": record.location,
             "components": ["Plan Section", "Function Activity Section", "Agent Activity Console"],
             "status": "awaiting_approval",
             "approval_required": "GREENLIGHT: DASHBOARD from human"
@@ -2024,7 +2016,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CMOAgent(factory_id=factory_id)
+    agent = get_agent(CMOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
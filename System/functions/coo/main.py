@@ -19,6 +19,8 @@ from typing import Dict, Any, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.registry import get_agent
 
 
 class COOAgent(BaseAgent):
@@ -48,33 +50,10 @@ class COOAgent(BaseAgent):
         return Path(__file__).parent.parent.parent.parent
 
     def _load_ceo_brief(self) -> Optional[str]:
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     # =========================================================================
     # COO.PROCESS - Design operational processes
@@ -87,13 +66,17 @@ class COOAgent(BaseAgent):
         business_plan = self._load_business_plan()
         ceo_brief = self._load_ceo_brief()
 
+        context = self._prompt_budget("agent_reasoning", max_tokens=2500).add(
+            "business_plan", business_plan or "No plan available", priority=1
+        ).add("ceo_brief", ceo_brief or "No brief available", priority=2).pack()
+
         prompt = f"""Based on this business plan, design an operations framework.
 
 ## Business Plan
-{business_plan[:2500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 ## CEO Brief
-{ceo_brief[:1000] if ceo_brief else "No brief available"}
+{context["ceo_brief"]}
 
 Generate an operations framework including:
 
@@ -152,17 +135,14 @@ Generate an operations framework including:
                 max_tokens=2500
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            ops_path = self.memory_path / "operations-plan.md"
-            with open(ops_path, 'w') as f:
-                f.write(framework)
+            record = self.memory.put("operations-plan", framework)
 
             self._log_session("process", {"generated": True})
 
             return {
                 "message": "Operations framework created",
                 "framework": framework,
-                "saved_to": str(ops_path)
+                "saved_to": record.location
             }
 
         except Exception as e:
@@ -178,9 +158,13 @@ Generate an operations framework including:
         """
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("agent_reasoning", max_tokens=1500).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Based on this business plan, create a workforce plan.
 
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Include:
 1. Roles needed (human vs AI)
@@ -199,15 +183,12 @@ Note: Worker classification requires legal review from CLO.
                 max_tokens=1500
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            workforce_path = self.memory_path / "workforce-plan.md"
-            with open(workforce_path, 'w') as f:
-                f.write(plan)
+            record = self.memory.put("workforce-plan", plan)
 
             return {
                 "message": "Workforce plan created",
                 "plan": plan,
-                "saved_to": str(workforce_path),
+                "saved_to": record.location,
                 "note": "Worker classification requires CLO review"
             }
 
@@ -283,7 +264,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = COOAgent(factory_id=factory_id)
+    agent = get_agent(COOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
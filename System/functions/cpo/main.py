@@ -19,6 +19,8 @@ from typing import Dict, Any, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.registry import get_agent
 
 
 class CPOAgent(BaseAgent):
@@ -48,33 +50,10 @@ class CPOAgent(BaseAgent):
         return Path(__file__).parent.parent.parent.parent
 
     def _load_ceo_brief(self) -> Optional[str]:
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     # =========================================================================
     # CPO.PRD - Product Requirements Document
@@ -87,10 +66,14 @@ class CPOAgent(BaseAgent):
         feature_name = payload.get("feature", "Core Product")
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("critical_decision", max_tokens=3000).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create a Product Requirements Document for: {feature_name}
 
 Business Context:
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Generate a PRD in this format:
 
@@ -178,11 +161,9 @@ Acceptance Criteria:
                 max_tokens=3000
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            prd_id = f"PRD-{datetime.utcnow().strftime('%Y%m%d')}-001"
-            prd_path = self.memory_path / f"{prd_id}.md"
-            with open(prd_path, 'w') as f:
-                f.write(prd)
+            prd_key = f"{datetime.utcnow().strftime('%Y%m%d')}-001"
+            prd_id = f"PRD-{prd_key}"
+            record = self.memory.put("PRD", prd, key=prd_key)
 
             self._log_session("prd", {"prd_id": prd_id, "feature": feature_name})
 
@@ -190,7 +171,7 @@ Acceptance Criteria:
                 "message": "PRD created",
                 "prd_id": prd_id,
                 "prd": prd,
-                "saved_to": str(prd_path),
+                "saved_to": record.location,
                 "next_step": "Review with CTO for technical feasibility"
             }
 
@@ -208,9 +189,13 @@ Acceptance Criteria:
         business_plan = self._load_business_plan()
         horizon = payload.get("horizon", "6_months")
 
+        context = self._prompt_budget("agent_reasoning", max_tokens=2000).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Create a {horizon} product roadmap based on this business plan.
 
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Generate a roadmap including:
 
@@ -260,15 +245,12 @@ Generate a roadmap including:
                 max_tokens=2000
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            roadmap_path = self.memory_path / "roadmap.md"
-            with open(roadmap_path, 'w') as f:
-                f.write(roadmap)
+            record = self.memory.put("roadmap", roadmap)
 
             return {
                 "message": "Roadmap created",
                 "roadmap": roadmap,
-                "saved_to": str(roadmap_path)
+                "saved_to": record.location
             }
 
         except Exception as e:
@@ -284,9 +266,13 @@ Generate a roadmap including:
         """
         business_plan = self._load_business_plan()
 
+        context = self._prompt_budget("agent_reasoning", max_tokens=1500).add(
+            "business_plan", business_plan or "No plan available"
+        ).pack()
+
         prompt = f"""Define product metrics framework for this business.
 
-{business_plan[:1500] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 Include:
 1. North Star Metric
@@ -411,7 +397,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CPOAgent(factory_id=factory_id)
+    agent = get_agent(CPOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
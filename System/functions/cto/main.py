@@ -19,6 +19,9 @@ from typing import Dict, Any, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.documents import read_document
+from factory_core.factory_state import factory_state, position_memory
+from factory_core.registry import get_agent
 
 
 class CTOAgent(BaseAgent):
@@ -52,26 +55,11 @@ class CTOAgent(BaseAgent):
 
     def _check_gate_status(self) -> Dict[str, Any]:
         """Check if CTO gate is open (CMO validated + human approved)."""
-        cmo_memory = self._get_project_root() / "C-Suites" / "CMO" / ".cmo" / "memory"
-
-        # Check for CMO validation results
-        validation_files = list(cmo_memory.glob("validation-results-*.md")) if cmo_memory.exists() else []
-        cmo_validated = False
-        cmo_decision = "UNKNOWN"
-
-        if validation_files:
-            latest = sorted(validation_files)[-1]
-            with open(latest, 'r') as f:
-                content = f.read()
-                if "PROCEED" in content:
-                    cmo_validated = True
-                    cmo_decision = "PROCEED"
-                elif "ITERATE" in content:
-                    cmo_decision = "ITERATE"
-                elif "PIVOT" in content:
-                    cmo_decision = "PIVOT"
-
-        # Check for human approval
+        # CMO gate decision, recorded by cmo.validate
+        cmo_decision = factory_state(self._get_project_root()).gate()["decision"]
+        cmo_validated = cmo_decision == "PROCEED"
+
+        # Check for human approval (a file the founder creates, not a memory record)
         approval_path = self.memory_path / "human-approval.md"
         human_approved = approval_path.exists()
 
@@ -86,33 +74,10 @@ class CTOAgent(BaseAgent):
         }
 
     def _load_ceo_brief(self) -> Optional[str]:
-        brief_path = self.memory_path / "ceo-brief.md"
-        if brief_path.exists():
-            with open(brief_path, 'r') as f:
-                return f.read()
-        return None
+        return self.memory.read("ceo-brief")
 
     def _load_business_plan(self) -> Optional[str]:
-        readme_path = self._get_project_root() / "README.md"
-        if readme_path.exists():
-            with open(readme_path, 'r') as f:
-                return f.read()
-        return None
-
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_path = self.logs_path / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return read_document(self._get_project_root() / "README.md")
 
     # =========================================================================
     # CTO.STATUS - Check gate status
@@ -163,24 +128,25 @@ class CTOAgent(BaseAgent):
         ceo_brief = self._load_ceo_brief()
 
         # Load PRD if available
-        cpo_memory = self._get_project_root() / "C-Suites" / "CPO" / ".cpo" / "memory"
-        prd_content = ""
-        if cpo_memory.exists():
-            prd_files = list(cpo_memory.glob("PRD-*.md"))
-            if prd_files:
-                with open(sorted(prd_files)[-1], 'r') as f:
-                    prd_content = f.read()[:1500]
+        latest_prd = position_memory(self._get_project_root(), "CPO").latest("PRD")
+        prd_content = latest_prd.content if latest_prd else ""
+
+        context = self._prompt_budget("code_generation", max_tokens=3000).add(
+            "business_plan", business_plan or "No plan available", priority=1
+        ).add("ceo_brief", ceo_brief or "No brief available", priority=2).add(
+            "prd", prd_content or "No PRD available - create general plan", priority=3
+        ).pack()
 
         prompt = f"""Create a technical implementation plan using the SpecKit methodology.
 
 ## Business Plan
-{business_plan[:2000] if business_plan else "No plan available"}
+{context["business_plan"]}
 
 ## CEO Brief
-{ceo_brief[:1000] if ceo_brief else "No brief available"}
+{context["ceo_brief"]}
 
 ## PRD (if available)
-{prd_content if prd_content else "No PRD available - create general plan"}
+{context["prd"]}
 
 Generate a technical plan including:
 
@@ -254,17 +220,14 @@ Generate a technical plan including:
                 max_tokens=3000
             )
 
-            self.memory_path.mkdir(parents=True, exist_ok=True)
-            plan_path = self.memory_path / "technical-plan.md"
-            with open(plan_path, 'w') as f:
-                f.write(plan)
+            record = self.memory.put("technical-plan", plan)
 
             self._log_session("plan", {"generated": True})
 
             return {
                 "message": "Technical plan created",
                 "plan": plan,
-                "saved_to": str(plan_path),
+                "saved_to": record.location,
                 "next_step": "Begin implementation with /cto.implement"
             }
 
@@ -371,7 +334,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CTOAgent(factory_id=factory_id)
+    agent = get_agent(CTOAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
@@ -3,7 +3,8 @@ CXA Agent - Chief Experience/Communications Agent
 Handles all external communications: email, phone, scheduling, and contacts.
 
 Commands:
-    cxa.email     - Email management and routing
+    cxa.email     - Email management and routing (bulk routes a local mailbox);
+                    replies follow their thread's routing, duplicates are skipped
     cxa.phone     - Phone communications (via Twilio)
     cxa.schedule  - Calendar and scheduling
     cxa.contacts  - Contact management
@@ -18,6 +19,9 @@ from typing import Dict, Any, List, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'packages'))
 from factory_core.agent import BaseAgent
+from factory_core.email_index import shared_index
+from factory_core.inbox import EmailRouter, route_inbox
+from factory_core.registry import get_agent
 
 
 class CXAAgent(BaseAgent):
@@ -60,67 +64,53 @@ class CXAAgent(BaseAgent):
         # HR
         (["job", "resume", "apply", "position", "hiring"], "COO", "low"),
     ]
+    # Rules are tried in order; compiled once for the class
+    EMAIL_ROUTER = EmailRouter(EMAIL_ROUTING)
 
     def __init__(self, factory_id: Optional[str] = None):
         super().__init__("CXA", "Chief Experience Agent", factory_id)
         self.memory_path = self._get_memory_path()
         self.logs_path = self._get_logs_path()
+        self.inbox_path = self._get_inbox_path()
 
     def _get_memory_path(self) -> Path:
         return Path(__file__).parent.parent.parent.parent / "C-Suites" / "CXA" / ".cxa" / "memory"
 
+    def _get_inbox_path(self) -> Path:
+        return Path(__file__).parent.parent.parent.parent / "C-Suites" / "CXA" / "inbox"
+
     def _get_logs_path(self) -> Path:
         return Path(__file__).parent.parent.parent.parent / "C-Suites" / "CXA" / "logs"
 
     def _get_project_root(self) -> Path:
         return Path(__file__).parent.parent.parent.parent
 
-    def _log_session(self, log_type: str, data: Dict[str, Any]) -> bool:
-        try:
-            self.logs_path.mkdir(parents=True, exist_ok=True)
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-
-            # Use subdirectories for different log types
+    def _log_session(self, log_type: str, data: Dict[str, Any], log_dir: Optional[Path] = None) -> bool:
+        # Use subdirectories for different log types
+        if log_dir is None:
             if log_type in ["email", "emails"]:
                 log_dir = self.logs_path / "emails"
             elif log_type in ["call", "calls"]:
                 log_dir = self.logs_path / "calls"
-            else:
-                log_dir = self.logs_path
-
-            log_dir.mkdir(parents=True, exist_ok=True)
-            log_path = log_dir / f"{log_type}-{date_str}.md"
-
-            with open(log_path, 'a') as f:
-                f.write(f"\n\n---\n\n# {log_type.title()} Session\n\n")
-                f.write(f"**Date**: {datetime.utcnow().isoformat()}Z\n\n")
-                f.write(json.dumps(data, indent=2))
-            return True
-        except Exception as e:
-            self.logger.error(f"Could not log session: {e}")
-            return False
+        return super()._log_session(log_type, data, log_dir)
+
+    @staticmethod
+    def _confined_path(value: str, base: Path) -> Optional[Path]:
+        """value resolved inside base, or None if it is absolute or leads outside (.., symlinks)."""
+        path = Path(value)
+        if path.is_absolute() or ".." in path.parts:
+            return None
+        resolved = (base / path).resolve()
+        try:
+            resolved.relative_to(base.resolve())
+        except ValueError:
+            return None
+        return resolved
 
     def _route_email(self, email: Dict[str, Any]) -> Dict[str, Any]:
         """Determine routing for incoming email."""
-        sender = email.get("from", "")
-        subject = email.get("subject", "").lower()
-        body = email.get("body", "").lower()
-        combined = subject + " " + body
-
-        for keywords, agent, priority in self.EMAIL_ROUTING:
-            if any(kw in combined for kw in keywords):
-                return {
-                    "route_to": agent,
-                    "reason": f"Keyword match: {keywords[0]}",
-                    "priority": priority
-                }
-
-        # Unknown - queue for human
-        return {
-            "route_to": "HUMAN",
-            "reason": "Could not determine routing",
-            "priority": "normal"
-        }
+        # Unknown senders and topics are queued for HUMAN
+        return self.EMAIL_ROUTER.route(email)
 
     # =========================================================================
     # CXA.EMAIL - Email management
@@ -147,12 +137,30 @@ class CXAAgent(BaseAgent):
             if not email:
                 return {"error": "Email data required"}
 
-            routing = self._route_email(email)
+            # The warm index only reads segments saved since its last use
+            index = shared_index(self.memory)
+            with index.lock:
+                index.refresh()
+                match = index.lookup(email)
+                if match.duplicate_of is not None:
+                    return {
+                        "message": "Duplicate email skipped",
+                        "duplicate_of": match.duplicate_of,
+                        "thread_id": match.thread_id
+                    }
+
+                if match.routing is not None:
+                    routing = {**match.routing, "reason": f"Thread: {match.thread_id}"}
+                else:
+                    routing = self._route_email(email)
+                index.add(email, routing, match)
+                index.save()
 
             self._log_session("email", {
                 "action": "route",
                 "from": email.get("from"),
                 "subject": email.get("subject"),
+                "thread_id": match.thread_id,
                 "routed_to": routing["route_to"],
                 "priority": routing["priority"]
             })
@@ -160,6 +168,7 @@ class CXAAgent(BaseAgent):
             return {
                 "message": "Email routed",
                 "routing": routing,
+                "thread_id": match.thread_id,
                 "email_preview": {
                     "from": email.get("from"),
                     "subject": email.get("subject")
@@ -188,6 +197,9 @@ class CXAAgent(BaseAgent):
                 "note": "Gmail API integration required to send"
             }
 
+        elif action == "bulk":
+            return self._route_bulk(payload)
+
         elif action == "search":
             query = payload.get("query", "")
             return {
@@ -198,6 +210,63 @@ class CXAAgent(BaseAgent):
 
         return {"error": f"Unknown action: {action}"}
 
+    def _route_bulk(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Route a local mailbox backlog across a process pool.
+
+        Paths come from the request, so they are confined to the factory:
+        source is relative to the CXA inbox and output_dir to logs/emails.
+        Absolute paths and paths leading outside those directories are
+        rejected.
+
+        Args:
+            payload: {
+                "source": mbox file, Maildir or JSONL file in the CXA inbox (relative path),
+                "format": "mbox" | "maildir" | "jsonl" (optional, detected),
+                "workers": int (optional, default CPU count),
+                "output_dir": directory under logs/emails (relative path; optional, default bulk-<timestamp>),
+                "dedupe": bool (optional, default True; collapse threads and skip duplicates)
+            }
+        """
+        if not payload.get("source"):
+            return {"error": "source required (mbox, Maildir or JSONL path in the CXA inbox)"}
+        source = self._confined_path(str(payload["source"]), self.inbox_path)
+        if source is None:
+            return {"error": f"source must be a relative path inside the CXA inbox ({self.inbox_path})"}
+        if not source.exists():
+            return {"error": f"Mailbox not found: {payload['source']}"}
+
+        emails_log = self.logs_path / "emails"
+        output_dir = self._confined_path(
+            str(payload.get("output_dir") or f"bulk-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}"), emails_log
+        )
+        if output_dir is None:
+            return {"error": f"output_dir must be a relative path inside {emails_log}"}
+        index = shared_index(self.memory) if payload.get("dedupe", True) else None
+        if index is None:
+            stats = route_inbox(
+                source, self.EMAIL_ROUTING, output_dir, workers=payload.get("workers"), format=payload.get("format")
+            )
+        else:
+            with index.lock:
+                index.refresh()
+                stats = route_inbox(
+                    source,
+                    self.EMAIL_ROUTING,
+                    output_dir,
+                    workers=payload.get("workers"),
+                    format=payload.get("format"),
+                    index=index
+                )
+                index.save()
+
+        self._log_session("email", {"action": "bulk", "source": str(source), **stats.as_dict()})
+
+        return {
+            "message": f"Routed {stats.messages} emails at {stats.messages_per_sec:.0f} messages/sec",
+            **stats.as_dict()
+        }
+
     # =========================================================================
     # CXA.PHONE - Phone communications
     # =========================================================================
@@ -368,7 +437,12 @@ def entry_point(request):
     if not command:
         return {"error": "Command required"}, 400
 
-    agent = CXAAgent(factory_id=factory_id)
+    agent = get_agent(CXAAgent, factory_id)
+
+    # Stream LLM output as newline-delimited JSON (chunked response)
+    if request_json.get("stream"):
+        return agent.stream_response(command, payload)
+
     result = agent.run(command, payload)
     return result
 
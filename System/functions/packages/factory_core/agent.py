@@ -1,8 +1,13 @@
 import os
 import sys
+import copy
 import json
+import queue
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import itertools
+import threading
+from typing import Dict, Any, Optional, List, Iterator, AsyncIterator, Callable, Tuple
 from datetime import datetime
 from pathlib import Path
 
@@ -11,7 +16,21 @@ lib_path = Path(__file__).parent.parent.parent.parent / "lib"
 if str(lib_path) not in sys.path:
     sys.path.insert(0, str(lib_path))
 
-from api_manager import APIManager, CompletionResult, UsageInfo, AGENT_MODEL_CONFIG
+from api_manager import APIManager, BatchRequest, CompletionResult, UsageInfo, AGENT_MODEL_CONFIG
+from tokens import PromptBudget, context_window, count_tokens, truncate_to_tokens
+
+from factory_core.documents import read_document
+from factory_core.log_pipeline import QueueLogHandler, StreamSink, log_event
+from factory_core.memory import MemoryStore, memory_store
+
+# Token limits for prompt context (see lib/tokens.py)
+GOVERNANCE_MAX_TOKENS = 1000
+CONTEXT_BUDGET_TOKENS = int(os.getenv("AGENT_CONTEXT_BUDGET_TOKENS", "16000"))  # Cost ceiling per prompt
+PROMPT_TEMPLATE_TOKENS = 1024  # Reserved for the instructions around packed context
+
+# Clock in the system prompt context; hour resolution so identical prompts
+# within the hour still hit the response cache
+SYSTEM_CLOCK_FORMAT = "%Y-%m-%dT%H:00Z"
 
 # Configure standard JSON logging for Cloud Functions
 class JsonFormatter(logging.Formatter):
@@ -20,7 +39,8 @@ class JsonFormatter(logging.Formatter):
             "severity": record.levelname,
             "message": record.getMessage(),
             "component": record.name,
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            # Records are formatted on the log writer thread, so use their creation time
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat() + "Z"
         }
         if hasattr(record, "agent_id"):
             json_log["agent_id"] = record.agent_id
@@ -28,8 +48,8 @@ class JsonFormatter(logging.Formatter):
             json_log["usage"] = record.usage
         return json.dumps(json_log)
 
-handler = logging.StreamHandler()
-handler.setFormatter(JsonFormatter())
+# Records are queued and written in batches by a background thread (see log_pipeline.py)
+handler = QueueLogHandler(StreamSink(sys.stderr, JsonFormatter()))
 logger = logging.getLogger("factory_core")
 logger.setLevel(logging.INFO)
 logger.addHandler(handler)
@@ -47,34 +67,80 @@ class BaseAgent:
         self.factory_id = factory_id or os.getenv("FACTORY_ID", "development")
         self.logger = logger.getChild(self.agent_id)
         self.governance = self._load_governance()
-        self.api_manager = APIManager(factory_id=self.factory_id)
-        self.session_usage = UsageInfo()  # Track usage for this session
+        self._system_prefix: Optional[str] = None
+        # A hedge's losing call is billed after its result was tracked; count it too
+        self.api_manager = APIManager(factory_id=self.factory_id, late_usage_sink=self._track_usage)
+        self._source_signatures = self._file_signatures()
+        self._reset_request_state()
         self.logger.info(f"Agent {self.agent_id} initialized", extra={"agent_id": self.agent_id})
 
-    def _load_governance(self) -> Dict[str, Any]:
-        """Loads ethics and mandate files."""
-        governance = {"mandate": "Serve the user with transparency and integrity."}
+    def _reset_request_state(self) -> None:
+        """Reset per-request state (usage totals, streaming hooks)."""
+        self.session_usage = UsageInfo()  # Track usage for this session
+        self._usage_lock = threading.Lock()
+        self._stream_sink: Optional[Callable[[Dict[str, Any]], None]] = None  # Set by run_stream()
+        self._stream_calls = itertools.count(1)
 
-        # Try to load from .ethics/ethics.md in the agent's directory
-        ethics_paths = [
+    def for_request(self) -> "BaseAgent":
+        """
+        Get a per-request view of this agent.
+
+        The copy shares governance, the APIManager and paths with this agent
+        but has its own session_usage, so concurrent requests on a warm
+        instance don't mix their usage totals.
+        """
+        agent = copy.copy(self)
+        agent._reset_request_state()
+        return agent
+
+    def _governance_paths(self) -> List[Path]:
+        """Ethics and mandate files, in load order."""
+        return [
             Path(__file__).parent.parent.parent.parent.parent / "C-Suites" / self.agent_id / ".ethics" / "ethics.md",
             Path(__file__).parent.parent.parent.parent.parent / ".mission" / "agent-governance.md",
         ]
 
-        for ethics_path in ethics_paths:
-            if ethics_path.exists():
-                try:
-                    with open(ethics_path, "r") as f:
-                        content = f.read()
-                        governance[ethics_path.stem] = content[:2000]  # Limit size
-                except Exception as e:
-                    self.logger.warning(f"Could not load governance from {ethics_path}: {e}")
+    def _file_signatures(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """(mtime_ns, size) of every file loaded at init (None if missing)."""
+        signatures = {}
+        for path in self._governance_paths() + self.api_manager.config_files:
+            try:
+                stat = path.stat()
+                signatures[str(path)] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signatures[str(path)] = None
+        return signatures
+
+    def is_stale(self) -> bool:
+        """Whether governance or factory config files changed since init."""
+        return self._file_signatures() != self._source_signatures
+
+    def _load_governance(self) -> Dict[str, Any]:
+        """Loads ethics and mandate files."""
+        governance = {"mandate": "Serve the user with transparency and integrity."}
+
+        # Try to load from .ethics/ethics.md in the agent's directory
+        for ethics_path in self._governance_paths():
+            try:
+                content = read_document(ethics_path)
+            except Exception as e:
+                self.logger.warning(f"Could not load governance from {ethics_path}: {e}")
+                continue
+            if content is not None:
+                governance[ethics_path.stem] = truncate_to_tokens(content, GOVERNANCE_MAX_TOKENS)
 
         return governance
 
-    def _get_system_prompt(self) -> str:
-        """Build the system prompt for this agent including governance."""
-        base_prompt = f"""You are the {self.role} ({self.agent_id}) agent in the CEO OpenSpec C-Suite.
+    def _get_system_prefix(self) -> str:
+        """
+        Stable part of the system prompt: role, mandate, rules and governance.
+
+        Built once per agent and identical on every call, so providers can
+        serve it from their prompt cache (APIManager adds cache_control
+        markers for models that need them).
+        """
+        if self._system_prefix is None:
+            prefix = f"""You are the {self.role} ({self.agent_id}) agent in the CEO OpenSpec C-Suite.
 
 Your core mandate: {self.governance.get('mandate', 'Serve with integrity.')}
 
@@ -84,12 +150,30 @@ You must:
 3. Log all decisions with clear rationale
 4. Escalate via RED PHONE if you detect ethical concerns
 5. Stay within your role's domain and defer to other C-Suite members for their areas
-
-Current context:
+"""
+            for name, content in self.governance.items():
+                if name != "mandate":
+                    prefix += f"\n## Governance: {name}\n{content}\n"
+            self._system_prefix = prefix
+        return self._system_prefix
+
+    def _get_system_context(self) -> str:
+        """Volatile part of the system prompt, sent after the cacheable prefix."""
+        return f"""Current context:
 - Factory ID: {self.factory_id}
-- Timestamp: {datetime.utcnow().isoformat()}Z
+- Timestamp: {datetime.utcnow().strftime(SYSTEM_CLOCK_FORMAT)}
 """
-        return base_prompt
+
+    def _get_system_prompt(self) -> str:
+        """Build the system prompt for this agent including governance."""
+        return self._get_system_prefix() + "\n" + self._get_system_context()
+
+    def _system_messages(self) -> List[Dict[str, str]]:
+        """The system prompt as two messages: the stable prefix, then the per-call context."""
+        return [
+            {"role": "system", "content": self._get_system_prefix()},
+            {"role": "system", "content": self._get_system_context()},
+        ]
 
     def run(self, command: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -98,33 +182,207 @@ Current context:
         self.logger.info(f"Received command: {command}", extra={"agent_id": self.agent_id})
 
         try:
-            handler = getattr(self, command.replace(".", "_"), None)
-            if not handler:
-                raise NotImplementedError(f"Command {command} not implemented for {self.agent_id}")
-
+            handler = self._get_handler(command)
             result = handler(payload)
+            return self._success_response(result)
 
-            # Include usage in response
-            response = {
-                "status": "success",
-                "agent": self.agent_id,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "data": result,
-                "usage": {
-                    "total_tokens": self.session_usage.total_tokens,
-                    "cost_usd": self.session_usage.cost_usd,
-                    "duration_ms": self.session_usage.duration_ms
-                }
-            }
-            return response
+        except Exception as e:
+            return self._error_response(command, e)
+
+    async def arun(self, command: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async entry point for agent execution.
+
+        Coroutine handlers are awaited directly; sync handlers run in a worker
+        thread so they don't block the event loop.
+        """
+        self.logger.info(f"Received command: {command}", extra={"agent_id": self.agent_id})
+
+        try:
+            handler = self._get_handler(command)
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler(payload)
+            else:
+                result = await asyncio.to_thread(handler, payload)
+            return self._success_response(result)
 
         except Exception as e:
-            self.logger.error(f"Error executing {command}: {str(e)}", extra={"agent_id": self.agent_id})
-            return {
-                "status": "error",
-                "agent": self.agent_id,
-                "error": str(e)
+            return self._error_response(command, e)
+
+    def run_stream(self, command: str, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Run a command, yielding LLM output while it is generated.
+
+        Every _think call inside the handler streams its completion. Yields
+        {"event": "delta", "call": n, "task": ..., "text": ...} for each chunk
+        (calls made in parallel are told apart by "call"), then a final
+        {"event": "result", "response": ...} holding what run() would return.
+        """
+        events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+
+        def work():
+            try:
+                events.put({"event": "result", "response": self.run(command, payload)})
+            finally:
+                self._stream_sink = None
+                events.put(None)
+
+        self._stream_sink = events.put
+        threading.Thread(target=work, name=f"{self.agent_id}-stream", daemon=True).start()
+
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield event
+
+    def stream_response(self, command: str, payload: Dict[str, Any]) -> Tuple[Iterator[str], int, Dict[str, str]]:
+        """
+        Cloud Function response that streams run_stream() as newline-delimited JSON.
+
+        Flask sends a generator body with chunked transfer encoding, so the
+        first tokens reach the caller as soon as the model produces them.
+        """
+        body = (json.dumps(event) + "\n" for event in self.run_stream(command, payload))
+        return body, 200, {"Content-Type": "application/x-ndjson", "Cache-Control": "no-cache"}
+
+    def _get_handler(self, command: str):
+        handler = getattr(self, command.replace(".", "_"), None)
+        if not handler:
+            raise NotImplementedError(f"Command {command} not implemented for {self.agent_id}")
+        return handler
+
+    def _success_response(self, result: Any) -> Dict[str, Any]:
+        # Include usage in response
+        return {
+            "status": "success",
+            "agent": self.agent_id,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "data": result,
+            "usage": {
+                "total_tokens": self.session_usage.total_tokens,
+                "cost_usd": self.session_usage.cost_usd,
+                "duration_ms": self.session_usage.duration_ms
             }
+        }
+
+    def _error_response(self, command: str, error: Exception) -> Dict[str, Any]:
+        self.logger.error(f"Error executing {command}: {str(error)}", extra={"agent_id": self.agent_id})
+        return {
+            "status": "error",
+            "agent": self.agent_id,
+            "error": str(error)
+        }
+
+    @property
+    def memory(self) -> MemoryStore:
+        """The MemoryStore for this agent's memory_path."""
+        return memory_store(self.memory_path)
+
+    def _log_session(self, log_type: str, data: Dict[str, Any], log_dir: Optional[Path] = None) -> bool:
+        """
+        Log a session to `<log_dir or self.logs_path>/<log_type>-<date>.jsonl`.
+
+        The entry is queued for the background log writer, so this returns
+        immediately; it returns False only if the entry was dropped because
+        the log queue was full.
+        """
+        return log_event(
+            log_dir or self.logs_path, log_type, data, agent=self.agent_id, factory_id=self.factory_id
+        )
+
+    def _prompt_budget(
+        self,
+        task_type: str = "agent_reasoning",
+        include_system: bool = True,
+        max_tokens: Optional[int] = None
+    ) -> PromptBudget:
+        """
+        Token budget for the context sections of a _think() prompt.
+
+        Sized to the smaller context window of the task's primary and fallback
+        models, minus the completion, the system prompt and the prompt
+        template, and capped at CONTEXT_BUDGET_TOKENS.
+
+        Example:
+            context = self._prompt_budget("critical_decision").add(
+                "business_plan", business_plan, priority=1
+            ).add("ceo_brief", ceo_brief or "No brief available", priority=2).pack()
+        """
+        routing = self.api_manager._get_routing(task_type)
+        config = routing.primary
+        if routing.fallback and context_window(routing.fallback.model) < context_window(config.model):
+            config = routing.fallback
+
+        reserved = PROMPT_TEMPLATE_TOKENS
+        if include_system:
+            reserved += count_tokens(self._get_system_prompt(), config.model)
+        return PromptBudget.for_model(
+            config.model, max_tokens or config.max_tokens, reserved, cap=CONTEXT_BUDGET_TOKENS
+        )
+
+    def _build_messages(self, prompt: str, include_system: bool = True) -> List[Dict[str, str]]:
+        messages = self._system_messages() if include_system else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        task_type: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> CompletionResult:
+        """Run a completion, streaming its chunks to run_stream() when one is active."""
+        sink = self._stream_sink
+        if sink is None:
+            return self.api_manager.complete_with_usage(
+                task=task_type,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                use_fallback=True,
+                agent=self.agent_id
+            )
+
+        call = next(self._stream_calls)
+        stream = self.api_manager.stream(
+            task=task_type,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_fallback=True,
+            agent=self.agent_id
+        )
+        for chunk in stream:
+            sink({"event": "delta", "call": call, "task": task_type, "text": chunk})
+        return stream.result
+
+    def _finish_thought(self, result: CompletionResult, log_usage: bool = True) -> str:
+        """Track usage for a completed LLM call and return its content (raises on failure)."""
+        # Track usage
+        self._track_usage(result.usage)
+
+        if not result.success:
+            self.logger.error(f"LLM call failed: {result.error}", extra={"agent_id": self.agent_id})
+            raise RuntimeError(f"LLM call failed: {result.error}")
+
+        if log_usage:
+            # Log the thinking
+            self.logger.info(
+                f"Thought complete",
+                extra={
+                    "agent_id": self.agent_id,
+                    "usage": {
+                        "tokens": result.usage.total_tokens,
+                        "cost": result.usage.cost_usd,
+                        "model": result.usage.model_used,
+                        "fallback": result.usage.fallback_used
+                    }
+                }
+            )
+
+        return result.content
 
     def _think(
         self,
@@ -149,42 +407,138 @@ Current context:
         """
         self.logger.info(f"Thinking ({task_type})...", extra={"agent_id": self.agent_id})
 
-        messages = []
-        if include_system:
-            messages.append({"role": "system", "content": self._get_system_prompt()})
-        messages.append({"role": "user", "content": prompt})
+        result = self._complete(self._build_messages(prompt, include_system), task_type, temperature, max_tokens)
+
+        return self._finish_thought(result)
+
+    async def _athink(
+        self,
+        prompt: str,
+        task_type: str = "agent_reasoning",
+        include_system: bool = True,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Async version of _think() (same arguments and return value)."""
+        self.logger.info(f"Thinking ({task_type})...", extra={"agent_id": self.agent_id})
 
-        result = self.api_manager.complete_with_usage(
+        result = await self.api_manager.acomplete_with_usage(
             task=task_type,
-            messages=messages,
+            messages=self._build_messages(prompt, include_system),
             temperature=temperature,
             max_tokens=max_tokens,
             use_fallback=True,
             agent=self.agent_id
         )
 
-        # Track usage
-        self._track_usage(result.usage)
+        return self._finish_thought(result)
 
-        if not result.success:
-            self.logger.error(f"LLM call failed: {result.error}", extra={"agent_id": self.agent_id})
-            raise RuntimeError(f"LLM call failed: {result.error}")
+    def _think_batch(
+        self,
+        prompts: List[str],
+        task_type: str = "agent_reasoning",
+        include_system: bool = True,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[int, CompletionResult], None]] = None
+    ) -> List[CompletionResult]:
+        """
+        Run independent prompts through APIManager.complete_batch().
+
+        Usage is tracked for every call. Unlike _think(), failures don't
+        raise: each prompt's CompletionResult is returned in order so callers
+        can keep the prompts that succeeded. on_result(index, result) is
+        called as each prompt finishes, so callers can act on early results.
+        """
+        self.logger.info(f"Thinking ({task_type}, batch of {len(prompts)})...", extra={"agent_id": self.agent_id})
+
+        batch = self.api_manager.complete_batch(
+            [
+                BatchRequest(
+                    task=task_type,
+                    messages=self._build_messages(prompt, include_system),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    agent=self.agent_id
+                )
+                for prompt in prompts
+            ],
+            max_concurrency=max_concurrency,
+            on_result=on_result
+        )
+
+        for result in batch.results:
+            self._track_usage(result.usage)
+            if not result.success:
+                self.logger.error(f"LLM call failed: {result.error}", extra={"agent_id": self.agent_id})
 
-        # Log the thinking
         self.logger.info(
-            f"Thought complete",
+            f"Batch complete",
             extra={
                 "agent_id": self.agent_id,
                 "usage": {
-                    "tokens": result.usage.total_tokens,
-                    "cost": result.usage.cost_usd,
-                    "model": result.usage.model_used,
-                    "fallback": result.usage.fallback_used
+                    "tokens": batch.usage.total_tokens,
+                    "cost": batch.usage.cost_usd,
+                    "model": batch.usage.model_used,
+                    "failed": len(batch.failed),
+                    "retries": batch.retries
                 }
             }
         )
+        return batch.results
 
-        return result.content
+    def _think_stream(
+        self,
+        prompt: str,
+        task_type: str = "agent_reasoning",
+        include_system: bool = True,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Streaming version of _think() (same arguments).
+
+        Yields text chunks as they arrive. Usage is tracked once the stream
+        ends; a failed call raises RuntimeError like _think().
+        """
+        self.logger.info(f"Thinking ({task_type}, streaming)...", extra={"agent_id": self.agent_id})
+
+        stream = self.api_manager.stream(
+            task=task_type,
+            messages=self._build_messages(prompt, include_system),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_fallback=True,
+            agent=self.agent_id
+        )
+        yield from stream
+
+        self._finish_thought(stream.result)
+
+    async def _athink_stream(
+        self,
+        prompt: str,
+        task_type: str = "agent_reasoning",
+        include_system: bool = True,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Async version of _think_stream() (same arguments)."""
+        self.logger.info(f"Thinking ({task_type}, streaming)...", extra={"agent_id": self.agent_id})
+
+        stream = self.api_manager.astream(
+            task=task_type,
+            messages=self._build_messages(prompt, include_system),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_fallback=True,
+            agent=self.agent_id
+        )
+        async for chunk in stream:
+            yield chunk
+
+        self._finish_thought(stream.result)
 
     def _think_with_history(
         self,
@@ -210,9 +564,27 @@ Current context:
         self.logger.info(f"Thinking with history ({task_type})...", extra={"agent_id": self.agent_id})
 
         if include_system:
-            messages = [{"role": "system", "content": self._get_system_prompt()}] + messages
+            messages = self._system_messages() + messages
 
-        result = self.api_manager.complete_with_usage(
+        result = self._complete(messages, task_type, temperature, max_tokens)
+
+        return self._finish_thought(result, log_usage=False)
+
+    async def _athink_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        task_type: str = "agent_reasoning",
+        include_system: bool = True,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Async version of _think_with_history() (same arguments and return value)."""
+        self.logger.info(f"Thinking with history ({task_type})...", extra={"agent_id": self.agent_id})
+
+        if include_system:
+            messages = self._system_messages() + messages
+
+        result = await self.api_manager.acomplete_with_usage(
             task=task_type,
             messages=messages,
             temperature=temperature,
@@ -221,21 +593,17 @@ Current context:
             agent=self.agent_id
         )
 
-        self._track_usage(result.usage)
-
-        if not result.success:
-            self.logger.error(f"LLM call failed: {result.error}", extra={"agent_id": self.agent_id})
-            raise RuntimeError(f"LLM call failed: {result.error}")
-
-        return result.content
+        return self._finish_thought(result, log_usage=False)
 
     def _track_usage(self, usage: UsageInfo) -> None:
         """Accumulate usage statistics for this session."""
-        self.session_usage.input_tokens += usage.input_tokens
-        self.session_usage.output_tokens += usage.output_tokens
-        self.session_usage.total_tokens += usage.total_tokens
-        self.session_usage.cost_usd += usage.cost_usd
-        self.session_usage.duration_ms += usage.duration_ms
+        with self._usage_lock:
+            self.session_usage.input_tokens += usage.input_tokens
+            self.session_usage.output_tokens += usage.output_tokens
+            self.session_usage.total_tokens += usage.total_tokens
+            self.session_usage.cached_tokens += usage.cached_tokens
+            self.session_usage.cost_usd += usage.cost_usd
+            self.session_usage.duration_ms += usage.duration_ms
 
     def get_usage_summary(self) -> Dict[str, Any]:
         """Get summary of usage for this session."""
@@ -244,6 +612,7 @@ Current context:
             "input_tokens": self.session_usage.input_tokens,
             "output_tokens": self.session_usage.output_tokens,
             "total_tokens": self.session_usage.total_tokens,
+            "cached_tokens": self.session_usage.cached_tokens,
             "cost_usd": round(self.session_usage.cost_usd, 6),
             "duration_ms": round(self.session_usage.duration_ms, 2)
         }
@@ -0,0 +1,182 @@
+"""
+Process-wide cache of governance and context documents.
+
+Agents read the same files on every command: governance (ethics.md,
+agent-governance.md), the CEO brief, the business plan (README.md) and
+the mission files. read_document() keeps their text in memory, keyed by
+path, and re-reads a file only when its mtime or size changes.
+
+This module provides:
+- DocumentCache, an LRU of file contents bounded by total size
+- Validation on every read with one stat() (edits are picked up at once)
+- Lazy loading; files over MMAP_THRESHOLD_BYTES are read through mmap
+- Hit/miss/reload counters
+
+Usage:
+    from factory_core.documents import read_document
+
+    plan = read_document(project_root / "README.md")  # None if missing
+    status = read_json_document(memory_path / "status.json", default={})
+"""
+
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("FACTORY_DOCUMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MMAP_THRESHOLD_BYTES = int(os.getenv("FACTORY_DOCUMENT_MMAP_BYTES", str(1024 * 1024)))
+
+PathLike = Union[str, Path]
+
+
+@dataclass
+class DocumentCacheStats:
+    """Counters for a DocumentCache."""
+    hits: int = 0
+    misses: int = 0  # First reads of a path
+    reloads: int = 0  # Re-reads after the file changed on disk
+    evictions: int = 0
+    mmap_reads: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "evictions": self.evictions,
+            "mmap_reads": self.mmap_reads,
+        }
+
+
+@dataclass
+class _Document:
+    text: str
+    signature: Tuple[int, int]  # (mtime_ns, size)
+
+
+class DocumentCache:
+    """
+    Caches file contents by path, validated against mtime and size.
+
+    Args:
+        max_bytes: Total size of cached files before the least recently used are dropped
+        mmap_threshold: Files at least this large are read through mmap (0 disables)
+    """
+
+    def __init__(self, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES, mmap_threshold: int = MMAP_THRESHOLD_BYTES):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self.stats = DocumentCacheStats()
+        self._documents: "OrderedDict[str, _Document]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def read(self, path: PathLike, default: Optional[str] = None) -> Optional[str]:
+        """
+        Get a file's text (UTF-8, universal newlines like open(path, "r")).
+
+        Returns default if the file doesn't exist; other read errors raise.
+        """
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            self.invalidate(key)
+            return default
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None and document.signature == signature:
+                self._documents.move_to_end(key)
+                self.stats.hits += 1
+                return document.text
+
+        text = self._load(key, stat.st_size)
+
+        with self._lock:
+            if document is None:
+                self.stats.misses += 1
+            else:
+                self.stats.reloads += 1
+            self._store(key, _Document(text, signature))
+        return text
+
+    def read_json(self, path: PathLike, default: Any = None) -> Any:
+        """Parse a JSON file (a fresh object on every call, so callers may modify it)."""
+        text = self.read(path)
+        if text is None:
+            return default
+        return json.loads(text)
+
+    def _load(self, path: str, size: int) -> str:
+        with open(path, "rb") as f:
+            if self.mmap_threshold and size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    data = mapped[:]
+                with self._lock:
+                    self.stats.mmap_reads += 1
+            else:
+                data = f.read()
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+    def _store(self, key: str, document: _Document) -> None:
+        """Insert or replace an entry and evict down to max_bytes (call with the lock held)."""
+        old = self._documents.pop(key, None)
+        if old is not None:
+            self._bytes -= old.signature[1]
+        if document.signature[1] > self.max_bytes:
+            return
+        self._documents[key] = document
+        self._bytes += document.signature[1]
+        while self._bytes > self.max_bytes:
+            _, evicted = self._documents.popitem(last=False)
+            self._bytes -= evicted.signature[1]
+            self.stats.evictions += 1
+
+    def invalidate(self, path: Optional[PathLike] = None) -> None:
+        """Drop one path, or everything when path is None."""
+        with self._lock:
+            if path is None:
+                self._documents.clear()
+                self._bytes = 0
+                return
+            document = self._documents.pop(os.path.abspath(path), None)
+            if document is not None:
+                self._bytes -= document.signature[1]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats.as_dict(), "documents": len(self._documents), "bytes": self._bytes}
+
+
+# =============================================================================
+# Process-wide default cache
+# =============================================================================
+
+_default_cache: Optional[DocumentCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    """Get the process-wide DocumentCache shared by all agents."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DocumentCache()
+        return _default_cache
+
+
+def read_document(path: PathLike, default: Optional[str] = None) -> Optional[str]:
+    """Read a file through the process-wide cache (default if it doesn't exist)."""
+    return get_document_cache().read(path, default)
+
+
+def read_json_document(path: PathLike, default: Any = None) -> Any:
+    """Parse a JSON file through the process-wide cache (default if it doesn't exist)."""
+    return get_document_cache().read_json(path, default)
@@ -0,0 +1,357 @@
+"""
+Thread and near-duplicate index for inbound email.
+
+Reply chains and repeated sends used to be routed and logged once per
+message. EmailIndex remembers recent messages by Message-ID and by a
+MinHash signature of their normalized subject and body, so each new
+message is checked in constant time before it is routed.
+
+This module provides:
+- signature(), a MinHash of the word 3-grams in the subject (reply prefixes
+  removed) and body (quoted lines removed)
+- EmailIndex.lookup(): the message's thread (from In-Reply-To/References)
+  with the routing already chosen for it, and the earlier message it
+  duplicates, if any (same Message-ID, or the same sender and at least
+  NEAR_DUPLICATE_SIMILARITY estimated 3-gram overlap)
+- EmailIndex.add(), recording a message and its thread's routing
+- A bounded size: the oldest messages are evicted past max_messages
+  (CXA_EMAIL_INDEX_SIZE), and threads go with their last message
+- load()/save() through a MemoryStore (`email-index` records in CXA
+  memory), so the index survives between invocations. save() appends the
+  messages added since the last save as a new segment record instead of
+  rewriting the index, so concurrent savers don't lose each other's
+  messages; past SEGMENT_LIMIT segments, it compacts them into one
+- shared_index(), one warm index per store for the process; refresh()
+  reads only the segments saved since it last did, so routing one message
+  doesn't reload the index
+
+Signatures are split into bands, and only messages sharing a band are
+compared (locality-sensitive hashing), so a lookup doesn't scan the index.
+Messages shorter than MIN_SHINGLES 3-grams are only matched by Message-ID;
+"Thanks!" twice is not a duplicate.
+
+Usage:
+    from factory_core.email_index import shared_index
+
+    index = shared_index(agent.memory)
+    with index.lock:
+        index.refresh()
+        match = index.lookup(email)
+        if match.duplicate_of is None:
+            routing = match.routing or route(email)
+            index.add(email, routing, match)
+            index.save()
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parseaddr
+from typing import Any, Dict, List, Optional, Set
+
+from factory_core.memory import MemoryStore
+
+INDEX_KIND = "email-index"
+EMAIL_INDEX_SIZE = int(os.getenv("CXA_EMAIL_INDEX_SIZE", "10000"))
+NEAR_DUPLICATE_SIMILARITY = 0.7
+MIN_SHINGLES = 8
+SIGNATURE_TOKENS = 400  # Leading words hashed; enough to tell messages apart
+SEGMENT_LIMIT = 64  # Saved segments before save() compacts them into one
+
+# 32 hashes in 8 bands of 4: messages with 0.7 overlap share a band ~90% of the time
+_HASHES = 32
+_BAND_ROWS = 4
+_VALUE_HEX = 4  # Each hash keeps 16 bits, so a signature is 128 hex characters
+_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (rng.randrange(1, _PRIME), rng.randrange(_PRIME))
+    for rng in [random.Random(2147483647)] for _ in range(_HASHES)
+]
+
+_REPLY_PREFIX = re.compile(r"^\s*(?:(?:re|fwd?|aw|sv)\s*(?:\[\d+\])?\s*:\s*)+", re.IGNORECASE)
+_QUOTE_HEADER = re.compile(r"^on\b.*\bwrote:$", re.IGNORECASE)
+_WORD = re.compile(r"\w+")
+
+
+def normalize_subject(subject: Optional[str]) -> str:
+    """The subject without Re:/Fwd: prefixes, lowercased."""
+    return _REPLY_PREFIX.sub("", subject or "").strip().lower()
+
+
+def _tokens(subject: Optional[str], body: Optional[str]) -> List[str]:
+    lines = [
+        line for line in (body or "").splitlines()
+        if not line.lstrip().startswith(">") and not _QUOTE_HEADER.match(line.strip())
+    ]
+    text = normalize_subject(subject) + "\n" + "\n".join(lines)
+    return _WORD.findall(text.lower())[:SIGNATURE_TOKENS]
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def signature(subject: Optional[str], body: Optional[str]) -> Optional[str]:
+    """MinHash signature (hex) of the normalized subject and body, or None if it is too short."""
+    tokens = _tokens(subject, body)
+    hashes = {_hash(" ".join(tokens[i:i + 3])) for i in range(len(tokens) - 2)}
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    return "".join(
+        f"{min((a * value + b) % _PRIME for value in hashes) & 0xFFFF:04x}"
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(first: str, second: str) -> float:
+    """Estimated 3-gram overlap (Jaccard similarity) of two signatures."""
+    same = sum(first[i:i + _VALUE_HEX] == second[i:i + _VALUE_HEX] for i in range(0, len(first), _VALUE_HEX))
+    return same / _HASHES
+
+
+def _bands(value: str) -> List[str]:
+    width = _BAND_ROWS * _VALUE_HEX
+    return [value[i:i + width] for i in range(0, len(value), width)]
+
+
+def _sender(message: Dict[str, Any]) -> str:
+    return parseaddr(message.get("from") or "")[1].lower()
+
+
+def content_key(message: Dict[str, Any]) -> str:
+    """Stand-in Message-ID for messages without one: same sender and text, same key."""
+    text = " ".join(_tokens(message.get("subject"), message.get("body")))
+    return f"<{_hash(text):016x}.{_sender(message)}>"
+
+
+_segment_sequence = itertools.count()
+
+
+def _segment_key() -> str:
+    """A new segment's key: unique across processes, and sorting in write order."""
+    return f"{time.time_ns():020d}-{os.getpid()}-{next(_segment_sequence)}"
+
+
+def _references(message: Dict[str, Any]) -> List[str]:
+    references = message.get("references") or []
+    if isinstance(references, str):
+        references = references.split()
+    return [str(reference).strip() for reference in references if str(reference).strip()]
+
+
+@dataclass
+class IndexMatch:
+    """What the index knows about a message, from EmailIndex.lookup()."""
+    key: str  # Message-ID, or a stand-in derived from the sender and text
+    signature: Optional[str]
+    thread_id: str
+    routing: Optional[Dict[str, Any]] = None  # Routing already chosen for the thread
+    duplicate_of: Optional[str] = None
+
+
+class EmailIndex:
+    """
+    Recent messages by Message-ID, thread and signature.
+
+    Not thread-safe: hold `lock` around a refresh, lookup, add and save.
+
+    Args:
+        store: Where save() persists the index (None keeps it in memory only)
+        max_messages: Messages remembered before the oldest are evicted
+    """
+
+    def __init__(self, store: Optional[MemoryStore] = None, max_messages: int = EMAIL_INDEX_SIZE):
+        self.store = store
+        self.max_messages = max_messages
+        # key -> [thread_id, signature, sender], oldest first
+        self._messages: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._bands: List[Dict[str, Set[str]]] = [{} for _ in range(_HASHES // _BAND_ROWS)]
+        # thread_id -> {"routing": {...}, "messages": count}
+        self._threads: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[str] = []  # Keys added since the last save()
+        self._segments: List[Optional[str]] = []  # Saved segments this index holds the messages of
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, store: MemoryStore, max_messages: int = EMAIL_INDEX_SIZE) -> "EmailIndex":
+        """The index saved in store, or an empty one."""
+        index = cls(store, max_messages)
+        index.refresh()
+        return index
+
+    def refresh(self) -> int:
+        """
+        Read the segments saved (by this or another process) that this index
+        hasn't seen, oldest first. Returns how many were read.
+
+        Only the segment keys are listed otherwise, so an up-to-date index
+        refreshes without reading any records.
+        """
+        if self.store is None:
+            return 0
+        present = self.store.keys(INDEX_KIND)
+        seen = set(self._segments)
+        # Segment keys sort in write order; the unkeyed record is the pre-segment layout
+        new = sorted((key for key in present if key not in seen), key=lambda key: key or "")
+        stored = set(present)
+        self._segments = [key for key in self._segments if key in stored]
+        for key in new:
+            record = self.store.get(INDEX_KIND, key)
+            if record is None:
+                continue  # Compacted away since it was listed
+            self._merge(record.json())
+            self._segments.append(key)
+        return len(new)
+
+    def _merge(self, data: Dict[str, Any]) -> None:
+        """Add a saved segment's messages that the index doesn't have."""
+        routings = data.get("threads", {})
+        for key, thread_id, value, sender in data.get("messages", [])[-self.max_messages:]:
+            if key not in self._messages:
+                self._insert(key, thread_id, value, sender, routings.get(thread_id))
+        while len(self._messages) > self.max_messages:
+            self._evict()
+
+    def save(self) -> None:
+        """
+        Persist the messages added since the last save() as a new segment.
+
+        Saved segments are never rewritten, so another process saving the
+        same index at the same time can't lose these messages (or lose its
+        own). Once there would be more than SEGMENT_LIMIT segments, the
+        whole index is written as one segment instead, and the segments it
+        was loaded from are deleted.
+        """
+        if self.store is None or not self._pending:
+            return
+        compact = len(self._segments) >= SEGMENT_LIMIT
+        keys = list(self._messages) if compact else [key for key in self._pending if key in self._messages]
+        thread_ids = {self._messages[key][0] for key in keys}
+        data = {
+            "messages": [[key, *self._messages[key]] for key in keys],
+            "threads": {thread_id: self._threads[thread_id]["routing"] for thread_id in thread_ids},
+        }
+        segment = _segment_key()
+        self.store.put(INDEX_KIND, json.dumps(data, separators=(",", ":")), key=segment, format="json")
+        if compact:
+            for old in self._segments:
+                self.store.delete(INDEX_KIND, old)
+            self._segments = []
+        self._segments.append(segment)
+        self._pending = []
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def lookup(self, message: Dict[str, Any]) -> IndexMatch:
+        """
+        Check a message against the index without recording it.
+
+        Args:
+            message: {"message_id", "from", "subject", "body", "in_reply_to", "references"};
+                     a precomputed "signature" (and "content_key") is used as is
+        """
+        value = message["signature"] if "signature" in message else signature(
+            message.get("subject"), message.get("body")
+        )
+        sender = _sender(message)
+        key = str(message.get("message_id") or message.get("id") or "").strip()
+        if not key:
+            key = message.get("content_key") or content_key(message)
+
+        # The newest ancestor we know decides the thread; otherwise the chain's root
+        ancestors = _references(message)
+        if message.get("in_reply_to"):
+            ancestors.append(str(message["in_reply_to"]).strip())
+        thread_id = next(
+            (self._messages[ancestor][0] for ancestor in reversed(ancestors) if ancestor in self._messages),
+            ancestors[0] if ancestors else key
+        )
+        thread = self._threads.get(thread_id)
+        match = IndexMatch(key, value, thread_id, routing=thread["routing"] if thread else None)
+
+        if key in self._messages:
+            match.duplicate_of = key
+        elif value is not None:
+            match.duplicate_of = self._near_duplicate(value, sender, set(ancestors))
+        return match
+
+    def _near_duplicate(self, value: str, sender: str, ancestors: Set[str]) -> Optional[str]:
+        for band, buckets in zip(_bands(value), self._bands):
+            for candidate in buckets.get(band, ()):
+                # A reply quoting its parent isn't a duplicate of it
+                _, other, other_sender = self._messages[candidate]
+                if (other_sender == sender and candidate not in ancestors
+                        and similarity(value, other) >= NEAR_DUPLICATE_SIMILARITY):
+                    return candidate
+        return None
+
+    def add(self, message: Dict[str, Any], routing: Dict[str, Any], match: Optional[IndexMatch] = None) -> IndexMatch:
+        """
+        Record a message and, if its thread has none yet, the thread's routing.
+
+        Args:
+            message: As for lookup()
+            routing: The routing chosen for the message
+            match: lookup()'s result for the message, to avoid repeating it
+        """
+        match = match or self.lookup(message)
+        if match.key in self._messages:
+            self._messages.move_to_end(match.key)
+            return match
+        self._insert(match.key, match.thread_id, match.signature, _sender(message), match.routing or routing)
+        self._pending.append(match.key)
+        while len(self._messages) > self.max_messages:
+            self._evict()
+        if len(self._pending) > 2 * self.max_messages:
+            # Unsaved but already evicted; keeps a long unsaved run bounded
+            self._pending = [key for key in self._pending if key in self._messages]
+        return match
+
+    def _insert(self, key: str, thread_id: str, value: Optional[str], sender: str,
+                routing: Optional[Dict[str, Any]]) -> None:
+        self._messages[key] = [thread_id, value, sender]
+        thread = self._threads.setdefault(thread_id, {"routing": routing, "messages": 0})
+        thread["messages"] += 1
+        thread["routing"] = thread["routing"] or routing
+        if value is not None:
+            for band, buckets in zip(_bands(value), self._bands):
+                buckets.setdefault(band, set()).add(key)
+
+    def _evict(self) -> None:
+        key, (thread_id, value, _) = self._messages.popitem(last=False)
+        thread = self._threads[thread_id]
+        thread["messages"] -= 1
+        if thread["messages"] <= 0:
+            del self._threads[thread_id]
+        if value is not None:
+            for band, buckets in zip(_bands(value), self._bands):
+                bucket = buckets[band]
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band]
+
+
+_shared: Dict[MemoryStore, EmailIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_index(store: MemoryStore, max_messages: int = EMAIL_INDEX_SIZE) -> EmailIndex:
+    """
+    The process-wide index for a store, kept warm between calls.
+
+    Call refresh() under its lock before using it, to pick up segments
+    other processes saved.
+    """
+    with _shared_lock:
+        index = _shared.get(store)
+        if index is None:
+            index = _shared[store] = EmailIndex(store, max_messages)
+        return index
@@ -0,0 +1,207 @@
+"""
+Materialized gate and position state for a factory.
+
+The CMO validation gate and the set of briefed positions used to be
+recomputed from memory files on every read: the CTO searched the newest
+validation file for PROCEED/ITERATE/PIVOT, and ceo.report checked each
+position's brief. Writers now record what they did in one state record,
+and readers look it up.
+
+This module provides:
+- FactoryState, a JSON record (`factory-state` in the CEO's memory) with
+  the gate decision and briefed positions
+- Writers: record_validation() (cmo.validate), record_approval_request()
+  (cmo.approve) and record_briefs() (ceo.propagate)
+- Readers: gate(), position() and positions(), which fall back to the memory files when
+  the state has no entry yet (older factories) or a file was written after
+  the entry (hand edits, files copied in)
+- parse_gate_decision(), which reads the "## GATE DECISION:" line
+
+Usage:
+    from factory_core.factory_state import factory_state
+
+    state = factory_state(project_root)
+    state.record_validation("PROCEED", record.location)
+    state.gate()["decision"]  # "PROCEED"
+"""
+
+import copy
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from factory_core.memory import MemoryStore, memory_store
+
+STATE_KIND = "factory-state"
+GATE_DECISIONS = ("PROCEED", "ITERATE", "PIVOT")
+UNKNOWN_DECISION = "UNKNOWN"
+
+_DECISION_LINE = re.compile(r"^#+\s*GATE DECISION:\s*(PROCEED|ITERATE|PIVOT)\b", re.MULTILINE | re.IGNORECASE)
+
+# Writers record their time just after writing the file; allow for clock rounding
+_CLOCK_SLACK = timedelta(milliseconds=1)
+
+PathLike = Union[str, Path]
+
+
+def parse_gate_decision(content: str) -> str:
+    """The decision on a validation record's "## GATE DECISION:" line, or UNKNOWN."""
+    match = _DECISION_LINE.search(content or "")
+    return match.group(1).upper() if match else UNKNOWN_DECISION
+
+
+def _written_after(modified: Optional[datetime], recorded: Optional[str]) -> bool:
+    """Whether a memory file (modified) changed after a state entry's timestamp (recorded)."""
+    if modified is None:
+        return False
+    if not recorded:
+        return True
+    return modified > datetime.fromisoformat(recorded.rstrip("Z")) + _CLOCK_SLACK
+
+
+def position_memory(project_root: PathLike, position: str) -> MemoryStore:
+    """The MemoryStore of a C-Suite position (C-Suites/[POSITION]/.[pos]/memory)."""
+    return memory_store(Path(project_root) / "C-Suites" / position / f".{position.lower()}" / "memory")
+
+
+class FactoryState:
+    """
+    Gate and position state for one project root.
+
+    Writes are read-modify-write under a process lock; each is one atomic
+    MemoryStore put. This assumes one writing process at a time (each agent
+    command runs in its own process, one after another): two processes
+    writing at once can lose one update, which rebuild() repairs.
+
+    An entry is used unless its memory file was written after it, so hand
+    edits are picked up; rebuild() derives the whole state again from the
+    memory files. The parsed record is kept until the state file changes,
+    so a read costs one stat rather than a JSON parse.
+
+    Args:
+        project_root: The factory's project root (the directory holding C-Suites/)
+    """
+
+    def __init__(self, project_root: PathLike):
+        self.project_root = Path(project_root)
+        self.store = position_memory(self.project_root, "CEO")
+        self._lock = threading.Lock()
+        self._cached: Optional[Tuple[Optional[datetime], Dict[str, Any]]] = None  # (modified_at, state)
+
+    def load(self) -> Dict[str, Any]:
+        """The whole state ({"gate": {...}, "positions": {...}}), empty if never written."""
+        modified = self.store.modified_at(STATE_KIND)
+        cached = self._cached
+        if cached is None or cached[0] != modified:
+            state = self.store.get_json(STATE_KIND, default={}) if modified is not None else {}
+            cached = self._cached = (modified, state)
+        return copy.deepcopy(cached[1])
+
+    def _update(self, section: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            state = self.load()
+            state.setdefault(section, {}).update(changes)
+            state["updated_at"] = datetime.utcnow().isoformat() + "Z"
+            self.store.put_json(STATE_KIND, state)
+            self._cached = None
+        return state
+
+    # Writers
+
+    def record_validation(self, decision: str, source: str) -> None:
+        """Record a CMO gate decision and the validation record it came from."""
+        self._update("gate", {
+            "decision": decision,
+            "source": source,
+            "validated_at": datetime.utcnow().isoformat() + "Z",
+        })
+
+    def record_approval_request(self, source: str) -> None:
+        """Record that the CMO asked the founder to approve CTO activation."""
+        self._update("gate", {
+            "approval_requested_at": datetime.utcnow().isoformat() + "Z",
+            "approval_request": source,
+        })
+
+    def record_briefs(self, positions: Iterable[str]) -> None:
+        """Record that positions received a CEO brief."""
+        now = datetime.utcnow().isoformat() + "Z"
+        self._update("positions", {position: {"briefed_at": now} for position in positions})
+
+    # Readers
+
+    def gate(self) -> Dict[str, Any]:
+        """
+        The CMO gate: {"decision", "source", "validated_at", ...}.
+
+        Falls back to the CMO's latest validation record when no decision
+        has been recorded, or when a validation record was written after it.
+        """
+        gate = self.load().get("gate", {})
+        cmo = position_memory(self.project_root, "CMO")
+        validated = cmo.last_modified("validation-results")
+        if "decision" in gate and not _written_after(validated, gate.get("validated_at")):
+            return gate
+        latest = cmo.latest("validation-results")
+        if latest is None:
+            return {**gate, "decision": UNKNOWN_DECISION}
+        return {
+            **gate,
+            "decision": parse_gate_decision(latest.content),
+            "source": latest.location,
+            "validated_at": latest.created_at.isoformat() + "Z",
+        }
+
+    def position(self, position: str) -> Optional[Dict[str, Any]]:
+        """
+        A position's state ({"briefed_at": ...}), or None if it hasn't been briefed.
+
+        Falls back to the position's ceo-brief record when it was written
+        after the position's recorded briefing. An unbriefed position's
+        brief counts only if written after the last recorded propagation.
+        """
+        return self.positions([position])[position]
+
+    def positions(self, positions: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """position() for several positions, reading the state once."""
+        recorded = self.load().get("positions", {})
+        last_recorded = max((entry["briefed_at"] for entry in recorded.values()), default=None)
+        states = {}
+        for position in positions:
+            entry = recorded.get(position)
+            written = position_memory(self.project_root, position).modified_at("ceo-brief")
+            if _written_after(written, entry["briefed_at"] if entry is not None else last_recorded):
+                entry = {"briefed_at": written.isoformat() + "Z"}
+            states[position] = entry
+        return states
+
+    def rebuild(self, positions: Iterable[str]) -> Dict[str, Any]:
+        """Derive the state from the memory files, replacing what was recorded."""
+        with self._lock:
+            self.store.delete(STATE_KIND)
+            state: Dict[str, Any] = {"gate": self.gate()}
+            state["positions"] = {
+                position: entry for position, entry in self.positions(positions).items()
+                if entry is not None
+            }
+            state["updated_at"] = datetime.utcnow().isoformat() + "Z"
+            self.store.put_json(STATE_KIND, state)
+            self._cached = None
+        return state
+
+
+_states: Dict[str, FactoryState] = {}
+_states_lock = threading.Lock()
+
+
+def factory_state(project_root: PathLike) -> FactoryState:
+    """Get the shared FactoryState for a project root."""
+    key = os.path.abspath(project_root)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = FactoryState(key)
+        return state
@@ -0,0 +1,342 @@
+"""
+Bulk inbox routing for the CXA agent.
+
+A morning backlog is thousands of messages; routing them one request at a
+time through cxa.email is too slow. route_inbox() streams messages from a
+local mailbox, routes them with a compiled rule set across a process pool,
+and writes decisions as it goes.
+
+This module provides:
+- EmailRouter, keyword routing rules compiled into one KeywordMatcher
+  (rules are tried in order; the first rule with a match wins)
+- iter_raw_messages(), streaming raw messages from an mbox file, a Maildir
+  or a JSONL file (one {"from", "subject", "body", ...} object per line)
+- route_inbox(), which parses and routes in worker processes, appends each
+  decision to `decisions.jsonl`, writes one priority-ordered queue per agent
+  (`queues/<AGENT>.jsonl`) and reports throughput; with an EmailIndex,
+  replies follow their thread's routing and near-duplicates are skipped
+
+Usage:
+    from factory_core.inbox import EmailRouter, route_inbox
+
+    router = EmailRouter(CXAAgent.EMAIL_ROUTING)
+    router.route({"subject": "Legal notice", "body": "..."})
+    stats = route_inbox("backlog.mbox", CXAAgent.EMAIL_ROUTING, output_dir, workers=4)
+    stats.messages_per_sec
+"""
+
+import email
+import email.policy
+import json
+import mailbox
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from email.message import Message
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from factory_core.email_index import EmailIndex, content_key, signature
+from factory_core.keywords import KeywordMatcher
+
+# (keywords, agent, priority), as in CXAAgent.EMAIL_ROUTING
+RoutingRule = Tuple[Sequence[str], str, str]
+# ("jsonl", line) or ("rfc822", message bytes)
+RawMessage = Tuple[str, Union[str, bytes]]
+
+PRIORITY_ORDER = {"critical": 0, "high": 1, "normal": 2, "low": 3}
+BULK_CHUNK_SIZE = int(os.getenv("CXA_BULK_CHUNK_SIZE", "200"))
+BULK_BODY_CHARS = 20_000  # Body text routed per message; signatures and quoted history rarely matter
+
+PathLike = Union[str, Path]
+
+
+class EmailRouter:
+    """
+    Routes emails to agents by keyword rules.
+
+    Args:
+        rules: (keywords, agent, priority) rules, most important first
+    """
+
+    def __init__(self, rules: Sequence[RoutingRule]):
+        self.rules = [(list(keywords), agent, priority) for keywords, agent, priority in rules]
+        self.matcher = KeywordMatcher.from_groups(
+            (index, keywords) for index, (keywords, _, _) in enumerate(self.rules)
+        )
+
+    def route(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """{"route_to", "reason", "priority"}; HUMAN when no rule matches."""
+        match = self.matcher.best(f"{message.get('subject') or ''} {message.get('body') or ''}")
+        if match is None:
+            return {"route_to": "HUMAN", "reason": "Could not determine routing", "priority": "normal"}
+        keywords, agent, priority = self.rules[match.label]
+        return {"route_to": agent, "reason": f"Keyword match: {keywords[0]}", "priority": priority}
+
+
+# =============================================================================
+# Sources
+# =============================================================================
+
+def detect_format(path: PathLike) -> str:
+    """"maildir", "jsonl" or "mbox", from the path's layout and extension."""
+    path = Path(path)
+    if path.is_dir():
+        return "maildir"
+    if path.suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "mbox"
+
+
+def iter_raw_messages(path: PathLike, format: Optional[str] = None) -> Iterator[RawMessage]:
+    """
+    Stream raw messages from a mailbox without parsing them.
+
+    Parsing happens in route_inbox()'s workers, so this loop only does I/O.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    format = format or detect_format(path)
+    if format == "jsonl":
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield ("jsonl", line)
+    elif format in ("mbox", "maildir"):
+        box = mailbox.mbox(str(path), create=False) if format == "mbox" else mailbox.Maildir(str(path), create=False)
+        try:
+            for key in box.iterkeys():
+                yield ("rfc822", box.get_bytes(key))
+        finally:
+            box.close()
+    else:
+        raise ValueError(f"Unknown mailbox format: {format}")
+
+
+def _body_text(message: Message) -> str:
+    """The first text/plain part, decoded."""
+    for part in message.walk() if message.is_multipart() else [message]:
+        if part.get_content_type() == "text/plain" and not part.is_attachment():
+            try:
+                return part.get_content()
+            except (LookupError, UnicodeDecodeError):
+                payload = part.get_payload(decode=True) or b""
+                return payload.decode("utf-8", errors="replace")
+    return ""
+
+
+def parse_message(raw: RawMessage) -> Dict[str, Any]:
+    """Turn a raw message into {"message_id", "from", "subject", "body", "in_reply_to", "references"}."""
+    kind, data = raw
+    if kind == "jsonl":
+        message = json.loads(data)
+        return {
+            "message_id": message.get("message_id") or message.get("id"),
+            "from": message.get("from", ""),
+            "subject": message.get("subject", ""),
+            "body": message.get("body", ""),
+            "in_reply_to": message.get("in_reply_to"),
+            "references": message.get("references", []),
+        }
+    message = email.message_from_bytes(data, policy=email.policy.default)
+    return {
+        "message_id": str(message.get("Message-ID", "")).strip() or None,
+        "from": str(message.get("From", "")),
+        "subject": str(message.get("Subject", "")),
+        "body": _body_text(message),
+        "in_reply_to": str(message.get("In-Reply-To", "")).strip() or None,
+        "references": str(message.get("References", "")).split(),
+    }
+
+
+# =============================================================================
+# Bulk routing
+# =============================================================================
+
+_worker_router: Optional[EmailRouter] = None
+_worker_threads = False
+
+
+def _init_worker(rules: Sequence[RoutingRule], threads: bool = False) -> None:
+    """Compile the rules once per worker process."""
+    global _worker_router, _worker_threads
+    _worker_router = EmailRouter(rules)
+    _worker_threads = threads
+
+
+def _route_chunk(chunk: List[Tuple[int, RawMessage]]) -> List[Dict[str, Any]]:
+    """Parse and route a chunk of (sequence, raw message); runs in a worker."""
+    decisions = []
+    for seq, raw in chunk:
+        try:
+            message = parse_message(raw)
+        except Exception as e:
+            decisions.append({"seq": seq, "error": f"Unparseable message: {e}", "route_to": "HUMAN", "priority": "normal"})
+            continue
+        message["body"] = (message.get("body") or "")[:BULK_BODY_CHARS]
+        decision = {
+            "seq": seq,
+            "message_id": message["message_id"],
+            "from": message["from"],
+            "subject": message["subject"],
+            **_worker_router.route(message),
+        }
+        if _worker_threads:
+            # What the parent's index lookup needs, so bodies stay in the worker
+            decision["in_reply_to"] = message["in_reply_to"]
+            decision["references"] = message["references"]
+            decision["signature"] = signature(message["subject"], message["body"])
+            if not message["message_id"]:
+                decision["content_key"] = content_key(message)
+        decisions.append(decision)
+    return decisions
+
+
+def _apply_index(index: EmailIndex, decision: Dict[str, Any], stats: "BulkRoutingStats") -> bool:
+    """Check a decision against the index; False if it is a duplicate and shouldn't be queued."""
+    match = index.lookup(decision)
+    for field_name in ("signature", "content_key", "in_reply_to", "references"):
+        decision.pop(field_name, None)
+    decision["thread_id"] = match.thread_id
+    if match.duplicate_of is not None:
+        decision["duplicate_of"] = match.duplicate_of
+        stats.duplicates += 1
+        return False
+    if match.routing is not None:
+        decision.update(match.routing, reason=f"Thread: {match.thread_id}")
+        stats.threaded += 1
+    index.add(decision, {key: decision[key] for key in ("route_to", "reason", "priority")}, match)
+    return True
+
+
+def _chunks(raw_messages: Iterable[RawMessage], size: int) -> Iterator[List[Tuple[int, RawMessage]]]:
+    chunk: List[Tuple[int, RawMessage]] = []
+    for seq, raw in enumerate(raw_messages):
+        chunk.append((seq, raw))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class BulkRoutingStats:
+    """Result of a route_inbox() run."""
+    messages: int = 0
+    errors: int = 0  # Messages that could not be parsed (routed to HUMAN)
+    duplicates: int = 0  # Skipped as duplicates of an indexed message
+    threaded: int = 0  # Routed like the rest of their thread
+    seconds: float = 0.0
+    workers: int = 0
+    by_agent: Dict[str, int] = field(default_factory=dict)
+    decisions_path: str = ""
+    queue_paths: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def messages_per_sec(self) -> float:
+        return self.messages / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "errors": self.errors,
+            "duplicates": self.duplicates,
+            "threaded": self.threaded,
+            "seconds": round(self.seconds, 3),
+            "messages_per_sec": round(self.messages_per_sec, 1),
+            "workers": self.workers,
+            "by_agent": dict(self.by_agent),
+            "decisions_path": self.decisions_path,
+            "queue_paths": dict(self.queue_paths),
+        }
+
+
+def route_inbox(
+    source: Union[PathLike, Iterable[RawMessage]],
+    rules: Sequence[RoutingRule],
+    output_dir: PathLike,
+    workers: Optional[int] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    format: Optional[str] = None,
+    index: Optional[EmailIndex] = None
+) -> BulkRoutingStats:
+    """
+    Route every message in a mailbox.
+
+    Decisions are appended to `<output_dir>/decisions.jsonl` as each chunk
+    finishes, in source order. When the source is exhausted, one queue per
+    agent is written to `<output_dir>/queues/<AGENT>.jsonl`, ordered by
+    priority (critical first) and then by arrival.
+
+    With an index, each decision is checked against it in source order:
+    duplicates are logged with "duplicate_of" but not queued, and replies
+    take their thread's routing. The caller saves the index.
+
+    Args:
+        source: Mailbox path (mbox, Maildir or JSONL) or an iterable of raw messages
+        rules: (keywords, agent, priority) routing rules
+        output_dir: Where decisions and queues are written
+        workers: Worker processes (default: CPU count; 0 or 1 routes in this process)
+        chunk_size: Messages sent to a worker at a time
+        format: Mailbox format when source is a path (default: detected)
+        index: EmailIndex for thread collapsing and duplicate skipping
+
+    Returns:
+        BulkRoutingStats with counts, per-agent totals and messages/sec
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    raw_messages = iter_raw_messages(source, format) if isinstance(source, (str, Path)) else source
+    workers = (os.cpu_count() or 1) if workers is None else workers
+
+    stats = BulkRoutingStats(workers=workers, decisions_path=str(output_dir / "decisions.jsonl"))
+    queues: Dict[str, List[Tuple[int, int, Dict[str, Any]]]] = {}
+    start = time.monotonic()
+
+    with open(stats.decisions_path, "w") as log:
+        def record(decisions: List[Dict[str, Any]]) -> None:
+            for decision in decisions:
+                stats.messages += 1
+                stats.errors += "error" in decision
+                if index is not None and "error" not in decision:
+                    if not _apply_index(index, decision, stats):
+                        continue
+                agent = decision["route_to"]
+                stats.by_agent[agent] = stats.by_agent.get(agent, 0) + 1
+                rank = PRIORITY_ORDER.get(decision["priority"], len(PRIORITY_ORDER))
+                queues.setdefault(agent, []).append((rank, decision["seq"], decision))
+            log.write("".join(json.dumps(decision, default=str) + "\n" for decision in decisions))
+            log.flush()
+
+        chunks = _chunks(raw_messages, chunk_size)
+        threads = index is not None
+        if workers <= 1:
+            _init_worker(rules, threads)
+            for chunk in chunks:
+                record(_route_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(list(rules), threads)) as pool:
+                # A bounded window of chunks in flight keeps memory flat on large mailboxes
+                in_flight: Deque[Future] = deque()
+                for chunk in chunks:
+                    in_flight.append(pool.submit(_route_chunk, chunk))
+                    if len(in_flight) >= workers * 2:
+                        record(in_flight.popleft().result())
+                while in_flight:
+                    record(in_flight.popleft().result())
+
+    queue_dir = output_dir / "queues"
+    queue_dir.mkdir(exist_ok=True)
+    for agent, entries in queues.items():
+        entries.sort(key=lambda entry: entry[:2])
+        path = queue_dir / f"{agent}.jsonl"
+        with open(path, "w") as f:
+            f.write("".join(json.dumps(entry[2], default=str) + "\n" for entry in entries))
+        stats.queue_paths[agent] = str(path)
+
+    stats.seconds = time.monotonic() - start
+    return stats
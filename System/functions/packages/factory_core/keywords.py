@@ -0,0 +1,140 @@
+"""
+Compiled multi-keyword matching for risk detection and routing.
+
+Agents classify text by keyword lists (high-risk domains, email routes).
+Testing `keyword in text` for every keyword costs keywords x text length;
+KeywordMatcher compiles all keywords into one regex, shaped as a trie so
+shared prefixes are matched once, and finds every match in one pass.
+
+This module provides:
+- KeywordMatcher, built once from labelled keyword groups; group order is
+  the priority (0 = highest)
+- Word-start matching: a keyword matches at the start of a word, so "eu"
+  doesn't match "neutral" but "invest" still matches "investment"
+  (word_end=True requires whole words)
+- All matches with positions, labels and priorities, including keywords
+  that overlap ("mental health" and "health")
+
+Usage:
+    from factory_core.keywords import KeywordMatcher
+
+    matcher = KeywordMatcher.from_groups([
+        ("legal", ["lawsuit", "legal notice"]),
+        ("press", ["interview", "journalist"]),
+    ])
+    matcher.best(text)          # KeywordMatch with the highest priority, or None
+    matcher.first_by_label(text)  # {"legal": KeywordMatch, ...}
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """One keyword found in a text."""
+    keyword: str
+    label: Any
+    priority: int  # Lower is more important
+    start: int
+    end: int
+
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    """Regex for a trie node; the empty-string key marks the end of a keyword."""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    # Greedy optional tail, so the longest keyword at a position wins
+    return pattern + "?" if "" in node else pattern
+
+
+class KeywordMatcher:
+    """
+    Finds labelled keywords in text with one compiled regex.
+
+    Matching is case-insensitive. A keyword may appear in several groups;
+    each match is reported once per group it belongs to.
+
+    Args:
+        keywords: (keyword, label, priority) entries
+        word_end: Also require keywords to end at a word boundary
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any, int]], word_end: bool = False):
+        self.word_end = word_end
+        self._entries: Dict[str, List[Tuple[Any, int]]] = {}
+        for keyword, label, priority in keywords:
+            keyword = keyword.lower()
+            if keyword:
+                self._entries.setdefault(keyword, []).append((label, priority))
+
+        trie: Dict[str, Any] = {}
+        for keyword in self._entries:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        # For each keyword, the shorter keywords it starts with, longest first
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [keyword[:i] for i in range(len(keyword) - 1, 0, -1) if keyword[:i] in self._entries]
+            for keyword in self._entries
+        }
+
+        tail = r"(?!\w)" if word_end else ""
+        body = _trie_pattern(trie)
+        # The lookahead makes matches zero-width, so keywords starting inside
+        # another match are still found
+        self._pattern = re.compile(rf"(?<!\w)(?=({body}){tail})", re.IGNORECASE) if body else None
+
+    @classmethod
+    def from_groups(cls, groups: Iterable[Tuple[Any, Iterable[str]]], word_end: bool = False) -> "KeywordMatcher":
+        """Build from (label, keywords) groups; a group's priority is its position."""
+        return cls(
+            ((keyword, label, priority)
+             for priority, (label, keywords) in enumerate(groups)
+             for keyword in keywords),
+            word_end=word_end
+        )
+
+    def _ends_word(self, text: str, end: int) -> bool:
+        return end >= len(text) or not (text[end].isalnum() or text[end] == "_")
+
+    def finditer(self, text: str) -> Iterator[KeywordMatch]:
+        """Yield every match in text order (by start, then longest keyword first)."""
+        if self._pattern is None or not text:
+            return
+        for match in self._pattern.finditer(text):
+            start = match.start(1)
+            found = match.group(1).lower()
+            for i, keyword in enumerate([found] + self._prefixes.get(found, [])):
+                end = start + len(keyword)
+                if i and self.word_end and not self._ends_word(text, end):
+                    continue
+                for label, priority in self._entries.get(keyword, ()):
+                    yield KeywordMatch(keyword, label, priority, start, end)
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        return list(self.finditer(text))
+
+    def first_by_label(self, text: str) -> Dict[Any, KeywordMatch]:
+        """The first match of each label, in the order labels first appear in text."""
+        first: Dict[Any, KeywordMatch] = {}
+        for match in self.finditer(text):
+            first.setdefault(match.label, match)
+        return first
+
+    def best(self, text: str) -> Optional[KeywordMatch]:
+        """The match with the highest priority (lowest number), earliest on ties."""
+        best: Optional[KeywordMatch] = None
+        for match in self.finditer(text):
+            if best is None or match.priority < best.priority:
+                best = match
+                if best.priority == 0:
+                    break
+        return best
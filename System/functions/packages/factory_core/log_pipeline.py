@@ -0,0 +1,313 @@
+"""
+Non-blocking, batched log pipeline for agents.
+
+Request threads only enqueue; one background writer formats, serializes
+and writes in batches, so logging stays out of command latency.
+
+This module provides:
+- LogPipeline, a bounded queue drained by a background writer thread that
+  flushes in batches (every FACTORY_LOG_FLUSH_INTERVAL seconds or
+  FACTORY_LOG_BATCH_SIZE items)
+- Backpressure: past FACTORY_LOG_SAMPLE_AT of capacity, records below
+  WARNING are sampled (1 in FACTORY_LOG_SAMPLE_RATE); a full queue drops
+- QueueLogHandler, a logging.Handler that formats on the writer thread
+- JsonlSink, JSONL session logs rotated by date and size, optionally gzipped
+- Counters for enqueued, written, sampled and dropped items
+
+Usage:
+    from factory_core.log_pipeline import QueueLogHandler, StreamSink, log_event
+
+    logger.addHandler(QueueLogHandler(StreamSink(sys.stderr, JsonFormatter())))
+    log_event(logs_path, "plan-generation", {"agent": "CEO", ...})
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+LOG_QUEUE_SIZE = int(os.getenv("FACTORY_LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("FACTORY_LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("FACTORY_LOG_FLUSH_INTERVAL", "0.5"))
+LOG_SAMPLE_AT = float(os.getenv("FACTORY_LOG_SAMPLE_AT", "0.8"))  # Fraction of capacity
+LOG_SAMPLE_RATE = int(os.getenv("FACTORY_LOG_SAMPLE_RATE", "10"))  # Keep 1 in N when sampling
+SESSION_LOG_MAX_BYTES = int(os.getenv("FACTORY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SESSION_LOG_COMPRESS = os.getenv("FACTORY_LOG_COMPRESS", "0").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class LogPipelineStats:
+    """Counters for a LogPipeline."""
+    enqueued: int = 0
+    written: int = 0
+    sampled: int = 0  # Low-severity items skipped while the queue was nearly full
+    dropped: int = 0  # Items rejected because the queue was full
+    batches: int = 0
+    errors: int = 0  # Batches a sink failed to write
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+
+class StreamSink:
+    """Writes log records to a stream, one formatted line each."""
+
+    def __init__(self, stream: IO[str], formatter: logging.Formatter):
+        self.stream = stream
+        self.formatter = formatter
+
+    def write_batch(self, records: List[logging.LogRecord]) -> None:
+        self.stream.write("".join(self.formatter.format(record) + "\n" for record in records))
+        self.stream.flush()
+
+
+class JsonlSink:
+    """
+    Appends dicts as JSON lines to `<directory>/<name>-<YYYY-MM-DD>.jsonl`.
+
+    A new file starts each UTC day. When a file would grow past max_bytes it
+    is renamed to `<name>-<date>.<n>.jsonl` (gzipped to `.jsonl.gz` when
+    compress is set) and writing continues in a fresh file.
+    """
+
+    def __init__(self, directory: Path, name: str, max_bytes: int = SESSION_LOG_MAX_BYTES, compress: bool = SESSION_LOG_COMPRESS):
+        self.directory = Path(directory)
+        self.name = name
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+    def path_for(self, date_str: str) -> Path:
+        return self.directory / f"{self.name}-{date_str}.jsonl"
+
+    def write_batch(self, entries: List[Dict[str, Any]]) -> None:
+        by_date: Dict[str, List[str]] = {}
+        for entry in entries:
+            date_str = str(entry.get("timestamp", ""))[:10] or datetime.utcnow().strftime("%Y-%m-%d")
+            by_date.setdefault(date_str, []).append(json.dumps(entry, default=str) + "\n")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for date_str, lines in by_date.items():
+            path = self.path_for(date_str)
+            data = "".join(lines)
+            if path.exists() and path.stat().st_size + len(data) > self.max_bytes:
+                self._rotate(path)
+            with open(path, "a") as f:
+                f.write(data)
+
+    def _rotate(self, path: Path) -> None:
+        index = 1
+        while any(path.with_suffix(f".{index}{ext}").exists() for ext in (".jsonl", ".jsonl.gz")):
+            index += 1
+        rotated = path.with_suffix(f".{index}.jsonl")
+        path.rename(rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            rotated.unlink()
+
+
+class LogPipeline:
+    """
+    Bounded queue of (sink, item) drained by a background writer thread.
+
+    Items are grouped per sink and written in batches. The writer starts on
+    the first submit() and is flushed at interpreter exit.
+
+    Args:
+        capacity: Items buffered before submit() drops
+        batch_size: Most items written per batch
+        flush_interval: Longest an item waits for its batch, in seconds
+        sample_at: Fraction of capacity above which low-severity items are sampled
+        sample_rate: Keep 1 in sample_rate low-severity items while sampling
+    """
+
+    def __init__(
+        self,
+        capacity: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        sample_at: float = LOG_SAMPLE_AT,
+        sample_rate: int = LOG_SAMPLE_RATE
+    ):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_at = sample_at
+        self.sample_rate = max(1, sample_rate)
+        self.stats = LogPipelineStats()
+        self._queue: "queue.Queue[Optional[Tuple[Any, Any]]]" = queue.Queue(maxsize=capacity)
+        self._lock = threading.Lock()
+        self._sample_counter = 0
+        self._pending = 0  # Submitted but not yet written
+        self._idle = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, sink: Any, item: Any, sampleable: bool = False) -> bool:
+        """
+        Queue an item for sink.write_batch(). Never blocks.
+
+        Returns False if the item was sampled out or dropped. Only sampleable
+        items (low-severity log records) are sampled; anything is dropped
+        when the queue is full.
+        """
+        with self._lock:
+            if self._closed:
+                self.stats.dropped += 1
+                return False
+            if sampleable and self._queue.qsize() >= self.capacity * self.sample_at:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_rate:
+                    self.stats.sampled += 1
+                    return False
+            try:
+                self._queue.put_nowait((sink, item))
+            except queue.Full:
+                self.stats.dropped += 1
+                return False
+            self.stats.enqueued += 1
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="factory-log-writer", daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[Any, Any]]) -> None:
+        by_sink: Dict[int, Tuple[Any, List[Any]]] = {}
+        for sink, item in batch:
+            by_sink.setdefault(id(sink), (sink, []))[1].append(item)
+        errors = 0
+        for sink, items in by_sink.values():
+            try:
+                sink.write_batch(items)
+            except Exception:
+                errors += 1
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.errors += errors
+            self.stats.written += len(batch)
+            self._pending -= len(batch)
+            self._idle.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued item is written. Returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Write what's queued and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats.as_dict(), "queued": self._pending}
+
+
+class QueueLogHandler(logging.Handler):
+    """
+    logging.Handler that hands records to a LogPipeline.
+
+    Only the message is rendered on the calling thread (its args may change
+    later); JSON formatting and the write happen on the writer thread.
+    """
+
+    def __init__(self, sink: StreamSink, pipeline: Optional["LogPipeline"] = None, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.sink = sink
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            pipeline = self.pipeline or get_log_pipeline()
+            pipeline.submit(self.sink, record, sampleable=record.levelno < logging.WARNING)
+        except Exception:
+            self.handleError(record)
+
+
+# =============================================================================
+# Process-wide pipeline and session log sinks
+# =============================================================================
+
+_default_pipeline: Optional[LogPipeline] = None
+_sinks: Dict[Tuple[str, str], JsonlSink] = {}
+_default_lock = threading.Lock()
+
+
+def get_log_pipeline() -> LogPipeline:
+    """Get the process-wide LogPipeline (flushed at interpreter exit)."""
+    global _default_pipeline
+    with _default_lock:
+        if _default_pipeline is None:
+            _default_pipeline = LogPipeline()
+            atexit.register(_default_pipeline.close)
+        return _default_pipeline
+
+
+def session_sink(directory: Path, name: str) -> JsonlSink:
+    """Get the shared JsonlSink for a log directory and name."""
+    key = (os.path.abspath(directory), name)
+    with _default_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = _sinks[key] = JsonlSink(Path(key[0]), name)
+        return sink
+
+
+def log_event(directory: Path, log_type: str, data: Dict[str, Any], **fields: Any) -> bool:
+    """
+    Queue one session log entry for `<directory>/<log_type>-<date>.jsonl`.
+
+    The entry is {"timestamp", "type", **fields, "data"}; data is serialized
+    on the writer thread, so don't modify it after logging.
+
+    Returns:
+        True if queued, False if dropped under backpressure
+    """
+    entry = {"timestamp": datetime.utcnow().isoformat() + "Z", "type": log_type, **fields, "data": data}
+    return get_log_pipeline().submit(session_sink(directory, log_type), entry)
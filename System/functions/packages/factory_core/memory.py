@@ -0,0 +1,483 @@
+"""
+Storage for agent memory records.
+
+Agents keep their state (validation results, budgets, PRDs, briefs,
+reports) as records of a kind, optionally keyed, in a MemoryStore per
+memory directory. "Latest record of kind X" is an index lookup instead of
+globbing and sorting the directory on every command.
+
+Records of a kind are ordered by key, as agents always sorted their
+`<kind>-<key>.md` files; agents key records by date or version, so the
+latest record is the newest one.
+
+This module provides:
+- MemoryStore, the interface: put/get/latest/list/delete, plus JSON helpers
+- FilesystemMemoryStore, one file per record (`<kind>[-<key>].<format>`,
+  the existing layout), written atomically, with a per-kind index ordered
+  by key that is rebuilt only when the directory changes
+- SqliteMemoryStore, one `memory.sqlite3` per directory, where latest() is
+  a lookup on the (kind, key) index; each kind's records in the filesystem
+  layout are imported the first time the kind is used
+- memory_store(directory), the shared store for a directory; the backend
+  comes from FACTORY_MEMORY_BACKEND ("filesystem" or "sqlite")
+
+Usage:
+    from factory_core.memory import memory_store
+
+    store = memory_store(memory_path)
+    record = store.put("validation-results", content, key="2026-01-01")
+    latest = store.latest("validation-results")  # None if there are none
+    status = store.get_json("onboarding-status", default={})
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from factory_core.documents import get_document_cache, read_document
+
+MEMORY_BACKEND = os.getenv("FACTORY_MEMORY_BACKEND", "filesystem").lower()
+SQLITE_FILENAME = "memory.sqlite3"
+
+PathLike = Union[str, Path]
+
+
+@dataclass(frozen=True)
+class MemoryRecord:
+    """One stored record."""
+    kind: str
+    key: Optional[str]
+    content: str
+    created_at: datetime  # UTC time of the last write
+    format: str = "md"  # "md" or "json"
+    location: str = ""  # File path, or "<db>#<kind>/<key>" for SQLite
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class MemoryStore(ABC):
+    """
+    Records of a kind, optionally keyed; (kind, key) is unique and a second
+    put() replaces the first. Records are ordered by key; the unkeyed
+    record comes first.
+    """
+
+    @abstractmethod
+    def put(self, kind: str, content: str, key: Optional[str] = None, format: str = "md") -> MemoryRecord:
+        """Write a record atomically; readers see the old or the new content, never a mix."""
+
+    @abstractmethod
+    def get(self, kind: str, key: Optional[str] = None) -> Optional[MemoryRecord]:
+        """Get one record, or None."""
+
+    @abstractmethod
+    def latest(self, kind: str) -> Optional[MemoryRecord]:
+        """Get the record of a kind with the greatest key, or None."""
+
+    @abstractmethod
+    def list(self, kind: str, limit: Optional[int] = None) -> List[MemoryRecord]:
+        """Get records of a kind, greatest key first."""
+
+    @abstractmethod
+    def delete(self, kind: str, key: Optional[str] = None) -> bool:
+        """Remove a record. Returns False if it didn't exist."""
+
+    def location(self, kind: str, key: Optional[str] = None, format: str = "md") -> str:
+        """Where a record is (or would be) stored, for messages and logs."""
+        return f"{kind}/{key or ''}"
+
+    def keys(self, kind: str) -> List[Optional[str]]:
+        """Keys of a kind's records, greatest first. Backends answer without reading content."""
+        return [record.key for record in self.list(kind)]
+
+    def modified_at(self, kind: str, key: Optional[str] = None) -> Optional[datetime]:
+        """UTC time a record was last written, or None. Backends answer without reading content."""
+        record = self.get(kind, key)
+        return record.created_at if record is not None else None
+
+    def last_modified(self, kind: str) -> Optional[datetime]:
+        """UTC time any record of a kind was last written, or None if there are none."""
+        record = self.latest(kind)
+        return record.created_at if record is not None else None
+
+    def read(self, kind: str, key: Optional[str] = None, default: Optional[str] = None) -> Optional[str]:
+        """Get a record's content, or default."""
+        record = self.get(kind, key)
+        return record.content if record is not None else default
+
+    def put_json(self, kind: str, data: Any, key: Optional[str] = None) -> MemoryRecord:
+        return self.put(kind, json.dumps(data, indent=2, default=str), key=key, format="json")
+
+    def get_json(self, kind: str, key: Optional[str] = None, default: Any = None) -> Any:
+        record = self.get(kind, key)
+        return record.json() if record is not None else default
+
+
+# =============================================================================
+# Filesystem backend
+# =============================================================================
+
+class FilesystemMemoryStore(MemoryStore):
+    """
+    One file per record: `<kind>.<format>`, or `<kind>-<key>.<format>`.
+
+    Files written by hand or by older versions are picked up, since this is
+    the layout agents always used. A kind's records are the files named
+    `<kind>.*` or `<kind>-*.*`, so kinds in one directory must not be
+    hyphenated prefixes of each other ("plan" and "plan-version").
+
+    Args:
+        directory: The memory directory (created on first write)
+    """
+
+    FORMATS = ("md", "json")
+
+    def __init__(self, directory: PathLike):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._signature: Optional[int] = None  # Directory mtime_ns the index was built at
+        self._index: Dict[str, List[Tuple[str, str, int]]] = {}  # kind -> sorted [(key, filename, mtime_ns)]
+
+    def path_for(self, kind: str, key: Optional[str] = None, format: str = "md") -> Path:
+        name = f"{kind}-{key}" if key else kind
+        return self.directory / f"{name}.{format}"
+
+    def location(self, kind: str, key: Optional[str] = None, format: str = "md") -> str:
+        return str(self.path_for(kind, key, format))
+
+    def _parse(self, filename: str, kind: str) -> Optional[Tuple[Optional[str], str]]:
+        """(key, format) if filename is a record of kind."""
+        stem, _, format = filename.rpartition(".")
+        if format not in self.FORMATS or filename.startswith("."):
+            return None
+        if stem == kind:
+            return None, format
+        if stem.startswith(kind + "-") and len(stem) > len(kind) + 1:
+            return stem[len(kind) + 1:], format
+        return None
+
+    def _directory_signature(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _entries(self, kind: str) -> List[Tuple[str, str, int]]:
+        """The kind's index, rebuilding all indexes if the directory changed (call with the lock held)."""
+        signature = self._directory_signature()
+        if signature != self._signature:
+            self._index = {}
+            self._signature = signature
+        entries = self._index.get(kind)
+        if entries is None:
+            entries = []
+            if signature is not None:
+                with os.scandir(self.directory) as scan:
+                    for entry in scan:
+                        parsed = entry.is_file() and self._parse(entry.name, kind)
+                        if parsed:
+                            entries.append((parsed[0] or "", entry.name, entry.stat().st_mtime_ns))
+            entries.sort()
+            self._index[kind] = entries
+        return entries
+
+    def _record(self, kind: str, filename: str, mtime_ns: int) -> Optional[MemoryRecord]:
+        key, format = self._parse(filename, kind)
+        path = self.directory / filename
+        content = read_document(path)
+        if content is None:
+            return None
+        return MemoryRecord(
+            kind=kind,
+            key=key,
+            content=content,
+            created_at=datetime.utcfromtimestamp(mtime_ns / 1e9),
+            format=format,
+            location=str(path)
+        )
+
+    def put(self, kind: str, content: str, key: Optional[str] = None, format: str = "md") -> MemoryRecord:
+        path = self.path_for(kind, key, format)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = self._entries(kind)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+            mtime_ns = path.stat().st_mtime_ns
+            entries[:] = [entry for entry in entries if entry[1] != path.name]
+            bisect.insort(entries, (key or "", path.name, mtime_ns))
+            # Our own write changed the directory; the index is still current
+            self._signature = self._directory_signature()
+        get_document_cache().invalidate(path)
+        return MemoryRecord(kind, key, content, datetime.utcfromtimestamp(mtime_ns / 1e9), format, str(path))
+
+    def get(self, kind: str, key: Optional[str] = None) -> Optional[MemoryRecord]:
+        for format in self.FORMATS:
+            path = self.path_for(kind, key, format)
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            record = self._record(kind, path.name, mtime_ns)
+            if record is not None:
+                return record
+        return None
+
+    def keys(self, kind: str) -> List[Optional[str]]:
+        with self._lock:
+            return [key or None for key, _, _ in reversed(self._entries(kind))]
+
+    def modified_at(self, kind: str, key: Optional[str] = None) -> Optional[datetime]:
+        for format in self.FORMATS:
+            try:
+                mtime_ns = self.path_for(kind, key, format).stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            return datetime.utcfromtimestamp(mtime_ns / 1e9)
+        return None
+
+    def last_modified(self, kind: str) -> Optional[datetime]:
+        with self._lock:
+            entries = self._entries(kind)
+            mtime_ns = max((mtime_ns for _, _, mtime_ns in entries), default=None)
+        return datetime.utcfromtimestamp(mtime_ns / 1e9) if mtime_ns is not None else None
+
+    def latest(self, kind: str) -> Optional[MemoryRecord]:
+        with self._lock:
+            entries = self._entries(kind)
+            newest = entries[-1] if entries else None
+        if newest is None:
+            return None
+        return self._record(kind, newest[1], newest[2])
+
+    def list(self, kind: str, limit: Optional[int] = None) -> List[MemoryRecord]:
+        with self._lock:
+            entries = list(reversed(self._entries(kind)))
+        records = []
+        for _, filename, mtime_ns in entries[:limit]:
+            record = self._record(kind, filename, mtime_ns)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def delete(self, kind: str, key: Optional[str] = None) -> bool:
+        deleted = False
+        with self._lock:
+            for format in self.FORMATS:
+                path = self.path_for(kind, key, format)
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                deleted = True
+                get_document_cache().invalidate(path)
+            self._signature = None
+        return deleted
+
+
+# =============================================================================
+# SQLite backend
+# =============================================================================
+
+class SqliteMemoryStore(MemoryStore):
+    """
+    Records in `<directory>/memory.sqlite3`, indexed on (kind, key).
+
+    Each put() is one upsert statement, so it is atomic. The database runs
+    in WAL mode, so readers in other processes aren't blocked by a writer.
+
+    The first time a kind is used, its records in the filesystem layout
+    (`<kind>[-<key>].md` files in the same directory) are imported, so
+    switching FACTORY_MEMORY_BACKEND keeps existing memory. Records already
+    in the database win; the files are left in place but not read again.
+
+    Args:
+        directory: The memory directory (created on first use)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL DEFAULT '',
+            format TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            UNIQUE (kind, key)
+        );
+        CREATE INDEX IF NOT EXISTS records_kind_created ON records (kind, created_at, id);
+        CREATE TABLE IF NOT EXISTS imported_kinds (kind TEXT PRIMARY KEY);
+    """
+
+    def __init__(self, directory: PathLike):
+        self.directory = Path(directory)
+        self.path = self.directory / SQLITE_FILENAME
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._imported: Set[str] = set()  # Kinds known to be imported from the filesystem layout
+
+    def _connect(self, kind: Optional[str] = None) -> sqlite3.Connection:
+        """
+        The shared connection, opened on first use (call with the lock held).
+
+        With a kind, its filesystem records are imported first if that has
+        never been done for this database.
+        """
+        if self._connection is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+        if kind is not None and kind not in self._imported:
+            self._import_files(self._connection, kind)
+            self._imported.add(kind)
+        return self._connection
+
+    def _import_files(self, connection: sqlite3.Connection, kind: str) -> None:
+        """Copy a kind's filesystem-layout records into the database, once per database."""
+        if connection.execute("SELECT 1 FROM imported_kinds WHERE kind = ?", (kind,)).fetchone():
+            return
+        records = FilesystemMemoryStore(self.directory).list(kind)
+        # IMMEDIATE: another process importing the same kind waits, then finds it done
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO records (kind, key, format, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (kind, record.key or "", record.format, record.content,
+                     record.created_at.replace(tzinfo=timezone.utc).timestamp())
+                    for record in records
+                ]
+            )
+            connection.execute("INSERT OR IGNORE INTO imported_kinds (kind) VALUES (?)", (kind,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def location(self, kind: str, key: Optional[str] = None, format: str = "md") -> str:
+        return f"{self.path}#{kind}/{key or ''}"
+
+    def _record(self, row: Tuple[str, str, str, str, float]) -> MemoryRecord:
+        kind, key, format, content, created_at = row
+        return MemoryRecord(
+            kind=kind,
+            key=key or None,
+            content=content,
+            created_at=datetime.utcfromtimestamp(created_at),
+            format=format,
+            location=self.location(kind, key or None)
+        )
+
+    def _query(self, kind: str, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._connect(kind).execute(sql, params).fetchall()
+
+    def put(self, kind: str, content: str, key: Optional[str] = None, format: str = "md") -> MemoryRecord:
+        created_at = time.time()
+        with self._lock:
+            # A single upsert in autocommit mode is its own transaction
+            self._connect(kind).execute(
+                "INSERT INTO records (kind, key, format, content, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, key) DO UPDATE SET "
+                "format = excluded.format, content = excluded.content, created_at = excluded.created_at",
+                (kind, key or "", format, content, created_at)
+            )
+        return self._record((kind, key or "", format, content, created_at))
+
+    def get(self, kind: str, key: Optional[str] = None) -> Optional[MemoryRecord]:
+        rows = self._query(
+            kind,
+            "SELECT kind, key, format, content, created_at FROM records WHERE kind = ? AND key = ?",
+            (kind, key or "")
+        )
+        return self._record(rows[0]) if rows else None
+
+    def keys(self, kind: str) -> List[Optional[str]]:
+        rows = self._query(kind, "SELECT key FROM records WHERE kind = ? ORDER BY key DESC", (kind,))
+        return [key or None for (key,) in rows]
+
+    def modified_at(self, kind: str, key: Optional[str] = None) -> Optional[datetime]:
+        rows = self._query(kind, "SELECT created_at FROM records WHERE kind = ? AND key = ?", (kind, key or ""))
+        return datetime.utcfromtimestamp(rows[0][0]) if rows else None
+
+    def last_modified(self, kind: str) -> Optional[datetime]:
+        rows = self._query(kind, "SELECT MAX(created_at) FROM records WHERE kind = ?", (kind,))
+        return datetime.utcfromtimestamp(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    def latest(self, kind: str) -> Optional[MemoryRecord]:
+        records = self.list(kind, limit=1)
+        return records[0] if records else None
+
+    def list(self, kind: str, limit: Optional[int] = None) -> List[MemoryRecord]:
+        rows = self._query(
+            kind,
+            "SELECT kind, key, format, content, created_at FROM records WHERE kind = ? "
+            "ORDER BY key DESC LIMIT ?",
+            (kind, -1 if limit is None else limit)
+        )
+        return [self._record(row) for row in rows]
+
+    def delete(self, kind: str, key: Optional[str] = None) -> bool:
+        with self._lock:
+            cursor = self._connect(kind).execute("DELETE FROM records WHERE kind = ? AND key = ?", (kind, key or ""))
+            return cursor.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# =============================================================================
+# Shared stores
+# =============================================================================
+
+BACKENDS = {
+    "filesystem": FilesystemMemoryStore,
+    "sqlite": SqliteMemoryStore,
+}
+
+_stores: Dict[Tuple[str, str], MemoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def memory_store(directory: PathLike, backend: Optional[str] = None) -> MemoryStore:
+    """
+    Get the shared MemoryStore for a memory directory.
+
+    Args:
+        directory: The memory directory
+        backend: "filesystem" or "sqlite" (default: FACTORY_MEMORY_BACKEND)
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or MEMORY_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown memory backend: {backend}")
+    key = (backend, os.path.abspath(directory))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = BACKENDS[backend](Path(key[1]))
+        return store
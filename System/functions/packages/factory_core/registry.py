@@ -0,0 +1,73 @@
+"""
+Warm-instance agent registry for Cloud Function entry points.
+
+A warm Cloud Functions instance handles many requests in one process.
+get_agent() keeps one initialized agent per (agent class, factory_id) so
+repeat invocations skip BaseAgent.__init__ (governance files, APIManager
+config, .env loading), and hands each request its own view of it.
+
+Usage:
+    from factory_core.registry import get_agent
+
+    agent = get_agent(CEOAgent, factory_id)
+    result = agent.run(command, payload)
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple, Type, TypeVar
+
+from factory_core.agent import BaseAgent
+
+
+AgentT = TypeVar("AgentT", bound=BaseAgent)
+
+_agents: Dict[Tuple[type, str], BaseAgent] = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+
+def get_agent(agent_class: Type[AgentT], factory_id: Optional[str] = None) -> AgentT:
+    """
+    Get a per-request agent, reusing the cached instance when possible.
+
+    The cached agent is rebuilt if its governance or factory config files
+    changed on disk since it was created.
+
+    Args:
+        agent_class: BaseAgent subclass (e.g. CEOAgent)
+        factory_id: Factory identifier (defaults to FACTORY_ID or "development")
+
+    Returns:
+        A request-scoped agent with fresh session_usage
+    """
+    factory_id = factory_id or os.getenv("FACTORY_ID", "development")
+    key = (agent_class, factory_id)
+
+    with _lock:
+        agent = _agents.get(key)
+        if agent is None:
+            _stats["misses"] += 1
+        elif agent.is_stale():
+            _stats["reloads"] += 1
+            agent = None
+        else:
+            _stats["hits"] += 1
+
+        if agent is None:
+            agent = agent_class(factory_id=factory_id)
+            _agents[key] = agent
+
+    return agent.for_request()
+
+
+def clear_agents() -> None:
+    """Drop every cached agent (the next get_agent() call re-initializes)."""
+    with _lock:
+        _agents.clear()
+
+
+def registry_stats() -> Dict[str, int]:
+    """Get cache counters and the number of cached agents."""
+    with _lock:
+        return dict(_stats, agents=len(_agents))
@@ -7,6 +7,8 @@ import sys
 import json
 import pytest
 import importlib.util
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
@@ -38,6 +40,124 @@ def load_agent_module(agent_name: str):
     return module
 
 
+class StubLLMServer:
+    """
+    Local OpenAI-compatible stub server for transport and APIManager tests.
+
+    Serves /chat/completions with a canned response over HTTP/1.1 keep-alive
+    (as chunked server-sent events when the request asks to stream) and
+    records every request it receives.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.content = "Stub completion"
+        self.usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        self.status = 200
+        self.status_sequence = []  # statuses for the next requests, then status
+        self.extra_headers = {}
+        self.delay = 0.0
+        self.model_delays = {}  # model -> seconds, overrides delay
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+                delay = stub.model_delays.get(body.get("model"), stub.delay)
+                if delay:
+                    import time
+                    time.sleep(delay)
+                status = stub.status_sequence.pop(0) if stub.status_sequence else stub.status
+                if body.get("stream") and status == 200:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for event in stub.build_stream_events(self.path, body):
+                        chunk = event.encode("utf-8")
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                data = stub.build_response(self.path, body)
+                payload = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in stub.extra_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        # Clients that hang up mid-stream are expected; don't print tracebacks
+        self.server.handle_error = lambda request, client_address: None
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def build_response(self, path, body):
+        return {
+            "choices": [{"message": {"role": "assistant", "content": self.content}}],
+            "usage": self.usage
+        }
+
+    def build_stream_events(self, path, body):
+        events = [": OPENROUTER PROCESSING\n\n"]
+        for word in self.content.split(" "):
+            delta = {"choices": [{"delta": {"content": word + " "}}]}
+            events.append(f"data: {json.dumps(delta)}\n\n")
+        usage = {"choices": [], "usage": self.usage}
+        events.append(f"data: {json.dumps(usage)}\n\n")
+        events.append("data: [DONE]\n\n")
+        return events
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_health():
+    """Start every test with empty process-wide latency histograms, breakers and rate limits."""
+    from latency import get_default_latency_tracker
+    from circuit_breaker import get_default_breakers
+    from rate_limit import get_default_rate_governor
+    get_default_latency_tracker().clear()
+    get_default_breakers().reset()
+    get_default_rate_governor().reset()
+    yield
+
+
+@pytest.fixture
+def stub_llm_server(monkeypatch):
+    """Run a local stub LLM server and point APIManager providers at it."""
+    server = StubLLMServer().start()
+    monkeypatch.setenv("OPENROUTER_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-openrouter-key")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-openai-key")
+    yield server
+    server.stop()
+
+
 @pytest.fixture
 def mock_llm_response():
     """Mock LLM response for _think method."""
@@ -0,0 +1,163 @@
+"""
+Parity tests for the blocking and async APIManager paths.
+
+Each scenario runs once through complete_with_usage() and once through
+acomplete_with_usage() against the stub server, and both must end the same
+way: same result, same requests sent, same permit and breaker state.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from api_manager import APIManager, DEFAULT_TASK_ROUTING, RATE_LIMIT_RETRIES
+from circuit_breaker import CLOSED, CircuitBreakerRegistry
+from latency import HedgePolicy, LatencyTracker
+from rate_limit import RateGovernor
+from response_cache import ResponseCache
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+PRIMARY = DEFAULT_TASK_ROUTING["default"].primary
+FALLBACK = DEFAULT_TASK_ROUTING["default"].fallback
+
+
+def fresh_manager():
+    return APIManager(
+        transport=PooledHTTPTransport(),
+        async_transport=AsyncHTTPTransport(),
+        cache=ResponseCache(),
+        latency=LatencyTracker(),
+        breakers=CircuitBreakerRegistry(cooldown_seconds=60),
+        rate_governor=RateGovernor()
+    )
+
+
+def complete(manager, mode, **kwargs):
+    if mode == "sync":
+        return manager.complete_with_usage("default", MESSAGES, **kwargs)
+    return asyncio.run(manager.acomplete_with_usage("default", MESSAGES, **kwargs))
+
+
+def outcome(manager, stub, result):
+    return {
+        "success": result.success,
+        "content": result.content,
+        "model_used": result.usage.model_used,
+        "fallback_used": result.usage.fallback_used,
+        "hedged": result.usage.hedged,
+        "circuit_open": result.usage.circuit_open,
+        "cache_hit": result.usage.cache_hit,
+        "total_tokens": result.usage.total_tokens,
+        "retry_after": result.retry_after,
+        "late_tokens": manager.late_usage.total_tokens,
+        "requests": [r["body"]["model"] for r in stub.requests],
+        "in_flight": [limit["in_flight"] for limit in manager.rate_stats()["limits"].values()],
+    }
+
+
+def primary_succeeds(manager, stub, mode):
+    return complete(manager, mode)
+
+
+def primary_fails_over(manager, stub, mode):
+    stub.status_sequence = [500]
+    return complete(manager, mode)
+
+
+def rate_limit_retried(manager, stub, mode):
+    stub.status_sequence = [429]
+    stub.extra_headers = {"Retry-After": "0.05"}
+    return complete(manager, mode)
+
+
+def rate_limit_exhausted(manager, stub, mode):
+    stub.status_sequence = [429] * (RATE_LIMIT_RETRIES + 1)
+    stub.extra_headers = {"Retry-After": "0.05"}
+    return complete(manager, mode)
+
+
+def breaker_open(manager, stub, mode):
+    breaker = manager.breakers.get(PRIMARY.provider, PRIMARY.model)
+    while breaker.allow():
+        breaker.record_failure()
+    return complete(manager, mode)
+
+
+def cached(manager, stub, mode):
+    complete(manager, mode)
+    return complete(manager, mode)
+
+
+def hedged(manager, stub, mode):
+    stub.model_delays = {PRIMARY.model: 0.3}
+
+    async def complete_and_let_loser_finish():
+        result = await manager.acomplete_with_usage("default", MESSAGES)
+        await asyncio.sleep(0.5)
+        return result
+
+    with patch.object(manager._get_routing("default"), "hedge", HedgePolicy(initial_delay_ms=50)):
+        if mode == "async":
+            return asyncio.run(complete_and_let_loser_finish())
+        result = complete(manager, mode)
+        time.sleep(0.5)
+        return result
+
+
+SCENARIOS = [primary_succeeds, primary_fails_over, rate_limit_retried, rate_limit_exhausted, breaker_open, cached, hedged]
+
+
+class TestSyncAsyncParity:
+    """Test that both request paths route, retry and fail the same way."""
+
+    @pytest.mark.parametrize("scenario", SCENARIOS, ids=[scenario.__name__ for scenario in SCENARIOS])
+    def test_same_outcome(self, stub_llm_server, scenario):
+        """Test that a scenario ends the same way through complete_with_usage() and acomplete_with_usage()."""
+        outcomes = {}
+        for mode in ("sync", "async"):
+            stub_llm_server.requests.clear()
+            stub_llm_server.extra_headers = {}
+            stub_llm_server.model_delays = {}
+            manager = fresh_manager()
+            result = scenario(manager, stub_llm_server, mode)
+            outcomes[mode] = outcome(manager, stub_llm_server, result)
+
+        assert outcomes["sync"] == outcomes["async"]
+        assert outcomes["sync"]["success"]
+
+    def test_expected_outcomes(self, stub_llm_server):
+        """Test the outcomes the parity test compares (run through the blocking path)."""
+        stub_llm_server.status_sequence = [429] * (RATE_LIMIT_RETRIES + 1)
+        stub_llm_server.extra_headers = {"Retry-After": "0.05"}
+        manager = fresh_manager()
+
+        result = outcome(manager, stub_llm_server, complete(manager, "sync"))
+
+        assert result["requests"] == [PRIMARY.model] * (RATE_LIMIT_RETRIES + 1) + [FALLBACK.model]
+        assert result["fallback_used"]
+        assert result["retry_after"] == 0.05
+        assert set(result["in_flight"]) == {0}
+
+    @pytest.mark.parametrize("mode", ["sync", "async"])
+    def test_interrupted_request_releases_permit(self, stub_llm_server, mode):
+        """Test that a request interrupted mid-call hands back its permit and breaker probe on both paths."""
+        manager = fresh_manager()
+        breaker = manager.breakers.get(PRIMARY.provider, PRIMARY.model)
+
+        def interrupt(*args, **kwargs):
+            raise KeyboardInterrupt
+
+        async def ainterrupt(*args, **kwargs):
+            raise KeyboardInterrupt
+
+        with patch.object(manager.transport, "post_json", interrupt), \
+                patch.object(manager.async_transport, "post_json", ainterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                complete(manager, mode, use_cache=False)
+
+        assert [limit["in_flight"] for limit in manager.rate_stats()["limits"].values()] == [0]
+        assert breaker.state == CLOSED
+        assert breaker.allow()
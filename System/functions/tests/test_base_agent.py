@@ -5,9 +5,10 @@ Unit tests for BaseAgent class.
 import os
 import sys
 import json
+import asyncio
 import pytest
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from datetime import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
@@ -69,6 +70,39 @@ class TestBaseAgentCommandDispatch:
         agent.test_example.assert_called_once_with({})
 
 
+    def test_arun_dispatches_sync_handler(self):
+        """Test that arun runs sync handlers and returns the success structure."""
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.test_example = Mock(return_value={"test": True})
+
+        result = asyncio.run(agent.arun("test.example", {"a": 1}))
+
+        agent.test_example.assert_called_once_with({"a": 1})
+        assert result["status"] == "success"
+        assert result["data"] == {"test": True}
+
+    def test_arun_awaits_async_handler(self):
+        """Test that arun awaits coroutine handlers."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        async def handler(payload):
+            return {"echo": payload["value"]}
+
+        agent.test_async = handler
+        result = asyncio.run(agent.arun("test.async", {"value": 42}))
+
+        assert result["data"] == {"echo": 42}
+
+    def test_arun_handles_unknown_command(self):
+        """Test that arun reports unknown commands as errors."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        result = asyncio.run(agent.arun("test.unknown", {}))
+
+        assert result["status"] == "error"
+        assert "not implemented" in result["error"]
+
+
 class TestBaseAgentLogging:
     """Test BaseAgent logging capabilities."""
 
@@ -154,6 +188,41 @@ class TestBaseAgentThinkMethod:
         assert agent.session_usage.total_tokens >= 0
 
 
+class TestBaseAgentAsyncThink:
+    """Test BaseAgent _athink method."""
+
+    @patch('factory_core.agent.APIManager')
+    def test_athink_calls_async_api(self, mock_api_manager):
+        """Test that _athink awaits acomplete_with_usage and tracks usage."""
+        from api_manager import CompletionResult, UsageInfo
+        mock_instance = mock_api_manager.return_value
+        mock_instance.acomplete_with_usage = AsyncMock(return_value=CompletionResult(
+            content="Async response",
+            usage=UsageInfo(input_tokens=10, output_tokens=5, total_tokens=15, cost_usd=0.001),
+            success=True
+        ))
+
+        agent = BaseAgent("TEST", "Test Agent")
+        result = asyncio.run(agent._athink("Test prompt"))
+
+        assert result == "Async response"
+        mock_instance.acomplete_with_usage.assert_awaited_once()
+        assert agent.session_usage.total_tokens == 15
+
+    @patch('factory_core.agent.APIManager')
+    def test_athink_raises_on_failure(self, mock_api_manager):
+        """Test that _athink raises when the LLM call fails."""
+        from api_manager import CompletionResult, UsageInfo
+        mock_instance = mock_api_manager.return_value
+        mock_instance.acomplete_with_usage = AsyncMock(return_value=CompletionResult(
+            content="", usage=UsageInfo(), success=False, error="boom"
+        ))
+
+        agent = BaseAgent("TEST", "Test Agent")
+        with pytest.raises(RuntimeError):
+            asyncio.run(agent._athink("Test prompt"))
+
+
 class TestBaseAgentGovernance:
     """Test BaseAgent governance loading."""
 
@@ -0,0 +1,197 @@
+"""
+Unit tests for APIManager batch completions.
+"""
+
+import asyncio
+import io
+import time
+import urllib.error
+from email.message import Message
+from email.utils import formatdate
+
+import pytest
+
+from api_manager import APIManager, BatchRequest, _retry_after_seconds
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+
+def http_error(code, retry_after=None):
+    headers = Message()
+    if retry_after is not None:
+        headers["Retry-After"] = retry_after
+    return urllib.error.HTTPError("http://stub", code, "error", headers, io.BytesIO(b""))
+
+
+def requests_for(count, task="default", **kwargs):
+    return [
+        BatchRequest(task=task, messages=[{"role": "user", "content": f"request {i}"}], **kwargs)
+        for i in range(count)
+    ]
+
+
+class TestCompleteBatch:
+    """Test bounded-concurrency batch completions."""
+
+    def test_results_in_request_order(self, stub_llm_server):
+        """Test that results line up with requests and usage is summed."""
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        batch = manager.complete_batch(requests_for(4))
+
+        assert batch.success
+        assert [r.content for r in batch.results] == ["Stub completion"] * 4
+        assert batch.usage.total_tokens == 15 * 4
+        assert batch.usage.input_tokens == 10 * 4
+        assert batch.failed == []
+        sent = sorted(r["body"]["messages"][0]["content"] for r in stub_llm_server.requests)
+        assert sent == [f"request {i}" for i in range(4)]
+
+    def test_runs_concurrently(self, stub_llm_server):
+        """Test that a batch takes about as long as its slowest call."""
+        stub_llm_server.delay = 0.2
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        start = time.monotonic()
+        batch = manager.complete_batch(requests_for(5), max_concurrency=5)
+        elapsed = time.monotonic() - start
+
+        assert batch.success
+        assert elapsed < 0.2 * 5 * 0.6
+
+    def test_concurrency_is_bounded(self, stub_llm_server):
+        """Test that max_concurrency limits requests in flight."""
+        stub_llm_server.delay = 0.1
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        start = time.monotonic()
+        manager.complete_batch(requests_for(4), max_concurrency=2)
+        elapsed = time.monotonic() - start
+
+        assert elapsed >= 0.2
+
+    def test_per_request_routing(self, stub_llm_server):
+        """Test that each request uses its own task routing and dict requests work."""
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        manager.complete_batch([
+            {"task": "critical_decision", "messages": [{"role": "user", "content": "a"}]},
+            {"task": "quick_response", "messages": [{"role": "user", "content": "b"}], "max_tokens": 50},
+        ])
+
+        by_content = {r["body"]["messages"][0]["content"]: r["body"] for r in stub_llm_server.requests}
+        assert by_content["a"]["model"] == manager._get_routing("critical_decision").primary.model
+        assert by_content["b"]["model"] == manager._get_routing("quick_response").primary.model
+        assert by_content["b"]["max_tokens"] == 50
+
+    def test_on_result_as_each_request_finishes(self, stub_llm_server):
+        """Test that on_result sees a fast request before a slow one has finished."""
+        manager = APIManager(transport=PooledHTTPTransport())
+        stub_llm_server.model_delays = {manager._get_routing("critical_decision").primary.model: 0.5}
+        seen = []
+
+        start = time.monotonic()
+        manager.complete_batch(
+            [
+                {"task": "critical_decision", "messages": [{"role": "user", "content": "slow"}]},
+                {"task": "quick_response", "messages": [{"role": "user", "content": "fast"}]},
+            ],
+            on_result=lambda index, result: seen.append((index, result.success, time.monotonic() - start))
+        )
+
+        assert [(index, success) for index, success, _ in seen] == [(1, True), (0, True)]
+        assert seen[0][2] < 0.5
+
+    def test_empty_batch(self):
+        """Test that an empty batch returns no results."""
+        batch = APIManager().complete_batch([])
+        assert batch.results == []
+        assert batch.usage.total_tokens == 0
+
+
+class TestBatchRateLimits:
+    """Test 429 / Retry-After handling in batches."""
+
+    @pytest.fixture(autouse=True)
+    def no_rate_governor(self, monkeypatch):
+        # The governor retries 429s itself; test the batch-level retry alone
+        monkeypatch.setenv("APIMANAGER_RATE_GOVERNOR", "0")
+
+    def test_retries_after_rate_limit(self, stub_llm_server):
+        """Test that a rate-limited request waits Retry-After and is retried."""
+        stub_llm_server.status_sequence = [429]
+        stub_llm_server.extra_headers = {"Retry-After": "0.2"}
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        start = time.monotonic()
+        batch = manager.complete_batch(requests_for(1, use_fallback=False))
+        elapsed = time.monotonic() - start
+
+        assert batch.success
+        assert batch.retries == 1
+        assert len(stub_llm_server.requests) == 2
+        assert elapsed >= 0.2
+
+    def test_gives_up_after_max_retries(self, stub_llm_server):
+        """Test that a request still limited after max_retries is returned as failed."""
+        stub_llm_server.status = 429
+        stub_llm_server.extra_headers = {"Retry-After": "0"}
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        batch = manager.complete_batch(requests_for(1, use_fallback=False), max_retries=1)
+
+        assert batch.failed == [0]
+        assert batch.results[0].retry_after == 0
+        assert batch.retries == 1
+        assert len(stub_llm_server.requests) == 2
+
+    def test_other_failures_not_retried(self, stub_llm_server):
+        """Test that non-rate-limit errors fail without retrying."""
+        stub_llm_server.status = 400
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        batch = manager.complete_batch(requests_for(1, use_fallback=False))
+
+        assert not batch.success
+        assert batch.retries == 0
+        assert len(stub_llm_server.requests) == 1
+
+    def test_retry_after_parsing(self):
+        """Test Retry-After seconds, HTTP dates and defaults."""
+        assert _retry_after_seconds(http_error(429, "3")) == 3
+        assert 0 < _retry_after_seconds(http_error(429, formatdate(time.time() + 5, usegmt=True))) <= 5
+        assert _retry_after_seconds(http_error(429, "3600")) == 60
+        assert _retry_after_seconds(http_error(429)) == 1.0
+        assert _retry_after_seconds(http_error(503, "2")) == 2
+        assert _retry_after_seconds(http_error(503)) is None
+        assert _retry_after_seconds(http_error(500, "2")) is None
+        assert _retry_after_seconds(ValueError("boom")) is None
+
+
+class TestAsyncCompleteBatch:
+    """Test the async batch twin."""
+
+    def test_acomplete_batch_concurrent_and_ordered(self, stub_llm_server):
+        """Test that async batches overlap and keep request order."""
+        stub_llm_server.delay = 0.2
+        manager = APIManager(async_transport=AsyncHTTPTransport())
+
+        start = time.monotonic()
+        batch = asyncio.run(manager.acomplete_batch(requests_for(5)))
+        elapsed = time.monotonic() - start
+
+        assert batch.success
+        assert len(batch.results) == 5
+        assert batch.usage.total_tokens == 15 * 5
+        assert elapsed < 0.2 * 5 * 0.6
+
+    def test_acomplete_batch_retries_rate_limit(self, stub_llm_server, monkeypatch):
+        """Test that async batches honour Retry-After."""
+        monkeypatch.setenv("APIMANAGER_RATE_GOVERNOR", "0")
+        stub_llm_server.status_sequence = [429]
+        stub_llm_server.extra_headers = {"Retry-After": "0.1"}
+        manager = APIManager(async_transport=AsyncHTTPTransport())
+
+        batch = asyncio.run(manager.acomplete_batch(requests_for(1, use_fallback=False)))
+
+        assert batch.success
+        assert batch.retries == 1
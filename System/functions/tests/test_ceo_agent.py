@@ -5,11 +5,13 @@ Unit tests for CEO Agent.
 import os
 import sys
 import json
+import time
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 
+from api_manager import CompletionResult, UsageInfo
 from conftest import load_agent_module
 
 # Load CEO agent module
@@ -151,11 +153,13 @@ class TestCEOPropagateCommand:
 
             assert "error" in result
 
-    @patch.object(CEOAgent, '_think')
-    @patch.object(CEOAgent, '_generate_position_brief')
-    def test_propagate_briefs_all_positions(self, mock_brief, mock_think, temp_project_root):
+    @patch.object(CEOAgent, '_think_batch')
+    def test_propagate_briefs_all_positions(self, mock_batch, temp_project_root):
         """Test that propagate creates briefs for all positions."""
-        mock_brief.return_value = "# Test Brief\n\nContent..."
+        mock_batch.side_effect = lambda prompts, on_result, **kwargs: [
+            on_result(i, CompletionResult(content="# Test Brief\n\nContent...", usage=UsageInfo()))
+            for i in range(len(prompts))
+        ]
 
         with patch.object(CEOAgent, '_get_project_root', return_value=temp_project_root):
             agent = CEOAgent()
@@ -165,6 +169,89 @@ class TestCEOPropagateCommand:
             assert "CFO" in result["positions_briefed"]
             assert "CMO" in result["positions_briefed"]
             assert "CTO" in result["positions_briefed"]
+            mock_batch.assert_called_once()
+
+
+    def test_propagate_generates_briefs_concurrently(self, temp_project_root, stub_llm_server):
+        """Test that briefs are generated as one concurrent batch and saved per position."""
+        stub_llm_server.delay = 0.1
+        stub_llm_server.content = "# Brief"
+
+        with patch.object(CEOAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CEOAgent()
+            agent.memory_path = temp_project_root / "C-Suites" / "CEO" / ".ceo" / "memory"
+
+            start = time.monotonic()
+            result = agent.ceo_propagate({"max_concurrency": 6})
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.1 * 6 / 2
+        assert len(stub_llm_server.requests) == 6
+        assert result["positions_briefed"] == ["CFO", "CMO", "COO", "CIO", "CLO", "CTO"]
+        assert result["failed_positions"] == []
+        brief_path = temp_project_root / "C-Suites" / "CMO" / ".cmo" / "memory" / "ceo-brief.md"
+        assert brief_path.read_text() == "# Brief"
+        assert agent.session_usage.total_tokens == 15 * 6
+
+    def test_propagate_partial_failure(self, temp_project_root):
+        """Test that one failing brief does not block the other positions."""
+        def flaky_batch(prompts, on_result, **kwargs):
+            results = [
+                CompletionResult(content="", usage=UsageInfo(), success=False, error="LLM call failed")
+                if "the CLO position" in prompt
+                else CompletionResult(content=prompt.split("\n")[0], usage=UsageInfo())
+                for prompt in prompts
+            ]
+            for i, result in enumerate(results):
+                on_result(i, result)
+            return results
+
+        with patch.object(CEOAgent, '_get_project_root', return_value=temp_project_root):
+            with patch.object(CEOAgent, '_think_batch', side_effect=flaky_batch):
+                agent = CEOAgent()
+                agent.memory_path = temp_project_root / "C-Suites" / "CEO" / ".ceo" / "memory"
+                result = agent.ceo_propagate({"max_concurrency": 3})
+
+        assert result["failed_positions"] == ["CLO"]
+        assert "Error generating brief" in result["briefs"]["CLO"]
+        assert "the CFO position" in result["briefs"]["CFO"]
+
+    def test_propagate_saves_each_brief_as_it_arrives(self, temp_project_root):
+        """Test that a finished brief is saved before the rest of the batch completes."""
+        cfo_brief = temp_project_root / "C-Suites" / "CFO" / ".cfo" / "memory" / "ceo-brief.md"
+        saved_early = []
+
+        def batch(prompts, on_result, **kwargs):
+            results = [CompletionResult(content="# Brief", usage=UsageInfo()) for _ in prompts]
+            on_result(0, results[0])
+            saved_early.append(cfo_brief.exists())
+            for i, result in enumerate(results[1:], start=1):
+                on_result(i, result)
+            return results
+
+        with patch.object(CEOAgent, '_get_project_root', return_value=temp_project_root):
+            with patch.object(CEOAgent, '_think_batch', side_effect=batch):
+                agent = CEOAgent()
+                agent.memory_path = temp_project_root / "C-Suites" / "CEO" / ".ceo" / "memory"
+                result = agent.ceo_propagate({})
+
+        assert saved_early == [True]
+        assert result["failed_positions"] == []
+
+    def test_propagate_sequential_mode(self, temp_project_root, stub_llm_server):
+        """Test that max_concurrency=1 generates briefs in position order."""
+        with patch.object(CEOAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CEOAgent()
+            agent.memory_path = temp_project_root / "C-Suites" / "CEO" / ".ceo" / "memory"
+            agent.ceo_propagate({"max_concurrency": 1})
+
+        calls = [
+            position
+            for request in stub_llm_server.requests
+            for position in ["CFO", "CMO", "COO", "CIO", "CLO", "CTO"]
+            if f"the {position} position" in request["body"]["messages"][-1]["content"]
+        ]
+        assert calls == ["CFO", "CMO", "COO", "CIO", "CLO", "CTO"]
 
 
 class TestCEOOnboardCommand:
@@ -244,6 +331,24 @@ class TestCEOReportCommand:
 
             assert result["positions"]["CTO"]["status"] == "gated"
 
+    @patch.object(CEOAgent, '_think_batch')
+    def test_report_uses_propagation_state(self, mock_batch, temp_project_root):
+        """Test that positions briefed by ceo.propagate show as active."""
+        mock_batch.side_effect = lambda prompts, on_result, **kwargs: [
+            on_result(i, CompletionResult(content="# Brief", usage=UsageInfo())) for i in range(len(prompts))
+        ]
+
+        with patch.object(CEOAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CEOAgent()
+            agent.memory_path = temp_project_root / "C-Suites" / "CEO" / ".ceo" / "memory"
+            assert agent.ceo_report({})["positions"]["CFO"]["status"] == "pending"
+
+            agent.ceo_propagate({})
+            result = agent.ceo_report({})
+
+        assert result["positions"]["CFO"]["status"] == "active"
+        assert result["positions"]["CXA"]["status"] == "pending"
+
 
 class TestCEOCommandDispatch:
     """Test CEO command dispatch."""
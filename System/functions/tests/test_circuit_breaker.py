@@ -0,0 +1,226 @@
+"""
+Unit tests for circuit breakers and adaptive timeouts.
+"""
+
+import asyncio
+import time
+import urllib.error
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerRegistry, is_provider_failure
+from latency import LatencyTracker
+from api_manager import APIManager, DEFAULT_TASK_ROUTING
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+PRIMARY = DEFAULT_TASK_ROUTING["default"].primary
+FALLBACK = DEFAULT_TASK_ROUTING["default"].fallback
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_at_failure_rate(self):
+        """Test that the breaker opens once the failure rate crosses the threshold."""
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4)
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_half_open_probe_closes_on_success(self):
+        """Test that a successful probe after the cooldown closes the breaker."""
+        breaker = CircuitBreaker(min_calls=1, cooldown_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()  # One probe at a time
+
+        breaker.record_success()
+
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_half_open_probe_reopens_on_failure(self):
+        """Test that a failed probe reopens the breaker."""
+        breaker = CircuitBreaker(min_calls=1, cooldown_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+        breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert breaker.times_opened == 2
+
+    def test_neutral_outcome_frees_probe(self):
+        """Test that a client error during a probe lets another probe through."""
+        breaker = CircuitBreaker(min_calls=1, cooldown_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+        breaker.allow()
+
+        breaker.record_neutral()
+
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+
+    def test_failure_classification(self):
+        """Test which errors count against provider health."""
+        def http_error(code):
+            return urllib.error.HTTPError("u", code, "x", {}, None)
+
+        assert is_provider_failure(http_error(503))
+        assert is_provider_failure(http_error(429))
+        assert not is_provider_failure(http_error(401))
+        assert is_provider_failure(TimeoutError())
+        assert is_provider_failure(ConnectionRefusedError())
+        assert not is_provider_failure(ValueError("No API key"))
+
+
+class TestAPIManagerBreakers:
+    """Test fast-fail to the fallback."""
+
+    def test_open_breaker_skips_primary(self, stub_llm_server):
+        """Test that an open primary breaker goes straight to the fallback."""
+        breakers = CircuitBreakerRegistry(min_calls=2, cooldown_seconds=60)
+        manager = APIManager(transport=PooledHTTPTransport(), breakers=breakers)
+        stub_llm_server.status = 503
+        for _ in range(2):
+            manager.complete_with_usage("default", MESSAGES, use_fallback=False)
+        stub_llm_server.status = 200
+        stub_llm_server.requests.clear()
+
+        result = manager.complete_with_usage("default", MESSAGES)
+
+        assert result.success
+        assert result.usage.fallback_used
+        assert [r["body"]["model"] for r in stub_llm_server.requests] == [FALLBACK.model]
+        stats = manager.breaker_stats()
+        assert stats[f"openrouter:{PRIMARY.model}"]["state"] == OPEN
+        assert stats[f"openai:{FALLBACK.model}"]["state"] == CLOSED
+
+    def test_fast_fail_result_is_marked(self, stub_llm_server):
+        """Test that a rejected call reports circuit_open without a request."""
+        breakers = CircuitBreakerRegistry(min_calls=1, cooldown_seconds=60)
+        breakers.get(PRIMARY.provider, PRIMARY.model).record_failure()
+        manager = APIManager(transport=PooledHTTPTransport(), breakers=breakers)
+
+        result = manager.complete_with_usage("default", MESSAGES, use_fallback=False)
+
+        assert not result.success
+        assert result.usage.circuit_open
+        assert stub_llm_server.requests == []
+
+    def test_client_errors_do_not_open_breaker(self, stub_llm_server):
+        """Test that 4xx responses leave the breaker closed."""
+        breakers = CircuitBreakerRegistry(min_calls=1)
+        manager = APIManager(transport=PooledHTTPTransport(), breakers=breakers)
+        stub_llm_server.status = 400
+
+        manager.complete_with_usage("default", MESSAGES, use_fallback=False)
+
+        assert breakers.get(PRIMARY.provider, PRIMARY.model).state == CLOSED
+
+    def test_async_path_uses_breaker(self, stub_llm_server):
+        """Test that acomplete_with_usage fails fast too."""
+        breakers = CircuitBreakerRegistry(min_calls=1, cooldown_seconds=60)
+        breakers.get(PRIMARY.provider, PRIMARY.model).record_failure()
+        manager = APIManager(async_transport=AsyncHTTPTransport(), breakers=breakers)
+
+        result = asyncio.run(manager.acomplete_with_usage("default", MESSAGES))
+
+        assert result.usage.fallback_used
+        assert [r["body"]["model"] for r in stub_llm_server.requests] == [FALLBACK.model]
+
+    def test_cancelled_probe_is_released(self, stub_llm_server):
+        """Test that cancelling a half-open probe mid-request lets the next call probe."""
+        breakers = CircuitBreakerRegistry(min_calls=1, cooldown_seconds=0)
+        breaker = breakers.get(PRIMARY.provider, PRIMARY.model)
+        breaker.record_failure()
+        manager = APIManager(async_transport=AsyncHTTPTransport(), breakers=breakers)
+        stub_llm_server.delay = 1.0
+
+        async def cancel_probe():
+            task = asyncio.ensure_future(manager.acomplete_with_usage("default", MESSAGES, use_fallback=False))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(cancel_probe())
+
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+
+
+class TestAdaptiveTimeouts:
+    """Test latency-derived request timeouts."""
+
+    def test_default_until_enough_samples(self):
+        """Test that the hardcoded default is used without history."""
+        assert LatencyTracker().timeout_for("openrouter", "m", 60) == 60
+
+    def test_timeout_tracks_percentile(self):
+        """Test that the timeout is a multiple of observed p99, clamped."""
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.record("openrouter", "m", 5000.0)
+
+        assert tracker.timeout_for("openrouter", "m", 60) == 15.0
+        assert tracker.timeout_for("openrouter", "m", 10) == 10
+        assert tracker.timeout_for("openrouter", "m", 60, min_seconds=20) == 20
+
+    def test_timeout_per_completion_budget(self):
+        """Test that short calls don't shorten the timeout for long generations."""
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.record("openrouter", "m", 4000.0, max_tokens=200)
+
+        assert tracker.timeout_for("openrouter", "m", 60, max_tokens=256) == 12.0
+        assert tracker.timeout_for("openrouter", "m", 60, max_tokens=4000) == 60
+
+    def test_manager_passes_adaptive_timeout(self, stub_llm_server, monkeypatch):
+        """Test that provider calls use the adapted timeout."""
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.record(PRIMARY.provider, PRIMARY.model, 4000.0, PRIMARY.max_tokens)
+        transport = PooledHTTPTransport()
+        seen = []
+        original = transport.post_json
+        monkeypatch.setattr(transport, "post_json", lambda *a, **kw: seen.append(kw["timeout"]) or original(*a, **kw))
+        manager = APIManager(transport=transport, latency=tracker)
+
+        manager.complete_with_usage("default", MESSAGES)
+
+        assert seen == [12.0]
+
+    def test_timed_out_call_is_learned_not_failed(self, stub_llm_server, monkeypatch):
+        """Test that a call cut off by an adapted timeout grows the timeout without tripping the breaker."""
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.record(PRIMARY.provider, PRIMARY.model, 4000.0, PRIMARY.max_tokens)
+        transport = PooledHTTPTransport()
+
+        def time_out(*args, **kwargs):
+            time.sleep(0.05)
+            raise urllib.error.URLError(TimeoutError("timed out"))
+
+        monkeypatch.setattr(transport, "post_json", time_out)
+        manager = APIManager(transport=transport, latency=tracker, breakers=CircuitBreakerRegistry(min_calls=1))
+
+        result = manager.complete_with_usage("default", MESSAGES, use_fallback=False)
+
+        assert not result.success
+        assert tracker.count(PRIMARY.provider, PRIMARY.model) == 21
+        assert manager.breakers.get(PRIMARY.provider, PRIMARY.model).state == CLOSED
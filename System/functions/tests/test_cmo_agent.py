@@ -56,6 +56,23 @@ class TestCMOValidateCommand:
             assert result["gate_decision"] == "PROCEED"
             assert result["criteria_met"] == "3/3"
 
+    def test_validate_records_gate_state(self, temp_project_root):
+        """Test that a recorded validation updates the factory gate state."""
+        from factory_core.factory_state import factory_state
+
+        with patch.object(CMOAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CMOAgent()
+            agent.memory_path = temp_project_root / "C-Suites" / "CMO" / ".cmo" / "memory"
+
+            result = agent.cmo_validate({
+                "action": "record",
+                "results": {"signups": 20, "target_signups": 100, "engagement_rate": 1}
+            })
+
+        gate = factory_state(temp_project_root).gate()
+        assert gate["decision"] == result["gate_decision"] == "PIVOT"
+        assert gate["source"] == result["saved_to"]
+
     def test_validate_pivot_decision(self, temp_project_root):
         """Test validation with PIVOT decision."""
         with patch.object(CMOAgent, '_get_project_root', return_value=temp_project_root):
@@ -8,6 +8,7 @@ import pytest
 from unittest.mock import patch
 
 from conftest import load_agent_module
+from factory_core.factory_state import position_memory
 
 # Load CTO agent module
 cto_module = load_agent_module('cto')
@@ -78,6 +79,16 @@ class TestCTOGateStatus:
             assert gate["human_approved"] == True
             assert gate["gate_open"] == True
 
+    def test_gate_reads_latest_dated_validation(self, temp_project_root):
+        """Test that the gate uses the CMO's latest-dated validation, whatever the write order."""
+        with patch.object(CTOAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CTOAgent()
+            cmo_memory = position_memory(temp_project_root, "CMO")
+            cmo_memory.put("validation-results", "## GATE DECISION: PROCEED", key="2024-01-02")
+            cmo_memory.put("validation-results", "## GATE DECISION: PIVOT", key="2024-01-01")
+
+            assert agent._check_gate_status()["cmo_decision"] == "PROCEED"
+
 
 class TestCTOStatusCommand:
     """Test CTO status command."""
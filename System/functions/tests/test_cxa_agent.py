@@ -89,6 +89,29 @@ class TestCXAEmailRouting:
 
         assert result["route_to"] == "HUMAN"
 
+    def test_route_ignores_keywords_inside_words(self):
+        """Test that keywords only match at word starts ("api" is not in "rapid")."""
+        agent = CXAAgent()
+        result = agent._route_email({
+            "from": "friend@example.com",
+            "subject": "Rapid reply",
+            "body": "Thanks for the quick note."
+        })
+
+        assert result["route_to"] == "HUMAN"
+
+    def test_route_uses_first_matching_rule(self):
+        """Test that the earliest rule wins even when its keyword comes later in the text."""
+        agent = CXAAgent()
+        result = agent._route_email({
+            "from": "someone@example.com",
+            "subject": "Help with pricing",
+            "body": "Our attorney has filed a lawsuit."
+        })
+
+        assert result["route_to"] == "CLO"
+        assert result["priority"] == "critical"
+
 
 class TestCXAEmailCommand:
     """Test CXA email command."""
@@ -106,6 +129,7 @@ class TestCXAEmailCommand:
         with patch.object(CXAAgent, '_get_project_root', return_value=temp_project_root):
             agent = CXAAgent()
             agent.logs_path = temp_project_root / "C-Suites" / "CXA" / "logs"
+            agent.memory_path = temp_project_root / "C-Suites" / "CXA" / ".cxa" / "memory"
 
             result = agent.cxa_email({
                 "action": "route",
@@ -119,6 +143,48 @@ class TestCXAEmailCommand:
             assert "routing" in result
             assert result["routing"]["route_to"] == "CMO"
 
+    def test_email_route_follows_thread(self, temp_project_root):
+        """Test that a reply takes its thread's routing and a resend is skipped."""
+        with patch.object(CXAAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CXAAgent()
+            agent.logs_path = temp_project_root / "C-Suites" / "CXA" / "logs"
+            agent.memory_path = temp_project_root / "C-Suites" / "CXA" / ".cxa" / "memory"
+            original = {
+                "message_id": "<1@tc.com>",
+                "from": "press@tc.com",
+                "subject": "Interview",
+                "body": "Press inquiry: could your founder join us for a short interview about the launch next week?"
+            }
+            reply = {
+                "message_id": "<2@tc.com>",
+                "in_reply_to": "<1@tc.com>",
+                "from": "press@tc.com",
+                "subject": "Re: Interview",
+                "body": "Also, what is your pricing?"
+            }
+
+            agent.cxa_email({"action": "route", "email": original})
+            threaded = agent.cxa_email({"action": "route", "email": reply})
+            resent = agent.cxa_email({"action": "route", "email": {**original, "message_id": "<3@tc.com>"}})
+
+            assert threaded["routing"]["route_to"] == "CMO"
+            assert threaded["thread_id"] == "<1@tc.com>"
+            assert resent["duplicate_of"] == "<1@tc.com>"
+
+    def test_email_route_keeps_index_warm(self, temp_project_root):
+        """Test that routing another message doesn't reload the saved index."""
+        with patch.object(CXAAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CXAAgent()
+            agent.logs_path = temp_project_root / "C-Suites" / "CXA" / "logs"
+            agent.memory_path = temp_project_root / "C-Suites" / "CXA" / ".cxa" / "memory"
+            agent.cxa_email({"action": "route", "email": {"message_id": "<1@tc.com>", "from": "a@tc.com", "body": "Press"}})
+
+            with patch.object(type(agent.memory), "get") as get, patch.object(type(agent.memory), "list") as listed:
+                agent.cxa_email({"action": "route", "email": {"message_id": "<2@tc.com>", "from": "b@tc.com", "body": "Legal"}})
+
+            get.assert_not_called()
+            listed.assert_not_called()
+
     def test_email_route_requires_email(self):
         """Test that route requires email data."""
         agent = CXAAgent()
@@ -140,6 +206,66 @@ class TestCXAEmailCommand:
 
             assert "email_id" in result
 
+    def test_email_bulk(self, temp_project_root):
+        """Test that bulk routing writes decisions and per-agent queues."""
+        with patch.object(CXAAgent, '_get_project_root', return_value=temp_project_root):
+            agent = CXAAgent()
+            agent.logs_path = temp_project_root / "C-Suites" / "CXA" / "logs"
+            agent.memory_path = temp_project_root / "C-Suites" / "CXA" / ".cxa" / "memory"
+            agent.inbox_path = temp_project_root / "C-Suites" / "CXA" / "inbox"
+            agent.inbox_path.mkdir()
+            (agent.inbox_path / "backlog.jsonl").write_text(
+                '{"from": "a@example.com", "subject": "Legal notice", "body": ""}\n'
+                '{"from": "b@example.com", "subject": "Hello", "body": "Just saying hi"}\n'
+            )
+
+            result = agent.cxa_email({"action": "bulk", "source": "backlog.jsonl", "workers": 1, "output_dir": "run-1"})
+
+            assert result["messages"] == 2
+            assert result["by_agent"] == {"CLO": 1, "HUMAN": 1}
+            assert result["queue_paths"]["CLO"].startswith(str(agent.logs_path / "emails" / "run-1"))
+            assert os.path.exists(result["queue_paths"]["CLO"])
+
+    def test_email_bulk_requires_source(self, temp_project_root):
+        """Test that bulk routing reports a missing mailbox."""
+        agent = CXAAgent()
+        agent.inbox_path = temp_project_root / "C-Suites" / "CXA" / "inbox"
+
+        assert "error" in agent.cxa_email({"action": "bulk"})
+        assert "Mailbox not found" in agent.cxa_email({"action": "bulk", "source": "missing.mbox"})["error"]
+
+    @pytest.mark.parametrize("field,value", [
+        ("source", "/etc/passwd"),
+        ("source", "../../../README.md"),
+        ("source", "mail/../../outside.jsonl"),
+        ("output_dir", "/tmp/queues"),
+        ("output_dir", "../../memory"),
+    ])
+    def test_email_bulk_rejects_paths_outside_factory(self, temp_project_root, field, value):
+        """Test that request paths can't read or write outside the CXA inbox and email logs."""
+        agent = CXAAgent()
+        agent.logs_path = temp_project_root / "C-Suites" / "CXA" / "logs"
+        agent.inbox_path = temp_project_root / "C-Suites" / "CXA" / "inbox"
+        agent.inbox_path.mkdir()
+        (agent.inbox_path / "backlog.jsonl").write_text('{"from": "a@example.com", "subject": "Hi", "body": ""}\n')
+        payload = {"action": "bulk", "source": "backlog.jsonl", "workers": 1, field: value}
+
+        with patch.object(cxa_module, "route_inbox") as route_inbox:
+            result = agent.cxa_email(payload)
+
+        assert "must be a relative path" in result["error"]
+        route_inbox.assert_not_called()
+
+    def test_email_bulk_rejects_symlink_out_of_inbox(self, temp_project_root):
+        """Test that a symlink in the inbox can't point the source elsewhere."""
+        agent = CXAAgent()
+        agent.inbox_path = temp_project_root / "C-Suites" / "CXA" / "inbox"
+        agent.inbox_path.mkdir()
+        (temp_project_root / "secret.txt").write_text("secret")
+        (agent.inbox_path / "mail.jsonl").symlink_to(temp_project_root / "secret.txt")
+
+        assert "must be a relative path" in agent.cxa_email({"action": "bulk", "source": "mail.jsonl"})["error"]
+
     def test_email_search(self):
         """Test email search."""
         agent = CXAAgent()
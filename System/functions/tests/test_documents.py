@@ -0,0 +1,125 @@
+"""
+Unit tests for the process-wide document cache.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.documents import DocumentCache, get_document_cache, read_document
+
+
+def touch(path, text):
+    """Write text and bump mtime so a same-size rewrite is still detected."""
+    path.write_text(text)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestDocumentCache:
+    """Test cached reads and invalidation."""
+
+    def test_second_read_is_a_hit(self, tmp_path):
+        """Test that an unchanged file is served from memory."""
+        cache = DocumentCache()
+        path = tmp_path / "README.md"
+        path.write_text("# Plan")
+
+        assert cache.read(path) == "# Plan"
+        assert cache.read(path) == "# Plan"
+        assert cache.snapshot()["hits"] == 1
+        assert cache.snapshot()["misses"] == 1
+
+    def test_changed_file_is_reloaded(self, tmp_path):
+        """Test that a new mtime or size invalidates the entry."""
+        cache = DocumentCache()
+        path = tmp_path / "ceo-brief.md"
+        path.write_text("v1")
+        cache.read(path)
+
+        touch(path, "v2")
+
+        assert cache.read(path) == "v2"
+        assert cache.stats.reloads == 1
+
+    def test_missing_file_returns_default(self, tmp_path):
+        """Test that missing files give the default and drop stale entries."""
+        cache = DocumentCache()
+        path = tmp_path / "vision.md"
+        path.write_text("vision")
+        cache.read(path)
+        path.unlink()
+
+        assert cache.read(path) is None
+        assert cache.read(path, "") == ""
+        assert cache.snapshot()["documents"] == 0
+
+    def test_mmap_for_large_files(self, tmp_path):
+        """Test that files over the threshold are read through mmap."""
+        cache = DocumentCache(mmap_threshold=1024)
+        path = tmp_path / "big.md"
+        path.write_text("x" * 4096)
+
+        assert cache.read(path) == "x" * 4096
+        assert cache.stats.mmap_reads == 1
+
+    def test_universal_newlines(self, tmp_path):
+        """Test that CRLF files read like open(path, "r")."""
+        cache = DocumentCache()
+        path = tmp_path / "crlf.md"
+        path.write_bytes(b"a\r\nb\rc\n")
+
+        assert cache.read(path) == "a\nb\nc\n"
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the cache stays under max_bytes."""
+        cache = DocumentCache(max_bytes=10)
+        paths = [tmp_path / f"{i}.md" for i in range(3)]
+        for path in paths:
+            path.write_text("12345")
+            cache.read(path)
+
+        snapshot = cache.snapshot()
+        assert snapshot["documents"] == 2
+        assert snapshot["bytes"] <= 10
+        assert snapshot["evictions"] == 1
+
+    def test_read_json_returns_fresh_objects(self, tmp_path):
+        """Test that callers can modify parsed JSON without corrupting the cache."""
+        cache = DocumentCache()
+        path = tmp_path / "status.json"
+        path.write_text('{"phase": 1}')
+
+        first = cache.read_json(path)
+        first["phase"] = 2
+
+        assert cache.read_json(path) == {"phase": 1}
+        assert cache.read_json(tmp_path / "missing.json", {}) == {}
+
+
+class TestAgentDocuments:
+    """Test that agents load context through the shared cache."""
+
+    def test_governance_uses_shared_cache(self, tmp_path, monkeypatch):
+        """Test that a second agent's governance load hits the cache."""
+        from factory_core.agent import BaseAgent
+
+        ethics = tmp_path / "ethics.md"
+        ethics.write_text("Never lie.")
+        monkeypatch.setattr(BaseAgent, "_governance_paths", lambda self: [ethics])
+
+        assert BaseAgent("CEO", "Chief Executive Officer").governance["ethics"] == "Never lie."
+        hits = get_document_cache().stats.hits
+        assert BaseAgent("CEO", "Chief Executive Officer").governance["ethics"] == "Never lie."
+        assert get_document_cache().stats.hits == hits + 1
+
+    def test_read_document_shares_process_cache(self, tmp_path):
+        """Test that read_document goes through get_document_cache()."""
+        path = tmp_path / "README.md"
+        path.write_text("# Shared")
+
+        read_document(path)
+        hits = get_document_cache().stats.hits
+        assert read_document(path) == "# Shared"
+        assert get_document_cache().stats.hits == hits + 1
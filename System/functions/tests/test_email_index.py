@@ -0,0 +1,214 @@
+"""
+Unit tests for the email thread and duplicate index.
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core import email_index
+from factory_core.email_index import INDEX_KIND, EmailIndex, normalize_subject, shared_index, signature, similarity
+from factory_core.inbox import route_inbox
+from factory_core.memory import FilesystemMemoryStore, SqliteMemoryStore
+
+
+BODY = (
+    "Hi team, I would like to schedule a call next week to discuss the "
+    "partnership proposal we sent over, including pricing, timelines and "
+    "the pilot scope for our three regional offices."
+)
+ROUTING = {"route_to": "CEO", "reason": "Keyword match: partnership", "priority": "normal"}
+
+
+def _message(message_id, body=BODY, sender="ana@example.com", subject="Partnership", **headers):
+    return {"message_id": message_id, "from": sender, "subject": subject, "body": body, **headers}
+
+
+class TestSignature:
+    """Test normalization and MinHash."""
+
+    def test_reply_prefixes_removed(self):
+        """Test that Re:/Fwd: prefixes don't change the subject."""
+        assert normalize_subject("RE: Fwd: re[2]: Partnership") == "partnership"
+
+    def test_quoted_text_ignored(self):
+        """Test that quoted lines and the attribution line don't change the signature."""
+        reply = "Sounds good, let us meet on Tuesday at ten in the main office."
+        quoted = reply + "\nOn Mon, Ana wrote:\n> " + BODY
+
+        assert signature("Re: Partnership", quoted) == signature("Partnership", reply)
+
+    def test_similarity(self):
+        """Test that an edited copy is similar and unrelated text is not."""
+        original = signature("Partnership", BODY)
+
+        assert similarity(original, signature("Partnership", BODY.replace("Hi team", "Hello team"))) >= 0.7
+        assert similarity(original, signature("Invoice", "Please find attached the invoice for the March consulting services, due in thirty days")) < 0.3
+
+    def test_short_text(self):
+        """Test that messages too short to compare have no signature."""
+        assert signature("", "") is None
+        assert signature("Re: Partnership", "Thanks!") is None
+
+
+class TestEmailIndex:
+    """Test threads, duplicates and bounds."""
+
+    def test_reply_joins_thread(self):
+        """Test that replies take the thread and routing of the message they answer."""
+        index = EmailIndex()
+        index.add(_message("<1@x>"), ROUTING)
+
+        match = index.lookup(_message("<2@x>", body="Yes, Tuesday works.", in_reply_to="<1@x>"))
+
+        assert match.thread_id == "<1@x>"
+        assert match.routing == ROUTING
+        assert match.duplicate_of is None
+
+    def test_thread_from_references_root(self):
+        """Test that messages referencing the same unseen root share a thread."""
+        index = EmailIndex()
+        index.add(_message("<2@x>", body="First reply", references="<root@x>"), ROUTING)
+
+        match = index.lookup(_message("<3@x>", body="Second reply", references=["<root@x>", "<other@x>"]))
+
+        assert match.thread_id == "<root@x>"
+        assert match.routing == ROUTING
+
+    def test_same_message_id_is_duplicate(self):
+        """Test that a message seen before is a duplicate."""
+        index = EmailIndex()
+        index.add(_message("<1@x>"), ROUTING)
+
+        assert index.lookup(_message("<1@x>", body="Anything")).duplicate_of == "<1@x>"
+
+    def test_near_duplicate_from_same_sender(self):
+        """Test that a resend with a small edit is a duplicate, but not from another sender."""
+        index = EmailIndex()
+        index.add(_message("<1@x>"), ROUTING)
+        resend = BODY.replace("Hi team", "Hello team")
+
+        assert index.lookup(_message("<2@x>", body=resend)).duplicate_of == "<1@x>"
+        assert index.lookup(_message("<3@x>", body=resend, sender="bo@example.com")).duplicate_of is None
+        assert index.lookup(_message("<4@x>", body="Totally different text about invoices")).duplicate_of is None
+
+    def test_reply_quoting_parent_is_not_duplicate(self):
+        """Test that a near-identical reply to a message isn't a duplicate of it."""
+        index = EmailIndex()
+        index.add(_message("<1@x>"), ROUTING)
+
+        assert index.lookup(_message("<2@x>", in_reply_to="<1@x>")).duplicate_of is None
+
+    def test_bounded(self):
+        """Test that the oldest messages and their threads are evicted."""
+        index = EmailIndex(max_messages=2)
+        for i in range(3):
+            index.add(_message(f"<{i}@x>", body=f"Message number {i} about topic {i * 7}"), ROUTING)
+
+        assert len(index) == 2
+        assert index.lookup(_message("<9@x>", body="Reply", in_reply_to="<0@x>")).routing is None
+        assert index.lookup(_message("<9@x>", body="Reply", in_reply_to="<2@x>")).routing == ROUTING
+
+    def test_persisted(self, tmp_path):
+        """Test that a saved index is loaded with its threads and signatures."""
+        store = FilesystemMemoryStore(tmp_path)
+        index = EmailIndex(store)
+        index.add(_message("<1@x>"), ROUTING)
+        index.save()
+
+        loaded = EmailIndex.load(store)
+
+        assert loaded.lookup(_message("<2@x>", body="Reply", in_reply_to="<1@x>")).routing == ROUTING
+        assert loaded.lookup(_message("<3@x>")).duplicate_of == "<1@x>"
+
+    def test_concurrent_saves_keep_both(self, tmp_path):
+        """Test that two indexes loaded and saved at the same time don't lose each other's messages."""
+        store = SqliteMemoryStore(tmp_path)
+        first, second = EmailIndex.load(store), EmailIndex.load(store)
+        first.add(_message("<1@x>"), ROUTING)
+        second.add(_message("<2@x>", body="Different text about invoices and the budget for next quarter"), ROUTING)
+        first.save()
+        second.save()
+
+        loaded = EmailIndex.load(store)
+
+        assert len(loaded) == 2
+        assert loaded.lookup(_message("<1@x>")).duplicate_of == "<1@x>"
+        assert loaded.lookup(_message("<2@x>")).duplicate_of == "<2@x>"
+
+    def test_segments_compacted(self, tmp_path, monkeypatch):
+        """Test that saves append segments until SEGMENT_LIMIT, then compact them."""
+        monkeypatch.setattr(email_index, "SEGMENT_LIMIT", 3)
+        store = FilesystemMemoryStore(tmp_path)
+        index = EmailIndex.load(store)
+        for i in range(4):
+            index.add(_message(f"<{i}@x>", body=f"Message number {i} about topic {i * 7}"), ROUTING)
+            index.save()
+
+        assert len(store.list(INDEX_KIND)) == 1
+        loaded = EmailIndex.load(store)
+        assert len(loaded) == 4
+        assert loaded.lookup(_message("<9@x>", body="Reply", in_reply_to="<0@x>")).routing == ROUTING
+
+    def test_refresh_reads_only_new_segments(self, tmp_path):
+        """Test that a warm index reads only segments saved since it last refreshed."""
+        store = FilesystemMemoryStore(tmp_path)
+        writer = EmailIndex(store)
+        writer.add(_message("<1@x>"), ROUTING)
+        writer.save()
+        warm = EmailIndex.load(store)
+        writer.add(_message("<2@x>", body="Different text about invoices and the budget for next quarter"), ROUTING)
+        writer.save()
+
+        with patch.object(store, "get", wraps=store.get) as get:
+            assert warm.refresh() == 1
+            assert warm.refresh() == 0
+
+        assert get.call_count == 1
+        assert warm.lookup(_message("<2@x>")).duplicate_of == "<2@x>"
+
+    def test_shared_per_store(self, tmp_path):
+        """Test that shared_index() keeps one index per store."""
+        store = FilesystemMemoryStore(tmp_path)
+        assert shared_index(store) is shared_index(store)
+
+    def test_loads_unsegmented_index(self, tmp_path):
+        """Test that an index saved as one unkeyed record still loads."""
+        store = FilesystemMemoryStore(tmp_path)
+        store.put(INDEX_KIND, json.dumps({
+            "messages": [["<1@x>", "<1@x>", None, "ana@example.com"]],
+            "threads": {"<1@x>": ROUTING}
+        }), format="json")
+
+        loaded = EmailIndex.load(store)
+
+        assert loaded.lookup(_message("<2@x>", body="Reply", in_reply_to="<1@x>")).routing == ROUTING
+
+
+class TestBulkWithIndex:
+    """Test route_inbox() with an index."""
+
+    def test_threads_and_duplicates(self, tmp_path):
+        """Test that bulk routing collapses threads and skips duplicates in source order."""
+        rules = [(["partnership"], "CEO", "normal"), (["pricing"], "CFO", "high")]
+        messages = [
+            _message("<1@x>"),
+            _message("<2@x>", body="What about pricing for the second year?", in_reply_to="<1@x>"),
+            _message("<3@x>"),
+        ]
+        source = tmp_path / "backlog.jsonl"
+        source.write_text("".join(json.dumps(message) + "\n" for message in messages))
+
+        stats = route_inbox(source, rules, tmp_path / "out", workers=1, index=EmailIndex())
+
+        with open(stats.decisions_path) as f:
+            decisions = [json.loads(line) for line in f]
+        assert [decision["route_to"] for decision in decisions] == ["CEO", "CEO", "CEO"]
+        assert decisions[1]["thread_id"] == "<1@x>"
+        assert decisions[2]["duplicate_of"] == "<1@x>"
+        assert "signature" not in decisions[0]
+        assert (stats.threaded, stats.duplicates) == (1, 1)
+        assert stats.by_agent == {"CEO": 2}
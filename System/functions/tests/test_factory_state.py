@@ -0,0 +1,123 @@
+"""
+Unit tests for the materialized gate and position state.
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.factory_state import FactoryState, factory_state, parse_gate_decision, position_memory
+from factory_core.memory import FilesystemMemoryStore
+
+
+class TestParseGateDecision:
+    """Test reading the decision line."""
+
+    def test_reads_decision_line(self):
+        """Test that the decision comes from the GATE DECISION heading."""
+        assert parse_gate_decision("# Validation\n\n## GATE DECISION: ITERATE 🟡\n") == "ITERATE"
+
+    def test_ignores_words_elsewhere(self):
+        """Test that PROCEED in the body doesn't count as a decision."""
+        content = "## GATE DECISION: PIVOT\n\nWe cannot PROCEED until the pivot is agreed."
+
+        assert parse_gate_decision(content) == "PIVOT"
+        assert parse_gate_decision("Ready to PROCEED") == "UNKNOWN"
+
+
+class TestFactoryState:
+    """Test writers and readers."""
+
+    def test_recorded_gate_skips_memory_files(self, tmp_path):
+        """Test that a recorded decision is read without looking at CMO memory."""
+        state = FactoryState(tmp_path)
+        state.record_validation("PROCEED", "validation-results-2026-01-01.md")
+
+        with patch.object(FilesystemMemoryStore, "latest") as latest:
+            gate = state.gate()
+
+        latest.assert_not_called()
+        assert gate["decision"] == "PROCEED"
+        assert gate["source"] == "validation-results-2026-01-01.md"
+
+    def test_gate_falls_back_to_latest_validation(self, tmp_path):
+        """Test that without a recorded decision the CMO's latest validation is parsed."""
+        state = FactoryState(tmp_path)
+        assert state.gate()["decision"] == "UNKNOWN"
+
+        position_memory(tmp_path, "CMO").put("validation-results", "## GATE DECISION: ITERATE", key="2026-01-01")
+
+        assert state.gate()["decision"] == "ITERATE"
+
+    def test_approval_request_keeps_decision(self, tmp_path):
+        """Test that updates merge into the gate section."""
+        state = FactoryState(tmp_path)
+        state.record_validation("PROCEED", "results.md")
+        state.record_approval_request("approval-request.md")
+
+        gate = state.gate()
+        assert gate["decision"] == "PROCEED"
+        assert gate["approval_request"] == "approval-request.md"
+
+    def test_positions(self, tmp_path):
+        """Test that recorded briefs are authoritative and brief files are the fallback."""
+        position_memory(tmp_path, "CFO").put("ceo-brief", "# Brief")
+        state = FactoryState(tmp_path)
+        assert state.position("CFO") is not None
+        assert state.position("CMO") is None
+
+        state.record_briefs(["CMO"])
+
+        assert "briefed_at" in state.position("CMO")
+        assert state.position("CFO") is None
+
+    def test_reads_are_cached_until_the_state_changes(self, tmp_path):
+        """Test that repeated reads parse the state once, and a write is seen by the next read."""
+        state = FactoryState(tmp_path)
+        state.record_validation("PROCEED", "results.md")
+        state.record_briefs(["CFO", "CMO"])
+        state.gate()
+
+        with patch.object(FilesystemMemoryStore, "get") as get:
+            state.gate()
+            briefed = state.positions(["CFO", "CMO", "COO"])
+            state.position("CFO")
+
+        get.assert_not_called()
+        assert {position for position, entry in briefed.items() if entry} == {"CFO", "CMO"}
+
+        state.record_briefs(["COO"])
+        assert state.position("COO") is not None
+
+    def test_files_written_after_the_state_win(self, tmp_path):
+        """Test that validation and brief files written after the recorded state are picked up."""
+        state = FactoryState(tmp_path)
+        state.record_validation("PIVOT", "old.md")
+        state.record_briefs(["CMO"])
+        time.sleep(0.01)
+
+        position_memory(tmp_path, "CMO").put("validation-results", "## GATE DECISION: PROCEED", key="2026-01-02")
+        position_memory(tmp_path, "CFO").put("ceo-brief", "# Brief")
+
+        assert state.gate()["decision"] == "PROCEED"
+        assert state.position("CFO") is not None
+
+    def test_rebuild_from_files(self, tmp_path):
+        """Test that rebuild() re-derives the state from memory files."""
+        state = FactoryState(tmp_path)
+        state.record_validation("PIVOT", "old.md")
+        position_memory(tmp_path, "CMO").put("validation-results", "## GATE DECISION: PROCEED", key="2026-01-02")
+        position_memory(tmp_path, "CFO").put("ceo-brief", "# Brief")
+
+        rebuilt = state.rebuild(["CFO", "CMO"])
+
+        assert rebuilt["gate"]["decision"] == "PROCEED"
+        assert list(rebuilt["positions"]) == ["CFO"]
+        assert state.gate()["decision"] == "PROCEED"
+
+    def test_shared_per_project_root(self, tmp_path):
+        """Test that factory_state() returns one instance per project root."""
+        assert factory_state(tmp_path) is factory_state(str(tmp_path))
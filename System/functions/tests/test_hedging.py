@@ -0,0 +1,167 @@
+"""
+Unit tests for latency tracking and hedged APIManager requests.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.agent import BaseAgent
+from latency import HedgePolicy, LatencyHistogram, LatencyTracker
+from api_manager import APIManager, DEFAULT_TASK_ROUTING
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+PRIMARY = DEFAULT_TASK_ROUTING["default"].primary
+FALLBACK = DEFAULT_TASK_ROUTING["default"].fallback
+
+
+def hedged_manager(monkeypatch, policy, **kwargs):
+    manager = APIManager(transport=PooledHTTPTransport(), latency=LatencyTracker(), **kwargs)
+    monkeypatch.setattr(manager._get_routing("default"), "hedge", policy)
+    return manager
+
+
+class TestLatencyTracker:
+    """Test rolling latency histograms."""
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles over the window."""
+        histogram = LatencyHistogram(window=100)
+        for ms in range(1, 101):
+            histogram.record(float(ms))
+
+        assert histogram.percentile(50) == 50
+        assert histogram.percentile(95) == 95
+        assert histogram.percentile(100) == 100
+
+    def test_window_rolls(self):
+        """Test that old samples fall out of the window."""
+        histogram = LatencyHistogram(window=3)
+        for ms in (1000, 1000, 1000, 10, 10, 10):
+            histogram.record(ms)
+
+        assert histogram.percentile(99) == 10
+
+    def test_min_samples(self):
+        """Test that percentiles are withheld until enough calls were seen."""
+        tracker = LatencyTracker()
+        tracker.record("openrouter", "m", 100)
+
+        assert tracker.percentile("openrouter", "m", 95, min_samples=2) is None
+        assert tracker.percentile("openrouter", "m", 95) == 100
+        assert tracker.snapshot()["openrouter:m"]["count"] == 1
+
+    def test_manager_records_successful_calls(self, stub_llm_server):
+        """Test that completions feed the tracker."""
+        manager = APIManager(transport=PooledHTTPTransport(), latency=LatencyTracker())
+
+        manager.complete_with_usage("default", MESSAGES)
+
+        assert manager.latency_stats()[f"openrouter:{PRIMARY.model}"]["count"] == 1
+
+
+class TestHedgedRequests:
+    """Test racing the fallback against a slow primary."""
+
+    def test_fast_primary_is_not_hedged(self, stub_llm_server, monkeypatch):
+        """Test that no second request is sent when the primary is quick."""
+        manager = hedged_manager(monkeypatch, HedgePolicy(initial_delay_ms=2000))
+
+        result = manager.complete_with_usage("default", MESSAGES)
+
+        assert result.success
+        assert not result.usage.hedged
+        assert not result.usage.fallback_used
+        assert len(stub_llm_server.requests) == 1
+
+    def test_slow_primary_is_hedged(self, stub_llm_server, monkeypatch):
+        """Test that the fallback wins when the primary stalls past the delay."""
+        stub_llm_server.model_delays = {PRIMARY.model: 1.0}
+        manager = hedged_manager(monkeypatch, HedgePolicy(initial_delay_ms=50))
+
+        start = time.monotonic()
+        result = manager.complete_with_usage("default", MESSAGES)
+        elapsed = time.monotonic() - start
+
+        assert result.success
+        assert result.usage.hedged
+        assert result.usage.hedge_delay_ms == 50
+        assert result.usage.fallback_used
+        assert result.usage.model_used == FALLBACK.model
+        assert elapsed < 0.8
+
+    @pytest.mark.parametrize("mode", ["sync", "async"])
+    def test_losing_call_reaches_agent_usage(self, stub_llm_server, monkeypatch, mode):
+        """Test that the slow call, billed after the winner returned, is added to the agent's session usage."""
+        stub_llm_server.model_delays = {PRIMARY.model: 0.5}
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.api_manager.latency = LatencyTracker()
+        agent.api_manager.async_transport = AsyncHTTPTransport()
+        monkeypatch.setattr(agent.api_manager._get_routing("default"), "hedge", HedgePolicy(initial_delay_ms=50))
+
+        async def think_and_wait():
+            if mode == "sync":
+                agent._think("hi", task_type="default")
+            else:
+                await agent._athink("hi", task_type="default")
+            returned = agent.session_usage.total_tokens
+            # The async loser keeps running in this loop
+            deadline = time.monotonic() + 5
+            while agent.session_usage.total_tokens < 30 and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            return returned
+
+        assert asyncio.run(think_and_wait()) == 15
+        assert agent.session_usage.total_tokens == 30
+        assert agent.api_manager.late_usage.total_tokens == 15
+
+    def test_hedging_is_opt_in(self):
+        """Test that no default task races two models."""
+        assert all(routing.hedge is None for routing in DEFAULT_TASK_ROUTING.values())
+
+    def test_delay_comes_from_histogram(self, stub_llm_server, monkeypatch):
+        """Test that the observed percentile replaces the initial delay."""
+        manager = hedged_manager(monkeypatch, HedgePolicy(percentile=95, min_samples=3, initial_delay_ms=5000))
+        for _ in range(3):
+            manager.latency.record(PRIMARY.provider, PRIMARY.model, 40.0)
+        stub_llm_server.model_delays = {PRIMARY.model: 1.0}
+
+        result = manager.complete_with_usage("default", MESSAGES)
+
+        assert result.usage.hedged
+        assert result.usage.hedge_delay_ms == 40.0
+
+    def test_prefer_faster_leads_with_faster_model(self, stub_llm_server, monkeypatch):
+        """Test that prefer_faster sends the lower-median model first."""
+        manager = hedged_manager(monkeypatch, HedgePolicy(min_samples=1, prefer_faster=True))
+        manager.latency.record(PRIMARY.provider, PRIMARY.model, 900.0)
+        manager.latency.record(FALLBACK.provider, FALLBACK.model, 100.0)
+
+        result = manager.complete_with_usage("default", MESSAGES)
+
+        assert stub_llm_server.requests[0]["body"]["model"] == FALLBACK.model
+        assert result.usage.fallback_used
+        assert not result.usage.hedged
+
+    def test_async_hedge_returns_early(self, stub_llm_server, monkeypatch):
+        """Test that the async race returns without waiting for the slow call."""
+        stub_llm_server.model_delays = {PRIMARY.model: 1.0}
+        manager = hedged_manager(monkeypatch, HedgePolicy(initial_delay_ms=50), async_transport=AsyncHTTPTransport())
+
+        async def run():
+            start = time.monotonic()
+            result = await manager.acomplete_with_usage("default", MESSAGES)
+            return result, time.monotonic() - start
+
+        result, elapsed = asyncio.run(run())
+
+        assert result.usage.hedged
+        assert result.usage.model_used == FALLBACK.model
+        assert elapsed < 0.8
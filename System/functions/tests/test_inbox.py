@@ -0,0 +1,139 @@
+"""
+Unit tests for bulk inbox routing.
+"""
+
+import json
+import mailbox
+import os
+import sys
+from email.message import EmailMessage
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.inbox import EmailRouter, detect_format, iter_raw_messages, parse_message, route_inbox
+
+
+RULES = [
+    (["lawsuit", "legal notice"], "CLO", "critical"),
+    (["investor", "funding"], "CFO", "high"),
+    (["press", "interview"], "CMO", "high"),
+    (["partnership"], "CEO", "normal"),
+    (["newsletter"], "CMO", "low"),
+]
+
+MESSAGES = [
+    {"from": "a@example.com", "subject": "Our newsletter", "body": "Monthly news"},
+    {"from": "b@example.com", "subject": "Hello", "body": "Just saying hi"},
+    {"from": "c@example.com", "subject": "Interview request", "body": "Sent by the press desk"},
+    {"from": "d@example.com", "subject": "Legal notice", "body": "Please respond"},
+    {"from": "e@example.com", "subject": "Funding", "body": "We would like to talk"},
+]
+
+
+def _email(index, message):
+    email = EmailMessage()
+    email["From"] = message["from"]
+    email["Subject"] = message["subject"]
+    email["Message-ID"] = f"<{index}@example.com>"
+    email.set_content(message["body"])
+    return email
+
+
+@pytest.fixture
+def jsonl_source(tmp_path):
+    path = tmp_path / "backlog.jsonl"
+    path.write_text("".join(json.dumps(message) + "\n" for message in MESSAGES))
+    return path
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestEmailRouter:
+    """Test routing single messages."""
+
+    def test_first_rule_wins(self):
+        """Test that the earliest matching rule decides the route."""
+        router = EmailRouter(RULES)
+
+        result = router.route({"subject": "Interview", "body": "about the lawsuit"})
+
+        assert result == {"route_to": "CLO", "reason": "Keyword match: lawsuit", "priority": "critical"}
+
+    def test_unmatched_goes_to_human(self):
+        """Test that messages without a keyword are queued for a human."""
+        assert EmailRouter(RULES).route({"subject": None, "body": "Hi"})["route_to"] == "HUMAN"
+
+
+class TestSources:
+    """Test reading mailboxes."""
+
+    def test_detect_format(self, tmp_path):
+        """Test that the format follows the path's layout and extension."""
+        assert detect_format(tmp_path) == "maildir"
+        assert detect_format(tmp_path / "inbox.jsonl") == "jsonl"
+        assert detect_format(tmp_path / "inbox.mbox") == "mbox"
+
+    def test_mbox_and_maildir(self, tmp_path):
+        """Test that mbox and Maildir messages parse into the same fields."""
+        box = mailbox.mbox(str(tmp_path / "inbox.mbox"))
+        maildir = mailbox.Maildir(str(tmp_path / "maildir"))
+        for index, message in enumerate(MESSAGES):
+            box.add(_email(index, message))
+            maildir.add(_email(index, message))
+        box.close()
+
+        for source in (tmp_path / "inbox.mbox", tmp_path / "maildir"):
+            parsed = [parse_message(raw) for raw in iter_raw_messages(source)]
+            assert sorted(message["subject"] for message in parsed) == sorted(m["subject"] for m in MESSAGES)
+            assert all(message["message_id"].endswith("@example.com>") for message in parsed)
+            assert {message["body"].strip() for message in parsed} == {m["body"] for m in MESSAGES}
+
+    def test_unknown_format(self, tmp_path):
+        """Test that an unknown format is rejected."""
+        with pytest.raises(ValueError):
+            list(iter_raw_messages(tmp_path / "inbox", format="pst"))
+
+
+class TestRouteInbox:
+    """Test bulk routing."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_decisions_in_source_order(self, jsonl_source, tmp_path, workers):
+        """Test that decisions are logged in source order, inline or across workers."""
+        stats = route_inbox(jsonl_source, RULES, tmp_path / "out", workers=workers, chunk_size=2)
+
+        decisions = _read_jsonl(stats.decisions_path)
+        assert [decision["seq"] for decision in decisions] == list(range(len(MESSAGES)))
+        assert [decision["route_to"] for decision in decisions] == ["CMO", "HUMAN", "CMO", "CLO", "CFO"]
+        assert stats.messages == len(MESSAGES)
+        assert stats.workers == workers
+
+    def test_queues_ordered_by_priority(self, jsonl_source, tmp_path):
+        """Test that each agent's queue puts higher priorities first, then arrival order."""
+        stats = route_inbox(jsonl_source, RULES, tmp_path / "out", workers=1)
+
+        cmo_queue = _read_jsonl(stats.queue_paths["CMO"])
+        assert [entry["subject"] for entry in cmo_queue] == ["Interview request", "Our newsletter"]
+        assert stats.by_agent == {"CMO": 2, "HUMAN": 1, "CLO": 1, "CFO": 1}
+
+    def test_unparseable_messages_go_to_human(self, tmp_path):
+        """Test that a broken message is counted and routed to HUMAN without stopping the run."""
+        raw = [("jsonl", "{not json"), ("jsonl", json.dumps(MESSAGES[3]))]
+
+        stats = route_inbox(raw, RULES, tmp_path / "out", workers=1)
+
+        assert stats.errors == 1
+        assert stats.by_agent == {"HUMAN": 1, "CLO": 1}
+
+    def test_stats(self, jsonl_source, tmp_path):
+        """Test that throughput is reported."""
+        stats = route_inbox(jsonl_source, RULES, tmp_path / "out", workers=1).as_dict()
+
+        assert stats["messages"] == len(MESSAGES)
+        assert stats["messages_per_sec"] >= 0
+        assert set(stats["queue_paths"]) == {"CMO", "HUMAN", "CLO", "CFO"}
@@ -0,0 +1,74 @@
+"""
+Unit tests for the compiled keyword matcher.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.keywords import KeywordMatcher
+
+
+ROUTES = KeywordMatcher.from_groups([
+    ("critical", ["lawsuit", "legal notice"]),
+    ("legal", ["legal", "attorney"]),
+    ("health", ["health", "mental health"]),
+    ("eu", ["eu", "gdpr"]),
+])
+
+
+class TestKeywordMatcher:
+    """Test matching, positions and priorities."""
+
+    def test_matches_with_positions(self):
+        """Test that matches carry keyword, label, priority and span."""
+        text = "Received a Legal Notice today"
+
+        matches = ROUTES.find_all(text)
+
+        assert [(m.keyword, m.label, m.priority) for m in matches] == [
+            ("legal notice", "critical", 0),
+            ("legal", "legal", 1),
+        ]
+        assert text[matches[0].start:matches[0].end] == "Legal Notice"
+
+    def test_overlapping_keywords(self):
+        """Test that a keyword inside a longer match is still found."""
+        keywords = [m.keyword for m in ROUTES.finditer("We support mental health.")]
+
+        assert keywords == ["mental health", "health"]
+
+    def test_matches_at_word_start(self):
+        """Test that keywords match word starts, not the middle of words."""
+        assert ROUTES.find_all("A neutral queue") == []
+        assert [m.keyword for m in ROUTES.finditer("EU-based, healthcare")] == ["eu", "health"]
+
+    def test_word_end(self):
+        """Test that word_end=True only matches whole words."""
+        matcher = KeywordMatcher.from_groups([("finance", ["invest", "investment"])], word_end=True)
+
+        assert [m.keyword for m in matcher.finditer("investment")] == ["investment"]
+        assert matcher.find_all("investor") == []
+
+    def test_best_prefers_priority(self):
+        """Test that best() returns the highest-priority match anywhere in the text."""
+        best = ROUTES.best("Our attorney mentioned a lawsuit")
+
+        assert best.label == "critical"
+        assert ROUTES.best("Nothing relevant") is None
+
+    def test_first_by_label(self):
+        """Test that each label is reported once, with its first match."""
+        first = ROUTES.first_by_label("GDPR applies in the EU; health and health again")
+
+        assert list(first) == ["eu", "health"]
+        assert first["eu"].keyword == "gdpr"
+
+    def test_many_keywords(self):
+        """Test that thousands of keywords compile into one matcher."""
+        keywords = [f"term{i}x" for i in range(5000)]
+        matcher = KeywordMatcher.from_groups([(i, [kw]) for i, kw in enumerate(keywords)])
+        text = "filler " * 10000 + "term4999x"
+
+        assert [m.label for m in matcher.finditer(text)] == [4999]
@@ -0,0 +1,204 @@
+"""
+Unit tests for the batched background log pipeline.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.agent import BaseAgent, JsonFormatter
+from factory_core.log_pipeline import JsonlSink, LogPipeline, QueueLogHandler, StreamSink, get_log_pipeline
+
+
+class RecordingSink:
+    """Sink that records batches, optionally blocking until released."""
+
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+        self.writing = threading.Event()
+
+    def write_batch(self, items):
+        self.writing.set()
+        self.release.wait()
+        time.sleep(self.delay)
+        self.batches.append(list(items))
+
+
+def blocked_pipeline(capacity, **kwargs):
+    """A pipeline whose writer is stuck on its first item, so the queue fills deterministically."""
+    sink = RecordingSink()
+    sink.release.clear()
+    pipeline = LogPipeline(capacity=capacity, batch_size=1, flush_interval=0, **kwargs)
+    pipeline.submit(sink, "first")
+    sink.writing.wait(1)
+    return pipeline, sink
+
+
+class TestLogPipeline:
+    """Test batching, non-blocking submits and backpressure."""
+
+    def test_items_written_in_batches(self):
+        """Test that queued items reach the sink in order, in few batches."""
+        sink = RecordingSink()
+        pipeline = LogPipeline(flush_interval=0.05)
+
+        for i in range(50):
+            assert pipeline.submit(sink, i)
+        assert pipeline.flush(2)
+
+        written = [item for batch in sink.batches for item in batch]
+        assert written == list(range(50))
+        assert len(sink.batches) < 50
+        assert pipeline.snapshot()["written"] == 50
+
+    def test_submit_does_not_wait_for_writes(self):
+        """Test that a slow sink doesn't slow down callers."""
+        sink = RecordingSink(delay=0.2)
+        pipeline = LogPipeline(flush_interval=0)
+
+        start = time.monotonic()
+        for i in range(20):
+            pipeline.submit(sink, i)
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.1
+        pipeline.close()
+
+    def test_full_queue_drops(self):
+        """Test that submits past capacity are dropped and counted."""
+        pipeline, sink = blocked_pipeline(capacity=3)
+
+        results = [pipeline.submit(sink, i) for i in range(5)]
+
+        assert results == [True, True, True, False, False]
+        assert pipeline.stats.dropped == 2
+        sink.release.set()
+        assert pipeline.flush(2)
+
+    def test_low_severity_sampled_near_capacity(self):
+        """Test that sampleable items are thinned once the queue passes sample_at."""
+        pipeline, sink = blocked_pipeline(capacity=10, sample_at=0.5, sample_rate=2)
+        for i in range(5):
+            pipeline.submit(sink, i)
+
+        kept = [pipeline.submit(sink, f"debug {i}", sampleable=True) for i in range(4)]
+        important = pipeline.submit(sink, "error")
+
+        assert kept == [False, True, False, True]
+        assert important
+        assert pipeline.stats.sampled == 2
+        sink.release.set()
+        assert pipeline.flush(2)
+
+    def test_sink_errors_counted(self):
+        """Test that a failing sink doesn't stop the writer."""
+
+        class FailingSink:
+            def write_batch(self, items):
+                raise OSError("disk full")
+
+        good = RecordingSink()
+        pipeline = LogPipeline(flush_interval=0)
+        pipeline.submit(FailingSink(), "lost")
+        pipeline.submit(good, "kept")
+        assert pipeline.flush(2)
+
+        assert pipeline.stats.errors >= 1
+        assert [item for batch in good.batches for item in batch] == ["kept"]
+
+    def test_close_writes_pending(self):
+        """Test that close() drains the queue before stopping."""
+        sink = RecordingSink(delay=0.05)
+        pipeline = LogPipeline(flush_interval=0)
+        for i in range(3):
+            pipeline.submit(sink, i)
+
+        pipeline.close()
+
+        assert [item for batch in sink.batches for item in batch] == [0, 1, 2]
+        assert not pipeline.submit(sink, "late")
+
+
+class TestQueueLogHandler:
+    """Test the logging handler."""
+
+    def test_records_formatted_on_writer(self):
+        """Test that records are rendered with their args and written as JSON lines."""
+        stream = io.StringIO()
+        pipeline = LogPipeline(flush_interval=0)
+        log = logging.getLogger("test_log_pipeline.handler")
+        log.propagate = False
+        log.addHandler(QueueLogHandler(StreamSink(stream, JsonFormatter()), pipeline))
+        log.setLevel(logging.INFO)
+
+        args = {"step": 1}
+        log.info("Step %s done", args, extra={"agent_id": "CEO"})
+        args["step"] = 2
+        assert pipeline.flush(2)
+
+        line = json.loads(stream.getvalue().splitlines()[0])
+        assert line["message"] == "Step {'step': 1} done"
+        assert line["agent_id"] == "CEO"
+        assert line["severity"] == "INFO"
+
+
+class TestJsonlSink:
+    """Test JSONL session logs."""
+
+    def test_appends_json_lines_per_day(self, tmp_path):
+        """Test that entries go to the file for their UTC date."""
+        sink = JsonlSink(tmp_path, "plan")
+
+        sink.write_batch([
+            {"timestamp": "2026-01-01T10:00:00Z", "data": {"a": 1}},
+            {"timestamp": "2026-01-02T10:00:00Z", "data": {"a": 2}},
+        ])
+        sink.write_batch([{"timestamp": "2026-01-01T11:00:00Z", "data": {"a": 3}}])
+
+        day_one = [json.loads(line) for line in (tmp_path / "plan-2026-01-01.jsonl").read_text().splitlines()]
+        assert [entry["data"]["a"] for entry in day_one] == [1, 3]
+        assert (tmp_path / "plan-2026-01-02.jsonl").exists()
+
+    def test_rotates_by_size_and_compresses(self, tmp_path):
+        """Test that a full file is renamed, gzipped and replaced."""
+        sink = JsonlSink(tmp_path, "plan", max_bytes=100, compress=True)
+        entry = {"timestamp": "2026-01-01T10:00:00Z", "data": "x" * 60}
+
+        sink.write_batch([entry])
+        sink.write_batch([entry])
+        sink.write_batch([entry])
+
+        assert len((tmp_path / "plan-2026-01-01.jsonl").read_text().splitlines()) == 1
+        for index in (1, 2):
+            with gzip.open(tmp_path / f"plan-2026-01-01.{index}.jsonl.gz", "rt") as f:
+                assert json.loads(f.read())["data"] == "x" * 60
+
+
+class TestAgentSessionLogs:
+    """Test BaseAgent._log_session."""
+
+    def test_log_session_writes_jsonl(self, tmp_path):
+        """Test that session logs are queued and land as JSONL with agent fields."""
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.logs_path = tmp_path
+
+        assert agent._log_session("vision", {"summary": "Coffee"})
+        assert get_log_pipeline().flush(2)
+
+        files = list(tmp_path.glob("vision-*.jsonl"))
+        assert len(files) == 1
+        entry = json.loads(files[0].read_text())
+        assert entry["type"] == "vision"
+        assert entry["agent"] == "TEST"
+        assert entry["factory_id"] == agent.factory_id
+        assert entry["data"] == {"summary": "Coffee"}
@@ -0,0 +1,230 @@
+"""
+Unit tests for agent memory stores.
+"""
+
+import os
+import sqlite3
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.memory import FilesystemMemoryStore, SqliteMemoryStore, memory_store
+
+
+def bump_mtime(path, seconds):
+    """Move a file's mtime forward so write order doesn't depend on clock resolution."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + int(seconds * 1e9)))
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "filesystem":
+        yield FilesystemMemoryStore(tmp_path / "memory")
+        return
+    store = SqliteMemoryStore(tmp_path / "memory")
+    yield store
+    store.close()
+
+
+class TestMemoryStore:
+    """Behaviour shared by both backends."""
+
+    def test_put_and_get(self, store):
+        """Test that records round-trip with their kind and key."""
+        store.put("vision", "# Vision")
+        store.put("budget", "# Budget", key="v20260101")
+
+        assert store.read("vision") == "# Vision"
+        record = store.get("budget", "v20260101")
+        assert record.content == "# Budget"
+        assert record.kind == "budget"
+        assert record.key == "v20260101"
+        assert store.get("budget") is None
+        assert store.read("missing", default="") == ""
+
+    def test_put_replaces(self, store):
+        """Test that a second put of the same kind and key replaces the first."""
+        store.put("validation-results", "ITERATE", key="2026-01-01")
+        store.put("validation-results", "PROCEED", key="2026-01-01")
+
+        assert [r.content for r in store.list("validation-results")] == ["PROCEED"]
+
+    def test_latest_is_greatest_key(self, store):
+        """Test that latest() returns the record of a kind with the greatest key, like sorted filenames."""
+        assert store.latest("validation-results") is None
+
+        for day in ("2026-01-01", "2026-01-03", "2026-01-02"):
+            store.put("validation-results", f"result {day}", key=day)
+        store.put("validation-results", "unkeyed")
+        store.put("strategy", "newer, other kind", key="v1")
+
+        assert store.latest("validation-results").content == "result 2026-01-03"
+        assert [r.key for r in store.list("validation-results")] == ["2026-01-03", "2026-01-02", "2026-01-01", None]
+
+    def test_modified_times(self, store):
+        """Test that write times are available without reading records."""
+        assert store.modified_at("budget") is None
+        assert store.last_modified("budget") is None
+
+        first = store.put("budget", "v1", key="a")
+        second = store.put("budget", "v2", key="b")
+
+        assert store.modified_at("budget", "a") == first.created_at
+        assert store.last_modified("budget") == second.created_at
+
+    def test_keys(self, store):
+        """Test that keys() lists a kind's keys, greatest first, without other kinds."""
+        store.put("budget", "v1", key="v1")
+        store.put("budget", "v2", key="v2")
+        store.put("budget", "unkeyed")
+        store.put("forecast", "other kind", key="v9")
+
+        assert store.keys("budget") == ["v2", "v1", None]
+
+    def test_json_records(self, store):
+        """Test JSON helpers."""
+        store.put_json("onboarding-status", {"next_phase": 2})
+
+        assert store.get_json("onboarding-status") == {"next_phase": 2}
+        assert store.get("onboarding-status").format == "json"
+        assert store.get_json("missing", default={}) == {}
+
+    def test_delete(self, store):
+        """Test that deleted records are gone from get, latest and list."""
+        store.put("forecast", "# Forecast")
+
+        assert store.delete("forecast")
+        assert not store.delete("forecast")
+        assert store.get("forecast") is None
+        assert store.latest("forecast") is None
+
+
+class TestFilesystemMemoryStore:
+    """Test the file layout and index."""
+
+    def test_existing_layout(self, tmp_path):
+        """Test that records use the `<kind>-<key>.md` names agents always wrote."""
+        store = FilesystemMemoryStore(tmp_path)
+
+        record = store.put("logo-concepts", "concepts", key="LOGO-20260101-001")
+
+        assert record.location == str(tmp_path / "logo-concepts-LOGO-20260101-001.md")
+        assert (tmp_path / "logo-concepts-LOGO-20260101-001.md").read_text() == "concepts"
+
+    def test_atomic_write_leaves_no_temp_files(self, tmp_path):
+        """Test that puts go through a temp file that is renamed into place."""
+        store = FilesystemMemoryStore(tmp_path)
+
+        with patch("factory_core.memory.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                store.put("vision", "new")
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_picks_up_external_files(self, tmp_path):
+        """Test that files written outside the store invalidate the index."""
+        store = FilesystemMemoryStore(tmp_path)
+        store.put("validation-results", "old", key="2026-01-01")
+        bump_mtime(tmp_path / "validation-results-2026-01-01.md", -1)
+
+        (tmp_path / "validation-results-2026-01-02.md").write_text("PROCEED")
+        os.utime(tmp_path, ns=(0, tmp_path.stat().st_mtime_ns + 1))
+
+        assert store.latest("validation-results").content == "PROCEED"
+
+    def test_latest_uses_index(self, tmp_path):
+        """Test that repeated latest() calls don't rescan an unchanged directory."""
+        store = FilesystemMemoryStore(tmp_path)
+        for i in range(5):
+            store.put("budget", str(i), key=f"v{i}")
+
+        with patch("factory_core.memory.os.scandir") as scandir:
+            store.latest("budget")
+            store.latest("budget")
+
+        scandir.assert_not_called()
+
+    def test_kinds_do_not_mix(self, tmp_path):
+        """Test that other kinds and hidden files aren't records of a kind."""
+        store = FilesystemMemoryStore(tmp_path)
+        store.put("validation-results", "result", key="2026-01-01")
+        (tmp_path / ".validation-results-x.md.tmp").write_text("partial")
+        (tmp_path / "validation-notes.md").write_text("notes")
+
+        assert [r.key for r in store.list("validation-results")] == ["2026-01-01"]
+
+
+class TestSqliteMemoryStore:
+    """Test the SQLite backend."""
+
+    def test_latest_uses_index(self, tmp_path):
+        """Test that latest() is answered from the (kind, key) index without sorting."""
+        store = SqliteMemoryStore(tmp_path)
+        store.put("budget", "v1", key="v1")
+
+        connection = sqlite3.connect(str(store.path))
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT kind, key, format, content, created_at FROM records "
+            "WHERE kind = ? ORDER BY key DESC LIMIT 1",
+            ("budget",)
+        ).fetchall()
+        connection.close()
+        store.close()
+
+        assert any("INDEX" in row[-1] for row in plan)
+        assert not any("TEMP B-TREE" in row[-1] for row in plan)
+
+    def test_imports_filesystem_layout(self, tmp_path):
+        """Test that a kind's existing files are imported once, and database records win."""
+        FilesystemMemoryStore(tmp_path).put("budget", "from file", key="v1")
+        (tmp_path / "budget-v2.md").write_text("older file")
+        store = SqliteMemoryStore(tmp_path)
+        store.put("budget", "from database", key="v2")
+
+        assert store.get("budget", "v1").content == "from file"
+        assert store.latest("budget").content == "from database"
+
+        store.delete("budget", "v1")
+        store.close()
+        reopened = SqliteMemoryStore(tmp_path)
+        assert reopened.get("budget", "v1") is None
+        reopened.close()
+
+    def test_visible_to_other_connections(self, tmp_path):
+        """Test that a put is committed when it returns."""
+        store = SqliteMemoryStore(tmp_path)
+        store.put("vision", "# Vision")
+
+        other = SqliteMemoryStore(tmp_path)
+        assert other.read("vision") == "# Vision"
+        other.close()
+        store.close()
+
+
+class TestSharedStores:
+    """Test memory_store() and agent integration."""
+
+    def test_one_store_per_directory(self, tmp_path):
+        """Test that the same directory gives the same store."""
+        assert memory_store(tmp_path) is memory_store(str(tmp_path))
+        assert isinstance(memory_store(tmp_path, "sqlite"), SqliteMemoryStore)
+
+    def test_unknown_backend(self, tmp_path):
+        """Test that an unknown backend raises ValueError."""
+        with pytest.raises(ValueError):
+            memory_store(tmp_path, "redis")
+
+    def test_agent_memory_follows_memory_path(self, tmp_path):
+        """Test that BaseAgent.memory is the store for the current memory_path."""
+        from factory_core.agent import BaseAgent
+
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.memory_path = tmp_path
+        agent.memory.put("ceo-brief", "# Brief")
+
+        assert (tmp_path / "ceo-brief.md").read_text() == "# Brief"
+        assert agent.memory is memory_store(tmp_path)
@@ -0,0 +1,158 @@
+"""
+Unit tests for the cacheable system prompt prefix and provider prompt caching.
+"""
+
+import os
+import sys
+from dataclasses import replace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from api_manager import APIManager, ModelConfig, TaskRouting
+from factory_core.agent import BaseAgent
+from transport import PooledHTTPTransport
+
+MESSAGES = [
+    {"role": "system", "content": "Stable prefix"},
+    {"role": "system", "content": "Current context"},
+    {"role": "user", "content": "Status report?"},
+]
+
+
+def manager_for(model):
+    manager = APIManager(transport=PooledHTTPTransport())
+    routing = TaskRouting(primary=ModelConfig(provider="openrouter", model=model))
+    # The loaded config is shared between managers, so don't mutate it
+    manager.config = replace(manager.config, task_routing={**manager.config.task_routing, "default": routing})
+    return manager
+
+
+class TestSystemPromptPrefix:
+    """Test the split between the stable prefix and the volatile context."""
+
+    def test_prefix_is_stable_across_calls(self):
+        """Test that the prefix doesn't change between calls or request views."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        assert agent._get_system_prefix() == agent._get_system_prefix()
+        assert agent.for_request()._get_system_prefix() == agent._get_system_prefix()
+
+    def test_prefix_has_no_clock(self):
+        """Test that the timestamp lives in the context, not the prefix."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        assert "Timestamp" not in agent._get_system_prefix()
+        assert "Timestamp" in agent._get_system_context()
+        assert agent.factory_id in agent._get_system_context()
+
+    def test_prefix_includes_governance(self):
+        """Test that loaded governance files are part of the cacheable prefix."""
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.governance = {"mandate": "Be good.", "ethics": "Never lie."}
+        agent._system_prefix = None
+
+        prefix = agent._get_system_prefix()
+
+        assert "Be good." in prefix
+        assert "## Governance: ethics\nNever lie." in prefix
+
+    def test_messages_put_prefix_first(self):
+        """Test that built messages send the prefix and context as separate system messages."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        messages = agent._build_messages("Hello")
+
+        assert [m["role"] for m in messages] == ["system", "system", "user"]
+        assert messages[0]["content"] == agent._get_system_prefix()
+        assert messages[1]["content"] == agent._get_system_context()
+        assert agent._get_system_prompt().startswith(agent._get_system_prefix())
+
+    def test_context_is_stable_within_the_hour(self):
+        """Test that the clock has hour resolution so prompts repeat within the hour."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        with patch("factory_core.agent.datetime") as clock:
+            clock.utcnow.return_value.strftime.side_effect = lambda fmt: fmt
+            context = agent._get_system_context()
+
+        assert "%H:00Z" in context
+
+
+class TestProviderPromptCaching:
+    """Test cache_control markers and cached-token accounting in APIManager."""
+
+    def test_anthropic_prefix_marked(self, stub_llm_server):
+        """Test that Anthropic models via OpenRouter get cache_control on the first system message."""
+        manager = manager_for("anthropic/claude-3.5-sonnet-20241022")
+
+        manager.complete_with_usage("default", MESSAGES, use_fallback=False, use_cache=False)
+
+        sent = stub_llm_server.requests[0]["body"]["messages"]
+        assert sent[0]["content"] == [
+            {"type": "text", "text": "Stable prefix", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert sent[1] == MESSAGES[1]
+        assert sent[2] == MESSAGES[2]
+        assert MESSAGES[0]["content"] == "Stable prefix"
+
+    def test_other_models_unmarked(self, stub_llm_server):
+        """Test that models with automatic caching are sent plain messages."""
+        manager = manager_for("openai/gpt-4o-mini")
+
+        manager.complete_with_usage("default", MESSAGES, use_fallback=False, use_cache=False)
+
+        assert stub_llm_server.requests[0]["body"]["messages"] == MESSAGES
+
+    def test_cached_tokens_reported_and_discounted(self, stub_llm_server):
+        """Test that cached prompt tokens are reported and billed at the cached rate."""
+        stub_llm_server.usage = {
+            "prompt_tokens": 2000,
+            "completion_tokens": 100,
+            "total_tokens": 2100,
+            "prompt_tokens_details": {"cached_tokens": 1500},
+        }
+        model = "anthropic/claude-3.5-sonnet-20241022"
+        manager = manager_for(model)
+
+        result = manager.complete_with_usage("default", MESSAGES, use_fallback=False, use_cache=False)
+
+        assert result.usage.cached_tokens == 1500
+        assert result.usage.cost_usd == manager._calculate_cost(model, 2000, 100, 1500)
+        assert result.usage.cost_usd < manager._calculate_cost(model, 2000, 100)
+
+    def test_streamed_cached_tokens(self, stub_llm_server):
+        """Test that the final usage chunk of a stream carries cached tokens."""
+        stub_llm_server.usage = {
+            "prompt_tokens": 2000,
+            "completion_tokens": 5,
+            "total_tokens": 2005,
+            "prompt_tokens_details": {"cached_tokens": 1024},
+        }
+        manager = manager_for("anthropic/claude-3.5-sonnet-20241022")
+
+        stream = manager.stream("default", MESSAGES, use_fallback=False)
+        list(stream)
+
+        assert stream.result.usage.cached_tokens == 1024
+
+    def test_cached_cost(self):
+        """Test cost with and without cached-input pricing."""
+        manager = APIManager()
+
+        assert manager._calculate_cost("anthropic/claude-3.5-sonnet-20241022", 1_000_000, 0, 1_000_000) == 0.30
+        assert manager._calculate_cost("openai/gpt-4-turbo", 1_000_000, 0, 1_000_000) == 10.00
+
+    def test_agent_tracks_cached_tokens(self, stub_llm_server):
+        """Test that BaseAgent sums cached tokens into its usage summary."""
+        stub_llm_server.usage = {
+            "prompt_tokens": 2000,
+            "completion_tokens": 5,
+            "total_tokens": 2005,
+            "prompt_tokens_details": {"cached_tokens": 1800},
+        }
+        agent = BaseAgent("TEST", "Test Agent")
+
+        agent._think("Hello")
+
+        assert agent.get_usage_summary()["cached_tokens"] == 1800
@@ -0,0 +1,305 @@
+"""
+Unit tests for the token-bucket rate governor.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api_manager import APIManager
+from rate_limit import RateGovernor, TokenBucket, parse_reset_seconds
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+MESSAGES = [{"role": "user", "content": "Status report?"}]
+MODEL = ("openrouter", "stub/model")
+
+
+class TestTokenBucket:
+    """Test the token bucket."""
+
+    def test_waits_for_refill(self):
+        """Test that an empty bucket reports the time until it refills."""
+        bucket = TokenBucket(per_minute=60)
+        now = bucket.updated
+
+        assert bucket.wait_time(60, now) == 0
+        bucket.take(60, now)
+        assert bucket.wait_time(1, now) == 1.0
+        assert bucket.wait_time(1, now + 1.0) == 0
+
+    def test_debt_delays_next_request(self):
+        """Test that spending more than is left pushes the level negative."""
+        bucket = TokenBucket(per_minute=60)
+        now = bucket.updated
+
+        bucket.take(90, now)
+        assert bucket.wait_time(1, now) == 31.0
+
+    def test_provider_remaining_lowers_level(self):
+        """Test that a lower remaining count from the provider is trusted."""
+        bucket = TokenBucket(per_minute=100)
+        now = bucket.updated
+
+        bucket.set_remaining(10, now)
+        assert bucket.level == 10
+        bucket.set_remaining(50, now)
+        assert bucket.level == 10
+
+
+class TestParseResetSeconds:
+    """Test x-ratelimit-reset parsing."""
+
+    def test_durations(self):
+        """Test OpenAI-style durations."""
+        assert parse_reset_seconds("1s") == 1
+        assert parse_reset_seconds("6m0s") == 360
+        assert parse_reset_seconds("20ms") == 0.02
+
+    def test_numbers_and_timestamps(self):
+        """Test plain seconds and epoch timestamps in seconds or milliseconds."""
+        now = 1_700_000_000.0
+        assert parse_reset_seconds("2.5", now) == 2.5
+        assert parse_reset_seconds(str(int(now + 30)), now) == 30
+        assert parse_reset_seconds(str(int((now + 30) * 1000)), now) == 30
+
+    def test_invalid(self):
+        """Test that missing or malformed values give None."""
+        assert parse_reset_seconds(None) is None
+        assert parse_reset_seconds("soon") is None
+
+
+class TestRateGovernor:
+    """Test permits, limits and fairness."""
+
+    def test_request_limit_waits(self):
+        """Test that a factory over its requests/min waits for the bucket."""
+        governor = RateGovernor(requests_per_minute=600)  # 10/s
+        for _ in range(600):
+            governor.release(governor.acquire("factory-a", *MODEL))
+
+        start = time.monotonic()
+        permit = governor.acquire("factory-a", *MODEL)
+        elapsed = time.monotonic() - start
+
+        assert permit is not None
+        assert elapsed >= 0.08
+        assert governor.stats.waited == 1
+
+    def test_limits_are_per_factory(self):
+        """Test that one factory's exhausted budget doesn't block another."""
+        governor = RateGovernor(requests_per_minute=1, max_wait_seconds=0.1)
+        governor.release(governor.acquire("factory-a", *MODEL))
+
+        assert governor.acquire("factory-a", *MODEL) is None
+        assert governor.acquire("factory-b", *MODEL) is not None
+        assert governor.stats.timeouts == 1
+
+    def test_token_limit_refunds_unused(self):
+        """Test that releasing with actual usage refunds the unused estimate."""
+        governor = RateGovernor(tokens_per_minute=1000, max_wait_seconds=0)
+        permit = governor.acquire("factory-a", *MODEL, tokens=900)
+        assert governor.acquire("factory-a", *MODEL, tokens=500) is None
+
+        governor.release(permit, used_tokens=100)
+
+        assert governor.acquire("factory-a", *MODEL, tokens=500) is not None
+
+    def test_concurrency_cap(self):
+        """Test that no more than max_concurrency calls run at once."""
+        governor = RateGovernor(max_concurrency=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def call(_):
+            permit = governor.acquire("factory-a", *MODEL)
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            governor.release(permit)
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(call, range(6)))
+
+        assert max(peak) == 2
+        assert governor.snapshot()["granted"] == 6
+
+    def test_fair_share_across_factories(self):
+        """Test that a freed slot goes to the factory with fewer calls in flight."""
+        governor = RateGovernor(max_concurrency=2)
+        held = [governor.acquire("factory-a", *MODEL) for _ in range(2)]
+        order = []
+
+        def wait_for(factory):
+            permit = governor.acquire(factory, *MODEL)
+            order.append(factory)
+            governor.release(permit)
+
+        # factory-a queues first, but still holds a slot once one frees up
+        threads = [threading.Thread(target=wait_for, args=(f,)) for f in ("factory-a", "factory-b")]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        governor.release(held[0])
+        threads[0].join(0.1)
+        governor.release(held[1])
+        for thread in threads:
+            thread.join()
+
+        assert order == ["factory-b", "factory-a"]
+
+    def test_learns_openai_headers(self):
+        """Test that x-ratelimit-*-requests/-tokens headers set the limits."""
+        governor = RateGovernor()
+        permit = governor.acquire("factory-a", *MODEL)
+        governor.release(permit, headers={
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "499",
+            "x-ratelimit-limit-tokens": "30000",
+            "x-ratelimit-remaining-tokens": "29000",
+        })
+
+        limits = governor.snapshot()["limits"]["factory-a:openrouter:stub/model"]
+        assert limits["requests_per_minute"] == 500
+        assert limits["tokens_per_minute"] == 30000
+
+    def test_exhausted_headers_block_until_reset(self):
+        """Test that remaining=0 with a reset time backs the model off."""
+        governor = RateGovernor(max_wait_seconds=0)
+        governor.release(governor.acquire("factory-a", *MODEL), headers={
+            "X-RateLimit-Limit": "20",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": "5s",
+        })
+
+        assert governor.acquire("factory-a", *MODEL) is None
+
+    def test_penalize_backs_off(self):
+        """Test that a Retry-After penalty delays the next permit."""
+        governor = RateGovernor()
+        governor.penalize("factory-a", *MODEL, 0.1)
+
+        start = time.monotonic()
+        governor.release(governor.acquire("factory-a", *MODEL))
+
+        assert time.monotonic() - start >= 0.09
+        assert governor.stats.throttled == 1
+
+    def test_async_acquire(self):
+        """Test that async callers respect the concurrency cap."""
+        governor = RateGovernor(max_concurrency=1)
+        peak = []
+
+        async def call():
+            permit = await governor.aacquire("factory-a", *MODEL)
+            peak.append(governor.snapshot()["limits"]["factory-a:openrouter:stub/model"]["in_flight"])
+            await asyncio.sleep(0.02)
+            governor.release(permit)
+
+        async def run():
+            await asyncio.gather(*[call() for _ in range(3)])
+
+        asyncio.run(run())
+
+        assert peak == [1, 1, 1]
+        assert governor.stats.granted == 3
+
+
+class TestAPIManagerRateGovernor:
+    """Test rate governing in APIManager."""
+
+    def test_rate_limit_retried_on_same_model(self, stub_llm_server):
+        """Test that a 429 is waited out and retried instead of failing over."""
+        stub_llm_server.status_sequence = [429]
+        stub_llm_server.extra_headers = {"Retry-After": "0.1"}
+        manager = APIManager(transport=PooledHTTPTransport(), rate_governor=RateGovernor())
+
+        start = time.monotonic()
+        result = manager.complete_with_usage("default", MESSAGES, use_cache=False)
+        elapsed = time.monotonic() - start
+
+        assert result.success
+        assert not result.usage.fallback_used
+        models = [r["body"]["model"] for r in stub_llm_server.requests]
+        assert len(models) == 2 and models[0] == models[1]
+        assert elapsed >= 0.1
+        assert result.usage.queue_ms >= 100 > result.usage.duration_ms
+        assert manager.rate_stats()["throttled"] == 1
+
+    def test_async_rate_limit_retried(self, stub_llm_server):
+        """Test that async completions retry a 429 on the same model."""
+        stub_llm_server.status_sequence = [429]
+        stub_llm_server.extra_headers = {"Retry-After": "0.1"}
+        manager = APIManager(async_transport=AsyncHTTPTransport(), rate_governor=RateGovernor())
+
+        result = asyncio.run(manager.acomplete_with_usage("default", MESSAGES, use_cache=False))
+
+        assert result.success
+        assert not result.usage.fallback_used
+        assert len(stub_llm_server.requests) == 2
+
+    @pytest.mark.parametrize("mode", ["sync", "async", "stream", "astream"])
+    def test_queue_wait_not_in_latency(self, stub_llm_server, mode):
+        """Test that time spent waiting for a permit is reported as queue_ms, not request latency."""
+        manager = APIManager(
+            transport=PooledHTTPTransport(), async_transport=AsyncHTTPTransport(), rate_governor=RateGovernor()
+        )
+        config = manager._get_routing("default").primary
+        manager.rate_governor.penalize(manager.factory_id, config.provider, config.model, 0.2)
+
+        if mode == "sync":
+            result = manager.complete_with_usage("default", MESSAGES, use_cache=False, use_fallback=False)
+        elif mode == "async":
+            result = asyncio.run(
+                manager.acomplete_with_usage("default", MESSAGES, use_cache=False, use_fallback=False)
+            )
+        elif mode == "stream":
+            result = manager.stream("default", MESSAGES, use_cache=False, use_fallback=False).consume()
+        else:
+            result = asyncio.run(
+                manager.astream("default", MESSAGES, use_cache=False, use_fallback=False).consume()
+            )
+
+        assert result.success
+        assert result.usage.queue_ms >= 150
+        assert result.usage.duration_ms < 150
+        assert manager.latency.percentile(config.provider, config.model, 100) < 150
+
+    def test_permit_timeout_fails_request(self, stub_llm_server):
+        """Test that a caller that can't get a permit gets a failed result, not a hang."""
+        governor = RateGovernor(requests_per_minute=1, max_wait_seconds=0.05)
+        manager = APIManager(transport=PooledHTTPTransport(), rate_governor=governor)
+
+        first = manager.complete_with_usage("default", MESSAGES, use_cache=False, use_fallback=False)
+        second = manager.complete_with_usage("default", MESSAGES, use_cache=False, use_fallback=False)
+
+        assert first.success
+        assert not second.success
+        assert "rate limit permit" in second.error
+        assert len(stub_llm_server.requests) == 1
+
+    def test_learns_limits_from_responses(self, stub_llm_server):
+        """Test that response headers feed the governor's limits."""
+        stub_llm_server.extra_headers = {
+            "x-ratelimit-limit-requests": "120",
+            "x-ratelimit-remaining-requests": "119",
+        }
+        manager = APIManager(transport=PooledHTTPTransport(), rate_governor=RateGovernor())
+
+        manager.complete_with_usage("default", MESSAGES, use_cache=False)
+
+        limits = manager.rate_stats()["limits"]
+        assert any(entry["requests_per_minute"] == 120 for entry in limits.values())
+
+    def test_disabled_by_env(self, monkeypatch):
+        """Test that APIMANAGER_RATE_GOVERNOR=0 turns governing off."""
+        monkeypatch.setenv("APIMANAGER_RATE_GOVERNOR", "0")
+        manager = APIManager()
+        assert manager.rate_governor is None
+        assert manager.rate_stats() is None
@@ -0,0 +1,114 @@
+"""
+Unit tests for the warm-instance agent registry.
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.agent import BaseAgent
+from factory_core import registry
+from factory_core.registry import clear_agents, get_agent, registry_stats
+from api_manager import UsageInfo
+from conftest import load_agent_module
+
+
+class RegistryTestAgent(BaseAgent):
+    """Minimal agent whose governance file lives in a temp directory."""
+
+    governance_file = None
+
+    def __init__(self, factory_id=None):
+        super().__init__("TEST", "Test Agent", factory_id)
+
+    def _governance_paths(self):
+        return [self.governance_file]
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(tmp_path):
+    clear_agents()
+    registry._stats.update(hits=0, misses=0, reloads=0)
+    RegistryTestAgent.governance_file = tmp_path / "ethics.md"
+    RegistryTestAgent.governance_file.write_text("Be transparent.")
+    yield
+    clear_agents()
+
+
+class TestGetAgent:
+    """Test agent reuse across requests."""
+
+    def test_reuses_initialized_agent(self):
+        """Test that a second request skips agent initialization."""
+        with patch.object(BaseAgent, "_load_governance", return_value={}) as load_governance:
+            first = get_agent(RegistryTestAgent, "factory-a")
+            second = get_agent(RegistryTestAgent, "factory-a")
+
+        assert load_governance.call_count == 1
+        assert first is not second
+        assert first.api_manager is second.api_manager
+        assert first.governance is second.governance
+        assert registry_stats() == {"hits": 1, "misses": 1, "reloads": 0, "agents": 1}
+
+    def test_factories_are_isolated(self):
+        """Test that each factory_id gets its own agent."""
+        a = get_agent(RegistryTestAgent, "factory-a")
+        b = get_agent(RegistryTestAgent, "factory-b")
+
+        assert a.factory_id == "factory-a"
+        assert b.factory_id == "factory-b"
+        assert a.api_manager is not b.api_manager
+
+    def test_session_usage_is_per_request(self):
+        """Test that usage from one request doesn't leak into the next."""
+        first = get_agent(RegistryTestAgent)
+        first._track_usage(UsageInfo(total_tokens=100, cost_usd=0.5))
+
+        second = get_agent(RegistryTestAgent)
+
+        assert first.session_usage.total_tokens == 100
+        assert second.session_usage.total_tokens == 0
+        assert second.session_usage is not first.session_usage
+
+    def test_changed_governance_file_rebuilds_agent(self):
+        """Test that on-disk changes invalidate the cached agent."""
+        first = get_agent(RegistryTestAgent)
+        assert "Be transparent." in first.governance["ethics"]
+
+        RegistryTestAgent.governance_file.write_text("Be transparent and kind.")
+        second = get_agent(RegistryTestAgent)
+
+        assert "kind" in second.governance["ethics"]
+        assert second.api_manager is not first.api_manager
+        assert registry_stats()["reloads"] == 1
+
+    def test_created_file_makes_agent_stale(self):
+        """Test that a governance file appearing after init is picked up."""
+        RegistryTestAgent.governance_file.unlink()
+        agent = get_agent(RegistryTestAgent)
+        assert not agent.is_stale()
+
+        RegistryTestAgent.governance_file.write_text("New mandate.")
+
+        assert agent.is_stale()
+
+
+class TestEntryPointReuse:
+    """Test that entry points go through the registry."""
+
+    def test_entry_point_reuses_agent(self):
+        """Test that two invocations share one initialized agent."""
+        module = load_agent_module("cpo")
+        request = Mock()
+        request.get_json.return_value = {"command": "unknown.command", "factory_id": "warm"}
+
+        module.entry_point(request)
+        module.entry_point(request)
+
+        stats = registry_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
@@ -0,0 +1,160 @@
+"""
+Unit tests for the LLM response cache and its APIManager integration.
+"""
+
+import asyncio
+import time
+
+from response_cache import CachePolicy, ResponseCache, make_cache_key
+from api_manager import APIManager
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class TestCacheKey:
+    """Test cache key hashing."""
+
+    def test_key_is_stable(self):
+        """Test that identical requests hash to the same key."""
+        assert make_cache_key("m", MESSAGES, 0.7, 100) == make_cache_key("m", list(MESSAGES), 0.7, 100)
+
+    def test_key_changes_with_params(self):
+        """Test that every keyed parameter affects the hash."""
+        base = make_cache_key("m", MESSAGES, 0.7, 100)
+        assert make_cache_key("other", MESSAGES, 0.7, 100) != base
+        assert make_cache_key("m", [{"role": "user", "content": "bye"}], 0.7, 100) != base
+        assert make_cache_key("m", MESSAGES, 0.2, 100) != base
+        assert make_cache_key("m", MESSAGES, 0.7, 200) != base
+
+
+class TestResponseCache:
+    """Test the memory and SQLite tiers."""
+
+    def test_memory_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", {"content": "A"}, 60)
+        cache.set("b", {"content": "B"}, 60)
+        assert cache.get("a")["content"] == "A"
+        cache.set("c", {"content": "C"}, 60)
+
+        assert cache.get("b") is None
+        assert cache.get("a")["content"] == "A"
+        assert cache.get("c")["content"] == "C"
+        assert cache.stats.evictions == 1
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        cache = ResponseCache()
+        cache.set("a", {"content": "A"}, 0.05)
+        time.sleep(0.1)
+
+        assert cache.get("a") is None
+        assert cache.stats.misses == 1
+
+    def test_disk_tier_persists_across_instances(self, tmp_path):
+        """Test that a new cache instance reads entries from SQLite."""
+        db_path = str(tmp_path / "cache.sqlite3")
+        first = ResponseCache(db_path=db_path)
+        first.set("a", {"content": "A"}, 60)
+        first.close()
+
+        second = ResponseCache(db_path=db_path)
+        assert second.get("a")["content"] == "A"
+        assert second.stats.disk_hits == 1
+        assert second.get("a")["content"] == "A"
+        assert second.stats.memory_hits == 1
+        second.close()
+
+    def test_disk_size_eviction(self, tmp_path):
+        """Test that the disk tier is bounded by max_disk_entries."""
+        cache = ResponseCache(max_entries=1, db_path=str(tmp_path / "cache.sqlite3"), max_disk_entries=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, {"content": key}, 60)
+            time.sleep(0.01)
+
+        assert cache.get("a") is None
+        assert cache.get("b")["content"] == "b"
+        cache.close()
+
+
+class TestAPIManagerCache:
+    """Test cached completions through APIManager."""
+
+    def test_cache_hit_skips_provider_and_costs_nothing(self, stub_llm_server):
+        """Test that a repeated request is served from the cache."""
+        manager = APIManager(transport=PooledHTTPTransport(), cache=ResponseCache())
+
+        first = manager.complete_with_usage("default", MESSAGES)
+        second = manager.complete_with_usage("default", MESSAGES)
+
+        assert len(stub_llm_server.requests) == 1
+        assert not first.usage.cache_hit
+        assert second.success
+        assert second.content == "Stub completion"
+        assert second.usage.cache_hit
+        assert second.usage.cost_usd == 0
+        assert second.usage.total_tokens == 0
+        assert second.usage.model_used == first.usage.model_used
+        assert manager.cache_stats()["memory_hits"] == 1
+
+    def test_uncached_task_always_calls_provider(self, stub_llm_server):
+        """Test that tasks without a cache policy are never cached."""
+        manager = APIManager(transport=PooledHTTPTransport(), cache=ResponseCache())
+
+        manager.complete_with_usage("backstory_generation", MESSAGES)
+        result = manager.complete_with_usage("backstory_generation", MESSAGES)
+
+        assert len(stub_llm_server.requests) == 2
+        assert not result.usage.cache_hit
+
+    def test_use_cache_false_bypasses_cache(self, stub_llm_server):
+        """Test that callers can opt out per request."""
+        manager = APIManager(transport=PooledHTTPTransport(), cache=ResponseCache())
+
+        manager.complete_with_usage("default", MESSAGES)
+        manager.complete_with_usage("default", MESSAGES, use_cache=False)
+
+        assert len(stub_llm_server.requests) == 2
+
+    def test_failures_are_not_cached(self, stub_llm_server, monkeypatch):
+        """Test that failed completions are retried next time."""
+        monkeypatch.delenv("OPENROUTER_API_KEY")
+        monkeypatch.delenv("OPENAI_API_KEY")
+        monkeypatch.setattr(APIManager, "_load_env", lambda self: None)
+        cache = ResponseCache()
+        manager = APIManager(transport=PooledHTTPTransport(), cache=cache)
+
+        assert not manager.complete_with_usage("default", MESSAGES).success
+        assert cache.stats.stores == 0
+
+    def test_task_ttl_comes_from_routing(self, stub_llm_server, monkeypatch):
+        """Test that the per-task policy sets the entry TTL."""
+        manager = APIManager(transport=PooledHTTPTransport(), cache=ResponseCache())
+        monkeypatch.setattr(manager._get_routing("default"), "cache", CachePolicy(ttl_seconds=0.05))
+
+        manager.complete_with_usage("default", MESSAGES)
+        time.sleep(0.1)
+        manager.complete_with_usage("default", MESSAGES)
+
+        assert len(stub_llm_server.requests) == 2
+
+    def test_async_path_uses_cache(self, stub_llm_server):
+        """Test that acomplete_with_usage shares the cache."""
+        manager = APIManager(
+            transport=PooledHTTPTransport(),
+            async_transport=AsyncHTTPTransport(),
+            cache=ResponseCache()
+        )
+        manager.complete_with_usage("default", MESSAGES)
+
+        result = asyncio.run(manager.acomplete_with_usage("default", MESSAGES))
+
+        assert result.usage.cache_hit
+        assert len(stub_llm_server.requests) == 1
+
+    def test_cache_disabled_by_default(self):
+        """Test that managers do not cache unless configured."""
+        assert APIManager().cache_stats() is None
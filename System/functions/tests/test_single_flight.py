@@ -0,0 +1,183 @@
+"""
+Unit tests for single-flight coalescing of identical in-flight requests.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api_manager import APIManager
+from single_flight import SingleFlight
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+
+MESSAGES = [{"role": "user", "content": "Status report?"}]
+
+
+class TestSingleFlight:
+    """Test the SingleFlight group."""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that callers arriving mid-flight get the leader's result."""
+        flights = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def slow():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "answer"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            leader = pool.submit(flights.do, "key", slow)
+            started.wait()
+            followers = [pool.submit(flights.do, "key", slow) for _ in range(3)]
+            outcomes = [leader.result()] + [f.result() for f in followers]
+
+        assert len(calls) == 1
+        assert outcomes[0] == ("answer", True)
+        assert all(outcome == ("answer", False) for outcome in outcomes[1:])
+        assert flights.snapshot() == {"leaders": 1, "coalesced": 3, "in_flight": 0}
+
+    def test_sequential_calls_run_again(self):
+        """Test that finished calls are not reused."""
+        flights = SingleFlight()
+
+        assert flights.do("key", lambda: 1) == (1, True)
+        assert flights.do("key", lambda: 2) == (2, True)
+        assert flights.stats.coalesced == 0
+
+    def test_leader_error_reaches_followers(self):
+        """Test that an exception in the leader is raised for followers too."""
+        flights = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flights.do, "key", failing)
+            started.wait()
+            follower = pool.submit(flights.do, "key", failing)
+            with pytest.raises(ValueError):
+                leader.result()
+            with pytest.raises(ValueError):
+                follower.result()
+        assert flights.in_flight == 0
+
+    def test_async_followers(self):
+        """Test that async callers in one event loop coalesce."""
+        flights = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def run():
+            return await asyncio.gather(*[flights.ado("key", slow) for _ in range(3)])
+
+        outcomes = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert [leader for _, leader in outcomes].count(True) == 1
+        assert all(result == "answer" for result, _ in outcomes)
+
+
+class TestAPIManagerSingleFlight:
+    """Test request coalescing in APIManager."""
+
+    def test_identical_requests_coalesce(self, stub_llm_server):
+        """Test that identical concurrent completions send one provider call."""
+        stub_llm_server.delay = 0.2
+        manager = APIManager(transport=PooledHTTPTransport(), single_flight=SingleFlight())
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: manager.complete_with_usage("default", MESSAGES), range(4)))
+
+        assert len(stub_llm_server.requests) == 1
+        assert all(r.content == "Stub completion" for r in results)
+        assert manager.single_flight_stats() == {"leaders": 1, "coalesced": 3, "in_flight": 0}
+
+    def test_followers_are_not_billed(self, stub_llm_server):
+        """Test that only the leader's result carries tokens."""
+        stub_llm_server.delay = 0.2
+        manager = APIManager(transport=PooledHTTPTransport(), single_flight=SingleFlight())
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(lambda _: manager.complete_with_usage("default", MESSAGES), range(3)))
+
+        leaders = [r for r in results if not r.usage.coalesced]
+        followers = [r for r in results if r.usage.coalesced]
+        assert len(leaders) == 1
+        assert leaders[0].usage.total_tokens == 15
+        assert len(followers) == 2
+        assert all(r.usage.total_tokens == 0 and r.usage.cost_usd == 0 for r in followers)
+        assert all(r.usage.model_used == leaders[0].usage.model_used for r in followers)
+        assert sum(r.usage.total_tokens for r in results) == 15
+
+    def test_different_requests_not_coalesced(self, stub_llm_server):
+        """Test that requests differing in messages or parameters run separately."""
+        stub_llm_server.delay = 0.1
+        manager = APIManager(transport=PooledHTTPTransport(), single_flight=SingleFlight())
+        calls = [
+            lambda: manager.complete_with_usage("default", MESSAGES),
+            lambda: manager.complete_with_usage("default", MESSAGES, max_tokens=10),
+            lambda: manager.complete_with_usage("default", [{"role": "user", "content": "Other"}]),
+        ]
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda call: call(), calls))
+
+        assert len(stub_llm_server.requests) == 3
+
+    def test_factories_not_coalesced(self, stub_llm_server):
+        """Test that identical requests from different factories both run."""
+        stub_llm_server.delay = 0.1
+        flights = SingleFlight()
+        managers = [
+            APIManager(factory_id=factory, transport=PooledHTTPTransport(), single_flight=flights)
+            for factory in ("factory-a", "factory-b")
+        ]
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda m: m.complete_with_usage("default", MESSAGES), managers))
+
+        assert len(stub_llm_server.requests) == 2
+
+    def test_use_cache_false_bypasses(self, stub_llm_server):
+        """Test that use_cache=False always sends its own request."""
+        stub_llm_server.delay = 0.1
+        manager = APIManager(transport=PooledHTTPTransport(), single_flight=SingleFlight())
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda _: manager.complete_with_usage("default", MESSAGES, use_cache=False), range(2)))
+
+        assert len(stub_llm_server.requests) == 2
+        assert manager.single_flight_stats()["leaders"] == 0
+
+    def test_async_requests_coalesce(self, stub_llm_server):
+        """Test that identical async completions share one provider call."""
+        stub_llm_server.delay = 0.2
+        manager = APIManager(async_transport=AsyncHTTPTransport(), single_flight=SingleFlight())
+
+        async def run():
+            return await asyncio.gather(*[manager.acomplete_with_usage("default", MESSAGES) for _ in range(3)])
+
+        results = asyncio.run(run())
+
+        assert len(stub_llm_server.requests) == 1
+        assert [r.usage.coalesced for r in results].count(False) == 1
+
+    def test_disabled_by_env(self, monkeypatch):
+        """Test that APIMANAGER_SINGLE_FLIGHT=0 turns coalescing off."""
+        monkeypatch.setenv("APIMANAGER_SINGLE_FLIGHT", "0")
+        manager = APIManager()
+        assert manager.single_flight is None
+        assert manager.single_flight_stats() is None
@@ -0,0 +1,207 @@
+"""
+Unit tests for streaming completions (APIManager, BaseAgent, entry points).
+"""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+from factory_core.agent import BaseAgent
+from api_manager import APIManager
+from response_cache import ResponseCache
+from transport import AsyncHTTPTransport, PooledHTTPTransport
+from conftest import load_agent_module
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class TestTransportStreaming:
+    """Test line-by-line response streaming."""
+
+    def test_stream_yields_sse_lines_and_reuses_connection(self, stub_llm_server):
+        """Test that a fully read stream returns its connection to the pool."""
+        transport = PooledHTTPTransport()
+        url = f"{stub_llm_server.base_url}/chat/completions"
+
+        for _ in range(2):
+            lines = list(transport.stream("POST", url, body=b'{"stream": true}'))
+            assert lines[-2:] == [b"data: [DONE]\n", b"\n"]
+
+        assert transport.stats.connections_opened == 1
+        assert transport.stats.connections_reused == 1
+        transport.close()
+
+    def test_abandoned_stream_closes_connection(self, stub_llm_server):
+        """Test that a partially read stream is not returned to the pool."""
+        transport = PooledHTTPTransport()
+        lines = transport.stream("POST", f"{stub_llm_server.base_url}/chat/completions", body=b'{"stream": true}')
+        next(lines)
+        lines.close()
+
+        assert transport.stats.connections_closed == 1
+        transport.close()
+
+    def test_async_stream_yields_lines(self, stub_llm_server):
+        """Test that the async transport yields body lines."""
+        transport = AsyncHTTPTransport()
+
+        async def run():
+            lines = [line async for line in transport.stream(
+                "POST", f"{stub_llm_server.base_url}/chat/completions", body=b'{"stream": true}'
+            )]
+            await transport.aclose()
+            return lines
+
+        assert b"data: [DONE]\n" in asyncio.run(run())
+
+
+class TestAPIManagerStream:
+    """Test APIManager.stream() and astream()."""
+
+    def test_stream_yields_deltas_and_usage(self, stub_llm_server):
+        """Test that deltas arrive in order and usage is set at stream end."""
+        stub_llm_server.content = "one two three"
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        stream = manager.stream("default", MESSAGES)
+        chunks = list(stream)
+
+        assert chunks == ["one ", "two ", "three "]
+        assert stream.result.success
+        assert stream.result.content == "one two three"
+        assert stream.result.usage.total_tokens == 15
+        body = stub_llm_server.requests[0]["body"]
+        assert body["stream"] is True
+        assert body["stream_options"] == {"include_usage": True}
+
+    def test_stream_falls_back_before_first_chunk(self, stub_llm_server, monkeypatch):
+        """Test that the fallback model streams when the primary fails up front."""
+        monkeypatch.delenv("OPENROUTER_API_KEY")
+        monkeypatch.setattr(APIManager, "_load_env", lambda self: None)
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        result = manager.stream("default", MESSAGES).consume()
+
+        assert result.success
+        assert result.usage.fallback_used
+        assert result.usage.provider == "openai"
+
+    def test_stream_http_error_fails_result(self, stub_llm_server):
+        """Test that an error status ends the stream with a failed result."""
+        stub_llm_server.status = 500
+        manager = APIManager(transport=PooledHTTPTransport())
+
+        stream = manager.stream("default", MESSAGES, use_fallback=False)
+
+        assert list(stream) == []
+        assert not stream.result.success
+
+    def test_stream_replays_and_fills_cache(self, stub_llm_server):
+        """Test that streamed results are cached and replayed as one chunk."""
+        manager = APIManager(transport=PooledHTTPTransport(), cache=ResponseCache())
+
+        manager.stream("default", MESSAGES).consume()
+        stream = manager.stream("default", MESSAGES)
+
+        assert list(stream) == ["Stub completion"]
+        assert stream.result.usage.cache_hit
+        assert len(stub_llm_server.requests) == 1
+
+    def test_replayed_stream_can_be_closed_early(self, stub_llm_server):
+        """Test that a cache-hit stream closes like a live one when abandoned."""
+        manager = APIManager(transport=PooledHTTPTransport(), cache=ResponseCache())
+        manager.stream("default", MESSAGES).consume()
+        stream = manager.stream("default", MESSAGES)
+
+        assert next(stream) == "Stub completion"
+        stream.close()
+
+    def test_astream_yields_deltas(self, stub_llm_server):
+        """Test the async iterator version."""
+        manager = APIManager(async_transport=AsyncHTTPTransport())
+
+        async def run():
+            stream = manager.astream("default", MESSAGES)
+            chunks = [chunk async for chunk in stream]
+            return chunks, stream.result
+
+        chunks, result = asyncio.run(run())
+
+        assert "".join(chunks).strip() == "Stub completion"
+        assert result.usage.total_tokens == 15
+
+
+class TestBaseAgentStreaming:
+    """Test streaming through BaseAgent."""
+
+    def test_think_stream_tracks_usage_at_end(self, stub_llm_server):
+        """Test that _think_stream yields chunks and then records usage."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        chunks = list(agent._think_stream("Test prompt"))
+
+        assert "".join(chunks).strip() == "Stub completion"
+        assert agent.session_usage.total_tokens == 15
+
+    def test_athink_stream(self, stub_llm_server):
+        """Test the async version of _think_stream."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        async def run():
+            return [chunk async for chunk in agent._athink_stream("Test prompt")]
+
+        assert "".join(asyncio.run(run())).strip() == "Stub completion"
+        assert agent.session_usage.total_tokens == 15
+
+    def test_run_stream_emits_deltas_then_result(self, stub_llm_server):
+        """Test that _think calls inside a command stream their output."""
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.test_command = lambda payload: {"answer": agent._think("Test prompt")}
+
+        events = list(agent.run_stream("test.command", {}))
+
+        deltas = [e for e in events if e["event"] == "delta"]
+        assert "".join(e["text"] for e in deltas).strip() == "Stub completion"
+        assert all(e["call"] == deltas[0]["call"] for e in deltas)
+        assert events[-1]["event"] == "result"
+        assert events[-1]["response"]["status"] == "success"
+        assert events[-1]["response"]["data"]["answer"] == "Stub completion"
+        assert events[-1]["response"]["usage"]["total_tokens"] == 15
+        assert agent._stream_sink is None
+
+    def test_stream_response_is_ndjson(self, stub_llm_server):
+        """Test the chunked Cloud Function response shape."""
+        agent = BaseAgent("TEST", "Test Agent")
+        agent.test_command = lambda payload: {"answer": agent._think("Test prompt")}
+
+        body, status, headers = agent.stream_response("test.command", {})
+        events = [json.loads(line) for line in body]
+
+        assert status == 200
+        assert headers["Content-Type"] == "application/x-ndjson"
+        assert events[-1]["event"] == "result"
+
+
+class TestEntryPointStreaming:
+    """Test that Cloud Function entry points honor "stream": true."""
+
+    @pytest.mark.parametrize("agent_name", ["ceo", "cfo", "cio", "clo", "cmo", "coo", "cpo", "cto", "cxa"])
+    def test_entry_point_streams(self, agent_name):
+        """Test that every entry point returns a streaming response when asked."""
+        module = load_agent_module(agent_name)
+        request = Mock()
+        request.get_json.return_value = {"command": "unknown.command", "stream": True}
+
+        body, status, headers = module.entry_point(request)
+        events = [json.loads(line) for line in body]
+
+        assert status == 200
+        assert events == [{"event": "result", "response": events[0]["response"]}]
+        assert events[0]["response"]["status"] == "error"
@@ -0,0 +1,249 @@
+"""
+Unit tests for token accounting and prompt budgets.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'packages'))
+
+import tokens
+from tokens import (
+    HeuristicTokenizer,
+    PromptBudget,
+    TRUNCATION_MARKER,
+    context_window,
+    count_message_tokens,
+    count_tokens,
+    model_family,
+    register_tokenizer,
+    truncate_to_tokens,
+)
+from api_manager import APIManager
+from factory_core import agent as agent_module
+from factory_core.agent import BaseAgent
+
+
+class CountingTokenizer(HeuristicTokenizer):
+    """Heuristic tokenizer that counts how often it is asked to count."""
+
+    def __init__(self):
+        super().__init__(chars_per_token=4.0, name="counting")
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return super().count(text)
+
+
+@pytest.fixture
+def restore_tokenizers():
+    factories = dict(tokens._TOKENIZER_FACTORIES)
+    yield
+    tokens._TOKENIZER_FACTORIES.clear()
+    tokens._TOKENIZER_FACTORIES.update(factories)
+    tokens._tokenizers.clear()
+    tokens._cached_count.cache_clear()
+
+
+class TestTokenCounting:
+    """Test tokenizers and cached counts."""
+
+    def test_heuristic_counts_words_and_punctuation(self):
+        """Test that short words cost one token and punctuation is counted."""
+        tokenizer = HeuristicTokenizer(chars_per_token=4.0)
+        assert tokenizer.count("Hi, you!") == 4
+        assert tokenizer.count("internationalization") == 5
+
+    def test_punctuation_heavy_text_costs_more_than_chars_over_four(self):
+        """Test that markdown tables are not undercounted."""
+        table = "| a | b | c |\n|---|---|---|\n| 1 | 2 | 3 |\n"
+        assert count_tokens(table) > len(table) // 4
+
+    def test_model_family(self):
+        """Test that model names map to tokenizer families."""
+        assert model_family("openai/gpt-4o-mini") == "openai"
+        assert model_family("gpt-4o") == "openai"
+        assert model_family("anthropic/claude-3-haiku-20240307") == "anthropic"
+        assert model_family("google/gemini-2.0-flash-exp:free") == "google"
+        assert model_family("mistralai/mistral-7b-instruct:free") == "default"
+        assert model_family(None) == "default"
+
+    def test_empty_text_is_zero(self):
+        """Test that empty and None text count as zero tokens."""
+        assert count_tokens("") == 0
+        assert count_tokens(None) == 0
+
+    def test_counts_are_cached(self, restore_tokenizers):
+        """Test that counting the same text twice only tokenizes once."""
+        tokenizer = CountingTokenizer()
+        register_tokenizer("default", tokenizer)
+
+        first = count_tokens("You are the CEO agent.")
+        second = count_tokens("You are the CEO agent.")
+
+        assert first == second
+        assert tokenizer.calls == 1
+
+    def test_register_tokenizer_replaces_family(self, restore_tokenizers):
+        """Test that a registered tokenizer is used for its family."""
+        count_tokens("cached before registration", "gpt-4o")
+        register_tokenizer("openai", HeuristicTokenizer(chars_per_token=1.0))
+
+        assert count_tokens("abcd", "gpt-4o") == 4
+
+    def test_message_tokens_include_overhead(self):
+        """Test that chat formatting overhead is added per message."""
+        messages = [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "Hi"},
+        ]
+        expected = tokens.TOKENS_PER_REQUEST + 2 * tokens.TOKENS_PER_MESSAGE + count_tokens("Be brief.") + count_tokens("Hi")
+        assert count_message_tokens(messages) == expected
+
+    def test_structured_content_counts_text_parts(self):
+        """Test that list content is counted by its text parts instead of failing."""
+        messages = [{"role": "user", "content": [
+            {"type": "text", "text": "Describe this"},
+            {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}},
+        ]}]
+
+        assert count_message_tokens(messages) > count_message_tokens([{"role": "user", "content": "Describe this"}])
+
+    def test_list_content_request(self, stub_llm_server):
+        """Test that a request with list content goes through the rate governor."""
+        manager = APIManager()
+        messages = [{"role": "user", "content": [{"type": "text", "text": "Hi"}]}]
+
+        result = manager.complete_with_usage("default", messages, use_fallback=False)
+
+        assert result.success
+        assert stub_llm_server.requests[0]["body"]["messages"] == messages
+
+    def test_context_window_default(self):
+        """Test that unknown models get the default context window."""
+        assert context_window("openai/gpt-4o-mini") == 128_000
+        assert context_window("unknown/model") == tokens.DEFAULT_CONTEXT_WINDOW
+
+
+class TestTruncation:
+    """Test cutting text to a token limit."""
+
+    def test_short_text_unchanged(self):
+        """Test that text within the limit is returned as-is."""
+        assert truncate_to_tokens("short text", 100) == "short text"
+
+    def test_truncates_with_marker(self):
+        """Test that long text is cut and marked, within the limit."""
+        text = " ".join(f"word{i}" for i in range(200))
+        truncated = truncate_to_tokens(text, 50)
+
+        assert truncated.endswith(TRUNCATION_MARKER)
+        assert text.startswith(truncated[:-len(TRUNCATION_MARKER)])
+        assert count_tokens(truncated) <= 50
+
+    def test_tiny_limit_skips_marker(self):
+        """Test that a limit smaller than the marker still respects the limit."""
+        truncated = truncate_to_tokens("one two three four five six", 2)
+        assert truncated == "one two"
+
+
+class TestPromptBudget:
+    """Test packing prompt sections into a budget."""
+
+    def test_everything_fits(self):
+        """Test that sections under budget are kept whole."""
+        packed = PromptBudget("gpt-4o", 1000).add("a", "alpha").add("b", "beta", priority=2).pack()
+        assert packed == {"a": "alpha", "b": "beta"}
+
+    def test_priority_order(self):
+        """Test that higher priority sections are packed first."""
+        long_text = " ".join(["word"] * 100)
+        budget = PromptBudget("gpt-4o", 120)
+        packed = budget.add("brief", long_text, priority=2).add("plan", long_text, priority=1).pack()
+
+        assert packed["plan"] == long_text
+        assert packed["brief"].endswith(TRUNCATION_MARKER)
+        assert budget.used_tokens <= 120
+
+    def test_section_cap(self):
+        """Test that max_tokens caps a section even with budget left."""
+        long_text = " ".join(["word"] * 100)
+        packed = PromptBudget("gpt-4o", 1000).add("plan", long_text, max_tokens=20).pack()
+        assert count_tokens(packed["plan"]) <= 20
+
+    def test_min_tokens_drops_section(self):
+        """Test that a section is dropped rather than cut below min_tokens."""
+        long_text = " ".join(["word"] * 100)
+        packed = PromptBudget("gpt-4o", 110).add("plan", long_text).add(
+            "brief", long_text, priority=2, min_tokens=50
+        ).pack()
+
+        assert packed["plan"] == long_text
+        assert packed["brief"] == ""
+
+    def test_none_text_packs_empty(self):
+        """Test that missing sections pack to empty strings."""
+        assert PromptBudget("gpt-4o", 100).add("plan", None).pack() == {"plan": ""}
+
+    def test_for_model_reserves_output_and_caps(self):
+        """Test that for_model subtracts reservations and applies the cap."""
+        assert PromptBudget.for_model("unknown/model", 2000, 1000).budget_tokens == tokens.DEFAULT_CONTEXT_WINDOW - 3000
+        assert PromptBudget.for_model("gpt-4o", 2000, cap=5000).budget_tokens == 5000
+
+
+class TestEstimateUsage:
+    """Test pre-call usage estimates."""
+
+    def test_estimate_usage_uses_primary_model(self):
+        """Test that estimates count input tokens and bound output by max_tokens."""
+        manager = APIManager()
+        messages = [{"role": "user", "content": "Estimate this prompt."}]
+
+        usage = manager.estimate_usage("default", messages, max_tokens=500)
+        config = manager._get_routing("default").primary
+
+        assert usage.model_used == config.model
+        assert usage.input_tokens == count_message_tokens(messages, config.model)
+        assert usage.output_tokens == 500
+        assert usage.total_tokens == usage.input_tokens + 500
+
+    def test_estimate_usage_prices_paid_models(self):
+        """Test that estimates for paid models carry a cost."""
+        usage = APIManager().estimate_usage("critical_decision", [{"role": "user", "content": "Plan."}])
+        assert usage.cost_usd > 0
+
+
+class TestAgentPromptBudget:
+    """Test BaseAgent token budgets."""
+
+    def test_governance_truncated_by_tokens(self, monkeypatch):
+        """Test that long governance files are cut to GOVERNANCE_MAX_TOKENS."""
+        monkeypatch.setattr(agent_module, "GOVERNANCE_MAX_TOKENS", 20)
+        agent = BaseAgent("TEST", "Test Agent")
+
+        for content in agent.governance.values():
+            assert count_tokens(content) <= 20
+
+    def test_prompt_budget_reserves_system_prompt(self):
+        """Test that the budget leaves room for the system prompt and completion."""
+        agent = BaseAgent("TEST", "Test Agent")
+
+        with_system = agent._prompt_budget("default", max_tokens=1000)
+        without_system = agent._prompt_budget("default", include_system=False, max_tokens=1000)
+
+        assert with_system.budget_tokens <= agent_module.CONTEXT_BUDGET_TOKENS
+        assert with_system.budget_tokens <= without_system.budget_tokens
+
+    def test_prompt_budget_uses_smaller_window(self, monkeypatch):
+        """Test that the budget fits the smaller of the primary and fallback windows."""
+        monkeypatch.setattr(agent_module, "CONTEXT_BUDGET_TOKENS", 10_000_000)
+        agent = BaseAgent("TEST", "Test Agent")
+        routing = agent.api_manager._get_routing("default")
+        smallest = min(context_window(routing.primary.model), context_window(routing.fallback.model))
+
+        budget = agent._prompt_budget("default", include_system=False, max_tokens=1000)
+
+        assert budget.budget_tokens == smallest - 1000 - agent_module.PROMPT_TEMPLATE_TOKENS
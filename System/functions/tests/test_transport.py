@@ -0,0 +1,165 @@
+"""
+Unit tests for the HTTP transports and APIManager provider calls.
+"""
+
+import asyncio
+import time
+import urllib.error
+
+import pytest
+
+from transport import AsyncHTTPTransport, PooledHTTPTransport, UrllibTransport
+from api_manager import APIManager
+
+
+class TestPooledTransport:
+    """Test keep-alive connection pooling."""
+
+    def test_connections_reused_across_requests(self, stub_llm_server):
+        """Test that sequential requests share one connection."""
+        transport = PooledHTTPTransport(pool_size=2, idle_timeout=30)
+        url = f"{stub_llm_server.base_url}/chat/completions"
+
+        for _ in range(5):
+            data = transport.post_json(url, {"model": "test"})
+            assert data["choices"][0]["message"]["content"] == "Stub completion"
+
+        stats = transport.stats.as_dict()
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 4
+        assert stats["reuse_ratio"] == 0.8
+        transport.close()
+
+    def test_idle_timeout_expires_connection(self, stub_llm_server):
+        """Test that idle connections past the timeout are not reused."""
+        transport = PooledHTTPTransport(pool_size=2, idle_timeout=0.05)
+        url = f"{stub_llm_server.base_url}/chat/completions"
+
+        transport.post_json(url, {})
+        time.sleep(0.1)
+        transport.post_json(url, {})
+
+        assert transport.stats.connections_opened == 2
+        assert transport.stats.connections_reused == 0
+        assert transport.stats.connections_closed >= 1
+        transport.close()
+
+    def test_http_error_raises_and_keeps_pool_usable(self, stub_llm_server):
+        """Test that non-2xx responses raise HTTPError like urlopen."""
+        transport = PooledHTTPTransport()
+        url = f"{stub_llm_server.base_url}/chat/completions"
+        stub_llm_server.status = 429
+
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            transport.post_json(url, {})
+        assert exc_info.value.code == 429
+
+        stub_llm_server.status = 200
+        transport.post_json(url, {})
+        assert transport.stats.connections_reused == 1
+        transport.close()
+
+    def test_per_host_stats(self, stub_llm_server):
+        """Test that counters are broken down per host."""
+        transport = PooledHTTPTransport()
+        transport.post_json(f"{stub_llm_server.base_url}/chat/completions", {})
+
+        host = stub_llm_server.base_url.replace("http://", "")
+        assert transport.stats.per_host[host]["requests"] == 1
+        transport.close()
+
+    def test_urllib_transport_opens_per_request(self, stub_llm_server):
+        """Test that the urllib transport never reuses connections."""
+        transport = UrllibTransport()
+        url = f"{stub_llm_server.base_url}/chat/completions"
+
+        transport.post_json(url, {})
+        transport.post_json(url, {})
+
+        assert transport.stats.connections_opened == 2
+        assert transport.stats.connections_reused == 0
+
+
+class TestAsyncTransport:
+    """Test the asyncio transport."""
+
+    def test_async_connections_reused(self, stub_llm_server):
+        """Test that sequential async requests share one connection."""
+        transport = AsyncHTTPTransport()
+        url = f"{stub_llm_server.base_url}/chat/completions"
+
+        async def run():
+            for _ in range(3):
+                data = await transport.post_json(url, {"model": "test"})
+                assert data["choices"][0]["message"]["content"] == "Stub completion"
+            await transport.aclose()
+
+        asyncio.run(run())
+
+        assert transport.stats.connections_opened == 1
+        assert transport.stats.connections_reused == 2
+
+    def test_async_http_error(self, stub_llm_server):
+        """Test that non-2xx responses raise HTTPError."""
+        transport = AsyncHTTPTransport()
+        stub_llm_server.status = 500
+
+        with pytest.raises(urllib.error.HTTPError):
+            asyncio.run(transport.post_json(f"{stub_llm_server.base_url}/chat/completions", {}))
+
+
+class TestAPIManagerTransport:
+    """Test APIManager provider calls over the transport."""
+
+    def test_complete_reuses_connection(self, stub_llm_server):
+        """Test that repeated completions reuse the pooled connection."""
+        transport = PooledHTTPTransport()
+        manager = APIManager(transport=transport)
+
+        for _ in range(3):
+            result = manager.complete_with_usage("default", [{"role": "user", "content": "hi"}])
+            assert result.success
+            assert result.content == "Stub completion"
+            assert result.usage.total_tokens == 15
+
+        stats = manager.transport_stats()
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 2
+        assert stub_llm_server.requests[0]["path"] == "/chat/completions"
+        transport.close()
+
+    def test_managers_share_default_transport(self):
+        """Test that managers in one process share the default pool."""
+        assert APIManager().transport is APIManager(factory_id="other").transport
+
+    def test_acomplete_runs_concurrently(self, stub_llm_server):
+        """Test that async completions overlap inside one event loop."""
+        stub_llm_server.delay = 0.2
+        manager = APIManager(async_transport=AsyncHTTPTransport())
+        messages = [{"role": "user", "content": "hi"}]
+
+        async def run():
+            return await asyncio.gather(*[
+                manager.acomplete_with_usage("default", messages) for _ in range(5)
+            ])
+
+        start = time.monotonic()
+        results = asyncio.run(run())
+        elapsed = time.monotonic() - start
+
+        assert all(r.success for r in results)
+        assert all(r.content == "Stub completion" for r in results)
+        assert elapsed < 0.2 * 5 * 0.6
+
+    def test_acomplete_falls_back(self, stub_llm_server, monkeypatch):
+        """Test that the async path uses the fallback when the primary fails."""
+        monkeypatch.delenv("OPENROUTER_API_KEY")
+        monkeypatch.setattr(APIManager, "_load_env", lambda self: None)
+        manager = APIManager(async_transport=AsyncHTTPTransport())
+
+        result = asyncio.run(manager.acomplete_with_usage("default", [{"role": "user", "content": "hi"}]))
+
+        assert result.success
+        assert result.usage.fallback_used
+        assert result.usage.provider == "openai"
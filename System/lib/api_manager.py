@@ -6,6 +6,17 @@ This module provides:
 - Automatic fallback logic
 - Task-specific model routing
 - Per-factory credential management
+- Pooled keep-alive HTTP connections (see transport.py)
+- Native asyncio twins of the completion API
+- Opt-in content-addressed response cache (see response_cache.py)
+- Streaming completions (server-sent events) via stream() / astream()
+- Hedged requests that race the fallback when the primary is slow (see latency.py)
+- Per-model circuit breakers and latency-based timeouts (see circuit_breaker.py)
+- Tokenizer-backed token counts and pre-call cost estimates (see tokens.py)
+- Batch completions with bounded concurrency that back off on 429/Retry-After
+- Single-flight coalescing of identical in-flight requests (see single_flight.py)
+- Token-bucket rate governing per factory/provider/model (see rate_limit.py)
+- Provider prompt caching: cache_control on the stable system prefix, cached-token counts
 
 Usage:
     from lib.api_manager import APIManager
@@ -21,44 +32,114 @@ Usage:
         task="backstory_generation",
         messages=[{"role": "user", "content": "Generate a backstory..."}]
     )
+
+    # Async (inside an event loop)
+    result = await manager.acomplete_with_usage(
+        task="agent_reasoning",
+        messages=[{"role": "user", "content": "Summarize..."}]
+    )
+
+    # Streaming (usage is on stream.result once the loop ends)
+    stream = manager.stream(task="agent_reasoning", messages=messages)
+    for chunk in stream:
+        print(chunk, end="")
+
+    # Batch (results in request order, usage summed in batch.usage)
+    batch = manager.complete_batch([
+        BatchRequest(task="agent_reasoning", messages=messages_a),
+        BatchRequest(task="quick_response", messages=messages_b),
+    ])
 """
 
+import asyncio
 import json
 import os
+import threading
 import time
-import urllib.request
 import urllib.error
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, AsyncIterator, Awaitable, Callable, Generator, Iterator, Tuple, Union
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+try:
+    from .transport import AsyncHTTPTransport, HTTPTransport, get_default_async_transport, get_default_transport
+    from .response_cache import CachePolicy, ResponseCache, get_default_cache, make_cache_key
+    from .latency import HedgePolicy, LatencyTracker, get_default_latency_tracker
+    from .circuit_breaker import CircuitBreakerRegistry, get_default_breakers, is_provider_failure, is_timeout
+    from .tokens import count_message_tokens, count_tokens
+    from .single_flight import SingleFlight, get_default_single_flight
+    from .rate_limit import RateGovernor, RatePermit, get_default_rate_governor
+except ImportError:
+    # Imported as a top-level module (System/lib on sys.path)
+    from transport import AsyncHTTPTransport, HTTPTransport, get_default_async_transport, get_default_transport
+    from response_cache import CachePolicy, ResponseCache, get_default_cache, make_cache_key
+    from latency import HedgePolicy, LatencyTracker, get_default_latency_tracker
+    from circuit_breaker import CircuitBreakerRegistry, get_default_breakers, is_provider_failure, is_timeout
+    from tokens import count_message_tokens, count_tokens
+    from single_flight import SingleFlight, get_default_single_flight
+    from rate_limit import RateGovernor, RatePermit, get_default_rate_governor
+
+
+# =============================================================================
+# Provider Endpoints (override with OPENROUTER_BASE_URL / OPENAI_BASE_URL)
+# =============================================================================
+PROVIDER_BASE_URLS = {
+    "openrouter": "https://openrouter.ai/api/v1",
+    "openai": "https://api.openai.com/v1",
+}
+
+# Display names for chat completion providers
+PROVIDER_NAMES = {
+    "openrouter": "OpenRouter",
+    "openai": "OpenAI",
+}
+
+# =============================================================================
+# Batch Requests
+# =============================================================================
+BATCH_MAX_CONCURRENCY = int(os.getenv("APIMANAGER_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_RETRIES = 2  # Retries per request after a rate limit
+DEFAULT_RETRY_AFTER_SECONDS = 1.0  # Used for 429s without a Retry-After header
+MAX_RETRY_AFTER_SECONDS = 60.0
+RATE_LIMIT_RETRIES = 1  # Same-model retries after a 429, once the rate governor's backoff has passed
+REQUEST_TIMEOUT_SECONDS = 60  # Provider call timeout until a model's latency has been learned
 
 
 # =============================================================================
-# Model Pricing (per 1M tokens in USD)
+# Model Pricing (per 1M tokens in USD; cached_input = prompt-cache reads)
 # =============================================================================
 MODEL_PRICING = {
     # OpenRouter models (Anthropic)
-    "anthropic/claude-3-opus-20240229": {"input": 15.00, "output": 75.00},
-    "anthropic/claude-3.5-sonnet-20241022": {"input": 3.00, "output": 15.00},
-    "anthropic/claude-3-haiku-20240307": {"input": 0.25, "output": 1.25},
+    "anthropic/claude-3-opus-20240229": {"input": 15.00, "output": 75.00, "cached_input": 1.50},
+    "anthropic/claude-3.5-sonnet-20241022": {"input": 3.00, "output": 15.00, "cached_input": 0.30},
+    "anthropic/claude-3-haiku-20240307": {"input": 0.25, "output": 1.25, "cached_input": 0.03},
     # OpenRouter models (OpenAI)
-    "openai/gpt-4o-2024-08-06": {"input": 2.50, "output": 10.00},
-    "openai/gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "openai/gpt-4o-2024-08-06": {"input": 2.50, "output": 10.00, "cached_input": 1.25},
+    "openai/gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
     "openai/gpt-4-turbo": {"input": 10.00, "output": 30.00},
     # OpenRouter models (Google)
     "google/gemini-2.0-flash-exp:free": {"input": 0.00, "output": 0.00},
-    "google/gemini-2.0-flash": {"input": 0.10, "output": 0.40},
-    "google/gemini-1.5-pro": {"input": 1.25, "output": 5.00},
+    "google/gemini-2.0-flash": {"input": 0.10, "output": 0.40, "cached_input": 0.025},
+    "google/gemini-1.5-pro": {"input": 1.25, "output": 5.00, "cached_input": 0.3125},
     # OpenRouter models (Mistral)
     "mistralai/mistral-7b-instruct:free": {"input": 0.00, "output": 0.00},
     # Direct OpenAI models
-    "gpt-4o": {"input": 2.50, "output": 10.00},
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "output": 10.00, "cached_input": 1.25},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
     "gpt-4-turbo": {"input": 10.00, "output": 30.00},
     "dall-e-3": {"input": 0.00, "output": 0.00, "per_image": 0.04},  # $0.04 per image (1024x1024)
 }
 
+# =============================================================================
+# Prompt Caching
+# =============================================================================
+# OpenRouter models that only cache prompt prefixes marked with cache_control
+# (OpenAI models cache long prefixes automatically)
+PROMPT_CACHE_CONTROL_MODELS = ("anthropic/",)
+
 # =============================================================================
 # Agent Model Configuration (per C-Suite position)
 # =============================================================================
@@ -119,11 +200,18 @@ class UsageInfo:
     input_tokens: int = 0
     output_tokens: int = 0
     total_tokens: int = 0
+    cached_tokens: int = 0  # Input tokens read from the provider's prompt cache (billed at cached_input)
     cost_usd: float = 0.0
-    duration_ms: float = 0.0
+    duration_ms: float = 0.0  # Time on the wire for the attempt that produced the result
+    queue_ms: float = 0.0  # Time before that attempt: rate permit waits, 429 backoff and retried attempts
     model_used: str = ""
     provider: str = ""
     fallback_used: bool = False
+    cache_hit: bool = False  # Served from ResponseCache (no provider tokens billed)
+    hedged: bool = False  # A second model was raced after hedge_delay_ms
+    hedge_delay_ms: float = 0.0
+    circuit_open: bool = False  # Failed fast: the model's circuit breaker was open
+    coalesced: bool = False  # Shared an identical in-flight request's result (no provider tokens billed)
 
 
 @dataclass
@@ -133,6 +221,221 @@ class CompletionResult:
     usage: UsageInfo
     success: bool = True
     error: Optional[str] = None
+    retry_after: Optional[float] = None  # Seconds a rate-limited provider asked us to wait
+
+
+@dataclass
+class BatchRequest:
+    """One request in a complete_batch() call (same arguments as complete_with_usage)."""
+    task: str
+    messages: List[Dict[str, str]]
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    use_fallback: bool = True
+    agent: Optional[str] = None
+    use_cache: bool = True
+
+
+@dataclass
+class BatchResult:
+    """Results of complete_batch() in request order, with usage summed over the batch."""
+    results: List[CompletionResult]
+    usage: UsageInfo
+    retries: int = 0  # Requests re-sent after a rate limit
+
+    @property
+    def success(self) -> bool:
+        return all(result.success for result in self.results)
+
+    @property
+    def failed(self) -> List[int]:
+        """Indices of the requests that failed."""
+        return [i for i, result in enumerate(self.results) if not result.success]
+
+
+def _aggregate_usage(usages: List[UsageInfo], duration_ms: float) -> UsageInfo:
+    """Sum token counts and cost over a batch (duration is the batch's wall-clock time)."""
+    return UsageInfo(
+        input_tokens=sum(u.input_tokens for u in usages),
+        output_tokens=sum(u.output_tokens for u in usages),
+        total_tokens=sum(u.total_tokens for u in usages),
+        cached_tokens=sum(u.cached_tokens for u in usages),
+        cost_usd=round(sum(u.cost_usd for u in usages), 6),
+        duration_ms=duration_ms,
+        model_used=", ".join(sorted({u.model_used for u in usages if u.model_used})),
+        provider=", ".join(sorted({u.provider for u in usages if u.provider})),
+        fallback_used=any(u.fallback_used for u in usages),
+        cache_hit=bool(usages) and all(u.cache_hit for u in usages),
+        hedged=any(u.hedged for u in usages),
+        circuit_open=any(u.circuit_open for u in usages)
+    )
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Seconds to wait before retrying a rate-limited request.
+
+    Reads Retry-After (seconds or an HTTP date) from 429/503 responses.
+    Returns None for errors that aren't rate limits.
+    """
+    if not isinstance(error, urllib.error.HTTPError) or error.code not in (429, 503):
+        return None
+    header = error.headers.get("Retry-After") if error.headers else None
+    if header:
+        try:
+            seconds = float(header)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(header).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = DEFAULT_RETRY_AFTER_SECONDS
+        return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+    return DEFAULT_RETRY_AFTER_SECONDS if error.code == 429 else None
+
+
+def _error_headers(error: Exception) -> Dict[str, str]:
+    """Response headers carried by an HTTPError (empty for other errors)."""
+    headers = getattr(error, "headers", None)
+    return dict(headers.items()) if headers else {}
+
+
+class _BatchThrottle:
+    """Batch-wide pause: once any request is rate limited, no request is sent until it lifts."""
+
+    def __init__(self):
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def delay(self) -> float:
+        """Seconds until requests may be sent again."""
+        with self._lock:
+            return max(0.0, self._resume_at - time.monotonic())
+
+
+class CompletionStream:
+    """
+    Iterator over the text deltas of a streamed completion.
+
+    Once exhausted, `result` holds the full CompletionResult (content and
+    usage accumulated at stream end).
+    """
+
+    def __init__(self, events: Iterator[Union[str, CompletionResult]]):
+        self._events = events
+        self.result: Optional[CompletionResult] = None
+
+    def __iter__(self) -> "CompletionStream":
+        return self
+
+    def __next__(self) -> str:
+        event = next(self._events)
+        if isinstance(event, CompletionResult):
+            self.result = event
+            raise StopIteration
+        return event
+
+    def close(self) -> None:
+        """Stop reading and release the connection."""
+        self._events.close()
+
+    def consume(self) -> CompletionResult:
+        """Read the rest of the stream and return the final result."""
+        for _ in self:
+            pass
+        return self.result
+
+
+class AsyncCompletionStream:
+    """Async iterator version of CompletionStream."""
+
+    def __init__(self, events: AsyncIterator[Union[str, CompletionResult]]):
+        self._events = events
+        self.result: Optional[CompletionResult] = None
+
+    def __aiter__(self) -> "AsyncCompletionStream":
+        return self
+
+    async def __anext__(self) -> str:
+        event = await self._events.__anext__()
+        if isinstance(event, CompletionResult):
+            self.result = event
+            raise StopAsyncIteration
+        return event
+
+    async def aclose(self) -> None:
+        """Stop reading and release the connection."""
+        await self._events.aclose()
+
+    async def consume(self) -> CompletionResult:
+        """Read the rest of the stream and return the final result."""
+        async for _ in self:
+            pass
+        return self.result
+
+
+class _StreamState:
+    """Accumulates content and usage from chat completion stream events."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.usage: Dict[str, Any] = {}
+
+    def feed(self, event: Dict[str, Any]) -> str:
+        """Record one event and return its text delta ("" if none)."""
+        if event.get("error"):
+            raise ValueError(f"Stream error: {event['error']}")
+        if event.get("usage"):
+            self.usage = event["usage"]
+        choices = event.get("choices") or []
+        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+        if not delta:
+            return ""
+        self.parts.append(delta)
+        return delta
+
+    @property
+    def content(self) -> str:
+        return "".join(self.parts)
+
+    def as_response(self) -> Dict[str, Any]:
+        """The equivalent non-streamed response body."""
+        return {
+            "choices": [{"message": {"content": self.content}}],
+            "usage": self.usage
+        }
+
+
+def _with_prompt_cache(provider: str, model: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Mark the first system message as a prompt-cache breakpoint for models that need one.
+
+    The first system message is taken to be the stable prefix (BaseAgent
+    keeps per-call context in a second system message), so everything up
+    to and including it can be served from the provider's cache.
+    """
+    if provider != "openrouter" or not model.startswith(PROMPT_CACHE_CONTROL_MODELS):
+        return messages
+    for i, message in enumerate(messages):
+        if message.get("role") != "system" or not isinstance(message.get("content"), str):
+            continue
+        marked = dict(message, content=[
+            {"type": "text", "text": message["content"], "cache_control": {"type": "ephemeral"}}
+        ])
+        return messages[:i] + [marked] + messages[i + 1:]
+    return messages
+
+
+def _sse_data(line: bytes) -> Optional[str]:
+    """Extract the payload of a server-sent event `data:` line (None for other lines)."""
+    text = line.decode("utf-8").strip()
+    if not text.startswith("data:"):
+        # Blank separators and ": keep-alive" comments
+        return None
+    return text[5:].strip()
 
 
 @dataclass
@@ -149,6 +452,9 @@ class TaskRouting:
     """Task-specific model routing with fallback."""
     primary: ModelConfig
     fallback: Optional[ModelConfig] = None
+    cache: Optional[CachePolicy] = None  # None = responses for this task are never cached
+    # None = fallback only runs after the primary fails. Opt-in: a hedged call can bill both models
+    hedge: Optional[HedgePolicy] = None
     
 
 @dataclass
@@ -196,7 +502,8 @@ DEFAULT_TASK_ROUTING = {
             model="gpt-4o-mini",
             temperature=0.5,
             max_tokens=2048
-        )
+        ),
+        cache=CachePolicy(ttl_seconds=3600)
     ),
     "quick_response": TaskRouting(
         primary=ModelConfig(
@@ -210,7 +517,8 @@ DEFAULT_TASK_ROUTING = {
             model="gpt-4o-mini",
             temperature=0.3,
             max_tokens=256
-        )
+        ),
+        cache=CachePolicy(ttl_seconds=600)
     ),
     "critical_decision": TaskRouting(
         primary=ModelConfig(
@@ -224,7 +532,8 @@ DEFAULT_TASK_ROUTING = {
             model="gpt-4o",
             temperature=0.3,
             max_tokens=4096
-        )
+        ),
+        cache=CachePolicy(ttl_seconds=3600)
     ),
     "legal_review": TaskRouting(
         primary=ModelConfig(
@@ -238,7 +547,8 @@ DEFAULT_TASK_ROUTING = {
             model="gpt-4o",
             temperature=0.2,
             max_tokens=4096
-        )
+        ),
+        cache=CachePolicy(ttl_seconds=86400)
     ),
     "content_generation": TaskRouting(
         primary=ModelConfig(
@@ -266,7 +576,8 @@ DEFAULT_TASK_ROUTING = {
             model="gpt-4o",
             temperature=0.3,
             max_tokens=4096
-        )
+        ),
+        cache=CachePolicy(ttl_seconds=3600)
     ),
     "default": TaskRouting(
         primary=ModelConfig(
@@ -280,7 +591,8 @@ DEFAULT_TASK_ROUTING = {
             model="gpt-4o-mini",
             temperature=0.7,
             max_tokens=1024
-        )
+        ),
+        cache=CachePolicy(ttl_seconds=600)
     )
 }
 
@@ -294,12 +606,28 @@ class APIManager:
     - OpenAI (fallback for DALL-E)
     - Per-factory credentials
     - Task-specific model routing
+    - Pluggable HTTP transport (pooled keep-alive by default)
+    - Async twins (acomplete, acomplete_with_usage) on a non-blocking transport
+    - Opt-in response caching per task type
+    - Hedged requests timed from rolling per-model latency
+    - Circuit breakers that fail fast to the fallback, adaptive timeouts
+    - Batch completions (complete_batch, acomplete_batch) with bounded concurrency
+    - Single-flight coalescing of identical concurrent requests
+    - Rate governing that queues requests instead of failing over on 429s
     """
     
     def __init__(
         self, 
         factory_id: Optional[str] = None,
-        config_path: Optional[str] = None
+        config_path: Optional[str] = None,
+        transport: Optional[HTTPTransport] = None,
+        async_transport: Optional[AsyncHTTPTransport] = None,
+        cache: Optional[ResponseCache] = None,
+        latency: Optional[LatencyTracker] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        single_flight: Optional[SingleFlight] = None,
+        rate_governor: Optional[RateGovernor] = None,
+        late_usage_sink: Optional[Callable[[UsageInfo], None]] = None
     ):
         """
         Initialize API manager.
@@ -307,10 +635,35 @@ class APIManager:
         Args:
             factory_id: Factory identifier for per-factory configs
             config_path: Path to factory config JSON file
+            transport: HTTP transport (defaults to the shared process-wide pool)
+            async_transport: Non-blocking transport for the async API
+            cache: Response cache (defaults to the process-wide cache if APIMANAGER_CACHE=1)
+            latency: Latency tracker used for hedging and timeouts (defaults to the process-wide tracker)
+            breakers: Circuit breakers per provider/model (defaults to the process-wide registry)
+            single_flight: Group that coalesces identical in-flight requests
+                (defaults to the process-wide group unless APIMANAGER_SINGLE_FLIGHT=0)
+            rate_governor: Rate limits per factory/provider/model
+                (defaults to the process-wide governor unless APIMANAGER_RATE_GOVERNOR=0)
+            late_usage_sink: Called with usage billed after its call returned
+                (a hedge's losing request); also summed in self.late_usage
         """
         self.factory_id = factory_id or "development"
         self.config = self._load_config(config_path)
+        # Files whose changes make this manager's config stale (see BaseAgent.is_stale)
+        self.config_files = ([Path(config_path)] if config_path else []) + [
+            Path(__file__).parent.parent / "factories" / self.factory_id / "config.json"
+        ]
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport or get_default_async_transport()
         self._load_env()
+        self.cache = cache or get_default_cache()
+        self.latency = latency or get_default_latency_tracker()
+        self.breakers = breakers or get_default_breakers()
+        self.single_flight = single_flight or get_default_single_flight()
+        self.rate_governor = rate_governor or get_default_rate_governor()
+        self.late_usage_sink = late_usage_sink
+        self.late_usage = UsageInfo()
+        self._late_usage_lock = threading.Lock()
         
     def _load_env(self) -> None:
         """Load environment variables from .env.local or .env."""
@@ -356,7 +709,9 @@ class APIManager:
         for task, routing in data.get("task_routing", {}).items():
             primary = ModelConfig(**routing["primary"])
             fallback = ModelConfig(**routing["fallback"]) if routing.get("fallback") else None
-            task_routing[task] = TaskRouting(primary=primary, fallback=fallback)
+            cache = CachePolicy(**routing["cache"]) if routing.get("cache") else None
+            hedge = HedgePolicy(**routing["hedge"]) if routing.get("hedge") else None
+            task_routing[task] = TaskRouting(primary=primary, fallback=fallback, cache=cache, hedge=hedge)
             
         return FactoryConfig(
             factory_id=data.get("factory_id", self.factory_id),
@@ -387,20 +742,73 @@ class APIManager:
             
         return key
         
+    def _get_base_url(self, provider: str) -> str:
+        """Get the API base URL for a provider."""
+        env_var = f"{provider.upper()}_BASE_URL"
+        return os.getenv(env_var, PROVIDER_BASE_URLS.get(provider, "")).rstrip("/")
+
+    def transport_stats(self) -> Dict[str, Any]:
+        """Get connection reuse counters for the underlying transports."""
+        stats = self.transport.stats.as_dict()
+        stats["async"] = self.async_transport.stats.as_dict()
+        return stats
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get rolling latency percentiles per provider/model."""
+        return self.latency.snapshot()
+
+    def breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get circuit breaker state per provider/model (for ops dashboards)."""
+        return self.breakers.snapshot()
+
+    def rate_stats(self) -> Optional[Dict[str, Any]]:
+        """Get rate governor counters and learned limits (None if governing is disabled)."""
+        return self.rate_governor.snapshot() if self.rate_governor else None
+
+    def single_flight_stats(self) -> Optional[Dict[str, int]]:
+        """Get coalesced-request counters (None if coalescing is disabled)."""
+        return self.single_flight.snapshot() if self.single_flight else None
+
     def _get_routing(self, task: str) -> TaskRouting:
         """Get routing configuration for a task."""
         return self.config.task_routing.get(task, DEFAULT_TASK_ROUTING.get(task, DEFAULT_TASK_ROUTING["default"]))
 
-    def _calculate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost in USD for a request."""
+    def _calculate_cost(self, model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """Calculate cost in USD for a request (cached_tokens are part of input_tokens)."""
         pricing = MODEL_PRICING.get(model, {"input": 0.003, "output": 0.015})
-        input_cost = (input_tokens / 1_000_000) * pricing["input"]
+        cached_tokens = min(cached_tokens, input_tokens)
+        input_cost = ((input_tokens - cached_tokens) / 1_000_000) * pricing["input"]
+        input_cost += (cached_tokens / 1_000_000) * pricing.get("cached_input", pricing["input"])
         output_cost = (output_tokens / 1_000_000) * pricing["output"]
         return round(input_cost + output_cost, 6)
 
-    def _estimate_tokens(self, text: str) -> int:
-        """Rough estimate of tokens (avg 4 chars per token)."""
-        return len(text) // 4
+    def _estimate_tokens(self, text: str, model: Optional[str] = None) -> int:
+        """Estimate tokens with the model family's tokenizer (see tokens.py)."""
+        return count_tokens(text, model)
+
+    def estimate_usage(
+        self,
+        task: str,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None
+    ) -> UsageInfo:
+        """
+        Pre-call estimate for a request on the task's primary model.
+
+        Input tokens are counted with the model's tokenizer; output tokens
+        and cost assume the full max_tokens is generated (an upper bound).
+        """
+        config = self._get_routing(task).primary
+        input_tokens = count_message_tokens(messages, config.model)
+        output_tokens = max_tokens or config.max_tokens
+        return UsageInfo(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+            cost_usd=self._calculate_cost(config.model, input_tokens, output_tokens),
+            model_used=config.model,
+            provider=config.provider
+        )
 
     def get_model_for_agent(
         self,
@@ -436,7 +844,8 @@ class APIManager:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         use_fallback: bool = True,
-        agent: Optional[str] = None
+        agent: Optional[str] = None,
+        use_cache: bool = True
     ) -> Union[str, CompletionResult]:
         """
         Make a chat completion request.
@@ -448,11 +857,13 @@ class APIManager:
             max_tokens: Override default max tokens
             use_fallback: Whether to try fallback on failure
             agent: Optional agent name for logging
+            use_cache: Whether to reuse other callers' responses (response cache if
+                configured for the task, and identical in-flight requests)
 
         Returns:
             Response content string (for backward compatibility)
         """
-        result = self.complete_with_usage(task, messages, temperature, max_tokens, use_fallback, agent)
+        result = self.complete_with_usage(task, messages, temperature, max_tokens, use_fallback, agent, use_cache)
         return result.content
 
     def complete_with_usage(
@@ -462,7 +873,8 @@ class APIManager:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         use_fallback: bool = True,
-        agent: Optional[str] = None
+        agent: Optional[str] = None,
+        use_cache: bool = True
     ) -> CompletionResult:
         """
         Make a chat completion request with full usage tracking.
@@ -474,20 +886,65 @@ class APIManager:
             max_tokens: Override default max tokens
             use_fallback: Whether to try fallback on failure
             agent: Optional agent name for logging
+            use_cache: Whether to reuse other callers' responses (response cache if
+                configured for the task, and identical in-flight requests)
 
         Returns:
             CompletionResult with content and usage info
         """
         routing = self._get_routing(task)
 
-        # Try primary
-        result = self._make_request_with_usage(
-            routing.primary,
-            messages,
-            temperature,
-            max_tokens
+        cache_key = self._cache_key(routing, messages, temperature, max_tokens) if use_cache else None
+        if cache_key:
+            cached = self._cached_result(cache_key)
+            if cached:
+                return cached
+
+        flight_key = self._flight_key(routing, messages, temperature, max_tokens, use_fallback) if use_cache else None
+        if flight_key is None:
+            result = self._complete_routed(routing, messages, temperature, max_tokens, use_fallback)
+        else:
+            start_time = time.time()
+            result, leader = self.single_flight.do(
+                flight_key,
+                lambda: self._complete_routed(routing, messages, temperature, max_tokens, use_fallback)
+            )
+            if not leader:
+                return self._coalesced_result(result, start_time)
+
+        self._store_result(cache_key, routing, result)
+        return result
+
+    def _complete_routed(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        use_fallback: bool
+    ) -> CompletionResult:
+        """Run a request against the routing's primary, then its fallback on failure."""
+        if use_fallback and routing.fallback and routing.hedge:
+            return self._complete_hedged(routing, messages, temperature, max_tokens)
+
+        return _run_steps(
+            self._fallback_steps(routing, use_fallback),
+            lambda config: self._make_request_with_usage(config, messages, temperature, max_tokens)
         )
 
+    def _fallback_steps(
+        self,
+        routing: TaskRouting,
+        use_fallback: bool
+    ) -> Generator[ModelConfig, CompletionResult, CompletionResult]:
+        """
+        Primary-then-fallback routing, shared by the blocking and async paths.
+
+        Yields each model to request and is sent its result (see _run_steps()).
+        """
+        # Try primary
+        result = yield routing.primary
+
         # If primary succeeded, return it
         if result.success:
             result.usage.fallback_used = False
@@ -496,18 +953,218 @@ class APIManager:
         # If primary failed and we have a fallback, try it
         if use_fallback and routing.fallback:
             print(f"Primary failed ({result.error}), trying fallback...")
-            fallback_result = self._make_request_with_usage(
-                routing.fallback,
-                messages,
-                temperature,
-                max_tokens
-            )
+            fallback_result = yield routing.fallback
             fallback_result.usage.fallback_used = True
+            if fallback_result.retry_after is None:
+                fallback_result.retry_after = result.retry_after
             return fallback_result
 
         # No fallback available, return the failed result
         return result
 
+    def _hedge_order(self, routing: TaskRouting) -> Tuple[ModelConfig, ModelConfig]:
+        """(lead, hedge) models: primary first unless prefer_faster picks the faster median."""
+        primary, fallback = routing.primary, routing.fallback
+        policy = routing.hedge
+        if policy.prefer_faster:
+            primary_p50 = self.latency.percentile(primary.provider, primary.model, 50, policy.min_samples)
+            fallback_p50 = self.latency.percentile(fallback.provider, fallback.model, 50, policy.min_samples)
+            if primary_p50 is not None and fallback_p50 is not None and fallback_p50 < primary_p50:
+                return fallback, primary
+        return primary, fallback
+
+    def _hedge_delay_ms(self, config: ModelConfig, policy: HedgePolicy) -> float:
+        """How long to wait on a model before hedging (its percentile latency once known)."""
+        observed = self.latency.percentile(config.provider, config.model, policy.percentile, policy.min_samples)
+        return observed if observed is not None else policy.initial_delay_ms
+
+    def _hedge_outcome(
+        self,
+        routing: TaskRouting,
+        config: ModelConfig,
+        result: CompletionResult,
+        hedged: bool,
+        delay_ms: float
+    ) -> CompletionResult:
+        result.usage.fallback_used = config is not routing.primary
+        result.usage.hedged = hedged
+        result.usage.hedge_delay_ms = delay_ms
+        return result
+
+    def _complete_hedged(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> CompletionResult:
+        """
+        Race the routing's two models once the lead is slower than its hedge delay.
+
+        The first successful response wins. The other call can't be stopped
+        once sent, so it is billed (see _bill_hedge_losers()). A lead that
+        fails before the delay falls back sequentially, as without hedging.
+        """
+        lead, other = self._hedge_order(routing)
+        delay_ms = self._hedge_delay_ms(lead, routing.hedge)
+        executor = _get_hedge_executor()
+
+        lead_future = executor.submit(self._make_request_with_usage, lead, messages, temperature, max_tokens)
+        try:
+            result = lead_future.result(timeout=delay_ms / 1000)
+        except FutureTimeout:
+            result = None
+
+        if result is not None:
+            if result.success:
+                return self._hedge_outcome(routing, lead, result, False, delay_ms)
+            print(f"Primary failed ({result.error}), trying fallback...")
+            result = self._make_request_with_usage(other, messages, temperature, max_tokens)
+            return self._hedge_outcome(routing, other, result, False, delay_ms)
+
+        hedge_future = executor.submit(self._make_request_with_usage, other, messages, temperature, max_tokens)
+        configs = {lead_future: lead, hedge_future: other}
+        pending = set(configs)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                winner, result = configs[future], future.result()
+                if result.success:
+                    # A loser still queued for a worker is never sent
+                    self._bill_hedge_losers(result, [
+                        loser for loser in configs if loser is not future and not loser.cancel()
+                    ])
+                    return self._hedge_outcome(routing, winner, result, True, delay_ms)
+
+        # Both failed: report the last failure
+        return self._hedge_outcome(routing, winner, result, True, delay_ms)
+
+    def _bill_hedge_losers(
+        self,
+        result: CompletionResult,
+        losers: List[Union[Future, "asyncio.Future"]]
+    ) -> None:
+        """
+        Bill the losing side of a hedge, which the provider charges for.
+
+        A loser that has finished is added to the winner's usage. One still
+        running is left to finish and then reported through the late usage
+        sink, since the caller has already read the winner's usage by then.
+        """
+        for loser in losers:
+            if loser.done():
+                _add_usage(result.usage, _hedge_loser_usage(loser))
+            else:
+                loser.add_done_callback(lambda loser: self._bill_late(_hedge_loser_usage(loser)))
+
+    def _bill_late(self, usage: Optional[UsageInfo]) -> None:
+        """Record usage billed after its call returned, in late_usage and the sink."""
+        if usage is None:
+            return
+        with self._late_usage_lock:
+            _add_usage(self.late_usage, usage)
+        if self.late_usage_sink:
+            self.late_usage_sink(usage)
+
+    def _cache_key(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> Optional[str]:
+        """Get the cache key for a request, or None if it should not be cached."""
+        if self.cache is None or routing.cache is None:
+            return None
+        primary = routing.primary
+        return make_cache_key(
+            primary.model,
+            messages,
+            temperature or primary.temperature,
+            max_tokens or primary.max_tokens
+        )
+
+    def _cached_result(self, cache_key: str) -> Optional[CompletionResult]:
+        """Build a zero-cost CompletionResult from a cache hit."""
+        start_time = time.time()
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+        return CompletionResult(
+            content=entry["content"],
+            usage=UsageInfo(
+                duration_ms=(time.time() - start_time) * 1000,
+                model_used=entry.get("model_used", ""),
+                provider=entry.get("provider", ""),
+                fallback_used=entry.get("fallback_used", False),
+                cache_hit=True
+            ),
+            success=True
+        )
+
+    def _store_result(self, cache_key: Optional[str], routing: TaskRouting, result: CompletionResult) -> None:
+        """Cache a successful result under its request key."""
+        if not cache_key or not result.success:
+            return
+        self.cache.set(
+            cache_key,
+            {
+                "content": result.content,
+                "model_used": result.usage.model_used,
+                "provider": result.usage.provider,
+                "fallback_used": result.usage.fallback_used,
+                "input_tokens": result.usage.input_tokens,
+                "output_tokens": result.usage.output_tokens
+            },
+            routing.cache.ttl_seconds
+        )
+
+    def _flight_key(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        use_fallback: bool
+    ) -> Optional[str]:
+        """Key identifying identical in-flight requests, or None if coalescing is disabled."""
+        if self.single_flight is None:
+            return None
+        primary = routing.primary
+        fallback = routing.fallback.model if use_fallback and routing.fallback else ""
+        request_key = make_cache_key(
+            primary.model,
+            messages,
+            temperature or primary.temperature,
+            max_tokens or primary.max_tokens
+        )
+        # Factories bill to their own keys, so never share across them
+        return f"{self.factory_id}:{fallback}:{request_key}"
+
+    def _coalesced_result(self, shared: CompletionResult, start_time: float) -> CompletionResult:
+        """A follower's copy of the leader's result: same content, no tokens billed to this caller."""
+        usage = shared.usage
+        return CompletionResult(
+            content=shared.content,
+            usage=UsageInfo(
+                duration_ms=(time.time() - start_time) * 1000,
+                model_used=usage.model_used,
+                provider=usage.provider,
+                fallback_used=usage.fallback_used,
+                hedged=usage.hedged,
+                hedge_delay_ms=usage.hedge_delay_ms,
+                circuit_open=usage.circuit_open,
+                coalesced=True
+            ),
+            success=shared.success,
+            error=shared.error,
+            retry_after=shared.retry_after
+        )
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """Get response cache hit/miss counters (None if caching is disabled)."""
+        return self.cache.stats.as_dict() if self.cache else None
+
     def _make_request(
         self,
         config: ModelConfig,
@@ -532,109 +1189,352 @@ class APIManager:
         start_time = time.time()
 
         if config.provider == "openrouter":
-            return self._openrouter_request_with_usage(config, messages, temperature, max_tokens, start_time)
+            result = self._openrouter_request_with_usage(config, messages, temperature, max_tokens, start_time)
         elif config.provider == "openai":
-            return self._openai_request_with_usage(config, messages, temperature, max_tokens, start_time)
+            result = self._openai_request_with_usage(config, messages, temperature, max_tokens, start_time)
+        else:
+            return self._unknown_provider_result(config)
+
+        return result
+
+    def _request_timeout(
+        self,
+        config: ModelConfig,
+        max_tokens: Optional[int] = None,
+        default_seconds: float = REQUEST_TIMEOUT_SECONDS
+    ) -> float:
+        """Timeout adapted from the model's observed latency at this completion budget (never above the default)."""
+        return self.latency.timeout_for(
+            config.provider, config.model, default_seconds, max_tokens=max_tokens or config.max_tokens
+        )
+
+    def _circuit_open_result(self, config: ModelConfig) -> Optional[CompletionResult]:
+        """
+        Fail fast if the model's breaker is open.
+
+        Returns None when the call may proceed; the caller must then report
+        its outcome with _record_outcome().
+        """
+        if self.breakers.get(config.provider, config.model).allow():
+            return None
+        return CompletionResult(
+            content="",
+            usage=UsageInfo(model_used=config.model, provider=config.provider, circuit_open=True),
+            success=False,
+            error=f"Circuit open for {config.provider}:{config.model}"
+        )
+
+    def _record_outcome(
+        self,
+        config: ModelConfig,
+        result: CompletionResult,
+        error: Optional[Exception] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Feed a finished call into its latency histogram and circuit breaker.
+
+        A timed-out call is recorded as a latency sample too, so a timeout
+        that is too short for the model grows instead of cutting off every
+        call like it. Timeouts shortened by adaptation don't count against
+        the provider's health.
+        """
+        breaker = self.breakers.get(config.provider, config.model)
+        max_tokens = max_tokens or config.max_tokens
+        if result.success:
+            self.latency.record(config.provider, config.model, result.usage.duration_ms, max_tokens)
+            breaker.record_success()
+            return
+        timed_out = is_timeout(error)
+        if timed_out:
+            self.latency.record(config.provider, config.model, result.usage.duration_ms, max_tokens)
+        if timed_out and timeout is not None and timeout < REQUEST_TIMEOUT_SECONDS:
+            breaker.record_neutral()
+        elif error is None or is_provider_failure(error):
+            breaker.record_failure()
         else:
+            breaker.record_neutral()
+
+    def _unknown_provider_result(self, config: ModelConfig) -> CompletionResult:
+        return CompletionResult(
+            content="",
+            usage=UsageInfo(),
+            success=False,
+            error=f"Unknown provider: {config.provider}"
+        )
+
+    def _build_chat_request(
+        self,
+        provider: str,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stream: bool = False
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Build (url, headers, payload) for a chat completion request."""
+        api_key = self._get_api_key(provider)
+
+        url = f"{self._get_base_url(provider)}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        if provider == "openrouter":
+            headers.update({
+                "HTTP-Referer": os.getenv("OPENROUTER_REFERER", "https://ceopenspec.ai"),
+                "X-Title": os.getenv("OPENROUTER_TITLE", "ceoOpenSpec"),
+                "X-Factory-ID": self.factory_id
+            })
+
+        payload = {
+            "model": config.model,
+            "messages": _with_prompt_cache(provider, config.model, messages),
+            "temperature": temperature or config.temperature,
+            "max_tokens": max_tokens or config.max_tokens
+        }
+        if stream:
+            # Ask for a final usage chunk so streamed calls are still billed correctly
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return url, headers, payload
+
+    def _parse_chat_response(
+        self,
+        provider: str,
+        config: ModelConfig,
+        data: Dict[str, Any],
+        start_time: float
+    ) -> CompletionResult:
+        """Convert a chat completion response body into a CompletionResult."""
+        duration_ms = (time.time() - start_time) * 1000
+
+        if "choices" not in data or not data["choices"]:
             return CompletionResult(
                 content="",
-                usage=UsageInfo(),
+                usage=UsageInfo(duration_ms=duration_ms, model_used=config.model, provider=provider),
                 success=False,
-                error=f"Unknown provider: {config.provider}"
+                error=f"Unexpected {PROVIDER_NAMES.get(provider, provider)} response: {data}"
             )
-            
-    def _openrouter_request(
+
+        # Extract usage info
+        usage_data = data.get("usage", {})
+        input_tokens = usage_data.get("prompt_tokens", 0)
+        output_tokens = usage_data.get("completion_tokens", 0)
+        total_tokens = usage_data.get("total_tokens", input_tokens + output_tokens)
+        cached_tokens = (usage_data.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+
+        usage = UsageInfo(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=total_tokens,
+            cached_tokens=cached_tokens,
+            cost_usd=self._calculate_cost(config.model, input_tokens, output_tokens, cached_tokens),
+            duration_ms=duration_ms,
+            model_used=config.model,
+            provider=provider
+        )
+
+        return CompletionResult(
+            content=data["choices"][0]["message"]["content"].strip(),
+            usage=usage,
+            success=True
+        )
+
+    def _failed_result(
+        self,
+        provider: str,
+        config: ModelConfig,
+        start_time: float,
+        error: Exception
+    ) -> CompletionResult:
+        duration_ms = (time.time() - start_time) * 1000
+        return CompletionResult(
+            content="",
+            usage=UsageInfo(duration_ms=duration_ms, model_used=config.model, provider=provider),
+            success=False,
+            error=str(error),
+            retry_after=_retry_after_seconds(error)
+        )
+
+    def _permit_tokens(
         self,
         config: ModelConfig,
         messages: List[Dict[str, str]],
-        temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
-    ) -> str:
-        """Make request to OpenRouter (backward compatible)."""
-        result = self._openrouter_request_with_usage(config, messages, temperature, max_tokens, time.time())
-        if not result.success:
-            raise ValueError(result.error)
-        return result.content
+        max_tokens: Optional[int]
+    ) -> int:
+        """Tokens a request may use (prompt plus max completion), reserved against tokens/min."""
+        return count_message_tokens(messages, config.model) + (max_tokens or config.max_tokens)
 
-    def _openrouter_request_with_usage(
+    def _rate_queue_result(self, config: ModelConfig, start_time: float) -> CompletionResult:
+        return CompletionResult(
+            content="",
+            usage=UsageInfo(
+                queue_ms=(time.time() - start_time) * 1000,
+                model_used=config.model,
+                provider=config.provider
+            ),
+            success=False,
+            error=f"Timed out waiting for a rate limit permit for {config.provider}:{config.model}"
+        )
+
+    def _release_permit(
+        self,
+        permit: Optional[RatePermit],
+        result: CompletionResult,
+        response_headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Hand a rate permit back with the tokens actually billed and any rate-limit headers."""
+        if permit is None:
+            return
+        # Failed calls bill nothing; successful calls without usage keep the estimate
+        used_tokens = result.usage.total_tokens if result.usage.total_tokens or not result.success else None
+        self.rate_governor.release(permit, used_tokens, response_headers)
+        if result.retry_after is not None:
+            self.rate_governor.penalize(*permit.key, result.retry_after)
+
+    def _retry_rate_limited(self, result: CompletionResult, attempt: int) -> bool:
+        """Whether to retry a 429 on the same model (the governor waits out its backoff)."""
+        return (
+            self.rate_governor is not None
+            and result.retry_after is not None
+            and attempt < RATE_LIMIT_RETRIES
+            and result.retry_after <= self.rate_governor.max_wait_seconds
+        )
+
+    def _chat_request_with_usage(
         self,
+        provider: str,
         config: ModelConfig,
         messages: List[Dict[str, str]],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         start_time: Optional[float] = None
     ) -> CompletionResult:
-        """Make request to OpenRouter with usage tracking."""
-        start_time = start_time or time.time()
+        """Make a chat completion request over the blocking transport (see _request_steps())."""
+        return _run_steps(
+            self._request_steps(provider, config, messages, temperature, max_tokens, start_time),
+            self._perform
+        )
 
-        try:
-            api_key = self._get_api_key("openrouter")
+    def _perform(self, step: Tuple[str, tuple, Dict[str, Any]]) -> Any:
+        """Carry out an I/O step from _request_steps() with the blocking governor and transport."""
+        action, args, kwargs = step
+        if action == "acquire":
+            return self.rate_governor.acquire(*args, **kwargs)
+        return self.transport.post_json(*args, **kwargs)
 
-            url = "https://openrouter.ai/api/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": os.getenv("OPENROUTER_REFERER", "https://ceopenspec.ai"),
-                "X-Title": os.getenv("OPENROUTER_TITLE", "ceoOpenSpec"),
-                "X-Factory-ID": self.factory_id
-            }
-
-            payload = {
-                "model": config.model,
-                "messages": messages,
-                "temperature": temperature or config.temperature,
-                "max_tokens": max_tokens or config.max_tokens
-            }
+    def _request_steps(
+        self,
+        provider: str,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        start_time: Optional[float] = None
+    ) -> Generator[Tuple[str, tuple, Dict[str, Any]], Any, CompletionResult]:
+        """
+        Make a chat completion request, leaving the I/O to the caller.
 
-            request = urllib.request.Request(
-                url,
-                data=json.dumps(payload).encode("utf-8"),
-                headers=headers
-            )
+        Waits for a rate permit first. After a 429 the request is retried on
+        the same model once its backoff has passed, rather than failing over.
+        Each attempt is timed from when it is sent, so permit waits and
+        backoff (reported as queue_ms) don't inflate latency samples.
 
-            with urllib.request.urlopen(request, timeout=60) as response:
-                data = json.loads(response.read().decode("utf-8"))
+        The blocking and async paths share this logic: it yields
+        ("acquire", args, kwargs) for RateGovernor.acquire() and
+        ("post_json", args, kwargs) for the transport's post_json(), and is
+        sent each call's return value or has its exception thrown in (see
+        _run_steps() and _arun_steps()).
+        """
+        start_time = start_time or time.time()
 
-            duration_ms = (time.time() - start_time) * 1000
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            permit = None
+            if self.rate_governor:
+                permit = yield "acquire", (
+                    self.factory_id, provider, config.model, self._permit_tokens(config, messages, max_tokens)
+                ), {}
+                if permit is None:
+                    return self._rate_queue_result(config, start_time)
 
-            if "choices" not in data or not data["choices"]:
-                return CompletionResult(
-                    content="",
-                    usage=UsageInfo(duration_ms=duration_ms, model_used=config.model, provider="openrouter"),
-                    success=False,
-                    error=f"Unexpected OpenRouter response: {data}"
+            sent_at = time.time()
+            try:
+                result, response_headers = yield from self._send_steps(
+                    provider, config, messages, temperature, max_tokens, sent_at
                 )
+            except BaseException:
+                # Interrupted or cancelled (e.g. the losing side of a hedge): nothing was billed
+                if permit is not None:
+                    self.rate_governor.release(permit, 0)
+                raise
+            self._release_permit(permit, result, response_headers)
+            if not self._retry_rate_limited(result, attempt):
+                break
 
-            # Extract usage info
-            usage_data = data.get("usage", {})
-            input_tokens = usage_data.get("prompt_tokens", 0)
-            output_tokens = usage_data.get("completion_tokens", 0)
-            total_tokens = usage_data.get("total_tokens", input_tokens + output_tokens)
-
-            usage = UsageInfo(
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                total_tokens=total_tokens,
-                cost_usd=self._calculate_cost(config.model, input_tokens, output_tokens),
-                duration_ms=duration_ms,
-                model_used=config.model,
-                provider="openrouter"
-            )
+        result.usage.queue_ms = (sent_at - start_time) * 1000
+        return result
 
-            return CompletionResult(
-                content=data["choices"][0]["message"]["content"].strip(),
-                usage=usage,
-                success=True
-            )
+    def _send_steps(
+        self,
+        provider: str,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        start_time: float
+    ) -> Generator[Tuple[str, tuple, Dict[str, Any]], Any, Tuple[CompletionResult, Dict[str, str]]]:
+        """Send one chat completion request (steps as in _request_steps()). Returns (result, response headers)."""
+        response_headers: Dict[str, str] = {}
 
+        rejected = self._circuit_open_result(config)
+        if rejected:
+            return rejected, response_headers
+
+        timeout = self._request_timeout(config, max_tokens)
+        try:
+            url, headers, payload = self._build_chat_request(provider, config, messages, temperature, max_tokens)
+            data = yield "post_json", (url, payload), {
+                "headers": headers, "timeout": timeout, "response_headers": response_headers
+            }
+            result = self._parse_chat_response(provider, config, data, start_time)
         except Exception as e:
-            duration_ms = (time.time() - start_time) * 1000
-            return CompletionResult(
-                content="",
-                usage=UsageInfo(duration_ms=duration_ms, model_used=config.model, provider="openrouter"),
-                success=False,
-                error=str(e)
-            )
+            response_headers.update(_error_headers(e))
+            result = self._failed_result(provider, config, start_time, e)
+            self._record_outcome(config, result, e, max_tokens, timeout)
+            return result, response_headers
+        except BaseException:
+            # Interrupted or cancelled: no verdict, but free a half-open probe
+            self.breakers.get(config.provider, config.model).record_neutral()
+            raise
+
+        self._record_outcome(config, result, max_tokens=max_tokens)
+        return result, response_headers
+
+    def _openrouter_request(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Make request to OpenRouter (backward compatible)."""
+        result = self._openrouter_request_with_usage(config, messages, temperature, max_tokens, time.time())
+        if not result.success:
+            raise ValueError(result.error)
+        return result.content
+
+    def _openrouter_request_with_usage(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        start_time: Optional[float] = None
+    ) -> CompletionResult:
+        """Make request to OpenRouter with usage tracking."""
+        return self._chat_request_with_usage("openrouter", config, messages, temperature, max_tokens, start_time)
 
     def _openai_request(
         self,
@@ -658,66 +1558,579 @@ class APIManager:
         start_time: Optional[float] = None
     ) -> CompletionResult:
         """Make request to OpenAI with usage tracking."""
-        start_time = start_time or time.time()
+        return self._chat_request_with_usage("openai", config, messages, temperature, max_tokens, start_time)
 
-        try:
-            api_key = self._get_api_key("openai")
+    # =========================================================================
+    # Streaming API (server-sent events)
+    # =========================================================================
 
-            url = "https://api.openai.com/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
+    def stream(
+        self,
+        task: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_fallback: bool = True,
+        agent: Optional[str] = None,
+        use_cache: bool = True
+    ) -> CompletionStream:
+        """
+        Stream a completion as it is generated.
 
-            payload = {
-                "model": config.model,
-                "messages": messages,
-                "temperature": temperature or config.temperature,
-                "max_tokens": max_tokens or config.max_tokens
-            }
+        Takes the same arguments as complete_with_usage(). The fallback model
+        is only tried if the primary fails before producing any output.
+
+        Returns:
+            CompletionStream yielding text deltas; its `result` is set when the
+            stream ends
 
-            request = urllib.request.Request(
-                url,
-                data=json.dumps(payload).encode("utf-8"),
-                headers=headers
+        Example:
+            stream = manager.stream("agent_reasoning", messages)
+            for chunk in stream:
+                print(chunk, end="", flush=True)
+            print(stream.result.usage.cost_usd)
+        """
+        routing = self._get_routing(task)
+
+        cache_key = self._cache_key(routing, messages, temperature, max_tokens) if use_cache else None
+        if cache_key:
+            cached = self._cached_result(cache_key)
+            if cached:
+                return CompletionStream(self._replay(cached))
+
+        return CompletionStream(
+            self._stream_routed(routing, messages, temperature, max_tokens, use_fallback, cache_key)
+        )
+
+    def _replay(self, result: CompletionResult) -> Iterator[Union[str, CompletionResult]]:
+        yield result.content
+        yield result
+
+    def _stream_routed(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        use_fallback: bool,
+        cache_key: Optional[str]
+    ) -> Iterator[Union[str, CompletionResult]]:
+        """Yield deltas from the primary (or fallback), then the final CompletionResult."""
+        configs = [routing.primary]
+        if use_fallback and routing.fallback:
+            configs.append(routing.fallback)
+
+        for attempt, config in enumerate(configs):
+            started = False
+            for event in self._stream_chat(config, messages, temperature, max_tokens):
+                if isinstance(event, CompletionResult):
+                    result = event
+                else:
+                    started = True
+                    yield event
+            result.usage.fallback_used = attempt > 0
+            if result.success or started or attempt == len(configs) - 1:
+                break
+            print(f"Primary failed ({result.error}), trying fallback...")
+
+        self._store_result(cache_key, routing, result)
+        yield result
+
+    def _stream_chat(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[Union[str, CompletionResult]]:
+        """Stream one chat completion over the blocking transport, holding a rate permit."""
+        start_time = time.time()
+
+        if config.provider not in PROVIDER_NAMES:
+            yield self._unknown_provider_result(config)
+            return
+
+        permit = None
+        if self.rate_governor:
+            permit = self.rate_governor.acquire(
+                self.factory_id, config.provider, config.model, self._permit_tokens(config, messages, max_tokens)
             )
+            if permit is None:
+                yield self._rate_queue_result(config, start_time)
+                return
 
-            with urllib.request.urlopen(request, timeout=60) as response:
-                data = json.loads(response.read().decode("utf-8"))
+        # Abandoned streams hand the permit back as unbilled
+        result = CompletionResult(content="", usage=UsageInfo(), success=False)
+        sent_at = time.time()
+        events = self._stream_chat_events(config, messages, temperature, max_tokens, sent_at)
+        try:
+            for event in events:
+                if isinstance(event, CompletionResult):
+                    result = event
+                    result.usage.queue_ms = (sent_at - start_time) * 1000
+                yield event
+        finally:
+            events.close()
+            self._release_permit(permit, result)
 
-            duration_ms = (time.time() - start_time) * 1000
+    def _stream_chat_events(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        start_time: float
+    ) -> Iterator[Union[str, CompletionResult]]:
+        rejected = self._circuit_open_result(config)
+        if rejected:
+            yield rejected
+            return
 
-            # Extract usage info
-            usage_data = data.get("usage", {})
-            input_tokens = usage_data.get("prompt_tokens", 0)
-            output_tokens = usage_data.get("completion_tokens", 0)
-            total_tokens = usage_data.get("total_tokens", input_tokens + output_tokens)
+        state = _StreamState()
+        lines = None
+        timeout = self._request_timeout(config, max_tokens)
+        try:
+            url, headers, payload = self._build_chat_request(
+                config.provider, config, messages, temperature, max_tokens, stream=True
+            )
+            lines = self.transport.stream(
+                "POST", url, headers=headers, body=json.dumps(payload).encode("utf-8"),
+                timeout=timeout
+            )
+            for line in lines:
+                data = _sse_data(line)
+                # Keep reading past [DONE] so the pooled connection can be reused
+                if data and data != "[DONE]":
+                    delta = state.feed(json.loads(data))
+                    if delta:
+                        yield delta
+        except Exception as e:
+            result = self._failed_result(config.provider, config, start_time, e)
+            result.content = state.content
+            self._record_outcome(config, result, e, max_tokens, timeout)
+            yield result
+            return
+        except BaseException:
+            # Abandoned or cancelled by the caller: no verdict on provider health
+            self.breakers.get(config.provider, config.model).record_neutral()
+            raise
+        finally:
+            if lines is not None:
+                lines.close()
 
-            usage = UsageInfo(
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                total_tokens=total_tokens,
-                cost_usd=self._calculate_cost(config.model, input_tokens, output_tokens),
-                duration_ms=duration_ms,
-                model_used=config.model,
-                provider="openai"
+        result = self._parse_chat_response(config.provider, config, state.as_response(), start_time)
+        self._record_outcome(config, result, max_tokens=max_tokens)
+        yield result
+
+    # =========================================================================
+    # Batch API
+    # =========================================================================
+
+    def complete_batch(
+        self,
+        requests: List[Union[BatchRequest, Dict[str, Any]]],
+        max_concurrency: Optional[int] = None,
+        max_retries: int = BATCH_MAX_RETRIES,
+        on_result: Optional[Callable[[int, CompletionResult], None]] = None
+    ) -> BatchResult:
+        """
+        Run independent completions with bounded concurrency.
+
+        Each request is routed like complete_with_usage() (own task, fallback
+        and cache). When a provider rate limits a request (429 / Retry-After),
+        the whole batch pauses for the requested time and the request is
+        retried, up to max_retries times.
+
+        Args:
+            requests: BatchRequest objects (or dicts of their fields)
+            max_concurrency: Requests in flight at once (default APIMANAGER_BATCH_CONCURRENCY)
+            max_retries: Retries per request after a rate limit
+            on_result: Called with (request index, result) as each request
+                finishes, from the worker thread that ran it
+
+        Returns:
+            BatchResult with results in request order and summed usage
+        """
+        batch = [self._batch_request(request) for request in requests]
+        if not batch:
+            return BatchResult(results=[], usage=UsageInfo())
+
+        start_time = time.time()
+        throttle = _BatchThrottle()
+        retries = [0] * len(batch)
+
+        def run(index: int) -> CompletionResult:
+            request = batch[index]
+            while True:
+                time.sleep(throttle.delay())
+                result = self.complete_with_usage(
+                    request.task,
+                    request.messages,
+                    request.temperature,
+                    request.max_tokens,
+                    request.use_fallback,
+                    request.agent,
+                    request.use_cache
+                )
+                if result.success or result.retry_after is None or retries[index] >= max_retries:
+                    if on_result:
+                        on_result(index, result)
+                    return result
+                retries[index] += 1
+                throttle.pause(result.retry_after)
+
+        workers = min(max_concurrency or BATCH_MAX_CONCURRENCY, len(batch))
+        if workers <= 1:
+            results = [run(i) for i in range(len(batch))]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apimanager-batch") as pool:
+                results = list(pool.map(run, range(len(batch))))
+
+        duration_ms = (time.time() - start_time) * 1000
+        return BatchResult(
+            results=results,
+            usage=_aggregate_usage([result.usage for result in results], duration_ms),
+            retries=sum(retries)
+        )
+
+    def _batch_request(self, request: Union[BatchRequest, Dict[str, Any]]) -> BatchRequest:
+        return request if isinstance(request, BatchRequest) else BatchRequest(**request)
+
+    # =========================================================================
+    # Async API (non-blocking twins of the methods above)
+    # =========================================================================
+
+    async def acomplete(
+        self,
+        task: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_fallback: bool = True,
+        agent: Optional[str] = None,
+        use_cache: bool = True
+    ) -> str:
+        """Async version of complete()."""
+        result = await self.acomplete_with_usage(task, messages, temperature, max_tokens, use_fallback, agent, use_cache)
+        return result.content
+
+    async def acomplete_with_usage(
+        self,
+        task: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_fallback: bool = True,
+        agent: Optional[str] = None,
+        use_cache: bool = True
+    ) -> CompletionResult:
+        """
+        Async version of complete_with_usage().
+
+        Runs on the non-blocking transport, so many requests can be in flight
+        inside one event loop (e.g. with asyncio.gather).
+        """
+        routing = self._get_routing(task)
+
+        cache_key = self._cache_key(routing, messages, temperature, max_tokens) if use_cache else None
+        if cache_key:
+            cached = self._cached_result(cache_key)
+            if cached:
+                return cached
+
+        flight_key = self._flight_key(routing, messages, temperature, max_tokens, use_fallback) if use_cache else None
+        if flight_key is None:
+            result = await self._acomplete_routed(routing, messages, temperature, max_tokens, use_fallback)
+        else:
+            start_time = time.time()
+            result, leader = await self.single_flight.ado(
+                flight_key,
+                lambda: self._acomplete_routed(routing, messages, temperature, max_tokens, use_fallback)
             )
+            if not leader:
+                return self._coalesced_result(result, start_time)
 
-            return CompletionResult(
-                content=data["choices"][0]["message"]["content"].strip(),
-                usage=usage,
-                success=True
+        self._store_result(cache_key, routing, result)
+        return result
+
+    async def _acomplete_routed(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        use_fallback: bool
+    ) -> CompletionResult:
+        """Async version of _complete_routed()."""
+        if use_fallback and routing.fallback and routing.hedge:
+            return await self._acomplete_hedged(routing, messages, temperature, max_tokens)
+
+        return await _arun_steps(
+            self._fallback_steps(routing, use_fallback),
+            lambda config: self._amake_request_with_usage(config, messages, temperature, max_tokens)
+        )
+
+    async def _acomplete_hedged(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> CompletionResult:
+        """Async version of _complete_hedged()."""
+        lead, other = self._hedge_order(routing)
+        delay_ms = self._hedge_delay_ms(lead, routing.hedge)
+
+        lead_task = asyncio.ensure_future(self._amake_request_with_usage(lead, messages, temperature, max_tokens))
+        done, _ = await asyncio.wait({lead_task}, timeout=delay_ms / 1000)
+
+        if done:
+            result = lead_task.result()
+            if result.success:
+                return self._hedge_outcome(routing, lead, result, False, delay_ms)
+            print(f"Primary failed ({result.error}), trying fallback...")
+            result = await self._amake_request_with_usage(other, messages, temperature, max_tokens)
+            return self._hedge_outcome(routing, other, result, False, delay_ms)
+
+        hedge_task = asyncio.ensure_future(self._amake_request_with_usage(other, messages, temperature, max_tokens))
+        configs = {lead_task: lead, hedge_task: other}
+        pending = set(configs)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    winner, result = configs[task], task.result()
+                    if result.success:
+                        self._bill_hedge_losers(result, [loser for loser in configs if loser is not task])
+                        pending = set()
+                        return self._hedge_outcome(routing, winner, result, True, delay_ms)
+        finally:
+            # Only when the caller was cancelled: nobody will bill or read these
+            for task in pending:
+                task.cancel()
+
+        # Both failed: report the last failure
+        return self._hedge_outcome(routing, winner, result, True, delay_ms)
+
+    async def _amake_request_with_usage(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> CompletionResult:
+        """Async version of _make_request_with_usage()."""
+        if config.provider not in PROVIDER_NAMES:
+            return self._unknown_provider_result(config)
+
+        return await _arun_steps(
+            self._request_steps(config.provider, config, messages, temperature, max_tokens),
+            self._aperform
+        )
+
+    async def _aperform(self, step: Tuple[str, tuple, Dict[str, Any]]) -> Any:
+        """Async version of _perform()."""
+        action, args, kwargs = step
+        if action == "acquire":
+            return await self.rate_governor.aacquire(*args, **kwargs)
+        return await self.async_transport.post_json(*args, **kwargs)
+
+    async def acomplete_batch(
+        self,
+        requests: List[Union[BatchRequest, Dict[str, Any]]],
+        max_concurrency: Optional[int] = None,
+        max_retries: int = BATCH_MAX_RETRIES,
+        on_result: Optional[Callable[[int, CompletionResult], None]] = None
+    ) -> BatchResult:
+        """Async version of complete_batch() (concurrency bounded by a semaphore)."""
+        batch = [self._batch_request(request) for request in requests]
+        if not batch:
+            return BatchResult(results=[], usage=UsageInfo())
+
+        start_time = time.time()
+        throttle = _BatchThrottle()
+        semaphore = asyncio.Semaphore(max_concurrency or BATCH_MAX_CONCURRENCY)
+        retries = [0] * len(batch)
+
+        async def run(index: int) -> CompletionResult:
+            request = batch[index]
+            async with semaphore:
+                while True:
+                    await asyncio.sleep(throttle.delay())
+                    result = await self.acomplete_with_usage(
+                        request.task,
+                        request.messages,
+                        request.temperature,
+                        request.max_tokens,
+                        request.use_fallback,
+                        request.agent,
+                        request.use_cache
+                    )
+                    if result.success or result.retry_after is None or retries[index] >= max_retries:
+                        if on_result:
+                            on_result(index, result)
+                        return result
+                    retries[index] += 1
+                    throttle.pause(result.retry_after)
+
+        results = await asyncio.gather(*[run(i) for i in range(len(batch))])
+
+        duration_ms = (time.time() - start_time) * 1000
+        return BatchResult(
+            results=list(results),
+            usage=_aggregate_usage([result.usage for result in results], duration_ms),
+            retries=sum(retries)
+        )
+
+    def astream(
+        self,
+        task: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_fallback: bool = True,
+        agent: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncCompletionStream:
+        """
+        Async version of stream().
+
+        Example:
+            stream = manager.astream("agent_reasoning", messages)
+            async for chunk in stream:
+                ...
+        """
+        routing = self._get_routing(task)
+
+        cache_key = self._cache_key(routing, messages, temperature, max_tokens) if use_cache else None
+        if cache_key:
+            cached = self._cached_result(cache_key)
+            if cached:
+                return AsyncCompletionStream(self._areplay(cached))
+
+        return AsyncCompletionStream(
+            self._astream_routed(routing, messages, temperature, max_tokens, use_fallback, cache_key)
+        )
+
+    async def _areplay(self, result: CompletionResult) -> AsyncIterator[Union[str, CompletionResult]]:
+        yield result.content
+        yield result
+
+    async def _astream_routed(
+        self,
+        routing: TaskRouting,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        use_fallback: bool,
+        cache_key: Optional[str]
+    ) -> AsyncIterator[Union[str, CompletionResult]]:
+        """Async version of _stream_routed()."""
+        configs = [routing.primary]
+        if use_fallback and routing.fallback:
+            configs.append(routing.fallback)
+
+        for attempt, config in enumerate(configs):
+            started = False
+            async for event in self._astream_chat(config, messages, temperature, max_tokens):
+                if isinstance(event, CompletionResult):
+                    result = event
+                else:
+                    started = True
+                    yield event
+            result.usage.fallback_used = attempt > 0
+            if result.success or started or attempt == len(configs) - 1:
+                break
+            print(f"Primary failed ({result.error}), trying fallback...")
+
+        self._store_result(cache_key, routing, result)
+        yield result
+
+    async def _astream_chat(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Union[str, CompletionResult]]:
+        """Async version of _stream_chat()."""
+        start_time = time.time()
+
+        if config.provider not in PROVIDER_NAMES:
+            yield self._unknown_provider_result(config)
+            return
+
+        permit = None
+        if self.rate_governor:
+            permit = await self.rate_governor.aacquire(
+                self.factory_id, config.provider, config.model, self._permit_tokens(config, messages, max_tokens)
             )
+            if permit is None:
+                yield self._rate_queue_result(config, start_time)
+                return
 
-        except Exception as e:
-            duration_ms = (time.time() - start_time) * 1000
-            return CompletionResult(
-                content="",
-                usage=UsageInfo(duration_ms=duration_ms, model_used=config.model, provider="openai"),
-                success=False,
-                error=str(e)
+        result = CompletionResult(content="", usage=UsageInfo(), success=False)
+        sent_at = time.time()
+        events = self._astream_chat_events(config, messages, temperature, max_tokens, sent_at)
+        try:
+            async for event in events:
+                if isinstance(event, CompletionResult):
+                    result = event
+                    result.usage.queue_ms = (sent_at - start_time) * 1000
+                yield event
+        finally:
+            await events.aclose()
+            self._release_permit(permit, result)
+
+    async def _astream_chat_events(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        start_time: float
+    ) -> AsyncIterator[Union[str, CompletionResult]]:
+        rejected = self._circuit_open_result(config)
+        if rejected:
+            yield rejected
+            return
+
+        state = _StreamState()
+        lines = None
+        timeout = self._request_timeout(config, max_tokens)
+        try:
+            url, headers, payload = self._build_chat_request(
+                config.provider, config, messages, temperature, max_tokens, stream=True
             )
-        
+            lines = self.async_transport.stream(
+                "POST", url, headers=headers, body=json.dumps(payload).encode("utf-8"),
+                timeout=timeout
+            )
+            async for line in lines:
+                data = _sse_data(line)
+                # Keep reading past [DONE] so the pooled connection can be reused
+                if data and data != "[DONE]":
+                    delta = state.feed(json.loads(data))
+                    if delta:
+                        yield delta
+        except Exception as e:
+            result = self._failed_result(config.provider, config, start_time, e)
+            result.content = state.content
+            self._record_outcome(config, result, e, max_tokens, timeout)
+            yield result
+            return
+        except BaseException:
+            # Abandoned or cancelled by the caller: no verdict on provider health
+            self.breakers.get(config.provider, config.model).record_neutral()
+            raise
+        finally:
+            if lines is not None:
+                await lines.aclose()
+
+        result = self._parse_chat_response(config.provider, config, state.as_response(), start_time)
+        self._record_outcome(config, result, max_tokens=max_tokens)
+        yield result
+
     def generate_image(
         self,
         prompt: str,
@@ -733,7 +2146,7 @@ class APIManager:
         # Try OpenAI DALL-E (primary for image generation)
         api_key = self._get_api_key("openai")
         
-        url = "https://api.openai.com/v1/images/generations"
+        url = f"{self._get_base_url('openai')}/images/generations"
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -747,18 +2160,93 @@ class APIManager:
             "n": 1
         }
         
-        request = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers=headers
+        start_time = time.time()
+        data = self.transport.post_json(
+            url, payload, headers=headers, timeout=self.latency.timeout_for("openai", "dall-e-3", 120)
         )
-        
-        with urllib.request.urlopen(request, timeout=120) as response:
-            data = json.loads(response.read().decode("utf-8"))
-            
+        self.latency.record("openai", "dall-e-3", (time.time() - start_time) * 1000)
+
         return data["data"][0]["url"]
 
 
+def _run_steps(steps: Generator[Any, Any, Any], perform: Callable[[Any], Any]) -> Any:
+    """
+    Drive a steps generator (e.g. APIManager._request_steps()) with blocking calls.
+
+    Each yielded step is passed to perform(), and its return value sent
+    back (or its exception thrown in) until the generator returns.
+    """
+    outcome: Any = None
+    error: Optional[BaseException] = None
+    while True:
+        try:
+            step = steps.send(outcome) if error is None else steps.throw(error)
+        except StopIteration as done:
+            return done.value
+        try:
+            outcome, error = perform(step), None
+        except BaseException as e:
+            outcome, error = None, e
+
+
+async def _arun_steps(steps: Generator[Any, Any, Any], perform: Callable[[Any], Awaitable[Any]]) -> Any:
+    """Async version of _run_steps(): perform() returns an awaitable."""
+    outcome: Any = None
+    error: Optional[BaseException] = None
+    while True:
+        try:
+            step = steps.send(outcome) if error is None else steps.throw(error)
+        except StopIteration as done:
+            return done.value
+        try:
+            outcome, error = await perform(step), None
+        except BaseException as e:
+            outcome, error = None, e
+
+
+def _hedge_loser_usage(loser: Union[Future, "asyncio.Future"]) -> Optional[UsageInfo]:
+    """The tokens and cost a finished hedge loser was billed (None if it never ran)."""
+    if loser.cancelled() or loser.exception() is not None:
+        return None
+    billed = loser.result().usage
+    return UsageInfo(
+        input_tokens=billed.input_tokens,
+        output_tokens=billed.output_tokens,
+        total_tokens=billed.total_tokens,
+        cached_tokens=billed.cached_tokens,
+        cost_usd=billed.cost_usd,
+        model_used=billed.model_used,
+        provider=billed.provider
+    )
+
+
+def _add_usage(usage: UsageInfo, billed: Optional[UsageInfo]) -> None:
+    """Add billed tokens and cost to usage (in place)."""
+    if billed is None:
+        return
+    usage.input_tokens += billed.input_tokens
+    usage.output_tokens += billed.output_tokens
+    usage.total_tokens += billed.total_tokens
+    usage.cached_tokens += billed.cached_tokens
+    usage.cost_usd += billed.cost_usd
+
+
+# Worker threads for hedged sync requests (shared by every APIManager)
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("APIMANAGER_HEDGE_WORKERS", "32")),
+                thread_name_prefix="apimanager-hedge"
+            )
+        return _hedge_executor
+
+
 # Convenience function for quick usage
 def get_manager(factory_id: Optional[str] = None) -> APIManager:
     """Get an API manager instance."""
@@ -0,0 +1,195 @@
+"""
+Per-(provider, model) circuit breakers for APIManager.
+
+This module provides:
+- Failure-rate based breakers over a rolling window of recent calls
+- Half-open probes after a cooldown before traffic is let back in
+- Fast-fail so callers go straight to TaskRouting.fallback while a model is down
+- Inspectable state for ops dashboards
+
+Usage:
+    from lib.circuit_breaker import CircuitBreakerRegistry
+
+    breakers = CircuitBreakerRegistry(failure_rate=0.5, min_calls=5, cooldown_seconds=30)
+    manager = APIManager(breakers=breakers)
+    print(manager.breaker_stats())
+"""
+
+import asyncio
+import http.client
+import os
+import threading
+import time
+import urllib.error
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_provider_failure(error: Optional[BaseException]) -> bool:
+    """
+    Whether an exception means the provider itself is unhealthy.
+
+    Server errors, rate limits, timeouts and connection failures count;
+    client errors such as a bad API key or malformed request do not.
+    """
+    if error is None:
+        return False
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code in (408, 429)
+    return isinstance(error, (OSError, asyncio.TimeoutError, http.client.HTTPException))
+
+
+def is_timeout(error: Optional[BaseException]) -> bool:
+    """Whether an exception is a request timing out (directly or wrapped in a URLError)."""
+    if isinstance(error, urllib.error.URLError) and not isinstance(error, urllib.error.HTTPError):
+        error = error.reason
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+    """
+    Breaker for one provider/model.
+
+    Args:
+        failure_rate: Fraction of failed calls in the window that opens the breaker
+        min_calls: Calls needed in the window before the rate is trusted
+        window: Number of recent call outcomes considered
+        cooldown_seconds: Time spent open before half-open probes are allowed
+        half_open_probes: Concurrent probe calls allowed while half-open
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        window: int = 20,
+        cooldown_seconds: float = 30.0,
+        half_open_probes: int = 1
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = failure
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be sent now (False = fail fast)."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                # Probe succeeded: close and start with a clean window
+                self.state = CLOSED
+                self._outcomes.clear()
+                self._probes_in_flight = 0
+            self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def record_neutral(self) -> None:
+        """A call ended without a verdict on provider health (e.g. a client error)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._probes_in_flight = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failures": sum(self._outcomes),
+                "failure_rate": round(sum(self._outcomes) / calls, 3) if calls else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in_seconds": (
+                    round(max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at)), 1)
+                    if self.state == OPEN else 0.0
+                ),
+            }
+
+
+class CircuitBreakerRegistry:
+    """Lazily created breakers keyed by (provider, model), sharing one configuration."""
+
+    def __init__(self, **breaker_kwargs: Any):
+        self.breaker_kwargs = breaker_kwargs
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get((provider, model))
+            if breaker is None:
+                breaker = self._breakers[(provider, model)] = CircuitBreaker(**self.breaker_kwargs)
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Breaker state keyed "provider:model"."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {f"{provider}:{model}": breaker.snapshot() for (provider, model), breaker in breakers.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+# =============================================================================
+# Process-wide default breakers
+# =============================================================================
+
+_default_breakers: Optional[CircuitBreakerRegistry] = None
+_default_breakers_lock = threading.Lock()
+
+
+def get_default_breakers() -> CircuitBreakerRegistry:
+    """Get (or lazily create) the process-wide breaker registry."""
+    global _default_breakers
+    with _default_breakers_lock:
+        if _default_breakers is None:
+            _default_breakers = CircuitBreakerRegistry(
+                failure_rate=float(os.getenv("APIMANAGER_BREAKER_FAILURE_RATE", "0.5")),
+                min_calls=int(os.getenv("APIMANAGER_BREAKER_MIN_CALLS", "5")),
+                window=int(os.getenv("APIMANAGER_BREAKER_WINDOW", "20")),
+                cooldown_seconds=float(os.getenv("APIMANAGER_BREAKER_COOLDOWN", "30"))
+            )
+        return _default_breakers
@@ -0,0 +1,169 @@
+"""
+Rolling latency statistics for APIManager.
+
+This module provides:
+- A rolling per-(provider, model) latency histogram of recent successful calls
+- The same per completion budget (max_tokens rounded up to a power of two),
+  so a model's short calls don't set the timeout for its long generations
+- Percentile lookups used to time request hedging and adapt request timeouts
+- A process-wide tracker shared by every APIManager (like the default transport)
+
+Usage:
+    from lib.latency import LatencyTracker
+
+    tracker = LatencyTracker(window=256)
+    tracker.record("openrouter", "google/gemini-2.0-flash", 850.0)
+    tracker.percentile("openrouter", "google/gemini-2.0-flash", 95)
+"""
+
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+@dataclass
+class HedgePolicy:
+    """
+    Hedging policy for a task type.
+
+    If the leading request has not finished after the `percentile` latency of
+    its model (or `initial_delay_ms` until `min_samples` calls have been seen),
+    the other model in the routing is fired in parallel and the first success
+    wins.
+    """
+    percentile: float = 95
+    min_samples: int = 20
+    initial_delay_ms: float = 8000
+    prefer_faster: bool = False  # Lead with whichever model has the lower median latency
+
+
+def output_class(max_tokens: int) -> int:
+    """max_tokens rounded up to a power of two (at least 256): calls of similar length."""
+    return max(256, 1 << max(0, int(max_tokens) - 1).bit_length())
+
+
+class LatencyHistogram:
+    """Latencies (ms) of the most recent `window` calls to one model."""
+
+    def __init__(self, window: int = 256):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, duration_ms: float) -> None:
+        self._samples.append(duration_ms)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile (None if no samples)."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyTracker:
+    """Thread-safe rolling latency histograms keyed by (provider, model)."""
+
+    def __init__(self, window: int = 256):
+        self.window = window
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._by_output: Dict[Tuple[str, str, int], LatencyHistogram] = {}  # (provider, model, output_class)
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, duration_ms: float, max_tokens: Optional[int] = None) -> None:
+        """Record a call's latency, also under its completion budget if max_tokens is given."""
+        with self._lock:
+            histogram = self._histograms.get((provider, model))
+            if histogram is None:
+                histogram = self._histograms[(provider, model)] = LatencyHistogram(self.window)
+            histogram.record(duration_ms)
+            if max_tokens:
+                key = (provider, model, output_class(max_tokens))
+                histogram = self._by_output.get(key)
+                if histogram is None:
+                    histogram = self._by_output[key] = LatencyHistogram(self.window)
+                histogram.record(duration_ms)
+
+    def count(self, provider: str, model: str) -> int:
+        with self._lock:
+            histogram = self._histograms.get((provider, model))
+            return histogram.count if histogram else 0
+
+    def percentile(self, provider: str, model: str, p: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile in ms, or None with fewer than min_samples calls."""
+        with self._lock:
+            histogram = self._histograms.get((provider, model))
+            if histogram is None or histogram.count < max(min_samples, 1):
+                return None
+            return histogram.percentile(p)
+
+    def timeout_for(
+        self,
+        provider: str,
+        model: str,
+        default_seconds: float,
+        percentile: float = 99,
+        multiplier: float = 3.0,
+        min_seconds: float = 10.0,
+        min_samples: int = 20,
+        max_tokens: Optional[int] = None
+    ) -> float:
+        """
+        Adaptive request timeout for a model.
+
+        `multiplier` x its observed percentile latency, clamped to
+        [min_seconds, default_seconds]. With max_tokens, only calls with the
+        same completion budget count. Falls back to default_seconds until
+        min_samples such calls have been seen.
+        """
+        if max_tokens:
+            with self._lock:
+                histogram = self._by_output.get((provider, model, output_class(max_tokens)))
+                enough = histogram is not None and histogram.count >= max(min_samples, 1)
+                observed = histogram.percentile(percentile) if enough else None
+        else:
+            observed = self.percentile(provider, model, percentile, min_samples)
+        if observed is None:
+            return default_seconds
+        return min(default_seconds, max(min_seconds, observed / 1000 * multiplier))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model counts and p50/p90/p99 (keyed "provider:model")."""
+        with self._lock:
+            return {
+                f"{provider}:{model}": {
+                    "count": histogram.count,
+                    "p50": histogram.percentile(50),
+                    "p90": histogram.percentile(90),
+                    "p99": histogram.percentile(99),
+                }
+                for (provider, model), histogram in self._histograms.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._by_output.clear()
+
+
+# =============================================================================
+# Process-wide default tracker
+# =============================================================================
+
+_default_tracker: Optional[LatencyTracker] = None
+_default_tracker_lock = threading.Lock()
+
+
+def get_default_latency_tracker() -> LatencyTracker:
+    """Get (or lazily create) the process-wide latency tracker."""
+    global _default_tracker
+    with _default_tracker_lock:
+        if _default_tracker is None:
+            _default_tracker = LatencyTracker(window=int(os.getenv("APIMANAGER_LATENCY_WINDOW", "256")))
+        return _default_tracker
@@ -0,0 +1,444 @@
+"""
+Token-bucket rate governor for APIManager provider calls.
+
+This module provides:
+- Token buckets for requests/min and tokens/min per (factory_id, provider, model)
+- Limits learned from provider x-ratelimit-* and Retry-After headers
+- A concurrency cap per provider/model shared by all factories, handed out
+  fairly (the factory with the fewest requests in flight goes first)
+- Waiting instead of failing: callers queue for a permit, so throughput
+  degrades smoothly under contention instead of tripping the fallback
+
+Usage:
+    from lib.rate_limit import RateGovernor
+
+    governor = RateGovernor(max_concurrency=8, requests_per_minute=60)
+    permit = governor.acquire("factory_001", "openrouter", "google/gemini-2.0-flash", tokens=1500)
+    try:
+        ...  # send the request
+    finally:
+        governor.release(permit, used_tokens=1200, headers=response_headers)
+
+    # Or configure the process-wide governor
+    # APIMANAGER_RATE_MAX_CONCURRENCY=16 APIMANAGER_RATE_RPM=60 APIMANAGER_RATE_TPM=200000
+"""
+
+import asyncio
+import itertools
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Poll interval for async waiters queued behind the concurrency cap
+ASYNC_POLL_SECONDS = 0.02
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_seconds(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds until a rate limit resets.
+
+    Accepts OpenAI-style durations ("1s", "6m0s", "20ms"), plain seconds, and
+    epoch timestamps in seconds or milliseconds (OpenRouter's X-RateLimit-Reset).
+    """
+    if not value:
+        return None
+    value = value.strip()
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    now = time.time() if now is None else now
+    if number > 1e11:  # epoch milliseconds
+        return max(0.0, number / 1000 - now)
+    if number > 1e9:  # epoch seconds
+        return max(0.0, number - now)
+    return max(0.0, number)
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units per minute, up to `capacity`.
+
+    The level may go negative when a request costs more than is left (its
+    debt delays the next request) or when a provider reports less remaining.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.per_minute = float(per_minute)
+        self.capacity = float(capacity or per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        if self.per_minute <= 0:
+            return float("inf")
+        return (needed - self.level) * 60 / self.per_minute
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount: float, now: float) -> None:
+        """Return units (e.g. an over-estimate); negative amounts take more."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def set_limit(self, per_minute: float, now: float) -> None:
+        self._refill(now)
+        self.per_minute = self.capacity = float(per_minute)
+        self.level = min(self.level, self.capacity)
+
+    def set_remaining(self, remaining: float, now: float) -> None:
+        """Trust the provider when it reports less left than we think."""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+@dataclass
+class RatePermit:
+    """A granted slot for one provider call (hand it back with RateGovernor.release)."""
+    key: Tuple[str, str, str]  # (factory_id, provider, model)
+    tokens: int  # Estimated tokens reserved
+    waited_ms: float = 0.0
+
+
+@dataclass
+class RateGovernorStats:
+    """Counters for a RateGovernor."""
+    granted: int = 0
+    waited: int = 0  # Permits that had to queue
+    wait_ms: float = 0.0
+    timeouts: int = 0  # Callers that gave up after max_wait_seconds
+    throttled: int = 0  # Provider rate limits reported (429 / Retry-After)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "granted": self.granted,
+            "waited": self.waited,
+            "wait_ms": round(self.wait_ms, 2),
+            "timeouts": self.timeouts,
+            "throttled": self.throttled,
+        }
+
+
+class _Limiter:
+    """Buckets and backoff for one (factory_id, provider, model)."""
+
+    def __init__(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        self.in_flight = 0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        wait = self.blocked_until - now
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(wait, 0.0)
+
+    def snapshot(self, now: float) -> Dict[str, float]:
+        return {
+            "requests_per_minute": self.requests.per_minute if self.requests else None,
+            "tokens_per_minute": self.tokens.per_minute if self.tokens else None,
+            "in_flight": self.in_flight,
+            "blocked_for_s": round(max(0.0, self.blocked_until - now), 3),
+        }
+
+
+@dataclass
+class _Waiter:
+    key: Tuple[str, str, str]
+    tokens: int
+    seq: int
+
+
+class RateGovernor:
+    """
+    Grants permits for provider calls.
+
+    A permit is granted once the caller's factory has request and token
+    budget left for the model, the model isn't backing off after a 429, and
+    a concurrency slot for the model is free. Slots go first to ready
+    waiters whose factory has the fewest requests in flight, so one
+    factory's burst can't starve the others.
+
+    Args:
+        max_concurrency: Calls in flight per provider/model across all factories
+        requests_per_minute: Starting request limit per factory/model (None = learn from headers)
+        tokens_per_minute: Starting token limit per factory/model (None = learn from headers)
+        max_wait_seconds: Longest a caller queues before acquire() gives up
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_wait_seconds: float = 30.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait_seconds = max_wait_seconds
+        self.stats = RateGovernorStats()
+        self._limiters: Dict[Tuple[str, str, str], _Limiter] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._waiting: Dict[Tuple[str, str], List[_Waiter]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _limiter(self, key: Tuple[str, str, str]) -> _Limiter:
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = _Limiter(self.requests_per_minute, self.tokens_per_minute)
+        return limiter
+
+    def _enqueue(self, factory_id: str, provider: str, model: str, tokens: int) -> _Waiter:
+        with self._cond:
+            waiter = _Waiter((factory_id, provider, model), tokens, next(self._seq))
+            self._waiting.setdefault((provider, model), []).append(waiter)
+            return waiter
+
+    def _try_grant(self, waiter: _Waiter, now: float) -> Optional[float]:
+        """
+        Grant the waiter a slot if it's its turn (call with the lock held).
+
+        Returns 0 when granted, seconds to wait when the factory is out of
+        budget, or None when waiting for a concurrency slot.
+        """
+        limiter = self._limiter(waiter.key)
+        wait = limiter.wait_time(waiter.tokens, now)
+        if wait > 0:
+            return wait
+
+        model_key = waiter.key[1:]
+        if self._in_flight.get(model_key, 0) >= self.max_concurrency:
+            return None
+        rank = (limiter.in_flight, waiter.seq)
+        for other in self._waiting.get(model_key, []):
+            if other is waiter:
+                continue
+            other_limiter = self._limiter(other.key)
+            if (other_limiter.in_flight, other.seq) < rank and other_limiter.wait_time(other.tokens, now) <= 0:
+                return None
+
+        if limiter.requests:
+            limiter.requests.take(1, now)
+        if limiter.tokens:
+            limiter.tokens.take(waiter.tokens, now)
+        limiter.in_flight += 1
+        self._in_flight[model_key] = self._in_flight.get(model_key, 0) + 1
+        self._waiting[model_key].remove(waiter)
+        return 0.0
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._cond:
+            self._waiting[waiter.key[1:]].remove(waiter)
+            self.stats.timeouts += 1
+            self._cond.notify_all()
+
+    def _granted(self, waiter: _Waiter, started: float) -> RatePermit:
+        waited_ms = (time.monotonic() - started) * 1000
+        self.stats.granted += 1
+        if waited_ms >= 1:
+            self.stats.waited += 1
+            self.stats.wait_ms += waited_ms
+        # A grant changes the ranking, so let the next waiter re-check
+        self._cond.notify_all()
+        return RatePermit(waiter.key, waiter.tokens, waited_ms)
+
+    def acquire(
+        self,
+        factory_id: str,
+        provider: str,
+        model: str,
+        tokens: int = 0,
+        max_wait_seconds: Optional[float] = None
+    ) -> Optional[RatePermit]:
+        """Wait for a permit. Returns None if none was granted within max_wait_seconds."""
+        started = time.monotonic()
+        deadline = started + (self.max_wait_seconds if max_wait_seconds is None else max_wait_seconds)
+        waiter = self._enqueue(factory_id, provider, model, tokens)
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._try_grant(waiter, now)
+                if wait == 0:
+                    return self._granted(waiter, started)
+                remaining = deadline - now
+                if remaining <= 0 or (wait is not None and wait > remaining):
+                    break
+                self._cond.wait(remaining if wait is None else wait)
+        self._abandon(waiter)
+        return None
+
+    async def aacquire(
+        self,
+        factory_id: str,
+        provider: str,
+        model: str,
+        tokens: int = 0,
+        max_wait_seconds: Optional[float] = None
+    ) -> Optional[RatePermit]:
+        """Async version of acquire() (polls instead of blocking the event loop)."""
+        started = time.monotonic()
+        deadline = started + (self.max_wait_seconds if max_wait_seconds is None else max_wait_seconds)
+        waiter = self._enqueue(factory_id, provider, model, tokens)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    wait = self._try_grant(waiter, now)
+                    if wait == 0:
+                        return self._granted(waiter, started)
+                remaining = deadline - now
+                if remaining <= 0 or (wait is not None and wait > remaining):
+                    break
+                await asyncio.sleep(min(remaining, ASYNC_POLL_SECONDS if wait is None else wait))
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self._abandon(waiter)
+        return None
+
+    def release(
+        self,
+        permit: RatePermit,
+        used_tokens: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """
+        Hand back a permit after the call.
+
+        Args:
+            permit: Permit from acquire()
+            used_tokens: Actual tokens billed (refunds or charges the difference from the estimate)
+            headers: Response headers to learn rate limits from
+        """
+        with self._cond:
+            now = time.monotonic()
+            limiter = self._limiter(permit.key)
+            # max(): permits granted before a reset() are handed back afterwards
+            limiter.in_flight = max(0, limiter.in_flight - 1)
+            model_key = permit.key[1:]
+            self._in_flight[model_key] = max(0, self._in_flight.get(model_key, 0) - 1)
+            if used_tokens is not None and limiter.tokens:
+                limiter.tokens.give(permit.tokens - used_tokens, now)
+            if headers:
+                self._learn(limiter, headers, now)
+            self._cond.notify_all()
+
+    def penalize(self, factory_id: str, provider: str, model: str, retry_after: float) -> None:
+        """Back off after a provider rate limit (429 / Retry-After)."""
+        with self._cond:
+            limiter = self._limiter((factory_id, provider, model))
+            limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + retry_after)
+            self.stats.throttled += 1
+
+    def observe(self, factory_id: str, provider: str, model: str, headers: Mapping[str, str]) -> None:
+        """Learn limits from response headers outside of release() (e.g. error responses)."""
+        with self._cond:
+            self._learn(self._limiter((factory_id, provider, model)), headers, time.monotonic())
+
+    def _learn(self, limiter: _Limiter, headers: Mapping[str, str], now: float) -> None:
+        """
+        Update a limiter from x-ratelimit-* headers.
+
+        OpenAI sends x-ratelimit-{limit,remaining,reset}-{requests,tokens};
+        OpenRouter sends x-ratelimit-{limit,remaining,reset} for requests.
+        """
+        lowered = {key.lower(): value for key, value in headers.items()}
+        for bucket_name, suffixes in (("requests", ("-requests", "")), ("tokens", ("-tokens",))):
+            def header(name: str) -> Optional[str]:
+                return next(
+                    (lowered[f"x-ratelimit-{name}{suffix}"] for suffix in suffixes if f"x-ratelimit-{name}{suffix}" in lowered),
+                    None
+                )
+
+            limit = _number(header("limit"))
+            remaining = _number(header("remaining"))
+            reset = parse_reset_seconds(header("reset"))
+
+            bucket = getattr(limiter, bucket_name)
+            if limit:
+                if bucket is None:
+                    bucket = TokenBucket(limit)
+                    setattr(limiter, bucket_name, bucket)
+                elif bucket.per_minute != limit:
+                    bucket.set_limit(limit, now)
+            if bucket is not None and remaining is not None:
+                bucket.set_remaining(remaining, now)
+            if remaining is not None and remaining <= 0 and reset:
+                limiter.blocked_until = max(limiter.blocked_until, now + reset)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Counters plus learned limits per factory/provider/model (for ops dashboards)."""
+        with self._cond:
+            now = time.monotonic()
+            return {
+                **self.stats.as_dict(),
+                "limits": {
+                    ":".join(key): limiter.snapshot(now) for key, limiter in self._limiters.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._cond:
+            self._limiters.clear()
+            self._in_flight.clear()
+            self._waiting.clear()
+            self.stats = RateGovernorStats()
+            self._cond.notify_all()
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# =============================================================================
+# Process-wide default governor (disable with APIMANAGER_RATE_GOVERNOR=0)
+# =============================================================================
+
+_default_governor: Optional[RateGovernor] = None
+_default_governor_lock = threading.Lock()
+
+
+def get_default_rate_governor() -> Optional[RateGovernor]:
+    """Get the process-wide governor, or None if rate governing is disabled."""
+    global _default_governor
+    if os.getenv("APIMANAGER_RATE_GOVERNOR", "1").lower() in ("0", "false", "no"):
+        return None
+    with _default_governor_lock:
+        if _default_governor is None:
+            rpm = os.getenv("APIMANAGER_RATE_RPM")
+            tpm = os.getenv("APIMANAGER_RATE_TPM")
+            _default_governor = RateGovernor(
+                max_concurrency=int(os.getenv("APIMANAGER_RATE_MAX_CONCURRENCY", "16")),
+                requests_per_minute=float(rpm) if rpm else None,
+                tokens_per_minute=float(tpm) if tpm else None,
+                max_wait_seconds=float(os.getenv("APIMANAGER_RATE_MAX_WAIT", "30"))
+            )
+        return _default_governor
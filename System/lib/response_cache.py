@@ -0,0 +1,214 @@
+"""
+Content-addressed LLM response cache for APIManager.
+
+This module provides:
+- Cache keys hashed from (model, messages, temperature, max_tokens)
+- An in-memory LRU tier
+- An optional on-disk SQLite tier shared across processes
+- TTL and size-based eviction
+- Per-task cache policies (see TaskRouting.cache in api_manager.py)
+
+Usage:
+    from lib.response_cache import ResponseCache
+
+    cache = ResponseCache(max_entries=256, db_path="/tmp/llm-cache.sqlite3")
+    manager = APIManager(cache=cache)
+
+    # Or enable for every manager in the process
+    # APIMANAGER_CACHE=1 APIMANAGER_CACHE_PATH=/tmp/llm-cache.sqlite3
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class CachePolicy:
+    """Caching policy for a task type."""
+    ttl_seconds: float = 3600
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a ResponseCache."""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+def make_cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    max_tokens: int
+) -> str:
+    """Hash a request into a stable cache key."""
+    canonical = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier response cache (memory LRU + optional SQLite).
+
+    Entries are plain dicts (content, model, provider, token counts) so they
+    round-trip through SQLite as JSON.
+
+    Args:
+        max_entries: Maximum entries kept in memory
+        db_path: Optional SQLite file for the on-disk tier
+        max_disk_entries: Maximum entries kept on disk (least recently used are evicted)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 10000
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = db_path
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, entry)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, entry TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry, promoting disk hits into memory."""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                expires_at, entry = item
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return dict(entry)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT entry, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry_json, expires_at = row
+                    if expires_at > now:
+                        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        entry = json.loads(entry_json)
+                        self._store_memory(key, expires_at, entry)
+                        self.stats.disk_hits += 1
+                        return dict(entry)
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, entry: Dict[str, Any], ttl_seconds: float) -> None:
+        """Store an entry in both tiers."""
+        now = time.time()
+        expires_at = now + ttl_seconds
+        with self._lock:
+            self._store_memory(key, expires_at, dict(entry))
+            self.stats.stores += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, entry, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(entry), expires_at, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _store_memory(self, key: str, expires_at: float, entry: Dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _evict_disk(self, now: float) -> None:
+        expired = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+        self.stats.evictions += max(expired, 0) + max(overflow, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# =============================================================================
+# Process-wide default cache (opt-in via APIMANAGER_CACHE=1)
+# =============================================================================
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """Get the process-wide cache, or None if caching is not enabled."""
+    global _default_cache
+    if os.getenv("APIMANAGER_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                max_entries=int(os.getenv("APIMANAGER_CACHE_MAX_ENTRIES", "256")),
+                db_path=os.getenv("APIMANAGER_CACHE_PATH") or None,
+                max_disk_entries=int(os.getenv("APIMANAGER_CACHE_MAX_DISK_ENTRIES", "10000"))
+            )
+        return _default_cache
@@ -0,0 +1,149 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests for APIManager.
+
+This module provides:
+- SingleFlight, which runs one call per key at a time; callers that arrive
+  while it is in flight wait for the leader's result instead of sending
+  a duplicate provider request
+- Works across threads and event loops (followers of either kind can
+  wait on a leader of either kind)
+- Counters for leaders and coalesced followers
+
+Usage:
+    from lib.single_flight import SingleFlight
+
+    flights = SingleFlight()
+    result, leader = flights.do(key, lambda: manager._complete_routed(...))
+
+    # Disable for every manager in the process
+    # APIMANAGER_SINGLE_FLIGHT=0
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters for a SingleFlight group."""
+    leaders: int = 0  # Calls that actually ran
+    coalesced: int = 0  # Calls that waited for a leader instead
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "coalesced": self.coalesced}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive before it finishes (followers) get the leader's result. Once the
+    call finishes the key is released, so later calls run again (caching
+    finished results is ResponseCache's job).
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str, can_wait: bool = True) -> Tuple[Optional[Future], bool]:
+        """
+        Get the in-flight future for key, registering a new one if none.
+
+        Returns (future, leader). A caller that can't wait and finds a call in
+        flight gets (None, False) and must run on its own.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                if not can_wait:
+                    return None, False
+                self.stats.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.stats.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() unless an identical call is in flight.
+
+        Returns:
+            (result, leader) - leader is False when the result was shared
+        """
+        # Blocking inside a running event loop could stall the leader we wait for
+        future, leader = self._join(key, can_wait=not _in_event_loop())
+        if future is None:
+            return fn(), True
+        if not leader:
+            return future.result(), False
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, True
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async version of do(); fn is a coroutine function."""
+        future, leader = self._join(key)
+        if not leader:
+            # shield: a cancelled follower must not cancel the leader's call
+            return await asyncio.shield(asyncio.wrap_future(future)), False
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, True
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.stats.as_dict(), "in_flight": self.in_flight}
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+# =============================================================================
+# Process-wide default group (disable with APIMANAGER_SINGLE_FLIGHT=0)
+# =============================================================================
+
+_default_single_flight: Optional[SingleFlight] = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_default_single_flight() -> Optional[SingleFlight]:
+    """Get the process-wide SingleFlight group, or None if coalescing is disabled."""
+    global _default_single_flight
+    if os.getenv("APIMANAGER_SINGLE_FLIGHT", "1").lower() in ("0", "false", "no"):
+        return None
+    with _default_single_flight_lock:
+        if _default_single_flight is None:
+            _default_single_flight = SingleFlight()
+        return _default_single_flight
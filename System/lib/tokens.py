@@ -0,0 +1,315 @@
+"""
+Token accounting for prompts and cost estimates.
+
+This module provides:
+- Pluggable tokenizers per model family (tiktoken for OpenAI models when
+  installed, calibrated heuristics otherwise)
+- Cached token counts, so static prompt parts are only counted once
+- Model context windows
+- PromptBudget, which packs prompt sections into a token budget by priority
+
+Usage:
+    from lib.tokens import PromptBudget, count_tokens
+
+    count_tokens("Hello world", model="gpt-4o-mini")
+
+    budget = PromptBudget.for_model("anthropic/claude-3.5-sonnet-20241022", max_output_tokens=4096)
+    context = budget.add("business_plan", plan, priority=1).add("brief", brief, priority=2).pack()
+"""
+
+import json
+import math
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+
+# =============================================================================
+# Model Context Windows (tokens, input + output)
+# =============================================================================
+MODEL_CONTEXT_WINDOWS = {
+    # OpenRouter models (Anthropic)
+    "anthropic/claude-3-opus-20240229": 200_000,
+    "anthropic/claude-3.5-sonnet-20241022": 200_000,
+    "anthropic/claude-3-haiku-20240307": 200_000,
+    # OpenRouter models (OpenAI)
+    "openai/gpt-4o-2024-08-06": 128_000,
+    "openai/gpt-4o-mini": 128_000,
+    "openai/gpt-4-turbo": 128_000,
+    # OpenRouter models (Google)
+    "google/gemini-2.0-flash-exp:free": 1_048_576,
+    "google/gemini-2.0-flash": 1_048_576,
+    "google/gemini-1.5-pro": 2_097_152,
+    # OpenRouter models (Mistral)
+    "mistralai/mistral-7b-instruct:free": 32_768,
+    # Direct OpenAI models
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4-turbo": 128_000,
+}
+DEFAULT_CONTEXT_WINDOW = 32_000
+
+# Chat formatting overhead (role markers etc.), per message and per request
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REQUEST = 3
+
+TRUNCATION_MARKER = "\n[... truncated]"
+
+
+def context_window(model: str) -> int:
+    """Context window for a model (tokens)."""
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+# =============================================================================
+# Tokenizers
+# =============================================================================
+
+class Tokenizer:
+    """Tokenizer interface: count tokens and cut text to a token limit."""
+
+    name = "base"
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        raise NotImplementedError
+
+
+class HeuristicTokenizer(Tokenizer):
+    """
+    Approximate BPE tokenizer.
+
+    Words cost one token per `chars_per_token` characters (at least one),
+    and each punctuation mark costs one token. Closer to real BPE counts
+    than len(text) // 4 on code, markdown and tables.
+    """
+
+    _PIECES = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self, chars_per_token: float = 4.0, name: str = "heuristic"):
+        self.chars_per_token = chars_per_token
+        self.name = name
+
+    def _cost(self, piece: str) -> int:
+        return max(1, math.ceil(len(piece) / self.chars_per_token))
+
+    def count(self, text: str) -> int:
+        return sum(self._cost(match.group()) for match in self._PIECES.finditer(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        used = 0
+        for match in self._PIECES.finditer(text):
+            used += self._cost(match.group())
+            if used > max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact counts for OpenAI models (requires the optional tiktoken package)."""
+
+    def __init__(self, encoding_name: str = "o200k_base"):
+        import tiktoken
+        self._encoding = tiktoken.get_encoding(encoding_name)
+        self.name = f"tiktoken:{encoding_name}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self._encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self._encoding.decode(tokens[:max_tokens])
+
+
+def _openai_tokenizer() -> Tokenizer:
+    try:
+        return TiktokenTokenizer("o200k_base")
+    except ImportError:
+        return HeuristicTokenizer(chars_per_token=4.0, name="openai-heuristic")
+
+
+# Model family -> tokenizer factory (replace with register_tokenizer)
+_TOKENIZER_FACTORIES = {
+    "openai": _openai_tokenizer,
+    "anthropic": lambda: HeuristicTokenizer(chars_per_token=3.5, name="anthropic-heuristic"),
+    "google": lambda: HeuristicTokenizer(chars_per_token=4.0, name="google-heuristic"),
+    "default": lambda: HeuristicTokenizer(chars_per_token=4.0),
+}
+_tokenizers: Dict[str, Tokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def model_family(model: Optional[str]) -> str:
+    """Tokenizer family for a model name ("openai", "anthropic", "google" or "default")."""
+    name = (model or "").lower()
+    if name.startswith(("openai/", "gpt-", "o1", "o3", "dall-e")):
+        return "openai"
+    if name.startswith(("anthropic/", "claude")):
+        return "anthropic"
+    if name.startswith(("google/", "gemini")):
+        return "google"
+    return "default"
+
+
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    """Get the (shared) tokenizer for a model's family."""
+    family = model_family(model)
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(family)
+        if tokenizer is None:
+            tokenizer = _tokenizers[family] = _TOKENIZER_FACTORIES[family]()
+        return tokenizer
+
+
+def register_tokenizer(family: str, tokenizer: Tokenizer) -> None:
+    """Use a custom tokenizer for a model family (clears cached counts)."""
+    with _tokenizers_lock:
+        _TOKENIZER_FACTORIES[family] = lambda: tokenizer
+        _tokenizers[family] = tokenizer
+    _cached_count.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _cached_count(family: str, text: str) -> int:
+    return _tokenizers[family].count(text)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens for a model (cached per family and text)."""
+    if not text:
+        return 0
+    get_tokenizer(model)
+    return _cached_count(model_family(model), text)
+
+
+def message_text(content: Any) -> str:
+    """
+    The countable text of a message's content.
+
+    Structured content (a list of parts) counts its text parts; any other
+    non-string part is counted as its JSON.
+    """
+    if content is None or isinstance(content, str):
+        return content or ""
+    if isinstance(content, list):
+        return "\n".join(
+            part if isinstance(part, str)
+            else part["text"] if isinstance(part, dict) and isinstance(part.get("text"), str)
+            else json.dumps(part, sort_keys=True)
+            for part in content
+        )
+    return json.dumps(content, sort_keys=True)
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    """Prompt tokens for a chat request, including per-message overhead."""
+    return TOKENS_PER_REQUEST + sum(
+        TOKENS_PER_MESSAGE + count_tokens(message_text(message.get("content")), model)
+        for message in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None, marker: str = TRUNCATION_MARKER) -> str:
+    """Cut text to at most max_tokens (marker included) for a model."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    tokenizer = get_tokenizer(model)
+    marker_tokens = count_tokens(marker, model)
+    if max_tokens <= marker_tokens:
+        return tokenizer.truncate(text, max_tokens)
+    return tokenizer.truncate(text, max_tokens - marker_tokens) + marker
+
+
+# =============================================================================
+# Prompt budgeting
+# =============================================================================
+
+@dataclass
+class PromptSection:
+    """One named part of a prompt."""
+    name: str
+    text: str
+    priority: int = 1  # Lower numbers are packed first
+    max_tokens: Optional[int] = None  # Per-section cap
+    min_tokens: int = 0  # Drop the section rather than keep fewer tokens than this
+
+
+class PromptBudget:
+    """
+    Packs prompt sections into a token budget by priority.
+
+    Sections are packed in priority order (insertion order within a
+    priority). Each gets as many tokens as remain, up to its own cap; a
+    section that doesn't fit is truncated, or dropped if less than its
+    min_tokens would remain.
+
+    Args:
+        model: Model whose tokenizer counts the sections
+        budget_tokens: Tokens available for the sections
+    """
+
+    def __init__(self, model: str, budget_tokens: int):
+        self.model = model
+        self.budget_tokens = max(0, budget_tokens)
+        self.sections: List[PromptSection] = []
+        self.used_tokens = 0
+
+    @classmethod
+    def for_model(
+        cls,
+        model: str,
+        max_output_tokens: int,
+        reserved_tokens: int = 0,
+        cap: Optional[int] = None
+    ) -> "PromptBudget":
+        """
+        Budget for a model's context window.
+
+        Args:
+            model: Model name
+            max_output_tokens: Tokens reserved for the completion
+            reserved_tokens: Tokens already used (system prompt, prompt template)
+            cap: Optional ceiling on the budget (bounds cost on huge windows)
+        """
+        budget = context_window(model) - max_output_tokens - reserved_tokens
+        if cap is not None:
+            budget = min(budget, cap)
+        return cls(model, budget)
+
+    def add(
+        self,
+        name: str,
+        text: Optional[str],
+        priority: int = 1,
+        max_tokens: Optional[int] = None,
+        min_tokens: int = 0
+    ) -> "PromptBudget":
+        """Add a section (None/empty text packs to ""). Returns self for chaining."""
+        self.sections.append(PromptSection(name, text or "", priority, max_tokens, min_tokens))
+        return self
+
+    @property
+    def remaining_tokens(self) -> int:
+        return self.budget_tokens - self.used_tokens
+
+    def pack(self) -> Dict[str, str]:
+        """Fit the sections into the budget and return {name: text}."""
+        packed: Dict[str, str] = {}
+        self.used_tokens = 0
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            allowed = self.remaining_tokens
+            if section.max_tokens is not None:
+                allowed = min(allowed, section.max_tokens)
+            if allowed < max(section.min_tokens, 1):
+                packed[section.name] = ""
+                continue
+            text = truncate_to_tokens(section.text, allowed, self.model)
+            packed[section.name] = text
+            self.used_tokens += count_tokens(text, self.model)
+        return packed
@@ -0,0 +1,817 @@
+"""
+HTTP transport layer for APIManager.
+
+This module provides:
+- Pluggable transports behind a single `request()` call
+- Per-host persistent (keep-alive) connection pools
+- Connection reuse across APIManager instances in the same process
+- Reuse counters for measuring handshake savings
+- A non-blocking asyncio transport for the async APIManager surface
+- Line-by-line response streaming (server-sent events) on both transports
+
+Usage:
+    from lib.transport import PooledHTTPTransport
+
+    transport = PooledHTTPTransport(pool_size=4, idle_timeout=30.0)
+    manager = APIManager(transport=transport)
+
+    # Inspect connection reuse
+    print(transport.stats.as_dict())
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import os
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+import weakref
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+# while it sat idle. The request is retried once on a fresh connection.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+@dataclass
+class TransportResponse:
+    """A fully-read HTTP response."""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        """Decode the body as JSON."""
+        return json.loads(self.body.decode("utf-8"))
+
+
+@dataclass
+class TransportStats:
+    """Connection reuse counters for a transport."""
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    connections_closed: int = 0
+    stale_retries: int = 0
+    per_host: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def record(self, host: str, counter: str) -> None:
+        setattr(self, counter, getattr(self, counter) + 1)
+        host_stats = self.per_host.setdefault(host, {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "connections_closed": 0,
+            "stale_retries": 0,
+        })
+        host_stats[counter] += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests served on an already-open connection."""
+        if not self.requests:
+            return 0.0
+        return self.connections_reused / self.requests
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "connections_closed": self.connections_closed,
+            "stale_retries": self.stale_retries,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+            "per_host": {host: dict(counts) for host, counts in self.per_host.items()},
+        }
+
+
+def _raise_for_status(url: str, response: TransportResponse) -> None:
+    """Raise urllib's HTTPError for non-2xx responses (matches urlopen behavior)."""
+    if 200 <= response.status < 300:
+        return
+    headers = Message()
+    for key, value in response.headers.items():
+        headers[key] = value
+    reason = http.client.responses.get(response.status, "Unknown")
+    raise urllib.error.HTTPError(url, response.status, reason, headers, io.BytesIO(response.body))
+
+
+class HTTPTransport:
+    """
+    Base transport interface.
+
+    Subclasses implement `request()` and return a fully-read TransportResponse,
+    raising urllib.error.HTTPError for non-2xx statuses.
+    """
+
+    def __init__(self):
+        self.stats = TransportStats()
+        self._stats_lock = threading.Lock()
+
+    def _record(self, host: str, counter: str) -> None:
+        with self._stats_lock:
+            self.stats.record(host, counter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> TransportResponse:
+        raise NotImplementedError
+
+    def post_json(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60,
+        response_headers: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """
+        POST a JSON payload and decode the JSON response.
+
+        Pass a dict as response_headers to receive the response headers
+        (e.g. rate-limit headers); error responses expose them on HTTPError.
+        """
+        response = self.request(
+            "POST",
+            url,
+            headers=headers,
+            body=json.dumps(payload).encode("utf-8"),
+            timeout=timeout
+        )
+        if response_headers is not None:
+            response_headers.update(response.headers)
+        return response.json()
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> Iterator[bytes]:
+        """
+        Send a request and yield the response body line by line.
+
+        Used for server-sent events. Non-2xx statuses raise HTTPError before
+        the first line. Transports that can't stream fall back to reading the
+        whole body.
+        """
+        response = self.request(method, url, headers=headers, body=body, timeout=timeout)
+        yield from response.body.splitlines(keepends=True)
+
+    def close(self) -> None:
+        """Release any held connections."""
+
+
+class UrllibTransport(HTTPTransport):
+    """Opens a fresh connection per request (original urlopen behavior)."""
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> TransportResponse:
+        host = urlsplit(url).netloc
+        self._record(host, "requests")
+        self._record(host, "connections_opened")
+        request = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = TransportResponse(
+                status=response.status,
+                headers=dict(response.headers.items()),
+                body=response.read()
+            )
+        self._record(host, "connections_closed")
+        return result
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> Iterator[bytes]:
+        host = urlsplit(url).netloc
+        self._record(host, "requests")
+        self._record(host, "connections_opened")
+        request = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                yield from response
+        finally:
+            self._record(host, "connections_closed")
+
+
+class ConnectionPool:
+    """Idle keep-alive connections for a single (scheme, host, port)."""
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        port: Optional[int],
+        max_size: int,
+        idle_timeout: float,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        self.netloc = f"{host}:{port}" if port else host
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+
+    def new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def acquire(self) -> Tuple[Optional[http.client.HTTPConnection], int]:
+        """
+        Pop the most recently used idle connection.
+
+        Returns:
+            (connection or None, number of expired connections closed)
+        """
+        expired = 0
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    return conn, expired
+                conn.close()
+                expired += 1
+        return None, expired
+
+    def release(self, conn: http.client.HTTPConnection) -> bool:
+        """Return a connection to the pool. Returns False if it was closed instead."""
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return True
+        conn.close()
+        return False
+
+    def close(self) -> int:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+        return len(idle)
+
+    @property
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+
+class PooledHTTPTransport(HTTPTransport):
+    """
+    Keep-alive transport with per-host connection pools.
+
+    Args:
+        pool_size: Maximum idle connections retained per host
+        idle_timeout: Seconds an idle connection may be reused before it is closed
+        ssl_context: Optional SSL context for HTTPS hosts
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        idle_timeout: float = 60.0,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        super().__init__()
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self._pools: Dict[Tuple[str, str, Optional[int]], ConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+
+    def _get_pool(self, scheme: str, host: str, port: Optional[int]) -> ConnectionPool:
+        key = (scheme, host, port)
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    scheme, host, port,
+                    max_size=self.pool_size,
+                    idle_timeout=self.idle_timeout,
+                    ssl_context=self.ssl_context if scheme == "https" else None
+                )
+                self._pools[key] = pool
+            return pool
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> TransportResponse:
+        pool, conn, response = self._open(method, url, headers, body, timeout)
+        try:
+            result = TransportResponse(
+                status=response.status,
+                headers=dict(response.getheaders()),
+                body=response.read()
+            )
+        except Exception:
+            conn.close()
+            self._record(pool.netloc, "connections_closed")
+            raise
+        self._finish(pool, conn, response)
+
+        _raise_for_status(url, result)
+        return result
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> Iterator[bytes]:
+        pool, conn, response = self._open(method, url, headers, body, timeout)
+        completed = False
+        try:
+            if not 200 <= response.status < 300:
+                result = TransportResponse(
+                    status=response.status,
+                    headers=dict(response.getheaders()),
+                    body=response.read()
+                )
+                completed = True
+                _raise_for_status(url, result)
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                yield line
+            completed = True
+        finally:
+            if completed:
+                self._finish(pool, conn, response)
+            else:
+                # Abandoned mid-body: the connection can't be reused
+                conn.close()
+                self._record(pool.netloc, "connections_closed")
+
+    def _open(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+        timeout: float
+    ) -> Tuple[ConnectionPool, http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a request on a pooled connection and return its unread response."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme}")
+        pool = self._get_pool(parts.scheme, parts.hostname, parts.port)
+        host_key = pool.netloc
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        request_headers = {"Connection": "keep-alive"}
+        request_headers.update(headers or {})
+        self._record(host_key, "requests")
+
+        conn, expired = pool.acquire()
+        for _ in range(expired):
+            self._record(host_key, "connections_closed")
+
+        reused = conn is not None
+        if reused:
+            self._record(host_key, "connections_reused")
+        else:
+            conn = pool.new_connection(timeout)
+            self._record(host_key, "connections_opened")
+
+        try:
+            response = self._send(conn, method, path, request_headers, body, timeout)
+        except STALE_CONNECTION_ERRORS:
+            conn.close()
+            self._record(host_key, "connections_closed")
+            if not reused:
+                raise
+            # Server dropped the idle connection; retry once on a fresh one
+            self._record(host_key, "stale_retries")
+            conn = pool.new_connection(timeout)
+            self._record(host_key, "connections_opened")
+            try:
+                response = self._send(conn, method, path, request_headers, body, timeout)
+            except Exception:
+                conn.close()
+                self._record(host_key, "connections_closed")
+                raise
+        except Exception:
+            conn.close()
+            self._record(host_key, "connections_closed")
+            raise
+
+        return pool, conn, response
+
+    def _finish(
+        self,
+        pool: ConnectionPool,
+        conn: http.client.HTTPConnection,
+        response: http.client.HTTPResponse
+    ) -> None:
+        """Return a connection whose response was fully read to the pool."""
+        if not response.will_close:
+            if not pool.release(conn):
+                self._record(pool.netloc, "connections_closed")
+        else:
+            conn.close()
+            self._record(pool.netloc, "connections_closed")
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        body: Optional[bytes],
+        timeout: float
+    ) -> http.client.HTTPResponse:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def close(self) -> None:
+        with self._pools_lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            for _ in range(pool.close()):
+                self._record(pool.netloc, "connections_closed")
+
+
+@dataclass
+class _AsyncConnection:
+    """An open asyncio connection whose response head has been read."""
+    key: Tuple[str, str, int]
+    host_key: str
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    status: int
+    headers: Dict[str, str]
+    keep_alive: bool
+
+
+class AsyncHTTPTransport:
+    """
+    Non-blocking HTTP/1.1 transport built on asyncio streams.
+
+    Keeps per-host keep-alive pools for each event loop (streams are bound to
+    the loop that opened them), so concurrent coroutines can have many
+    requests in flight without a thread per call.
+
+    Args:
+        pool_size: Maximum idle connections retained per host and event loop
+        idle_timeout: Seconds an idle connection may be reused before it is closed
+        ssl_context: Optional SSL context for HTTPS hosts
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        idle_timeout: float = 60.0,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.stats = TransportStats()
+        # event loop -> (scheme, host, port) -> idle (reader, writer, last_used)
+        self._pools = weakref.WeakKeyDictionary()
+
+    def _idle_for(self, key: Tuple[str, str, int]) -> List[Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]]:
+        loop = asyncio.get_running_loop()
+        return self._pools.setdefault(loop, {}).setdefault(key, [])
+
+    def _acquire(self, key: Tuple[str, str, int], host_key: str) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        idle = self._idle_for(key)
+        now = time.monotonic()
+        while idle:
+            reader, writer, last_used = idle.pop()
+            if now - last_used <= self.idle_timeout and not reader.at_eof():
+                return reader, writer
+            writer.close()
+            self.stats.record(host_key, "connections_closed")
+        return None
+
+    def _release(self, key: Tuple[str, str, int], host_key: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        idle = self._idle_for(key)
+        if len(idle) < self.pool_size:
+            idle.append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+            self.stats.record(host_key, "connections_closed")
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> TransportResponse:
+        conn = await self._open(method, url, headers, body, timeout)
+        try:
+            data = b"".join([chunk async for chunk in self._iter_body(conn, method, timeout)])
+        except BaseException:
+            # Includes cancellation: the connection state is unknown, drop it
+            self._discard(conn)
+            raise
+        self._finish(conn)
+
+        result = TransportResponse(status=conn.status, headers=conn.headers, body=data)
+        _raise_for_status(url, result)
+        return result
+
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60
+    ) -> AsyncIterator[bytes]:
+        """Async version of HTTPTransport.stream() (yields body lines)."""
+        conn = await self._open(method, url, headers, body, timeout)
+        completed = False
+        try:
+            if not 200 <= conn.status < 300:
+                data = b"".join([chunk async for chunk in self._iter_body(conn, method, timeout)])
+                completed = True
+                _raise_for_status(url, TransportResponse(status=conn.status, headers=conn.headers, body=data))
+
+            buffer = b""
+            async for chunk in self._iter_body(conn, method, timeout):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    yield line + b"\n"
+            if buffer:
+                yield buffer
+            completed = True
+        finally:
+            if completed:
+                self._finish(conn)
+            else:
+                # Abandoned mid-body: the connection can't be reused
+                self._discard(conn)
+
+    async def _open(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+        timeout: float
+    ) -> "_AsyncConnection":
+        """Send a request and read the response head (status line and headers)."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        host_key = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        request_headers = {
+            "Host": parts.netloc,
+            "Connection": "keep-alive",
+            "Content-Length": str(len(body or b"")),
+        }
+        request_headers.update(headers or {})
+        raw = f"{method} {path} HTTP/1.1\r\n".encode("latin-1")
+        raw += "".join(f"{k}: {v}\r\n" for k, v in request_headers.items()).encode("latin-1")
+        raw += b"\r\n" + (body or b"")
+
+        self.stats.record(host_key, "requests")
+        streams = self._acquire(key, host_key)
+        reused = streams is not None
+        if reused:
+            self.stats.record(host_key, "connections_reused")
+
+        for attempt in range(2):
+            if streams is None:
+                streams = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        parts.hostname, port,
+                        ssl=self.ssl_context if parts.scheme == "https" else None
+                    ),
+                    timeout
+                )
+                self.stats.record(host_key, "connections_opened")
+            reader, writer = streams
+            try:
+                status, response_headers, keep_alive = await asyncio.wait_for(
+                    self._exchange(reader, writer, raw, method), timeout
+                )
+                return _AsyncConnection(key, host_key, reader, writer, status, response_headers, keep_alive)
+            except (asyncio.IncompleteReadError,) + STALE_CONNECTION_ERRORS:
+                writer.close()
+                self.stats.record(host_key, "connections_closed")
+                if not reused or attempt:
+                    raise
+                # Server dropped the idle connection; retry once on a fresh one
+                self.stats.record(host_key, "stale_retries")
+                streams, reused = None, False
+            except BaseException:
+                # Includes cancellation: the connection state is unknown, drop it
+                writer.close()
+                self.stats.record(host_key, "connections_closed")
+                raise
+
+    def _finish(self, conn: "_AsyncConnection") -> None:
+        """Return a connection whose response was fully read to the pool."""
+        if conn.keep_alive:
+            self._release(conn.key, conn.host_key, conn.reader, conn.writer)
+        else:
+            self._discard(conn)
+
+    def _discard(self, conn: "_AsyncConnection") -> None:
+        conn.writer.close()
+        self.stats.record(conn.host_key, "connections_closed")
+
+    async def _exchange(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        raw: bytes,
+        method: str
+    ) -> Tuple[int, Dict[str, str], bool]:
+        """Write a raw request and parse the response head."""
+        writer.write(raw)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+        version, status, *_ = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        if not version.startswith("HTTP/"):
+            raise http.client.BadStatusLine(status_line.decode("latin-1"))
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip()] = value.strip()
+        lower = {k.lower(): v.lower() for k, v in headers.items()}
+
+        keep_alive = version == "HTTP/1.1" and lower.get("connection") != "close"
+        has_body = not (method == "HEAD" or int(status) in (204, 304) or 100 <= int(status) < 200)
+        if has_body and "chunked" not in lower.get("transfer-encoding", "") and "content-length" not in lower:
+            # Body is delimited by connection close
+            keep_alive = False
+
+        return int(status), headers, keep_alive
+
+    async def _iter_body(self, conn: "_AsyncConnection", method: str, timeout: float) -> AsyncIterator[bytes]:
+        """Yield the response body as it arrives (each read bounded by timeout)."""
+        reader = conn.reader
+        lower = {k.lower(): v.lower() for k, v in conn.headers.items()}
+
+        async def read(coro):
+            return await asyncio.wait_for(coro, timeout)
+
+        if method == "HEAD" or conn.status in (204, 304) or 100 <= conn.status < 200:
+            return
+        if "chunked" in lower.get("transfer-encoding", ""):
+            while True:
+                size_line = await read(reader.readline())
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip trailers
+                    while (await read(reader.readline())) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await read(reader.readexactly(size))
+                await read(reader.readexactly(2))
+        elif "content-length" in lower:
+            remaining = int(lower["content-length"])
+            while remaining > 0:
+                chunk = await read(reader.read(min(remaining, 65536)))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while True:
+                chunk = await read(reader.read(65536))
+                if not chunk:
+                    return
+                yield chunk
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60,
+        response_headers: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """POST a JSON payload and decode the JSON response (see HTTPTransport.post_json)."""
+        response = await self.request(
+            "POST",
+            url,
+            headers=headers,
+            body=json.dumps(payload).encode("utf-8"),
+            timeout=timeout
+        )
+        if response_headers is not None:
+            response_headers.update(response.headers)
+        return response.json()
+
+    async def aclose(self) -> None:
+        """Close idle connections owned by the running event loop."""
+        pools = self._pools.pop(asyncio.get_running_loop(), {})
+        for (scheme, host, port), idle in pools.items():
+            for _, writer, _ in idle:
+                writer.close()
+                self.stats.record(host if port in (80, 443) else f"{host}:{port}", "connections_closed")
+
+
+# =============================================================================
+# Process-wide default transport
+# =============================================================================
+# Shared by every APIManager in the process so a warm Cloud Function instance
+# keeps its provider connections open across invocations.
+
+_default_transport: Optional[HTTPTransport] = None
+_default_async_transport: Optional[AsyncHTTPTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> HTTPTransport:
+    """Get (or lazily create) the process-wide pooled transport."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = PooledHTTPTransport(
+                pool_size=int(os.getenv("APIMANAGER_POOL_SIZE", "10")),
+                idle_timeout=float(os.getenv("APIMANAGER_POOL_IDLE_TIMEOUT", "60"))
+            )
+        return _default_transport
+
+
+def get_default_async_transport() -> AsyncHTTPTransport:
+    """Get (or lazily create) the process-wide asyncio transport."""
+    global _default_async_transport
+    with _default_transport_lock:
+        if _default_async_transport is None:
+            _default_async_transport = AsyncHTTPTransport(
+                pool_size=int(os.getenv("APIMANAGER_POOL_SIZE", "10")),
+                idle_timeout=float(os.getenv("APIMANAGER_POOL_IDLE_TIMEOUT", "60"))
+            )
+        return _default_async_transport
+
+
+def set_default_transport(transport: Optional[HTTPTransport]) -> None:
+    """Replace the process-wide transport (None resets to a new pooled transport)."""
+    global _default_transport
+    with _default_transport_lock:
+        previous, _default_transport = _default_transport, transport
+    if previous is not None and previous is not transport:
+        previous.close()